@@ -6,7 +6,7 @@ import numpy as np
 from PIL import Image
 
 # Add project root to path
-PROJECT_ROOT = r"c:\Users\hp\aivideogen\aivideogen"
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
 if PROJECT_ROOT not in sys.path:
     sys.path.append(PROJECT_ROOT)
 
@@ -17,7 +17,11 @@ if not settings.configured:
     os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
     django.setup()
 
+import cv2
 from generator.video_engine import apply_ken_burns
+from generator.ken_burns import eval_param, base_crop_size
+
+FPS = 30
 
 def log(msg):
     sys.stderr.write(f"{msg}\n")
@@ -31,54 +35,142 @@ def create_dummy_image(path, size=(1920, 1080)):
     Image.fromarray(img_np).save(path)
     return path
 
+def legacy_make_frame_factory(image_path, duration, target_size, zoom, move, shake, shake_intensity, rotate):
+    """
+    v32.3: Pre-plan make_frame (v31.x) kept here as the baseline: string parsing,
+    eval and getenv on every frame + getAffineTransform + BGR->RGB per frame.
+    """
+    img_bgr = cv2.imread(image_path)
+    h_orig, w_orig = img_bgr.shape[:2]
+    target_w, target_h = target_size
+    z_start, z_end = (eval_param(p, 1.0) for p in zoom.split(':'))
+    move_configs = []
+    for sm in move.split('+'):
+        parts = [p.strip() for p in sm.strip().split(':') if p.strip()]
+        move_configs.append({'dir': parts[0].upper(), 'start': eval_param(parts[1], 50.0), 'end': eval_param(parts[2], 50.0)})
+    base_w, base_h = base_crop_size((w_orig, h_orig), target_size)
+
+    def make_frame(t):
+        progress = t / duration
+        current_zoom = z_start + (z_end - z_start) * progress
+        curr_w = base_w / current_zoom
+        curr_h = base_h / current_zoom
+        slack_w = w_orig - curr_w
+        slack_h = h_orig - curr_h
+        off_x = off_y = 0.0
+        for cfg in move_configs:
+            factor = (cfg['start'] + (cfg['end'] - cfg['start']) * progress - 50.0) / 50.0
+            if cfg['dir'] == 'HOR':
+                off_x = max(-slack_w/2.0, min(slack_w/2.0, factor * (slack_w / 2.0)))
+            elif cfg['dir'] == 'VER':
+                off_y = max(-slack_h/2.0, min(slack_h/2.0, factor * (slack_h / 2.0)))
+        if str(os.getenv('HUMAN_SIGNATURE_ENABLED', 'True')).lower() == 'true':
+            off_x += np.sin(t * 0.5 * 2 * np.pi) * 1.5 + np.cos(t * 1.2 * 2 * np.pi) * 0.8
+            off_y += np.cos(t * 0.7 * 2 * np.pi) * 1.2 + np.sin(t * 1.5 * 2 * np.pi) * 0.7
+        if shake:
+            amp = eval_param(shake_intensity, 5.0) * 2.0
+            off_x += np.sin(t * 12.0 * 2 * np.pi) * amp
+            off_y += np.cos(t * 12.0 * 1.5 * np.pi) * amp
+        cx = (w_orig / 2.0) + off_x
+        cy = (h_orig / 2.0) + off_y
+        angle = 0.0
+        if rotate:
+            r_parts = rotate.split(':')
+            r_start = eval_param(r_parts[0], 0.0)
+            angle += r_start + (eval_param(r_parts[1], r_start) - r_start) * progress
+        pivot = np.array([cx, cy])
+        p1 = np.array([cx - curr_w / 2, cy - curr_h / 2])
+        p2 = np.array([cx + curr_w / 2, cy - curr_h / 2])
+        p3 = np.array([cx - curr_w / 2, cy + curr_h / 2])
+        if angle != 0:
+            rad = np.radians(-angle)
+            c, s = np.cos(rad), np.sin(rad)
+            R_mat = np.array([[c, -s], [s, c]])
+            p1 = pivot + R_mat @ (p1 - pivot)
+            p2 = pivot + R_mat @ (p2 - pivot)
+            p3 = pivot + R_mat @ (p3 - pivot)
+        src_pts = np.array([p1, p2, p3], dtype=np.float32)
+        dst_pts = np.float32([[0, 0], [target_w, 0], [0, target_h]])
+        M = cv2.getAffineTransform(src_pts, dst_pts)
+        resized = cv2.warpAffine(img_bgr, M, (target_w, target_h), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_CONSTANT, borderValue=(0,0,0))
+        return cv2.cvtColor(resized, cv2.COLOR_BGR2RGB)
+
+    return make_frame
+
+def time_frames(make_frame, n_frames):
+    start = time.perf_counter()
+    for i in range(n_frames):
+        make_frame(i / FPS)
+    return n_frames / (time.perf_counter() - start)
+
 def benchmark():
     asset_path = "temp_benchmark_asset.png"
     output_path = "temp_benchmark_out.mp4"
-    
+    encode = '--encode' in sys.argv
+
     try:
         create_dummy_image(asset_path)
-        
+
         duration = 5.0
-        target_size = (1080, 1920) # Vertical generic
-        
-        log(f"--- Benchmarking apply_ken_burns ({duration}s, {target_size}) ---")
-        
-        start_time = time.time()
-        
-        # Call the function under test
-        clip = apply_ken_burns(
-            image_path=asset_path,
-            duration=duration,
-            target_size=target_size,
-            zoom="1.0:1.5",
-            move="VER"
-        )
-        
-        setup_time = time.time() - start_time
-        log(f"Setup time: {setup_time:.4f}s")
-        
-        render_start = time.time()
-        # Render to os.devnull or file
-        # Using ultrafast to isolate generation speed
-        clip.write_videofile(
-            output_path, 
-            fps=30, 
-            codec="libx264", 
-            preset="ultrafast", 
-            threads=4,
-            logger=None 
-        )
-        
-        render_time = time.time() - render_start
-        log(f"Render time: {render_time:.4f}s")
-        fps = 30 * duration / render_time
-        log(f"FPS: {fps:.2f}")
-        
+        params = dict(zoom="1.0:1.5", move="HOR:20:80 + VER:0:100", shake=True, shake_intensity="2*2", rotate="0:8")
+        n_frames = int(duration * FPS)
+
+        # Full-HD vertical (warp-bound) + a small draft size (per-frame overhead-bound)
+        for target_size in [(1080, 1920), (640, 360)]:
+            log(f"--- Benchmarking Ken Burns frame generation ({duration}s, {target_size}, {n_frames} frames) ---")
+
+            legacy = legacy_make_frame_factory(asset_path, duration, target_size, **params)
+            start_time = time.time()
+            clip = apply_ken_burns(image_path=asset_path, duration=duration, target_size=target_size, fps=FPS, **params)
+            log(f"Plan compile time: {time.time() - start_time:.4f}s")
+
+            # Warm-up (allocations, OpenCV thread pool)
+            legacy(0.0); clip.get_frame(0.0)
+
+            legacy_fps = time_frames(legacy, n_frames)
+            plan_fps = time_frames(clip.get_frame, n_frames)
+            log(f"Legacy make_frame:  {legacy_fps:8.1f} frames/s")
+            log(f"Compiled plan:      {plan_fps:8.1f} frames/s")
+            log(f"Speed-up:           {plan_fps / legacy_fps:8.2f}x")
+
+            # Geometry parity at full resolution (pyramid levels legitimately filter fine detail)
+            from django.test import override_settings
+            with override_settings(IMAGE_PYRAMID_ENABLED=False):
+                full_res = apply_ken_burns(image_path=asset_path, duration=duration, target_size=target_size, fps=FPS, **params)
+                diff = max(np.abs(legacy(t).astype(int) - full_res.get_frame(t).astype(int)).max() for t in (0.0, 1.0, 2.5, 4.9))
+            log(f"Max pixel diff vs legacy: {diff}")
+
+        if '--ffmpeg' in sys.argv:
+            # v32.6: Segment encode, MoviePy/OpenCV vs FFmpeg perspective filtergraph
+            from generator.segment_renderer import render_scene_segment
+            spec = dict(params, kind='ken_burns', image_path=os.path.abspath(asset_path), duration=duration, frames=n_frames)
+            for backend in ('opencv', 'ffmpeg'):
+                render_params = {'fps': FPS, 'codec': 'libx264', 'preset': 'ultrafast', 'threads': 1,
+                                 'ffmpeg_params': ['-pix_fmt', 'yuv420p'], 'image_backend': backend}
+                seg_start = time.time()
+                render_scene_segment(spec, output_path, (1920, 1080), render_params)
+                log(f"Segment backend {backend:7s}: {n_frames / (time.time() - seg_start):8.1f} frames/s (encode incl.)")
+
+        if encode:
+            # End-to-end: frame generation + libx264 ultrafast
+            render_start = time.time()
+            clip.write_videofile(
+                output_path,
+                fps=FPS,
+                codec="libx264",
+                preset="ultrafast",
+                threads=4,
+                logger=None
+            )
+            render_time = time.time() - render_start
+            log(f"Render time: {render_time:.4f}s")
+            log(f"FPS: {FPS * duration / render_time:.2f}")
+
     except Exception as e:
         log(f"ERROR: {e}")
         import traceback
         traceback.print_exc()
-        
+
     finally:
         if os.path.exists(asset_path):
             os.remove(asset_path)
@@ -80,6 +80,14 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.getenv('DATABASE_PATH', BASE_DIR / 'db.sqlite3'),
+        # v32.17: The web server, the render_worker supervisor and its N child renders write
+        # concurrently: WAL lets readers run during a write, and writers wait for the lock
+        # (SQLITE_TIMEOUT seconds) instead of failing with "database is locked" after 5s.
+        'OPTIONS': {
+            'timeout': int(os.getenv('SQLITE_TIMEOUT', 30)),
+            'init_command': 'PRAGMA journal_mode=WAL;',
+            'transaction_mode': 'IMMEDIATE',
+        },
     }
 }
 
@@ -153,6 +161,65 @@ AUDIO_BLOCK_FADE = float(os.getenv('AUDIO_BLOCK_FADE', 1.0))
 AUDIO_MERGE_THRESHOLD = float(os.getenv('AUDIO_MERGE_THRESHOLD', 1.5))
 # v19.5: Early finish time for audio blocks (avoids abrupt cuts)
 AUDIO_EARLY_FINISH = float(os.getenv('AUDIO_EARLY_FINISH', 0.1))
+# v32.9: Offline soundtrack mixdown to a WAV stem before the video encode
+AUDIO_MIXDOWN_ENABLED = os.getenv('AUDIO_MIXDOWN_ENABLED', 'True').lower() == 'true'
+AUDIO_MIXDOWN_KEEP_STEM = os.getenv('AUDIO_MIXDOWN_KEEP_STEM', 'False').lower() == 'true'
+
+# v32.10: Concurrent TTS requests (all scenes share one event loop) and retries per request
+TTS_CONCURRENCY = int(os.getenv('TTS_CONCURRENCY', 6))
+TTS_MAX_RETRIES = int(os.getenv('TTS_MAX_RETRIES', 3))
+# v32.11: Persistent TTS cache (MEDIA_ROOT/cache/tts, audio + word-timing sidecar)
+TTS_CACHE_ENABLED = os.getenv('TTS_CACHE_ENABLED', 'True').lower() == 'true'
+TTS_CACHE_MAX_MB = float(os.getenv('TTS_CACHE_MAX_MB', 1024))
+# v32.13: Persistent media probe cache (duration / streams / audio health per file version)
+MEDIA_PROBE_CACHE_ENABLED = os.getenv('MEDIA_PROBE_CACHE_ENABLED', 'True').lower() == 'true'
+MEDIA_PROBE_CACHE_MAX_MB = float(os.getenv('MEDIA_PROBE_CACHE_MAX_MB', 16))
+
+# v32.0: Parallel segment rendering (0 = CPU count - 1)
+RENDER_SEGMENT_WORKERS = int(os.getenv('RENDER_SEGMENT_WORKERS', 0))
+# v32.6: Pixel backend for plain image scenes in segment mode: 'opencv' (MoviePy + warpAffine)
+# or 'ffmpeg' (perspective filtergraph, no Python frame loop)
+RENDER_IMAGE_BACKEND = os.getenv('RENDER_IMAGE_BACKEND', 'opencv').lower()
+# v32.1: Content-addressed scene segment cache (MEDIA_ROOT/cache/scenes)
+SCENE_CACHE_ENABLED = os.getenv('SCENE_CACHE_ENABLED', 'True').lower() == 'true'
+SCENE_CACHE_MAX_MB = float(os.getenv('SCENE_CACHE_MAX_MB', 4096))
+# v32.4: Ken Burns source pyramid (MEDIA_ROOT/cache/pyramid)
+IMAGE_PYRAMID_ENABLED = os.getenv('IMAGE_PYRAMID_ENABLED', 'True').lower() == 'true'
+IMAGE_PYRAMID_MAX_MB = float(os.getenv('IMAGE_PYRAMID_MAX_MB', 4096))
+# v32.5: In-memory decoded image LRU shared by all scenes of a process
+DECODED_IMAGE_CACHE_MB = float(os.getenv('DECODED_IMAGE_CACHE_MB', 1024))
+# v32.19: Asset preparation (probe, pyramid, lip-sync) overlapped with TTS
+ASSET_PREFETCH_ENABLED = os.getenv('ASSET_PREFETCH_ENABLED', 'True').lower() == 'true'
+ASSET_PREFETCH_WORKERS = int(os.getenv('ASSET_PREFETCH_WORKERS', 2))
+# v32.22: Draft render profile (short side in px, frame rate, x264 CRF; soft subtitles)
+RENDER_DRAFT_HEIGHT = int(os.getenv('RENDER_DRAFT_HEIGHT', 540))
+RENDER_DRAFT_FPS = int(os.getenv('RENDER_DRAFT_FPS', 15))
+RENDER_DRAFT_CRF = int(os.getenv('RENDER_DRAFT_CRF', 30))
+# v32.22: Local lip-sync outputs cached by asset + voice content (MEDIA_ROOT/cache/lipsync)
+LIPSYNC_CACHE_ENABLED = os.getenv('LIPSYNC_CACHE_ENABLED', 'True').lower() == 'true'
+LIPSYNC_CACHE_MAX_MB = float(os.getenv('LIPSYNC_CACHE_MAX_MB', 2048))
+# v32.23: Single-scene previews from the editor (short side in px, fps, MEDIA_ROOT/cache/previews)
+SCENE_PREVIEW_HEIGHT = int(os.getenv('SCENE_PREVIEW_HEIGHT', 360))
+SCENE_PREVIEW_FPS = int(os.getenv('SCENE_PREVIEW_FPS', 15))
+SCENE_PREVIEW_CACHE_MAX_MB = float(os.getenv('SCENE_PREVIEW_CACHE_MAX_MB', 256))
+# v32.24: Single frames / storyboards for timeline scrubbing (MEDIA_ROOT/cache/frames)
+FRAME_CACHE_MAX_MB = float(os.getenv('FRAME_CACHE_MAX_MB', 256))
+
+# v32.17: Persistent render queue (RenderJob rows consumed by `manage.py render_worker`)
+RENDER_QUEUE_ENABLED = os.getenv('RENDER_QUEUE_ENABLED', 'True').lower() == 'true'
+# v32.18: 0 = as many renders as fit the CPU / RAM budget (0 = all cores / 75% of physical RAM)
+RENDER_WORKER_CONCURRENCY = int(os.getenv('RENDER_WORKER_CONCURRENCY', 0))
+RENDER_JOB_MAX_ATTEMPTS = int(os.getenv('RENDER_JOB_MAX_ATTEMPTS', 2))
+RENDER_CPU_BUDGET = float(os.getenv('RENDER_CPU_BUDGET', 0))
+RENDER_RAM_BUDGET_MB = int(os.getenv('RENDER_RAM_BUDGET_MB', 0))
+# v32.17: Renders run in worker processes, so progress / status / cancel keys need a
+# cache shared across processes (the default LocMemCache is per process)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(MEDIA_ROOT, 'cache', 'django'),
+    }
+}
 
 # File upload limits
 DATA_UPLOAD_MAX_NUMBER_FILES = 1000  # Maximum number of files that can be uploaded at once
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Asset, Music, VideoProject, YouTubeToken
+from .models import Asset, Music, VideoProject, YouTubeToken, RenderJob
 
 @admin.register(Asset)
 class AssetAdmin(admin.ModelAdmin):
@@ -17,3 +17,8 @@ class VideoProjectAdmin(admin.ModelAdmin):
 @admin.register(YouTubeToken)
 class YouTubeTokenAdmin(admin.ModelAdmin):
     list_display = ('updated_at',)
+
+@admin.register(RenderJob)
+class RenderJobAdmin(admin.ModelAdmin):
+    list_display = ('project', 'status', 'priority', 'source', 'attempts', 'worker', 'created_at')
+    list_filter = ('status', 'source')
@@ -0,0 +1,146 @@
+"""
+v32.14: Asset Filename Index
+Resolving a relative asset name used to probe every search directory x extension with
+os.path.isfile and, on a miss, os.walk the whole asset library comparing lowercased
+names, once per scene (and again in the Auto-Dubbing pre-check). Each media directory
+(assets, videos, uploads, outputs, music) is now walked ONCE per process into:
+- top   : normcase(name) -> path for files directly in the directory (the old probes)
+- exact / lower / stem : name, name.lower(), stem.lower() -> path for the whole tree
+Freshness comes from directory mtimes (adding, removing or renaming a file bumps its
+parent's mtime): they are re-stat'ed at most every RECHECK_SECONDS, always after a
+miss, and a stale hit (file gone) rebuilds that directory and retries.
+"""
+
+import os
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Minimum seconds between two freshness checks of the same directory on hits
+RECHECK_SECONDS = 2.0
+
+
+class _DirIndex:
+    __slots__ = ('root', 'top', 'exact', 'lower', 'stem', 'dir_mtimes', 'checked_at', 'lock')
+
+    def __init__(self, root):
+        self.root = root
+        self.lock = threading.Lock()
+        self._build()
+
+    def _build(self):
+        start = time.time()
+        top, exact, lower, stem, dir_mtimes = {}, {}, {}, {}, {}
+        if not os.path.isdir(self.root):
+            dir_mtimes[self.root] = None  # Created later -> stale on the next check
+        for dirpath, _dirs, files in os.walk(self.root):
+            try:
+                dir_mtimes[dirpath] = os.stat(dirpath).st_mtime_ns
+            except OSError:
+                continue
+            at_top = dirpath == self.root
+            for name in files:
+                path = os.path.join(dirpath, name)
+                if at_top:
+                    top[os.path.normcase(name)] = path
+                # First occurrence wins (walk order, like the old deep search)
+                exact.setdefault(name, path)
+                lower.setdefault(name.lower(), path)
+                stem.setdefault(os.path.splitext(name)[0].lower(), path)
+        self.top, self.exact, self.lower, self.stem = top, exact, lower, stem
+        self.dir_mtimes = dir_mtimes
+        self.checked_at = time.time()
+        elapsed = time.time() - start
+        if exact or elapsed > 0.5:
+            logger.info(f"🗂️ [AssetIndex] {os.path.basename(self.root) or self.root}: {len(exact)} archivos indexados en {elapsed:.2f}s")
+
+    def _is_fresh(self):
+        for dirpath, mtime in self.dir_mtimes.items():
+            try:
+                if os.stat(dirpath).st_mtime_ns != mtime:
+                    return False
+            except OSError:
+                if mtime is not None:
+                    return False
+        return True
+
+    def refresh(self, force=False):
+        """Rebuilds if a directory changed. Cheap: one stat per directory, throttled unless forced."""
+        with self.lock:
+            if not force and time.time() - self.checked_at < RECHECK_SECONDS:
+                return
+            if self._is_fresh():
+                self.checked_at = time.time()
+            else:
+                self._build()
+
+    def find_top(self, name, extensions=()):
+        for candidate in [name] + [name + ext for ext in extensions]:
+            path = self.top.get(os.path.normcase(candidate))
+            if path:
+                return path
+        return None
+
+    def find_deep(self, name):
+        """Old v20.7 deep scan order: exact name, then case-insensitive name or stem."""
+        key = name.lower()
+        return self.exact.get(name) or self.lower.get(key) or self.stem.get(key)
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def _get_index(root):
+    root = os.path.normpath(os.path.abspath(root))
+    with _indexes_lock:
+        index = _indexes.get(root)
+        if index is None:
+            index = _indexes[root] = _DirIndex(root)
+            return index
+    index.refresh()
+    return index
+
+
+def _lookup(name, dirs, extensions, deep_dirs):
+    for d in dirs:
+        path = _get_index(d).find_top(name, extensions)
+        if path:
+            return path
+    for d in deep_dirs:
+        path = _get_index(d).find_deep(name)
+        if path:
+            return path
+    return None
+
+
+def resolve_asset(name, dirs, extensions=(), deep_dirs=()):
+    """
+    v32.14: Same answer as probing os.path.join(d, name[+ext]) for d in dirs, then a
+    recursive name / lowercase / stem search of deep_dirs, without touching the disk
+    (beyond the freshness stats). Returns the path or None.
+    """
+    if not name:
+        return None
+    if os.sep in name or (os.altsep and os.altsep in name):
+        # Sub-path: direct probes (the index only keys bare file names)
+        for d in dirs:
+            for candidate in [name] + [name + ext for ext in extensions]:
+                test_path = os.path.join(d, candidate)
+                if os.path.isfile(test_path):
+                    return test_path
+        name = os.path.basename(name)
+        dirs = ()
+
+    path = _lookup(name, dirs, extensions, deep_dirs)
+    if path and os.path.isfile(path):
+        return path
+
+    # Miss or stale hit: re-check every involved directory now, then retry once
+    for d in set(dirs) | set(deep_dirs):
+        _get_index(d).refresh(force=True)
+    path = _lookup(name, dirs, extensions, deep_dirs)
+    return path if path and os.path.isfile(path) else None
+
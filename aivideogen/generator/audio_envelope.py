@@ -0,0 +1,149 @@
+"""
+v32.8: Precomputed Music Gain Envelope
+Ducking used to loop over every voice interval and build boolean masks for every audio
+chunk MoviePy requested: O(intervals x samples), recomputed per chunk. The whole music
+gain curve (attack/release ducking, block fades, early finish, per-block volume, mutes
+for local music) is now rendered ONCE into a float32 array at a control rate
+(CONTROL_RATE, 1 kHz) and applying it is an interpolated lookup + multiply.
+
+Each interval only touches its own slice of the array, so building is O(duration) no
+matter how many narration intervals an hour-long video has.
+"""
+
+import math
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Control points per second. Ramps are linear, so 1 ms resolution is inaudible.
+CONTROL_RATE = 1000
+
+
+class GainEnvelope:
+    """
+    v32.8: Piecewise-linear gain curve sampled at `rate` points per second.
+    Builders mutate in place and return self so they can be chained:
+        GainEnvelope(dur).duck(iv, 0.2, 0.15, 0.4).fade_blocks([(0, dur)], 1.0, 0.1).scale(0.18)
+    """
+
+    __slots__ = ('duration', 'rate', 'values')
+
+    def __init__(self, duration, rate=CONTROL_RATE, value=1.0):
+        self.duration = max(0.0, float(duration))
+        self.rate = int(rate)
+        # +2: the last time stamp is covered and interpolation always has a right neighbour
+        n = int(math.ceil(self.duration * self.rate)) + 2
+        self.values = np.full(n, float(value), dtype=np.float32)
+
+    # ─── Slicing helpers ───────────────────────────────────────────────
+    def _span(self, start, end):
+        """Grid indices [i0, i1) with start <= i/rate <= end, plus their time stamps."""
+        i0 = max(0, int(math.ceil(start * self.rate)))
+        i1 = min(len(self.values), int(math.floor(end * self.rate)) + 1)
+        if i1 <= i0:
+            return None, None
+        return slice(i0, i1), np.arange(i0, i1, dtype=np.float64) / self.rate
+
+    # ─── Builders ──────────────────────────────────────────────────────
+    def duck(self, intervals, ratio, attack, release):
+        """
+        Sidechain-style ducking (same curve as the v4.8 / v19.0 mask loops):
+        ramp down over `attack` before each voice interval, hold `ratio` while the
+        voice is active, ramp back up over `release`. Overlapping ramps keep the minimum.
+        """
+        ratio = float(ratio)
+        v = self.values
+        for vs, ve in intervals:
+            if attack > 0:
+                sl, t = self._span(vs - attack, vs)
+                if sl is not None:
+                    p = (t - (vs - attack)) / attack
+                    np.minimum(v[sl], 1.0 - p * (1.0 - ratio), out=v[sl])
+            if release > 0:
+                sl, t = self._span(ve, ve + release)
+                if sl is not None:
+                    p = (t - ve) / release
+                    np.minimum(v[sl], ratio + p * (1.0 - ratio), out=v[sl])
+            sl, _ = self._span(vs, ve)
+            if sl is not None:
+                v[sl] = ratio
+        return self
+
+    def fade_blocks(self, ranges, fade, early_finish):
+        """Per-block fade-in, fade-out ending `early_finish` seconds before the block end, then silence."""
+        if fade <= 0:
+            return self
+        v = self.values
+        for b_start, b_end in ranges:
+            sl, t = self._span(b_start, b_start + fade)
+            if sl is not None:
+                v[sl] *= (t - b_start) / fade
+            cut = b_end - early_finish
+            sl, t = self._span(cut - fade, cut)
+            if sl is not None:
+                v[sl] *= np.clip((cut - t) / fade, 0.0, 1.0)
+            sl, _ = self._span(cut + 1.0 / self.rate, b_end)
+            if sl is not None:
+                v[sl] = 0.0
+        return self
+
+    def scale(self, gain):
+        self.values *= float(gain)
+        return self
+
+    def scale_ranges(self, ranges, default):
+        """Multiplies by a step volume map: `default` outside, `vol` inside each (start, end, vol)."""
+        base = np.full(len(self.values), float(default), dtype=np.float32)
+        for start, end, vol in ranges:
+            sl, _ = self._span(start, end)
+            if sl is not None:
+                base[sl] = vol
+        self.values *= base
+        return self
+
+    def mute(self, intervals):
+        for start, end in intervals:
+            sl, _ = self._span(start, end)
+            if sl is not None:
+                self.values[sl] = 0.0
+        return self
+
+    # ─── Lookup ────────────────────────────────────────────────────────
+    def gains(self, t):
+        """Gain at time(s) t (scalar or array), linearly interpolated between control points."""
+        v = self.values
+        x = np.clip(np.asarray(t, dtype=np.float64) * self.rate, 0.0, len(v) - 1.0)
+        i = np.minimum(x.astype(np.int64), len(v) - 2)
+        g = v[i] + (v[i + 1] - v[i]) * (x - i)
+        return float(g) if g.ndim == 0 else g
+
+    def apply(self, get_frame, t):
+        """clip.transform() callback: multiplies the audio chunk by the envelope."""
+        audio = get_frame(t)
+        g = self.gains(t)
+        if isinstance(g, float):
+            return audio * g
+        return audio * g[:, None]
+
+
+def block_ducking_envelope(duration, intervals, volume, ratio, attack, release, fade, early_finish):
+    """v32.8: Envelope for block-local music (v19.0 inline ducking)."""
+    return (GainEnvelope(duration)
+            .duck(intervals, ratio, attack, release)
+            .fade_blocks([(0.0, duration)], fade, early_finish)
+            .scale(volume))
+
+
+def global_ducking_envelope(duration, intervals, ratio, attack, release, block_ranges, default_volume,
+                            fade, early_finish, mute_intervals):
+    """
+    v32.8: Envelope for the continuous global track (v20.2 master console).
+    block_ranges: [(start, end, volume)] in absolute time; mute_intervals silence blocks with local music.
+    """
+    return (GainEnvelope(duration)
+            .duck(intervals, ratio, attack, release)
+            .fade_blocks([(s, e) for s, e, _ in block_ranges], fade, early_finish)
+            .scale_ranges(block_ranges, default_volume)
+            .mute(mute_intervals))
@@ -0,0 +1,104 @@
+"""
+v32.9: Offline Soundtrack Mixdown
+The soundtrack used to be a lazy tree (CompositeAudioClip / AudioLoop / transforms over
+many AudioFileClip readers) pulled chunk by chunk during write_videofile, interleaved with
+video frames. It is now rendered to ONE PCM WAV stem before the video encode:
+- Dialogue tree (voice, SFX, video-asset audio, block-local music) is pulled in large
+  blocks instead of MoviePy's 2000-sample chunks.
+- Music beds are decoded to PCM once with FFmpeg, looped by index and multiplied by their
+  precomputed gain envelope (v32.8).
+The encoders then just mux the stem. Audio bugs can be reproduced by listening to the
+stem alone (kept when AUDIO_MIXDOWN_KEEP_STEM=True).
+"""
+
+import os
+import time
+import wave
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MIX_FPS = 44100
+# Stays below the FFMPEG_AudioReader buffer (200k samples) so readers never re-seek mid-block
+BLOCK_SECONDS = 2.0
+
+
+def decode_pcm(path, fps=MIX_FPS, nchannels=2):
+    """Whole file as float32 (n, nchannels) in [-1, 1] via one FFmpeg call. None on failure."""
+    from .segment_renderer import get_ffmpeg_exe
+    from .cancellation import run
+    cmd = [get_ffmpeg_exe(), '-v', 'error', '-i', path, '-vn', '-f', 's16le', '-acodec', 'pcm_s16le',
+           '-ac', str(nchannels), '-ar', str(fps), 'pipe:1']
+    try:
+        result = run(cmd, capture_output=True, check=True)
+    except Exception as e:
+        logger.warning(f"⚠️ [Mixdown] No se pudo decodificar {os.path.basename(path)}: {e}")
+        return None
+    pcm = np.frombuffer(result.stdout, dtype=np.int16).reshape(-1, nchannels)
+    if not len(pcm):
+        return None
+    return pcm.astype(np.float32) / 32768.0
+
+
+def _as_stereo(frames, n):
+    frames = np.asarray(frames, dtype=np.float32)
+    if frames.ndim == 1:
+        frames = frames[:, None]
+    if frames.shape[1] == 1:
+        frames = np.repeat(frames, 2, axis=1)
+    return frames[:n, :2]
+
+
+def mixdown_soundtrack(dialogue_audio, duration, output_path, beds=(), fps=MIX_FPS, log=None):
+    """
+    v32.9: Renders the final soundtrack to a 16-bit stereo WAV.
+    - dialogue_audio: MoviePy AudioClip (or None) with everything except the global music.
+    - beds: [(music_path, GainEnvelope)] looped from t=0 for the whole duration.
+    Returns output_path, or None so the caller keeps the lazy audio tree.
+    """
+    log = log or logger.info
+    start = time.time()
+    n_total = int(duration * fps)
+    if n_total <= 0:
+        return None
+
+    decoded = []
+    for path, envelope in beds:
+        pcm = decode_pcm(path, fps)
+        if pcm is None:
+            return None
+        decoded.append((pcm, envelope))
+
+    from .cancellation import current_token
+    token = current_token()
+    block = int(BLOCK_SECONDS * fps)
+    tmp_path = output_path + '.part'
+    try:
+        with wave.open(tmp_path, 'wb') as wav:
+            wav.setnchannels(2)
+            wav.setsampwidth(2)
+            wav.setframerate(fps)
+            for i0 in range(0, n_total, block):
+                if token:
+                    token.raise_if_cancelled()
+                idx = np.arange(i0, min(i0 + block, n_total))
+                t = idx / fps
+                if dialogue_audio is not None:
+                    mix = _as_stereo(dialogue_audio.get_frame(t), len(idx)).copy()
+                else:
+                    mix = np.zeros((len(idx), 2), dtype=np.float32)
+                for pcm, envelope in decoded:
+                    mix += pcm[idx % len(pcm)] * envelope.gains(t)[:, None].astype(np.float32)
+                np.clip(mix, -1.0, 1.0, out=mix)
+                wav.writeframes((mix * 32767).astype('<i2').tobytes())
+        os.replace(tmp_path, output_path)
+    except Exception as e:
+        log(f"⚠️ [Mixdown] Error generando la pista de audio: {e}. Se usa la mezcla en línea.")
+        try: os.remove(tmp_path)
+        except OSError: pass
+        return None
+
+    log(f"🔊 [Mixdown] Pista maestra {duration:.1f}s ({len(decoded)} base(s) musical(es)) en {time.time() - start:.1f}s")
+    return output_path
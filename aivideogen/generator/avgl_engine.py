@@ -3,9 +3,7 @@ import asyncio
 import random
 import json
 import re
-import time
 from django.conf import settings
-from moviepy import AudioFileClip, concatenate_audioclips, AudioClip
 import numpy as np
 
 def safe_float(val, default=0.0):
@@ -38,6 +36,11 @@ ACTIONS_CONFIG = {
 }
 
 class AVGLAsset:
+    # v32.20: Fixed attribute sets (no per-instance __dict__; thousands of nodes on long scripts)
+    __slots__ = ('type', 'zoom', 'move', 'overlay', 'fit', 'shake', 'rotate', 'shake_intensity', 'w_rotate',
+                 'video_volume', 'fast_assembly', 'cinema_mode', 'start_time', 'end_time', 'human_signature',
+                 'human_amplitude')
+
     def __init__(self, asset_type, zoom=None, move=None, overlay=None, fit=False, shake=False, rotate=None, shake_intensity=5, w_rotate=None, video_volume=None, fast_assembly=False, cinema_mode=False, start_time=0.0, end_time=None, human_signature=None, human_amplitude=1.0):
         self.type = asset_type
         self.zoom = zoom
@@ -57,12 +60,18 @@ class AVGLAsset:
         self.human_amplitude = safe_float(human_amplitude, 1.0)
 
 class AVGLSFX:
+    __slots__ = ('type', 'volume', 'offset')
+
     def __init__(self, sfx_type, volume=0.5, offset=0):
         self.type = sfx_type
         self.volume = volume
         self.offset = offset
 
 class AVGLScene:
+    __slots__ = ('title', 'text', 'voice', 'audio', 'speed', 'pitch', 'assets', 'sfx', 'pause', 'subtitle',
+                 'subtitles', 'voice_intervals', 'word_timings', 'group_id', 'group_settings', 'duration',
+                 'force_duration', 'lipsync', 'language', 'dubbing_mode', 'silent')
+
     def __init__(self, title):
         self.title = title
         self.text = ""
@@ -88,13 +97,20 @@ class AVGLScene:
         self.silent = False # v28.0: Mute mode (Subtitles without TTS)
 
 class AVGLBlock:
+    __slots__ = ('title', 'scenes', 'music', 'volume', 'voice', 'voice_speed')
+
     def __init__(self, title, music=None, volume=0.2):
         self.title = title
         self.scenes = []
         self.music = music
         self.volume = volume
+        self.voice = None
+        self.voice_speed = None
 
 class AVGLScript:
+    __slots__ = ('title', 'blocks', 'voice', 'speed', 'style', 'background_music', 'music_volume',
+                 'fuentes', 'tags', 'hashtags', 'music_volume_lock', 'settings')
+
     def __init__(self, title):
         self.title = title
         self.blocks = []
@@ -639,14 +655,159 @@ def wrap_ssml(text, voice, speed="+0%", pitch=None):
 # ═══════════════════════════════════════════════════════════════════
 
 
-async def generate_audio_edge(text, output_path, voice="es-DO-EmilioNeural", rate="+0%", pitch="+0Hz", scene=None):
+def _tts_settings():
+    """v32.10: (concurrency, retries) for TTS requests."""
+    return (max(1, int(getattr(settings, 'TTS_CONCURRENCY', 6))),
+            max(1, int(getattr(settings, 'TTS_MAX_RETRIES', 3))))
+
+
+async def _with_retries(make_attempt, semaphore=None, retries=3, label="TTS"):
     """
-    Robust Segmented Engine (v17.3)
-    Splits by [PAUSA:X.X] AND Emotions [TAG]...[/TAG].
-    Since edge-tts escapes SSML, we must physically split audio and join it.
+    v32.10: Runs make_attempt() (a coroutine factory) under the shared semaphore with
+    exponential backoff + jitter. Returns its result or raises the last error.
+    """
+    last_error = None
+    for attempt in range(retries):
+        try:
+            if semaphore is not None:
+                async with semaphore:
+                    return await make_attempt()
+            return await make_attempt()
+        except Exception as e:
+            last_error = e
+            if attempt < retries - 1:
+                delay = (2 ** attempt) + random.uniform(0, 0.5)
+                print(f"⚠️ [{label}] Intento {attempt + 1}/{retries} fallido ({e}). Reintentando en {delay:.1f}s")
+                await asyncio.sleep(delay)
+    raise last_error
+
+
+# v32.12: edge-tts streams 24 kHz mono MP3; segments are decoded to PCM at this rate
+TTS_PCM_RATE = 24000
+
+
+async def _stream_edge_segment(text, voice, rate, pitch):
+    """
+    v32.10: Streams one segment. Returns (mp3_bytes, word_timings, last_word_end) with
+    times relative to the segment start.
+    v32.12: Audio stays in memory (no temp_segments file).
     """
     import edge_tts
-    
+    communicate = edge_tts.Communicate(text, voice, rate=rate, pitch=pitch)
+    audio = bytearray()
+    words = []
+    last_word_end = 0.0
+    async for event in communicate.stream():
+        e_type = event.get("type", "").lower()
+        if e_type == "audio":
+            audio.extend(event["data"])
+        elif e_type in ["wordboundary", "word_boundary"]:
+            start_s = event["offset"] / 10_000_000
+            end_s = start_s + event["duration"] / 10_000_000
+            last_word_end = max(last_word_end, end_s)
+            words.append({"start": start_s, "end": end_s, "word": event["text"]})
+        elif e_type in ["sentenceboundary", "sentence_boundary"]:
+            # Fallback: Interpolate words if no WordBoundaries are emitted
+            s_start_s = event["offset"] / 10_000_000
+            if not any(wt['start'] >= s_start_s for wt in words):
+                s_words = event.get("text", "").split()
+                if s_words:
+                    s_dur_s = event["duration"] / 10_000_000
+                    w_dur = s_dur_s / len(s_words)
+                    last_word_end = max(last_word_end, s_start_s + s_dur_s)
+                    for idx, word in enumerate(s_words):
+                        words.append({
+                            "start": s_start_s + (idx * w_dur),
+                            "end": s_start_s + ((idx + 1) * w_dur),
+                            "word": word
+                        })
+    if not audio:
+        raise IOError("edge-tts no devolvió audio")
+    return bytes(audio), words, last_word_end
+
+
+def _decode_to_pcm(data, fps=TTS_PCM_RATE):
+    """v32.12: Compressed audio bytes -> mono int16 PCM through one FFmpeg pipe (no temp files)."""
+    import subprocess
+    from .segment_renderer import get_ffmpeg_exe
+    result = subprocess.run(
+        [get_ffmpeg_exe(), '-v', 'error', '-i', 'pipe:0', '-f', 's16le', '-acodec', 'pcm_s16le',
+         '-ac', '1', '-ar', str(fps), 'pipe:1'],
+        input=data, capture_output=True, check=True
+    )
+    pcm = np.frombuffer(result.stdout, dtype=np.int16)
+    if not len(pcm):
+        raise IOError("segmento de audio vacío")
+    return pcm
+
+
+def _clean_tts_text(text):
+    """v17.3: Clean all visual tags before TTS."""
+    clean = re.sub(r'(?i)\[(ZOOM|MOVE|FIT|AUDIO|SFX|PAN|VOICE|PITCH|TITLE|INSTRUCCIÓN|INSTRUCTION|SUB).*?\]', '', text)
+    clean = re.sub(r'\[.*?\]', '', clean) # Residuals
+    clean = re.sub(r'\(.*?\)', '', clean) # Comments
+    return clean.strip()
+
+
+def _assemble_edge_segments(segments, output_path, fps=TTS_PCM_RATE):
+    """
+    v32.10: Joins the synthesized segments IN SCRIPT ORDER (blocking, runs in a thread).
+    segments: [('pause', seconds) | ('text', pcm, words, last_word_end)]
+    Word timings and voice intervals are rebuilt here, so concurrent synthesis cannot reorder them.
+    v32.12: Pure NumPy (silence = zeros, trims by sample index), written once as a WAV.
+    Returns (word_timings, voice_intervals, duration), or None if nothing could be assembled.
+    """
+    import wave
+    buffers = []
+    voice_intervals = []
+    word_timings = []
+    n_samples = 0
+    for seg in segments:
+        if seg[0] == 'pause':
+            silence = np.zeros(int(round(seg[1] * fps)), dtype=np.int16)
+            buffers.append(silence)
+            n_samples += len(silence)
+            continue
+
+        _, pcm, words, last_word_end = seg
+        current_time = n_samples / fps
+
+        # v26.8 FINETUNING: Recorte Exacto basado en Timestamps
+        # En lugar de adivinar el padding, usamos el último timestamp real.
+        # ELIMINADO EL MARGEN 0.1s para reducir desfase.
+        if last_word_end > 0:
+            pcm = pcm[:max(1, int(round(last_word_end * fps)))]
+        duration = len(pcm) / fps
+
+        # v26.10: Auto-Calibration for Speed/Sync Drift
+        # If audio is faster than TTS timestamps (common with rate changes),
+        # we scale the word timings to match the actual audio duration.
+        scale_factor = 1.0
+        if last_word_end > 0 and duration < (last_word_end - 0.02):
+            scale_factor = duration / last_word_end
+        for wt in words:
+            word_timings.append({
+                "start": current_time + wt['start'] * scale_factor,
+                "end": current_time + wt['end'] * scale_factor,
+                "word": wt['word']
+            })
+
+        voice_intervals.append((current_time, current_time + duration))
+        buffers.append(pcm)
+        n_samples += len(pcm)
+
+    if not voice_intervals:
+        return None
+    with wave.open(output_path, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(fps)
+        wav.writeframes(np.concatenate(buffers).astype('<i2').tobytes())
+    return word_timings, voice_intervals, n_samples / fps
+
+
+def edge_segments(text):
+    """v17.3: Splits a scene text into ('pause', seconds, {}) / ('text', text, emotion settings) segments."""
     emotions_map = {
         'TENSO': {'pitch': '-2Hz', 'rate': '-5%'},
         'EPICO': {'pitch': '+5Hz', 'rate': '+10%'},
@@ -691,148 +852,211 @@ async def generate_audio_edge(text, output_path, voice="es-DO-EmilioNeural", rat
         if clean_text:
             segments.append(('text', clean_text, {}))
 
+    return segments
+
+
+def edge_tts_plan(segments, rate="+0%", pitch="+0Hz"):
+    """v32.11: JSON-serializable request plan of the segments (what the TTS cache key covers)."""
+    plan = []
+    for tag, val, settings_emo in segments:
+        if tag == 'pause':
+            plan.append(('pause', val))
+        else:
+            plan.append(('text', _clean_tts_text(val), settings_emo.get('rate', rate), settings_emo.get('pitch', pitch)))
+    return plan
+
+
+def elevenlabs_clean_text(text):
+    clean_text = re.sub(r'<[^>]+>', '', text)
+    return re.sub(r'\[.*?\]', '', clean_text).strip()
+
+
+def tts_request_key(engine, text, voice, rate="+0%", pitch="+0Hz"):
+    """v32.21: TTS cache key a synthesis request would use (None = nothing to synthesize)."""
+    from .tts_cache import tts_cache_key
+    if engine == 'edge':
+        segments = edge_segments(text)
+        return tts_cache_key('edge', voice, edge_tts_plan(segments, rate, pitch)) if segments else None
+    clean_text = elevenlabs_clean_text(text)
+    return tts_cache_key('eleven', voice, [('text', clean_text, 'eleven_multilingual_v2')]) if clean_text else None
+
+
+def apply_project_voice(script, project):
+    """FORCE OVERRIDE: the project voice replaces the script's and the default scene voice."""
+    if project.voice_id:
+        script.voice = project.voice_id
+        for block in script.blocks:
+            for scene in block.scenes:
+                if not scene.voice or scene.voice == "es-ES-AlvaroNeural":
+                    scene.voice = project.voice_id
+
+
+def scene_target_lang(scene, project):
+    """v22.6: Scene language, else the project's, else Spanish."""
+    s_lang = getattr(scene, 'language', None)
+    target_lang = s_lang if (s_lang and s_lang.strip()) else project.language
+    return target_lang or 'es'
+
+
+def scene_tts_text(scene, engine):
+    """Narration sent to the TTS: directions in () and a leading non-emotion tag removed, emotions translated."""
+    curr_text = re.sub(r'\(.*?\)', '', scene.text).strip()
+    if curr_text.startswith('[') and not re.match(r'^\[\s*SUB', curr_text, flags=re.IGNORECASE):
+        curr_text = re.sub(r'^\[(?!(?:\s*/?SUB|TENSO|EPICO|SUSPENSO|GRITANDO|SUSURRO))[^\]]+\]\s*', '', curr_text, flags=re.IGNORECASE)
+    return translate_emotions(curr_text, use_ssml=(engine == 'eleven'))
+
+
+def edge_voice_for(scene, project, target_lang):
+    """(voice, rate, pitch, switched) of an Edge request. v22.5: Native voice when the language changes."""
+    env_rate = os.getenv("EDGE_TTS_RATE", "+0%")
+    speed_rate = f"+{int((scene.speed - 1.0) * 100)}%" if scene.speed != 1.0 else env_rate
+    eff_voice = scene.voice or project.voice_id or "es-MX-JorgeNeural"
+    switched = None
+    if target_lang == 'en' and eff_voice.startswith('es-'):
+        eff_voice = switched = "en-US-GuyNeural"
+    elif target_lang == 'es' and eff_voice.startswith('en-'):
+        eff_voice = switched = "es-MX-JorgeNeural"
+    return eff_voice, speed_rate, scene.pitch or "+0Hz", switched
+
+
+async def generate_audio_edge(text, output_path, voice="es-DO-EmilioNeural", rate="+0%", pitch="+0Hz", scene=None, semaphore=None):
+    """
+    Robust Segmented Engine (v17.3)
+    Splits by [PAUSA:X.X] AND Emotions [TAG]...[/TAG].
+    Since edge-tts escapes SSML, we must physically split audio and join it.
+    v32.10: Segments are synthesized concurrently (bounded by `semaphore`, with retries)
+    and assembled in script order off the event loop.
+    v32.12: output_path is a mono WAV built from in-memory PCM; returns its exact
+    duration in seconds (False on failure).
+    """
+    segments = edge_segments(text)
     if not segments: return False
     
-    audio_clips = []
-    temp_files = []
-    temp_dir = os.path.join(settings.MEDIA_ROOT, 'temp_segments')
-    os.makedirs(temp_dir, exist_ok=True)
-    prefix = f"seg_{int(time.time())}_{random.randint(100,999)}"
-    current_time = 0.0
-    voice_intervals = []
-    
+    # v32.11: Persistent cache keyed by the exact request plan (segment text, rate, pitch, pauses)
+    from .tts_cache import tts_cache_key, load_cached_tts, store_tts
+    cache_key = tts_cache_key('edge', voice, edge_tts_plan(segments, rate, pitch))
+    cached = load_cached_tts(cache_key, output_path, ext='.wav')
+    if cached is not None:
+        if scene:
+            scene.word_timings.extend(cached['word_timings'])
+            scene.voice_intervals = cached['voice_intervals']
+        return cached.get('duration') or True
+
+    _, retries = _tts_settings()
+
+    async def _synth(clean, seg_rate, seg_pitch):
+        data, words, last_word_end = await _with_retries(
+            lambda: _stream_edge_segment(clean, voice, seg_rate, seg_pitch),
+            semaphore=semaphore, retries=retries, label="Edge TTS"
+        )
+        # v32.12: Decoded in a worker thread, concurrently with the other requests
+        pcm = await asyncio.to_thread(_decode_to_pcm, data)
+        return ('text', pcm, words, last_word_end)
+
     try:
-        for i, (tag, val, settings_emo) in enumerate(segments):
+        # Slots keep script order; text slots are filled by concurrent tasks
+        ordered = []
+        tasks = []
+        for tag, val, settings_emo in segments:
             if tag == 'pause':
-                silence = AudioClip(lambda t: np.zeros(2), duration=val).with_fps(44100)
-                audio_clips.append(silence)
-                current_time += val
-            else:
-                seg_path = os.path.join(temp_dir, f"{prefix}_{i}.mp3")
-                temp_files.append(seg_path)
-                
-                # Combinar settings base con los de la emocion
-                seg_rate = settings_emo.get('rate', rate)
-                seg_pitch = settings_emo.get('pitch', pitch)
-                
-                # v17.3: Clean all visual tags before TTS
-                clean = re.sub(r'(?i)\[(ZOOM|MOVE|FIT|AUDIO|SFX|PAN|VOICE|PITCH|TITLE|INSTRUCCIÓN|INSTRUCTION|SUB).*?\]', '', val)
-                clean = re.sub(r'\[.*?\]', '', clean) # Residuals
-                clean = re.sub(r'\(.*?\)', '', clean) # Comments
-                clean = clean.strip()
-                
-                if not clean: continue
-
-                communicate = edge_tts.Communicate(clean, voice, rate=seg_rate, pitch=seg_pitch)
-
-                # v16.5: Stream to capture word boundaries
-                last_word_end = 0.0
-                with open(seg_path, "wb") as f:
-                    async for event in communicate.stream():
-                        e_type = event.get("type", "").lower()
-                        if e_type == "audio":
-                            f.write(event["data"])
-                        elif e_type in ["wordboundary", "word_boundary"]:
-                            if scene:
-                                start_s = event["offset"] / 10_000_000
-                                dur_s = event["duration"] / 10_000_000
-                                end_s = start_s + dur_s
-                                last_word_end = max(last_word_end, end_s)
-                                
-                                scene.word_timings.append({
-                                    "start": current_time + start_s,
-                                    "end": current_time + end_s,
-                                    "word": event["text"]
-                                })
-                        elif e_type in ["sentenceboundary", "sentence_boundary"]:
-                            # Fallback: Interpolate words if no WordBoundaries are emitted
-                            if scene and not any(wt['start'] >= current_time + (event["offset"]/10_000_000) for wt in scene.word_timings):
-                                s_text = event.get("text", "")
-                                s_words = s_text.split()
-                                if s_words:
-                                    s_start_s = event["offset"] / 10_000_000
-                                    s_dur_s = event["duration"] / 10_000_000
-                                    w_dur = s_dur_s / len(s_words)
-                                    last_word_end = max(last_word_end, s_start_s + s_dur_s)
-                                    
-                                    for idx, word in enumerate(s_words):
-                                        scene.word_timings.append({
-                                            "start": current_time + s_start_s + (idx * w_dur),
-                                            "end": current_time + s_start_s + ((idx + 1) * w_dur),
-                                            "word": word
-                                        })
-                
-                if os.path.exists(seg_path):
-                    try:
-                        clip = AudioFileClip(seg_path)
-                        
-                        # v26.8 FINETUNING: Recorte Exacto basado en Timestamps
-                        # En lugar de adivinar el padding, usamos el último timestamp real.
-                        # Si last_word_end > 0, sabemos donde termina la voz.
-                        # ELIMINADO EL MARGEN 0.1s para reducir desfase.
-                        if last_word_end > 0:
-                            # Use exact end time, no buffer
-                            new_duration = min(clip.duration, last_word_end)
-                            if new_duration < clip.duration:
-                                clip = clip.with_duration(new_duration)
-                        
-                        voice_intervals.append((current_time, current_time + clip.duration))
-                        audio_clips.append(clip)
-                        # REMOVED PREMATURE UPDATE: current_time += clip.duration
-                    except Exception as e:
-                        print(f"Error loading audio segment: {e}")
-
-                # v26.10: Auto-Calibration for Speed/Sync Drift
-                # If audio is faster than TTS timestamps (common with rate changes),
-                # we scale the word timings to match the actual audio duration.
-                # This fixes internal drift within the segment.
-                if last_word_end > 0 and audio_clips:
-                    actual_duration = audio_clips[-1].duration
-                    # Tolerance: Only scale if mismatch is significant (>1% or >20ms)
-                    if actual_duration < (last_word_end - 0.02): # Audio is shorter/faster
-                        scale_factor = actual_duration / last_word_end
-                        
-                        # Apply scaling to the WORDS we just added for this segment.
-                        # Since current_time hasn't been updated yet, these words start >= current_time.
-                        for wt in scene.word_timings:
-                            if wt['start'] >= current_time:
-                                # Relativize, Scale, Absolutize
-                                rel_start = wt['start'] - current_time
-                                rel_end = wt['end'] - current_time
-                                
-                                wt['start'] = current_time + (rel_start * scale_factor)
-                                wt['end'] = current_time + (rel_end * scale_factor)
-
-                if audio_clips:
-                     current_time += audio_clips[-1].duration
-
-        if audio_clips:
-            final_audio = concatenate_audioclips(audio_clips)
-            final_audio.write_audiofile(output_path, logger=None)
-            for clip in audio_clips: clip.close()
-            for f in temp_files:
-                try: os.remove(f)
-                except: pass
-            if scene:
-                scene.voice_intervals = voice_intervals
-            return True
-        return False
+                ordered.append(('pause', val))
+                continue
+
+            # Combinar settings base con los de la emocion
+            seg_rate = settings_emo.get('rate', rate)
+            seg_pitch = settings_emo.get('pitch', pitch)
+
+            clean = _clean_tts_text(val)
+            if not clean: continue
+
+            task = asyncio.ensure_future(_synth(clean, seg_rate, seg_pitch))
+            tasks.append(task)
+            ordered.append(task)
+
+        # return_exceptions: every request finishes before a failure is reported (no orphan tasks)
+        for result in await asyncio.gather(*tasks, return_exceptions=True):
+            if isinstance(result, BaseException):
+                raise result
+        resolved = [s.result() if isinstance(s, asyncio.Future) else s for s in ordered]
+
+        assembled = await asyncio.to_thread(_assemble_edge_segments, resolved, output_path)
+        if assembled is None:
+            return False
+        word_timings, voice_intervals, duration = assembled
+        if scene:
+            scene.word_timings.extend(word_timings)
+            scene.voice_intervals = voice_intervals
+        await asyncio.to_thread(store_tts, cache_key, output_path, word_timings, voice_intervals, duration, '.wav')
+        return duration
     except Exception as e:
         print(f"❌ Error Audio v5.2: {e}")
         return False
 
-async def generate_audio_elevenlabs(text, output_path, voice_id, api_key):
+
+def _elevenlabs_save(text, output_path, voice_id, api_key):
     from elevenlabs.client import ElevenLabs
     from elevenlabs import save
+    client = ElevenLabs(api_key=api_key)
+    audio_gen = client.text_to_speech.convert(text=text, voice_id=voice_id, model_id="eleven_multilingual_v2")
+    save(audio_gen, output_path)
+
+
+async def generate_audio_elevenlabs(text, output_path, voice_id, api_key, semaphore=None):
+    """v32.10: The blocking SDK call + save() run in a worker thread, bounded and retried."""
     try:
-        clean_text = re.sub(r'<[^>]+>', '', text)
-        clean_text = re.sub(r'\[.*?\]', '', clean_text).strip()
-        client = ElevenLabs(api_key=api_key)
-        audio_gen = client.text_to_speech.convert(text=clean_text, voice_id=voice_id, model_id="eleven_multilingual_v2")
-        save(audio_gen, output_path)
+        clean_text = elevenlabs_clean_text(text)
+        # v32.11: Persistent TTS cache (no word timings for this engine)
+        from .tts_cache import tts_cache_key, load_cached_tts, store_tts
+        cache_key = tts_cache_key('eleven', voice_id, [('text', clean_text, 'eleven_multilingual_v2')])
+        if load_cached_tts(cache_key, output_path) is not None:
+            return True
+        _, retries = _tts_settings()
+        await _with_retries(
+            lambda: asyncio.to_thread(_elevenlabs_save, clean_text, output_path, voice_id, api_key),
+            semaphore=semaphore, retries=retries, label="ElevenLabs"
+        )
+        await asyncio.to_thread(store_tts, cache_key, output_path)
         return True
     except: return False
 
+
+async def _synthesize_jobs(jobs, engine, concurrency, on_done=None):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _one(job):
+        if engine == 'edge':
+            result = await generate_audio_edge(job['text'], job['path'], job['voice'], job['rate'],
+                                               pitch=job['pitch'], scene=job['scene'], semaphore=semaphore)
+        else:
+            result = await generate_audio_elevenlabs(job['text'], job['path'], job['voice'], job['api_key'], semaphore=semaphore)
+        if on_done and result:
+            # v32.19: Lets the next stage start on this scene while the others are in flight
+            try: on_done(job, result)
+            except Exception as e: print(f"⚠️ [TTS] on_done: {e}")
+        return result
+
+    return await asyncio.gather(*[_one(job) for job in jobs])
+
+
+def synthesize_scenes(jobs, engine='edge', on_done=None):
+    """
+    v32.10: TTS for every scene on ONE event loop (instead of a fresh loop per scene).
+    jobs: [{'text', 'path', 'voice', 'rate', 'pitch', 'scene', 'api_key'}]
+    Requests are bounded by TTS_CONCURRENCY and retried TTS_MAX_RETRIES times.
+    Returns one success flag per job, in job order.
+    v32.19: on_done(job, result) is called as soon as each job succeeds (completion order).
+    """
+    if not jobs:
+        return []
+    concurrency, _ = _tts_settings()
+    loop = asyncio.new_event_loop()
+    try:
+        asyncio.set_event_loop(loop)
+        return loop.run_until_complete(_synthesize_jobs(jobs, engine, concurrency, on_done))
+    finally:
+        loop.close()
+
+
 def convert_text_to_avgl_json(text_script, title="Nuevo Video"):
     script = {"title": title, "blocks": []}
     lines = text_script.strip().split('\n')
@@ -0,0 +1,275 @@
+"""
+v32.18: Batch Render Orchestrator
+launch_batch.py rendered a hardcoded list strictly one project after another. A batch is
+now a manifest of scripts turned into RenderJob rows that share one `batch` id:
+
+- Each job's cost is estimated from its parsed timeline (video seconds, scene count) and
+  its render mode: cores (est_cpu) and memory (est_ram_mb).
+- Jobs are enqueued longest first (LPT), so the tail of the batch is made of short jobs.
+- The render_worker supervisor runs as many jobs at once as fit the CPU / RAM budget
+  (RENDER_CPU_BUDGET / RENDER_RAM_BUDGET_MB) and hands each segment/frame render its
+  share of the cores (RENDER_SEGMENT_WORKERS of that child), instead of N renders each
+  spawning CPU-1 encoders.
+- All jobs reuse the on-disk TTS, media probe, pyramid and scene caches.
+- batch_report() gives per-job and aggregate throughput (video-seconds per wall-second).
+
+Manifest (JSON): {"name": "...", "defaults": {...}, "jobs": [{...}]} or a plain list of jobs.
+Job keys: title, script_path (relative to the manifest) or script (text / JSON object),
+aspect_ratio, render_mode, render_profile (final | draft), engine, auto_upload, priority.
+"""
+
+import os
+import re
+import json
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Speech rate used for the estimate (same 2.5 words/sec as the mute-subtitle timing, v28.0)
+WORDS_PER_SECOND = 2.5
+# Memory heuristics (MB): render process baseline, MoviePy compositing per 1080p-equivalent
+# frame size, and each parallel segment encoder (worker process + FFmpeg pipe)
+RAM_BASE_MB = 700
+RAM_PER_FRAME_SIZE_MB = 600
+RAM_PER_SEGMENT_WORKER_MB = 350
+# Cores used by a whole-timeline MoviePy render (Python compositing + FFmpeg encode)
+CPU_MODE_CORES = 2
+
+
+# ═══════════════════════════════════════════════════════════════════
+# Resource budget
+# ═══════════════════════════════════════════════════════════════════
+def physical_ram_mb():
+    try:
+        if os.name == 'nt':
+            import ctypes
+
+            class MEMORYSTATUSEX(ctypes.Structure):
+                _fields_ = [('dwLength', ctypes.c_ulong), ('dwMemoryLoad', ctypes.c_ulong),
+                            ('ullTotalPhys', ctypes.c_ulonglong), ('ullAvailPhys', ctypes.c_ulonglong),
+                            ('ullTotalPageFile', ctypes.c_ulonglong), ('ullAvailPageFile', ctypes.c_ulonglong),
+                            ('ullTotalVirtual', ctypes.c_ulonglong), ('ullAvailVirtual', ctypes.c_ulonglong),
+                            ('ullAvailExtendedVirtual', ctypes.c_ulonglong)]
+            stat = MEMORYSTATUSEX()
+            stat.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+            ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(stat))
+            return stat.ullTotalPhys // (1024 * 1024)
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') // (1024 * 1024)
+    except Exception:
+        return None
+
+
+def resource_budget():
+    """(cores, MB) available to concurrent renders. RAM None = unknown (not enforced)."""
+    from django.conf import settings
+    cpu = getattr(settings, 'RENDER_CPU_BUDGET', 0) or (os.cpu_count() or 2)
+    ram = getattr(settings, 'RENDER_RAM_BUDGET_MB', 0)
+    if not ram:
+        total = physical_ram_mb()
+        ram = int(total * 0.75) if total else None
+    return float(cpu), ram
+
+
+# ═══════════════════════════════════════════════════════════════════
+# Cost estimate
+# ═══════════════════════════════════════════════════════════════════
+def _voice_seconds(scene):
+    text = re.sub(r'\[.*?\]|\(.*?\)', '', str(scene.text or ''))
+    words = len(text.split())
+    if not words:
+        return 1.0
+    return max(1.5, words / WORDS_PER_SECOND)
+
+
+def ram_for(render_mode, cpu_share):
+    # Portrait and landscape are both one 1080p frame
+    ram = RAM_BASE_MB + RAM_PER_FRAME_SIZE_MB
+    if render_mode in ('segments', 'frames'):
+        ram += RAM_PER_SEGMENT_WORKER_MB * max(1, int(cpu_share))
+    return int(ram)
+
+
+def estimate_job(script_text, render_mode='cpu'):
+    """
+    Cost of rendering a script: {'video_seconds', 'scenes', 'cpu', 'ram_mb'}.
+    video_seconds comes from the compiled timeline (forced durations, else words / 2.5 + pause).
+    """
+    from .avgl_engine import parse_avgl_json
+    from .segment_renderer import get_segment_workers
+    from .timeline import compile_timeline
+    try:
+        script = parse_avgl_json(script_text)
+        # v32.20: Same duration rules as the render (outros, forced durations, pauses)
+        timeline = compile_timeline(script, {s: _voice_seconds(s) for s in script.get_all_scenes()})
+        seconds, scenes = timeline.duration, timeline.scenes
+    except Exception as e:
+        logger.warning(f"⚠️ [Batch] No se pudo estimar el guion: {e}")
+        seconds, scenes = 0.0, ()
+    cpu = get_segment_workers() if render_mode in ('segments', 'frames') else CPU_MODE_CORES
+    return {
+        'video_seconds': round(seconds, 1),
+        'scenes': len(scenes),
+        'cpu': float(cpu),
+        'ram_mb': ram_for(render_mode, cpu),
+    }
+
+
+def plan_cpu_share(render_mode, free_cpu, planned_parallel, cpu_budget):
+    """
+    Cores given to a job about to start. Segment/frame renders scale with cores, so they get
+    an even split of the budget between the jobs expected to run together (never more than
+    what is free, never less than 1). MoviePy renders keep their fixed footprint.
+    """
+    if render_mode not in ('segments', 'frames'):
+        return int(min(CPU_MODE_CORES, cpu_budget))
+    from .segment_renderer import get_segment_workers
+    even = int(cpu_budget // max(1, planned_parallel))
+    return int(max(1, min(get_segment_workers(), even, free_cpu)))
+
+
+# ═══════════════════════════════════════════════════════════════════
+# Manifest -> jobs
+# ═══════════════════════════════════════════════════════════════════
+def load_manifest(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return normalize_manifest(data, base_dir=os.path.dirname(os.path.abspath(path)))
+
+
+def normalize_manifest(data, base_dir=None):
+    """
+    (name, [job dicts]) with defaults applied and every script loaded as text.
+    Every entry is validated here (ValueError), so launch_batch never leaves a half-created batch.
+    """
+    if isinstance(data, list):
+        data = {'jobs': data}
+    if not isinstance(data, dict):
+        raise ValueError("el manifiesto debe ser un objeto o una lista de trabajos")
+    defaults = data.get('defaults') or {}
+    raw_jobs = data.get('jobs') or []
+    if not isinstance(defaults, dict) or not isinstance(raw_jobs, list):
+        raise ValueError("'defaults' debe ser un objeto y 'jobs' una lista")
+    jobs = []
+    for i, raw in enumerate(raw_jobs):
+        if not isinstance(raw, dict):
+            raise ValueError(f"Trabajo {i + 1}: debe ser un objeto")
+        entry = {**defaults, **raw}
+        try:
+            entry['priority'] = int(entry.get('priority', 0) or 0)
+        except (TypeError, ValueError):
+            raise ValueError(f"Trabajo {i + 1}: 'priority' debe ser un entero")
+        script = entry.get('script')
+        if script is None and entry.get('script_path'):
+            path = entry['script_path']
+            if base_dir and not os.path.isabs(path):
+                path = os.path.join(base_dir, path)
+            with open(path, 'r', encoding='utf-8') as f:
+                script = f.read()
+        if script is None:
+            raise ValueError(f"Trabajo {i + 1}: falta 'script' o 'script_path'")
+        if not isinstance(script, str):
+            script = json.dumps(script, ensure_ascii=False)
+        entry['script'] = script
+        jobs.append(entry)
+    return data.get('name'), jobs
+
+
+def launch_batch(jobs, name=None):
+    """Creates one project + RenderJob per entry (longest first). Returns the batch id."""
+    from django.conf import settings
+    from .models import VideoProject, RenderJob
+
+    batch_id = name or f"batch_{uuid.uuid4().hex[:8]}"
+    planned = []
+    for entry in jobs:
+        estimate = estimate_job(entry['script'], entry.get('render_mode', 'cpu'))
+        planned.append((entry, estimate))
+    # LPT: the longest renders start first, short ones fill the gaps at the end
+    planned.sort(key=lambda p: p[1]['video_seconds'], reverse=True)
+
+    for entry, estimate in planned:
+        title = entry.get('title')
+        if not title:
+            try:
+                title = json.loads(entry['script']).get('title')
+            except Exception:
+                title = None
+        project = VideoProject.objects.create(
+            title=title or "Proyecto por lotes",
+            script_text=entry['script'],
+            aspect_ratio=entry.get('aspect_ratio', 'landscape'),
+            render_mode=entry.get('render_mode', 'cpu'),
+            render_profile='draft' if entry.get('render_profile') == 'draft' else 'final',
+            engine=entry.get('engine', 'edge'),
+            auto_upload_youtube=bool(entry.get('auto_upload', False)),
+            status='queued',  # 'processing' once a worker starts the render
+        )
+        RenderJob.objects.create(
+            project=project, source='batch', batch=batch_id,
+            priority=entry.get('priority', 0),
+            max_attempts=getattr(settings, 'RENDER_JOB_MAX_ATTEMPTS', 2),
+            est_video_seconds=estimate['video_seconds'], est_cpu=estimate['cpu'], est_ram_mb=estimate['ram_mb'],
+        )
+        logger.info(f"📦 [Batch] {batch_id}: '{project.title}' (~{estimate['video_seconds']:.0f}s, "
+                    f"{estimate['scenes']} escenas, {estimate['cpu']:.0f} núcleos, {estimate['ram_mb']} MB)")
+    return batch_id
+
+
+# ═══════════════════════════════════════════════════════════════════
+# Report
+# ═══════════════════════════════════════════════════════════════════
+def batch_report(batch_id):
+    from .models import RenderJob
+    jobs = list(RenderJob.objects.filter(batch=batch_id).select_related('project').order_by('created_at'))
+    rows = []
+    video_total = 0.0
+    job_wall_total = 0.0
+    for job in jobs:
+        wall = (job.finished_at - job.started_at).total_seconds() if job.started_at and job.finished_at else None
+        rows.append({
+            'job_id': job.id,
+            'project_id': job.project_id,
+            'title': job.project.title,
+            'status': job.status,
+            'render_mode': job.project.render_mode,
+            'est_video_seconds': job.est_video_seconds,
+            'video_seconds': job.video_seconds,
+            'cpu_share': job.cpu_share,
+            'wall_seconds': round(wall, 1) if wall else None,
+            'throughput': round(job.video_seconds / wall, 3) if wall and job.video_seconds else None,
+        })
+        if job.status == 'done' and wall and job.video_seconds:
+            video_total += job.video_seconds
+            job_wall_total += wall
+
+    started = [j.started_at for j in jobs if j.started_at]
+    finished = [j.finished_at for j in jobs if j.finished_at]
+    pending = sum(1 for j in jobs if j.status in ('queued', 'running'))
+    wall = (max(finished) - min(started)).total_seconds() if started and finished else None
+    return {
+        'batch': batch_id,
+        'jobs': rows,
+        'total': len(jobs),
+        'pending': pending,
+        'done': sum(1 for j in jobs if j.status == 'done'),
+        'failed': sum(1 for j in jobs if j.status in ('failed', 'cancelled')),
+        'video_seconds': round(video_total, 1),
+        'wall_seconds': round(wall, 1) if wall else None,
+        'throughput': round(video_total / wall, 3) if wall and video_total else None,
+        # Sum of per-job times / batch wall time: how much the overlap saved vs. one by one
+        'parallel_speedup': round(job_wall_total / wall, 2) if wall and job_wall_total else None,
+    }
+
+
+def format_report(report):
+    lines = [f"📊 Lote {report['batch']}: {report['done']}/{report['total']} terminados, {report['failed']} fallidos"]
+    for row in report['jobs']:
+        thr = f"{row['throughput']:.2f}x" if row['throughput'] else "-"
+        wall = f"{row['wall_seconds']:.0f}s" if row['wall_seconds'] else "-"
+        vid = f"{row['video_seconds']:.0f}s" if row['video_seconds'] else f"~{row['est_video_seconds'] or 0:.0f}s"
+        lines.append(f"   [{row['status']:>9}] {row['title'][:40]:<40} video {vid:>6} | render {wall:>6} | {thr} | {row['cpu_share'] or '-'} núcleos")
+    if report['throughput']:
+        lines.append(f"   ⚡ {report['video_seconds']:.0f}s de video en {report['wall_seconds']:.0f}s "
+                     f"({report['throughput']:.2f} s-video/s, solape x{report['parallel_speedup']})")
+    return "\n".join(lines)
@@ -0,0 +1,187 @@
+"""
+v32.16: Cooperative Render Cancellation
+The stop button used to be noticed only by project.refresh_from_db() before each block
+and scene (one SQLite read per scene) and never during the encode itself, so a
+cancelled 30-minute write_videofile kept burning CPU until the end.
+
+- request_cancel(project_id) sets a shared cache key (stop_project view).
+- CancellationToken.start() runs a watchdog thread that polls that key every
+  POLL_SECONDS (and the DB status every DB_POLL_SECONDS, for renders running in
+  another process). On cancellation it flips a flag and kills every tracked child:
+  FFmpeg Popen objects and process pools.
+- Checkpoints are free: is_cancelled() reads the flag, raise_if_cancelled() raises
+  RenderCancelled (called from the MoviePy progress callback on every frame).
+"""
+
+import time
+import logging
+import threading
+import subprocess
+
+logger = logging.getLogger(__name__)
+
+POLL_SECONDS = 0.25
+DB_POLL_SECONDS = 2.0
+
+_local = threading.local()
+
+
+class RenderCancelled(Exception):
+    """Raised at a checkpoint once the render has been cancelled."""
+
+
+def _cancel_key(project_id):
+    return f"project_{project_id}_cancel"
+
+
+def request_cancel(project_id):
+    from django.core.cache import cache
+    cache.set(_cancel_key(project_id), True, timeout=3600)
+
+
+def current_token():
+    """Token of the render running in this thread (None outside a render)."""
+    return getattr(_local, 'token', None)
+
+
+def _terminate_pool(pool):
+    # ProcessPoolExecutor has no public kill: terminate its workers (their FFmpeg
+    # children see EOF on stdin and exit) so pending futures fail fast
+    for proc in list((getattr(pool, '_processes', None) or {}).values()):
+        try: proc.terminate()
+        except Exception: pass
+
+
+class CancellationToken:
+    def __init__(self, project_id):
+        self.project_id = project_id
+        self._cancelled = threading.Event()
+        self._stop = threading.Event()
+        self._children = []
+        self._lock = threading.Lock()
+        self._watchdog = None
+        self._last_db_poll = 0.0
+        # A new render starts clean even if the previous one was stopped
+        from django.core.cache import cache
+        cache.delete(_cancel_key(project_id))
+
+    # ─── Polling ───────────────────────────────────────────────────────
+    def _poll(self):
+        from django.core.cache import cache
+        if cache.get(_cancel_key(self.project_id)):
+            return True
+        now = time.time()
+        if now - self._last_db_poll >= DB_POLL_SECONDS:
+            self._last_db_poll = now
+            from .models import VideoProject
+            status = VideoProject.objects.filter(pk=self.project_id).values_list('status', flat=True).first()
+            return status == 'cancelled'
+        return False
+
+    def _run_watchdog(self):
+        from django.db import connection
+        try:
+            while not self._stop.wait(POLL_SECONDS):
+                try:
+                    if self._poll():
+                        self.cancel()
+                        break
+                except Exception as e:
+                    logger.warning(f"⚠️ [Cancel] Error consultando cancelación: {e}")
+        finally:
+            connection.close()
+
+    def start(self):
+        """Starts the watchdog and makes this the current token of the calling thread."""
+        _local.token = self
+        if self._watchdog is None:
+            self._watchdog = threading.Thread(target=self._run_watchdog, daemon=True)
+            self._watchdog.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if getattr(_local, 'token', None) is self:
+            _local.token = None
+
+    # ─── Cancellation ──────────────────────────────────────────────────
+    def cancel(self):
+        if self._cancelled.is_set():
+            return
+        self._cancelled.set()
+        logger.info(f"🛑 [Cancel] Proyecto {self.project_id}: deteniendo procesos hijos...")
+        with self._lock:
+            children = list(self._children)
+        for child in children:
+            _kill(child)
+
+    def is_cancelled(self):
+        if self._cancelled.is_set():
+            return True
+        if self._watchdog is None:
+            # No watchdog (token used standalone): poll on demand
+            try:
+                if self._poll():
+                    self.cancel()
+            except Exception:
+                pass
+        return self._cancelled.is_set()
+
+    def raise_if_cancelled(self):
+        if self.is_cancelled():
+            raise RenderCancelled(f"Render del proyecto {self.project_id} cancelado")
+
+    # ─── Child tracking ────────────────────────────────────────────────
+    def track(self, child):
+        """
+        child: Popen (killed), ProcessPoolExecutor (workers terminated) or a callable.
+        Returns the handle to pass to untrack().
+        """
+        if hasattr(child, '_processes'):
+            pool = child
+            child = lambda: _terminate_pool(pool)
+        with self._lock:
+            self._children.append(child)
+        if self._cancelled.is_set():
+            _kill(child)
+        return child
+
+    def untrack(self, handle):
+        with self._lock:
+            self._children = [c for c in self._children if c is not handle]
+
+
+def _kill(child):
+    try:
+        child() if callable(child) else child.kill()
+    except Exception:
+        pass
+
+
+def run(cmd, input=None, check=False, capture_output=False, timeout=None, **kwargs):
+    """
+    subprocess.run() whose child is killed if the current render gets cancelled
+    (same signature for the arguments used in this package).
+    """
+    token = current_token()
+    if token is None:
+        return subprocess.run(cmd, input=input, check=check, capture_output=capture_output, timeout=timeout, **kwargs)
+    token.raise_if_cancelled()
+    if capture_output:
+        kwargs['stdout'] = kwargs['stderr'] = subprocess.PIPE
+    if input is not None:
+        kwargs['stdin'] = subprocess.PIPE
+    with subprocess.Popen(cmd, **kwargs) as proc:
+        token.track(proc)
+        try:
+            stdout, stderr = proc.communicate(input, timeout=timeout)
+        except BaseException:
+            proc.kill()
+            raise
+        finally:
+            token.untrack(proc)
+    token.raise_if_cancelled()
+    result = subprocess.CompletedProcess(cmd, proc.returncode, stdout, stderr)
+    if check:
+        result.check_returncode()
+    return result
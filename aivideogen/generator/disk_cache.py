@@ -0,0 +1,158 @@
+"""
+v32.1: Size-Bounded Disk Cache
+Content-addressed file store under MEDIA_ROOT/cache/<namespace> with LRU eviction
+(mtime is touched on every hit) and hit/miss counters.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Files above this size are fingerprinted by sampling (head/middle/tail) instead of a full read
+_FULL_HASH_LIMIT = 64 * 1024 * 1024
+_SAMPLE_SIZE = 4 * 1024 * 1024
+
+_digest_memo = {}
+_digest_lock = threading.Lock()
+
+
+def file_digest(path):
+    """
+    v32.1: Content fingerprint of a file (sha1), memoized per (path, size, mtime).
+    Large videos are sampled so a 2 GB asset does not cost a full read on every render.
+    Returns None if the file does not exist.
+    """
+    if not path:
+        return None
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+
+    memo_key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    with _digest_lock:
+        cached = _digest_memo.get(memo_key)
+    if cached:
+        return cached
+
+    h = hashlib.sha1()
+    h.update(str(st.st_size).encode())
+    with open(path, 'rb') as f:
+        if st.st_size <= _FULL_HASH_LIMIT:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                h.update(chunk)
+        else:
+            for offset in (0, st.st_size // 2, max(0, st.st_size - _SAMPLE_SIZE)):
+                f.seek(offset)
+                h.update(f.read(_SAMPLE_SIZE))
+    digest = h.hexdigest()
+
+    with _digest_lock:
+        _digest_memo[memo_key] = digest
+    return digest
+
+
+def hash_key(*parts):
+    """Stable sha1 of arbitrary JSON-serializable parts."""
+    payload = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+class BoundedDiskCache:
+    """
+    v32.1: One directory per namespace, one file per key.
+    - get(): returns the cached path (and refreshes its LRU position) or None.
+    - put(): moves a freshly produced file into the cache.
+    - evict(): drops the least recently used entries until the size budget is met.
+    """
+
+    def __init__(self, namespace, max_mb=2048, root=None):
+        if root is None:
+            from django.conf import settings
+            root = os.path.join(settings.MEDIA_ROOT, 'cache')
+        self.namespace = namespace
+        self.directory = os.path.join(root, namespace)
+        self.max_bytes = int(float(max_mb) * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path_for(self, key, ext=''):
+        return os.path.join(self.directory, f"{key}{ext}")
+
+    def get(self, key, ext=''):
+        path = self.path_for(key, ext)
+        if os.path.isfile(path) and os.path.getsize(path) > 0:
+            try: os.utime(path, None)
+            except OSError: pass
+            with self._lock: self.hits += 1
+            return path
+        with self._lock: self.misses += 1
+        return None
+
+    def put(self, key, src_path, ext=''):
+        """Moves src_path into the cache (atomic on the same volume). Returns the cached path."""
+        dst = self.path_for(key, ext)
+        try:
+            os.replace(src_path, dst)
+        except OSError:
+            import shutil
+            shutil.copy2(src_path, dst)
+        try: os.utime(dst, None)
+        except OSError: pass
+        return dst
+
+    def _entries(self):
+        entries = []
+        try:
+            with os.scandir(self.directory) as it:
+                for e in it:
+                    if e.is_file():
+                        st = e.stat()
+                        entries.append((st.st_mtime, st.st_size, e.path))
+        except OSError:
+            pass
+        return entries
+
+    def evict(self, protect=()):
+        """Deletes the oldest entries until the namespace fits in max_bytes. Returns bytes freed."""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return 0
+        protect = {os.path.abspath(p) for p in protect}
+        freed = 0
+        for mtime, size, path in sorted(entries):
+            if total - freed <= self.max_bytes:
+                break
+            if os.path.abspath(path) in protect:
+                continue
+            try:
+                os.remove(path)
+                freed += size
+            except OSError:
+                pass
+        if freed:
+            logger.info(f"🧹 [Cache:{self.namespace}] Liberados {freed / 1048576:.1f} MB (LRU)")
+        return freed
+
+    def stats(self):
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        lookups = self.hits + self.misses
+        return {
+            'namespace': self.namespace,
+            'entries': len(entries),
+            'size_mb': round(total / 1048576, 2),
+            'max_mb': round(self.max_bytes / 1048576, 2),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'updated_at': time.time(),
+        }
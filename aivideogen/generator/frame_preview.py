@@ -0,0 +1,342 @@
+"""
+v32.24: Random-Access Frames (timeline scrubbing / storyboards)
+Checking what is on screen at 01:23 meant rendering up to there. A frame request only
+evaluates the scene under t:
+
+- The compiled timeline (scene_preview.preview_timeline: planner voice durations, cached
+  word timings) gives the active scene and the scene-local time, snapped to the 30 fps grid
+  of the final render.
+- Pixels come from the segment renderer's scene rebuild (build_scene_clip: Ken Burns,
+  group interpolation, shake / rotate, overlay, video assets) evaluated at that single time.
+- Subtitle events active at t are the ones the engine burns (timeline.subtitle_item), drawn
+  by the same ASS filter; a frame without subtitles never starts FFmpeg (cv2 encode).
+- Frames are content-addressed in MEDIA_ROOT/cache/frames by (scene hash, frame number,
+  active subtitles), so scrubbing back and forth over an unchanged scene is served from disk.
+
+render_storyboard() tiles N evenly spaced frames into one contact sheet through the same path
+(each tile is a cached frame, the sheet is cached by the keys of its tiles).
+"""
+
+import os
+import time
+import shutil
+import logging
+import subprocess
+
+logger = logging.getLogger(__name__)
+
+FRAME_FORMATS = {
+    'jpeg': ('.jpg', 'image/jpeg'),
+    'webp': ('.webp', 'image/webp'),
+}
+# Frame grid of the final render (t is snapped to it, so nearby requests share an entry)
+FRAME_FPS = 30
+STORYBOARD_MAX_FRAMES = 48
+STORYBOARD_TILE_HEIGHT = 270
+STORYBOARD_GAP = 4
+# Largest short side accepted for a frame / tile (the final frame size is never exceeded anyway)
+FRAME_MAX_HEIGHT = 2160
+# Bump when the frame pipeline changes
+FRAME_PREVIEW_VERSION = 1
+
+_frame_cache = None
+
+
+def get_frame_cache():
+    global _frame_cache
+    if _frame_cache is None:
+        from django.conf import settings
+        from .disk_cache import BoundedDiskCache
+        _frame_cache = BoundedDiskCache('frames', max_mb=getattr(settings, 'FRAME_CACHE_MAX_MB', 256))
+    return _frame_cache
+
+
+def _frame_url(path):
+    from django.conf import settings
+    return f"{settings.MEDIA_URL}cache/frames/{os.path.basename(path)}"
+
+
+def _frame_job(project, script, timeline, t, target_size, fmt, subtitles, overlay_dir):
+    """Everything needed to key (and later render) the frame at absolute second t."""
+    from .disk_cache import hash_key
+    from .timeline import subtitle_item
+    from .segment_renderer import scene_cache_key
+    from .scene_preview import preview_spec
+
+    t = min(max(0.0, float(t)), max(0.0, timeline.duration - 1.0 / FRAME_FPS))
+    entry = timeline.scene_at(t)
+    last_frame = max(0, int(round(entry.duration * FRAME_FPS)) - 1)
+    frame_no = min(max(0, int(round((t - entry.start) * FRAME_FPS))), last_frame)
+    local = frame_no / FRAME_FPS
+    spec = preview_spec(entry, script, overlay_dir)
+
+    items = []
+    if subtitles and entry.scene.subtitles:
+        default_y = getattr(project, 'subtitles_y_position', 0.70)
+        for sub, window in zip(entry.scene.subtitles, entry.subtitle_windows() or ()):
+            if window is None:
+                continue
+            item = subtitle_item(sub, window, default_y)
+            if item['start'] <= local < item['end']:
+                items.append(item)
+
+    key = hash_key('frame', FRAME_PREVIEW_VERSION, fmt, scene_cache_key(spec, target_size, {'fps': FRAME_FPS}),
+                   frame_no, items)
+    return {'key': key, 'entry': entry, 'spec': spec, 'frame_no': frame_no, 'local': local,
+            't': round(entry.start + local, 3), 'items': items}
+
+
+def _scene_pixels(spec, target_size, local):
+    """RGB uint8 frame of a scene spec at scene-local second `local`."""
+    import cv2
+    import numpy as np
+    from .segment_renderer import build_scene_clip
+
+    clips_to_close = []
+    clip = build_scene_clip(spec, target_size, clips_to_close, fps=FRAME_FPS)
+    try:
+        # Ken Burns hands out a reused buffer: copy before the clip is closed
+        frame = np.array(clip.get_frame(local), copy=True)
+    finally:
+        for c in [clip] + clips_to_close:
+            try: c.close()
+            except Exception: pass
+    if frame.dtype != np.uint8:
+        frame = np.clip(frame, 0, 255).astype(np.uint8)
+    if frame.ndim == 2:
+        frame = np.stack([frame] * 3, axis=-1)
+    elif frame.shape[2] == 4:
+        frame = frame[:, :, :3]
+    if frame.shape[0] != target_size[1] or frame.shape[1] != target_size[0]:
+        frame = cv2.resize(frame, tuple(target_size), interpolation=cv2.INTER_LINEAR)
+    return np.ascontiguousarray(frame)
+
+
+def _encode_image(frame, fmt, output_path):
+    """RGB frame -> JPEG / WebP file (OpenCV, no subprocess)."""
+    import cv2
+    params = [cv2.IMWRITE_JPEG_QUALITY, 90] if fmt == 'jpeg' else [cv2.IMWRITE_WEBP_QUALITY, 85]
+    ok, data = cv2.imencode(FRAME_FORMATS[fmt][0], cv2.cvtColor(frame, cv2.COLOR_RGB2BGR), params)
+    if not ok:
+        raise RuntimeError(f"No se pudo codificar el fotograma ({fmt})")
+    with open(output_path, 'wb') as f:
+        f.write(data.tobytes())
+
+
+def _burn_subtitles(frame, items, local, fmt, work_dir, output_path):
+    """Encodes one frame through the ASS filter with the scene-local events active at `local`."""
+    from .segment_renderer import get_ffmpeg_exe
+    from .subtitle_utils import compile_full_script_ass, ass_filter_arg
+
+    ass_path = os.path.join(work_dir, "frame.ass")
+    if not compile_full_script_ass(items, ass_path):
+        raise RuntimeError("Error compilando ASS")
+    height, width = frame.shape[:2]
+    codec = ['-c:v', 'mjpeg', '-q:v', '3'] if fmt == 'jpeg' else ['-c:v', 'libwebp', '-quality', '85']
+    cmd = [
+        get_ffmpeg_exe(), '-y', '-loglevel', 'error',
+        '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-s', f"{width}x{height}", '-framerate', str(FRAME_FPS), '-i', 'pipe:0',
+        # Same trick as the segment burn-in: the single frame is moved to its time in the ASS
+        '-vf', f"setpts=PTS+{local:.6f}/TB,{ass_filter_arg(ass_path)}",
+        '-frames:v', '1', '-update', '1',
+    ] + codec + [output_path]
+    subprocess.run(cmd, input=frame.tobytes(), check=True, capture_output=True)
+
+
+def _render_job(job, target_size, fmt, cache):
+    """Path of the job's frame in the cache, rendering it on a miss. Returns (path, cached)."""
+    from django.conf import settings
+    ext = FRAME_FORMATS[fmt][0]
+    cached = cache.get(job['key'], ext=ext)
+    if cached:
+        return cached, True
+
+    work_dir = os.path.join(settings.MEDIA_ROOT, 'temp_frames', f"{job['key'][:12]}_{os.getpid()}_{int(time.time() * 1000)}")
+    os.makedirs(work_dir, exist_ok=True)
+    try:
+        frame = _scene_pixels(job['spec'], target_size, job['local'])
+        out_path = os.path.join(work_dir, f"frame{ext}")
+        if job['items']:
+            _burn_subtitles(frame, job['items'], job['local'], fmt, work_dir, out_path)
+        else:
+            _encode_image(frame, fmt, out_path)
+        return cache.put(job['key'], out_path, ext=ext), False
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def _load_timeline(project, script_text):
+    from .scene_preview import preview_timeline
+    script, timeline, _ = preview_timeline(project, script_text)
+    if not timeline.scenes:
+        raise ValueError("El guion no tiene escenas")
+    return script, timeline
+
+
+def _subtitles_default(script, subtitles):
+    # Scripts rendered with a soft subtitle track have no burned-in text to show
+    if subtitles is None:
+        return not bool((getattr(script, 'settings', None) or {}).get('soft_subtitles', False))
+    return bool(subtitles)
+
+
+def _check_height(height):
+    """None when valid, else the error message (a bad height must not become a server error)."""
+    if height is None:
+        return None
+    if isinstance(height, bool) or not isinstance(height, int) or not 0 < height <= FRAME_MAX_HEIGHT:
+        return f"Altura inválida: {height} (1-{FRAME_MAX_HEIGHT})"
+    return None
+
+
+def _error(e):
+    return e.stderr.decode('utf-8', errors='replace')[-300:] if isinstance(getattr(e, 'stderr', None), bytes) else e
+
+
+def render_frame(project, t, fmt='jpeg', script_text=None, subtitles=None, height=None):
+    """
+    Frame of project's timeline at absolute second t (script_text = unsaved editor copy).
+    height: short side in px (None = final frame size). subtitles: None = as the render burns them.
+    Returns {'ok', 'path', 'url', 'format', 'content_type', 't', 'scene', 'size', 'subtitles',
+    'cached', 'elapsed_ms'} or {'ok': False, 'error'}.
+    """
+    from django.conf import settings
+    from .render_profiles import frame_size
+
+    started = time.time()
+    if fmt not in FRAME_FORMATS:
+        return {'ok': False, 'error': f"Formato no soportado: {fmt}"}
+    height_error = _check_height(height)
+    if height_error:
+        return {'ok': False, 'error': height_error}
+    try:
+        script, timeline = _load_timeline(project, script_text)
+    except ValueError as e:
+        return {'ok': False, 'error': str(e)}
+
+    target_size = frame_size(project.aspect_ratio, {'height': height} if height else None)
+    overlay_dir = os.path.join(settings.MEDIA_ROOT, 'overlays')
+    cache = get_frame_cache()
+    try:
+        job = _frame_job(project, script, timeline, t, target_size, fmt,
+                         _subtitles_default(script, subtitles), overlay_dir)
+        path, cached = _render_job(job, target_size, fmt, cache)
+        if not cached:
+            cache.evict(protect=[path])
+    except Exception as e:
+        logger.warning(f"⚠️ [Frames] t={t}: {_error(e)}")
+        return {'ok': False, 'error': f"Error renderizando el fotograma: {_error(e)}"}
+
+    elapsed_ms = int((time.time() - started) * 1000)
+    if not cached:
+        logger.info(f"🎞️ [Frames] t={job['t']:.2f}s (escena {job['entry'].index + 1}, "
+                    f"{target_size[0]}x{target_size[1]}) en {elapsed_ms} ms")
+    return {
+        'ok': True, 'path': path, 'url': _frame_url(path), 'format': fmt, 'content_type': FRAME_FORMATS[fmt][1],
+        't': job['t'], 'scene': job['entry'].index, 'size': list(target_size), 'subtitles': len(job['items']),
+        'cached': cached, 'elapsed_ms': elapsed_ms,
+    }
+
+
+def _format_timestamp(seconds):
+    minutes, secs = divmod(seconds, 60.0)
+    return f"{int(minutes):02d}:{secs:05.2f}"
+
+
+def _sheet_size(tile_size, count, columns, gap=STORYBOARD_GAP):
+    rows = (count + columns - 1) // columns
+    return columns * tile_size[0] + (columns + 1) * gap, rows * tile_size[1] + (rows + 1) * gap
+
+
+def _compose_sheet(tiles, labels, columns, gap=STORYBOARD_GAP):
+    """Tiles (same-size RGB arrays) -> one contact sheet with a timestamp label per tile."""
+    import cv2
+    import numpy as np
+
+    tile_h, tile_w = tiles[0].shape[:2]
+    width, height = _sheet_size((tile_w, tile_h), len(tiles), columns, gap)
+    sheet = np.full((height, width, 3), 24, dtype=np.uint8)
+    scale = max(0.35, tile_h / 540.0)
+    thickness = max(1, int(round(scale * 2)))
+    for i, (tile, label) in enumerate(zip(tiles, labels)):
+        y = gap + (i // columns) * (tile_h + gap)
+        x = gap + (i % columns) * (tile_w + gap)
+        sheet[y:y + tile_h, x:x + tile_w] = tile
+        (text_w, text_h), baseline = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, scale, thickness)
+        pad = max(2, text_h // 3)
+        cv2.rectangle(sheet, (x, y), (x + text_w + 2 * pad, y + text_h + baseline + 2 * pad), (0, 0, 0), -1)
+        cv2.putText(sheet, label, (x + pad, y + pad + text_h), cv2.FONT_HERSHEY_SIMPLEX, scale,
+                    (255, 255, 255), thickness, cv2.LINE_AA)
+    return sheet
+
+
+def render_storyboard(project, count=12, columns=4, height=None, fmt='jpeg', script_text=None, subtitles=None):
+    """
+    Contact sheet of `count` evenly spaced frames ((i + 0.5) * duration / count), `columns` per row,
+    tiles of short side `height` (default STORYBOARD_TILE_HEIGHT). Tiles share the frame cache.
+    Returns {'ok', 'path', 'url', 'format', 'content_type', 'frames': [{'t', 'scene'}], 'size',
+    'cached', 'elapsed_ms'} or {'ok': False, 'error'}.
+    """
+    import cv2
+    from django.conf import settings
+    from .disk_cache import hash_key
+    from .render_profiles import frame_size
+
+    started = time.time()
+    if fmt not in FRAME_FORMATS:
+        return {'ok': False, 'error': f"Formato no soportado: {fmt}"}
+    height_error = _check_height(height)
+    if height_error:
+        return {'ok': False, 'error': height_error}
+    count = max(1, min(int(count), STORYBOARD_MAX_FRAMES))
+    columns = max(1, min(int(columns), count))
+    try:
+        script, timeline = _load_timeline(project, script_text)
+    except ValueError as e:
+        return {'ok': False, 'error': str(e)}
+
+    target_size = frame_size(project.aspect_ratio, {'height': height or STORYBOARD_TILE_HEIGHT})
+    overlay_dir = os.path.join(settings.MEDIA_ROOT, 'overlays')
+    subtitles = _subtitles_default(script, subtitles)
+    cache = get_frame_cache()
+    ext = FRAME_FORMATS[fmt][0]
+    try:
+        # Tiles are always JPEG in the cache (the sheet is what gets the requested format)
+        jobs = [_frame_job(project, script, timeline, (i + 0.5) * timeline.duration / count, target_size, 'jpeg',
+                           subtitles, overlay_dir) for i in range(count)]
+        frames = [{'t': job['t'], 'scene': job['entry'].index} for job in jobs]
+        key = hash_key('storyboard', FRAME_PREVIEW_VERSION, fmt, columns, [job['key'] for job in jobs])
+        cached = cache.get(key, ext=ext)
+        if not cached:
+            tiles, paths = [], []
+            for job in jobs:
+                path, _ = _render_job(job, target_size, 'jpeg', cache)
+                paths.append(path)
+                tile = cv2.imread(path, cv2.IMREAD_COLOR)
+                if tile is None:
+                    raise RuntimeError(f"Fotograma ilegible: {os.path.basename(path)}")
+                tiles.append(cv2.cvtColor(tile, cv2.COLOR_BGR2RGB))
+            sheet = _compose_sheet(tiles, [f"{_format_timestamp(f['t'])}  #{f['scene'] + 1}" for f in frames], columns)
+            work_dir = os.path.join(settings.MEDIA_ROOT, 'temp_frames', f"{key[:12]}_{os.getpid()}_{int(time.time() * 1000)}")
+            os.makedirs(work_dir, exist_ok=True)
+            try:
+                out_path = os.path.join(work_dir, f"storyboard{ext}")
+                _encode_image(sheet, fmt, out_path)
+                path = cache.put(key, out_path, ext=ext)
+            finally:
+                shutil.rmtree(work_dir, ignore_errors=True)
+            cache.evict(protect=paths + [path])
+        else:
+            path = cached
+    except Exception as e:
+        logger.warning(f"⚠️ [Storyboard] {_error(e)}")
+        return {'ok': False, 'error': f"Error renderizando el storyboard: {_error(e)}"}
+
+    elapsed_ms = int((time.time() - started) * 1000)
+    if not cached:
+        logger.info(f"🎞️ [Storyboard] {count} fotogramas ({target_size[0]}x{target_size[1]}) en {elapsed_ms} ms")
+    return {
+        'ok': True, 'path': path, 'url': _frame_url(path), 'format': fmt, 'content_type': FRAME_FORMATS[fmt][1],
+        'frames': frames, 'size': list(_sheet_size(target_size, count, columns)),
+        'cached': bool(cached), 'elapsed_ms': elapsed_ms,
+    }
@@ -0,0 +1,279 @@
+"""
+v32.7: Multi-Process Frame Server
+Frame synthesis (warpAffine, overlay compositing, blending) is spread over N worker
+processes while ONE FFmpeg encodes the whole timeline:
+
+    workers --(frames)--> shared_memory ring --(in order)--> writer thread --> ffmpeg stdin
+
+- The timeline is cut into small chunks (CHUNK_FRAMES) that are dispatched as soon as
+  enough ring slots are free, so synthesis of chunk k+1.. overlaps the encode of chunk k.
+- Workers rebuild scenes from the same picklable specs as the segment renderer.
+- Only slot indices travel through the pool queues; pixels never get pickled.
+- The encoder gets the cores the workers leave free (v26.12 contention stays away).
+"""
+
+import os
+import time
+import queue
+import logging
+import threading
+import subprocess
+from collections import OrderedDict, deque
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CHUNK_FRAMES = 8
+# Scene clips kept alive per worker (consecutive chunks usually hit the same scene)
+_WORKER_CLIPS = 2
+
+_shm = None
+_ring = None
+_clips = OrderedDict()
+
+
+def _init_frame_worker(shm_name, n_slots, frame_shape):
+    """Pool initializer: Django + attach the parent's shared memory ring."""
+    global _shm, _ring
+    from multiprocessing import shared_memory
+    from .segment_renderer import _init_segment_worker
+    _init_segment_worker()
+    _shm = shared_memory.SharedMemory(name=shm_name)
+    _ring = np.ndarray((n_slots,) + tuple(frame_shape), dtype=np.uint8, buffer=_shm.buf)
+
+
+def _scene_clip(scene_idx, spec, target_size, fps):
+    entry = _clips.get(scene_idx)
+    if entry is not None:
+        _clips.move_to_end(scene_idx)
+        return entry[0]
+
+    from .segment_renderer import build_scene_clip
+    clips_to_close = []
+    clip = build_scene_clip(spec, target_size, clips_to_close=clips_to_close, fps=fps).without_audio()
+    _clips[scene_idx] = (clip, clips_to_close)
+    while len(_clips) > _WORKER_CLIPS:
+        _, (old, old_close) = _clips.popitem(last=False)
+        for c in [old] + old_close:
+            try: c.close()
+            except Exception: pass
+    return clip
+
+
+def _render_chunk(scene_idx, spec, target_size, fps, start_local, slots):
+    """Worker: renders len(slots) consecutive frames of one scene into the ring."""
+    import cv2
+    clip = _scene_clip(scene_idx, spec, target_size, fps)
+    height, width = _ring.shape[1:3]
+    for j, slot in enumerate(slots):
+        frame = clip.get_frame((start_local + j) / fps)
+        if frame.dtype != np.uint8:
+            frame = np.clip(frame, 0, 255).astype(np.uint8)
+        if frame.ndim == 2:
+            frame = np.stack([frame] * 3, axis=-1)
+        elif frame.shape[2] == 4:
+            frame = frame[:, :, :3]
+        if frame.shape[0] != height or frame.shape[1] != width:
+            frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_LINEAR)
+        np.copyto(_ring[slot], frame)
+    return scene_idx
+
+
+def plan_chunks(specs, chunk_frames=CHUNK_FRAMES):
+    """(scene_idx, first_local_frame, n_frames) in timeline order."""
+    chunks = []
+    for idx, spec in enumerate(specs):
+        for start in range(0, int(spec['frames']), chunk_frames):
+            chunks.append((idx, start, min(chunk_frames, int(spec['frames']) - start)))
+    return chunks
+
+
+def render_video_frame_server(final_video, segment_specs, output_path, target_size, project_id, log=None,
+                              jitter_id=None, fps=30, render_params=None, ass_path=None, audio_path=None):
+    """
+    v32.7: Frame server render mode entry point used by generate_video_avgl.
+    ass_path (optional) is burned by the single encoder (absolute timeline PTS).
+    audio_path (optional) is the offline mixdown stem (v32.9), muxed as is.
+    Returns True on success; False means the caller must fall back to write_videofile.
+    """
+    import shutil
+    from concurrent.futures import ProcessPoolExecutor, wait
+    from multiprocessing import shared_memory
+    from django.conf import settings
+    from django.core.cache import cache
+    from .segment_renderer import get_ffmpeg_exe, get_segment_workers, quantize_segments, concat_segments
+    from .cancellation import current_token
+
+    log = log or logger.info
+    render_params = render_params or {}
+    if not segment_specs or any(s is None for s in segment_specs):
+        log("⚠️ [FrameServer] Hay escenas sin descripción serializable. Usando renderizado estándar.")
+        return False
+
+    specs = quantize_segments(segment_specs, fps=fps)
+    chunks = plan_chunks(specs)
+    total_frames = sum(int(s['frames']) for s in specs)
+    width, height = int(target_size[0]), int(target_size[1])
+    frame_shape = (height, width, 3)
+    frame_bytes = width * height * 3
+
+    workers = get_segment_workers()
+    n_slots = CHUNK_FRAMES * (workers + 2)
+    encoder_threads = max(1, (os.cpu_count() or 2) - workers)
+
+    work_dir = os.path.join(settings.MEDIA_ROOT, 'temp_frame_server', f"project_{project_id}_{int(time.time())}")
+    os.makedirs(work_dir, exist_ok=True)
+    video_path = os.path.join(work_dir, "video.mp4")
+
+    token = current_token()
+    pool_handle = None
+    shm = None
+    proc = None
+    audio_thread = None
+    writer = None
+    write_q = queue.Queue()
+    free_q = queue.Queue()
+    errors = []
+    start = time.time()
+
+    try:
+        shm = shared_memory.SharedMemory(create=True, size=n_slots * frame_bytes)
+        ring = np.ndarray((n_slots,) + frame_shape, dtype=np.uint8, buffer=shm.buf)
+        for slot in range(n_slots):
+            free_q.put(slot)
+        log(f"🎞️ [FrameServer] {total_frames} fotogramas | {workers} procesos | anillo de {n_slots} fotogramas ({n_slots * frame_bytes / 1048576:.0f} MB) | encoder {encoder_threads} hilos")
+
+        # 1. Soundtrack (single pass, overlapped with the pixel work)
+        if not audio_path and final_video.audio is not None:
+            audio_path = os.path.join(work_dir, "soundtrack.m4a")
+
+            def _write_audio():
+                try:
+                    final_video.audio.write_audiofile(audio_path, fps=44100, codec='aac', bitrate='192k', logger=None)
+                except Exception as e:
+                    errors.append(e)
+
+            audio_thread = threading.Thread(target=_write_audio, daemon=True)
+            audio_thread.start()
+
+        # 2. The one encoder
+        cmd = [
+            get_ffmpeg_exe(), '-y', '-loglevel', 'error',
+            '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-s', f"{width}x{height}", '-framerate', str(fps), '-i', 'pipe:0',
+        ]
+        if ass_path:
+            from .subtitle_utils import ass_filter_arg
+            cmd += ['-vf', ass_filter_arg(ass_path)]
+        cmd += ['-frames:v', str(total_frames), '-c:v', render_params.get('codec', 'libx264')]
+        if render_params.get('preset'):
+            cmd += ['-preset', render_params['preset']]
+        if render_params.get('bitrate'):
+            cmd += ['-b:v', render_params['bitrate']]
+        cmd += list(render_params.get('ffmpeg_params') or [])  # v32.22: profile CRF
+        cmd += ['-threads', str(encoder_threads), '-pix_fmt', 'yuv420p', '-an', video_path]
+        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+        if token:
+            token.track(proc)  # v32.16: Killed on cancel (the writer then fails and unblocks the scheduler)
+
+        # 3. Writer thread: ring slots -> ffmpeg stdin, strictly in timeline order
+        def _writer():
+            try:
+                while True:
+                    slots = write_q.get()
+                    if slots is None:
+                        break
+                    for slot in slots:
+                        proc.stdin.write(ring[slot].data)
+                        free_q.put(slot)
+            except Exception as e:
+                errors.append(e)
+                # Unblock the scheduler
+                for slot in range(n_slots):
+                    free_q.put(slot)
+
+        writer = threading.Thread(target=_writer, daemon=True)
+        writer.start()
+
+        # 4. Scheduler: dispatch chunks while slots are free, hand finished chunks over in order
+        written = 0
+        next_report = 0.1
+        next_chunk = 0
+        pending = deque()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_frame_worker,
+                                 initargs=(shm.name, n_slots, frame_shape)) as pool:
+            if token:
+                pool_handle = token.track(pool)
+            while next_chunk < len(chunks) or pending:
+                if errors:
+                    raise errors[0]
+                if token:
+                    token.raise_if_cancelled()
+                if pending and pending[0][0].done():
+                    fut, slots = pending.popleft()
+                    fut.result()
+                    write_q.put(slots)
+                    written += len(slots)
+                    if written / total_frames >= next_report:
+                        p_val = 20 + (written / total_frames) * 70  # 20% → 90%
+                        status_text = f"Fotograma {written}/{total_frames} ({p_val:.1f}%)"
+                        cache.set(f"project_{project_id}_progress", p_val, timeout=60)
+                        cache.set(f"project_{project_id}_status_text", status_text, timeout=60)
+                        log(f"  🎞️ {status_text} | {written / max(0.001, time.time() - start):.1f} fps")
+                        next_report += 0.1
+                    continue
+                if next_chunk < len(chunks) and free_q.qsize() >= chunks[next_chunk][2]:
+                    idx, first, count = chunks[next_chunk]
+                    slots = [free_q.get() for _ in range(count)]
+                    fut = pool.submit(_render_chunk, idx, specs[idx], (width, height), fps, first, slots)
+                    pending.append((fut, slots))
+                    next_chunk += 1
+                    continue
+                if pending:
+                    wait([pending[0][0]], timeout=0.05)
+                else:
+                    time.sleep(0.005)  # Ring full: waiting for the encoder
+
+        write_q.put(None)
+        writer.join()
+        if errors:
+            raise errors[0]
+        proc.stdin.close()
+        stderr = proc.stderr.read()
+        if proc.wait() != 0:
+            raise RuntimeError(stderr.decode('utf-8', errors='replace')[-500:])
+
+        if audio_thread:
+            audio_thread.join()
+            if errors:
+                raise errors[0]
+
+        concat_segments([video_path], audio_path, output_path, metadata_comment=jitter_id)
+        elapsed = time.time() - start
+        log(f"✅ [FrameServer] {total_frames} fotogramas en {elapsed:.1f}s ({total_frames / max(0.001, elapsed):.1f} fps)")
+        return True
+    except Exception as e:
+        if token and token.is_cancelled():
+            log("🛑 [FrameServer] Render cancelado. Procesos detenidos.")
+            return False
+        log(f"⚠️ [FrameServer] Fallo en el servidor de fotogramas: {e}. Reintentando con renderizado estándar.")
+        return False
+    finally:
+        if token:
+            token.untrack(proc)
+            token.untrack(pool_handle)
+        if writer and writer.is_alive():
+            write_q.put(None)
+            writer.join(timeout=5)
+        if proc and proc.poll() is None:
+            try: proc.kill()
+            except Exception: pass
+        if audio_thread and audio_thread.is_alive():
+            audio_thread.join()
+        if shm is not None:
+            try:
+                shm.close()
+                shm.unlink()
+            except Exception:
+                pass
+        shutil.rmtree(work_dir, ignore_errors=True)
@@ -0,0 +1,145 @@
+"""
+v32.5: Process-Wide Decoded Image Cache
+Master shots (group scenes), fallback banners and static overlays reuse the same
+files across many scenes. Decoded arrays are kept in one LRU per process with a
+memory budget (DECODED_IMAGE_CACHE_MB), so a 200-scene script with 30 unique images
+decodes 30 images, not 200.
+
+Cached arrays are shared between scenes and marked read-only: callers that need to
+modify pixels must copy first.
+"""
+
+import os
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+_image_cache = None
+_image_cache_lock = threading.Lock()
+
+
+class DecodedImageCache:
+    """
+    v32.5: LRU of decoded NumPy arrays bounded by total bytes.
+    - get_or_load(key, loader): returns the cached array or calls loader() once.
+    - hits / misses / evictions counters for render summaries.
+    """
+
+    def __init__(self, max_mb=1024):
+        self.max_bytes = int(float(max_mb) * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            arr = self._entries.get(key)
+            if arr is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return arr
+
+    def put(self, key, arr):
+        if arr is None:
+            return None
+        nbytes = int(getattr(arr, 'nbytes', 0))
+        if nbytes > self.max_bytes:
+            # Bigger than the whole budget: usable now, never retained
+            return arr
+        try:
+            arr.flags.writeable = False
+        except (AttributeError, ValueError):
+            pass
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= int(old.nbytes)
+            self._entries[key] = arr
+            self._bytes += nbytes
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= int(evicted.nbytes)
+                self.evictions += 1
+        return arr
+
+    def get_or_load(self, key, loader):
+        arr = self.get(key)
+        if arr is not None:
+            return arr
+        return self.put(key, loader())
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'size_mb': round(self._bytes / 1048576, 2),
+                'max_mb': round(self.max_bytes / 1048576, 2),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+def get_image_cache():
+    """Process singleton sized by settings.DECODED_IMAGE_CACHE_MB."""
+    global _image_cache
+    if _image_cache is None:
+        with _image_cache_lock:
+            if _image_cache is None:
+                max_mb = 1024
+                try:
+                    from django.conf import settings
+                    max_mb = getattr(settings, 'DECODED_IMAGE_CACHE_MB', 1024)
+                except Exception:
+                    pass
+                _image_cache = DecodedImageCache(max_mb)
+    return _image_cache
+
+
+def _file_key(path):
+    """Cheap identity for a file version (no content read)."""
+    st = os.stat(path)
+    return (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+
+
+def load_image(path):
+    """
+    Decoded image exactly as MoviePy's ImageClip(path) would read it (imageio: RGB or RGBA).
+    Returns a shared read-only array, or None if unreadable.
+    """
+    try:
+        key = ('imageio',) + _file_key(path)
+    except OSError:
+        return None
+
+    def _load():
+        import imageio.v2 as iio
+        return iio.imread(path)
+
+    try:
+        return get_image_cache().get_or_load(key, _load)
+    except Exception as e:
+        logger.warning(f"⚠️ [ImageCache] No se pudo decodificar {os.path.basename(path)}: {e}")
+        return None
+
+
+def cached_image_clip(path, duration=None):
+    """ImageClip backed by the shared decoded cache (same alpha/mask handling as ImageClip(path))."""
+    from moviepy import ImageClip
+    img = load_image(path)
+    clip = ImageClip(img if img is not None else path)
+    return clip.with_duration(duration) if duration is not None else clip
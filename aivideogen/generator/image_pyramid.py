@@ -0,0 +1,215 @@
+"""
+v32.4: Resolution-Aware Image Pyramid
+Ken Burns sources are often 4K-8K stills rendered into a 1080p frame. Instead of
+decoding and warping the full image for every scene, each asset gets power-of-two
+levels (1, 1/2, 1/4, 1/8) keyed by file content:
+- On disk: MEDIA_ROOT/cache/pyramid/<sha1>_L<d>_v<version>.npy (RGB, loaded with mmap).
+- In memory: the process-wide decoded image LRU (v32.5, image_cache.py).
+The engine picks the smallest level that still covers the scene's maximum zoom and
+copies only the region of interest the camera will actually visit (panoramas).
+"""
+
+import os
+import logging
+import threading
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+PYRAMID_LEVELS = (8, 4, 2, 1)
+# Bump when the decoded levels change (v2: EXIF orientation applied for every format)
+PYRAMID_VERSION = 2
+_EXIF_ORIENTATION = 0x0112
+
+# Full-resolution levels are only written to disk for very large images (ROI reads via mmap)
+_ROI_DISK_MIN_PIXELS = 24_000_000
+
+_disk_cache = None
+
+
+def is_pyramid_enabled():
+    from django.conf import settings
+    return getattr(settings, 'IMAGE_PYRAMID_ENABLED', True)
+
+
+def get_pyramid_cache():
+    """Lazy per-process BoundedDiskCache for pyramid levels (None if disabled or unavailable)."""
+    global _disk_cache
+    if _disk_cache is None:
+        try:
+            from django.conf import settings
+            from .disk_cache import BoundedDiskCache
+            _disk_cache = BoundedDiskCache('pyramid', max_mb=getattr(settings, 'IMAGE_PYRAMID_MAX_MB', 4096))
+        except Exception as e:
+            logger.warning(f"⚠️ [Pyramid] Caché en disco no disponible: {e}")
+            _disk_cache = False
+    return _disk_cache or None
+
+
+def _read_header(image_path):
+    """(width, height, EXIF orientation) from the file header only (no pixel decode)."""
+    from PIL import Image
+    with Image.open(image_path) as im:
+        try:
+            orientation = int(im.getexif().get(_EXIF_ORIENTATION, 1) or 1)
+        except Exception:
+            orientation = 1
+        return im.size[0], im.size[1], orientation
+
+
+def get_image_size(image_path):
+    """
+    (width, height) as displayed, i.e. after EXIF orientation (same as the decoded levels).
+    Header only (no pixel decode). None if unreadable.
+    """
+    try:
+        w, h, orientation = _read_header(image_path)
+    except Exception:
+        return None
+    # 5-8: the stored pixels are transposed (phone photos taken in portrait)
+    return (h, w) if orientation in (5, 6, 7, 8) else (w, h)
+
+
+def _apply_orientation(img, orientation):
+    """Rotates / flips a decoded array as PIL's ImageOps.exif_transpose would."""
+    import cv2
+    if orientation == 2:
+        return cv2.flip(img, 1)
+    if orientation == 3:
+        return cv2.rotate(img, cv2.ROTATE_180)
+    if orientation == 4:
+        return cv2.flip(img, 0)
+    if orientation == 5:
+        return cv2.transpose(img)
+    if orientation == 6:
+        return cv2.rotate(img, cv2.ROTATE_90_CLOCKWISE)
+    if orientation == 7:
+        return cv2.flip(cv2.transpose(img), -1)
+    if orientation == 8:
+        return cv2.rotate(img, cv2.ROTATE_90_COUNTERCLOCKWISE)
+    return img
+
+
+def pick_level(src_size, required_scale):
+    """Largest reduction d whose level still has >= required_scale of the original resolution."""
+    w, h = src_size
+    for d in PYRAMID_LEVELS:
+        if d == 1:
+            return 1
+        # Levels smaller than ~2 px per side are useless
+        if 1.0 / d >= required_scale and w // d >= 2 and h // d >= 2:
+            return d
+    return 1
+
+
+def _decode_level(image_path, d):
+    """
+    Decodes level d as RGB. JPEGs use libjpeg DCT scaling (no full-resolution decode).
+    EXIF orientation is read by PIL and applied here (OpenCV's own handling is disabled:
+    it depends on the format), so the level always matches get_image_size().
+    """
+    import cv2
+    reduced = {2: cv2.IMREAD_REDUCED_COLOR_2, 4: cv2.IMREAD_REDUCED_COLOR_4, 8: cv2.IMREAD_REDUCED_COLOR_8}
+    if d > 1 and image_path.lower().endswith(('.jpg', '.jpeg')):
+        img = cv2.imread(image_path, reduced[d] | cv2.IMREAD_IGNORE_ORIENTATION)
+    else:
+        img = cv2.imread(image_path, cv2.IMREAD_COLOR | cv2.IMREAD_IGNORE_ORIENTATION)
+        if img is not None and d > 1:
+            h, w = img.shape[:2]
+            img = cv2.resize(img, (max(1, -(-w // d)), max(1, -(-h // d))), interpolation=cv2.INTER_AREA)
+    if img is None:
+        return None
+    try:
+        orientation = _read_header(image_path)[2]
+    except Exception:
+        orientation = 1
+    return cv2.cvtColor(_apply_orientation(img, orientation), cv2.COLOR_BGR2RGB)
+
+
+def load_level(image_path, d, persist=True):
+    """
+    Returns the (shared, read-only) RGB array of level d, or None.
+    Order: decoded image LRU -> disk cache -> decode (and persist).
+    """
+    from .disk_cache import file_digest
+    from .image_cache import get_image_cache
+
+    digest = file_digest(image_path)
+    if not digest:
+        return None
+    return get_image_cache().get_or_load(('pyramid', digest, d), lambda: _load_level_uncached(image_path, digest, d, persist))
+
+
+def warm_level(image_path, d):
+    """
+    v32.22: Makes sure level d is on disk without keeping it in this process's LRU
+    (a draft render prefetches the level the final frame size will need).
+    """
+    from .disk_cache import file_digest
+    digest = file_digest(image_path)
+    if digest and is_pyramid_enabled():
+        _load_level_uncached(image_path, digest, d, persist=True)
+
+
+def _load_level_uncached(image_path, digest, d, persist):
+    cache = get_pyramid_cache() if persist else None
+    cache_key = f"{digest}_L{d}_v{PYRAMID_VERSION}"
+    arr = None
+    if cache:
+        cached = cache.get(cache_key, ext='.npy')
+        if cached:
+            try:
+                arr = np.load(cached, mmap_mode='r')
+            except Exception as e:
+                logger.warning(f"⚠️ [Pyramid] Nivel corrupto, regenerando: {e}")
+
+    if arr is None:
+        arr = _decode_level(image_path, d)
+        if arr is None:
+            return None
+        if cache and (d > 1 or arr.shape[0] * arr.shape[1] >= _ROI_DISK_MIN_PIXELS):
+            tmp_path = cache.path_for(f"{cache_key}.{os.getpid()}.{threading.get_ident()}", '.tmp')
+            try:
+                with open(tmp_path, 'wb') as f:
+                    np.save(f, arr)
+                cache.put(cache_key, tmp_path, ext='.npy')
+                cache.evict()
+            except Exception as e:
+                logger.warning(f"⚠️ [Pyramid] No se pudo guardar el nivel L{d}: {e}")
+                try: os.remove(tmp_path)
+                except OSError: pass
+    return arr
+
+
+def load_plan_source(image_path, plan):
+    """
+    v32.4: Loads the smallest pyramid level that covers plan's max zoom, crops it to the
+    region the camera visits and rebases the plan onto it.
+    Returns a contiguous RGB array, or None if the image cannot be read.
+    """
+    w_orig, h_orig = plan.src_size
+    enabled = is_pyramid_enabled()
+    d = pick_level(plan.src_size, plan.required_scale()) if enabled else 1
+    level = load_level(image_path, d, persist=enabled)
+    if level is None:
+        return None
+
+    lh, lw = level.shape[:2]
+    sx, sy = lw / w_orig, lh / h_orig
+
+    # ROI (in level pixels): only what the camera will sample, plus a bilinear margin
+    x0, y0, x1, y1 = plan.source_bounds()
+    lx0, ly0 = max(0, int(x0 * sx) - 2), max(0, int(y0 * sy) - 2)
+    lx1, ly1 = min(lw, int(np.ceil(x1 * sx)) + 2), min(lh, int(np.ceil(y1 * sy)) + 2)
+    if (lx1 - lx0) * (ly1 - ly0) >= lw * lh:
+        lx0, ly0, lx1, ly1 = 0, 0, lw, lh
+
+    source = np.ascontiguousarray(level[ly0:ly1, lx0:lx1])
+    plan.rebase(sx, sy, lx0, ly0)
+    return source
+
+
+def pyramid_stats():
+    cache = get_pyramid_cache()
+    return cache.stats() if cache else {}
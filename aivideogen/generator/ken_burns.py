@@ -0,0 +1,300 @@
+"""
+v32.3: Precompiled Ken Burns Motion Plan
+The zoom / pan / rotate / shake / human-noise parameters of a scene are parsed ONCE
+and compiled into a table of affine matrices (one per output frame) in a single
+NumPy pass. make_frame is reduced to a table lookup + one cv2.warpAffine.
+
+Matrices are stored as inverse maps (output pixel -> source pixel) so they can be
+fed to cv2.warpAffine with WARP_INVERSE_MAP and no per-frame inversion.
+"""
+
+import os
+import re
+import numpy as np
+
+DEFAULT_FPS = 30
+
+# A timestamp closer than this (in frames) to a grid point reuses the precompiled row
+_GRID_TOLERANCE = 1e-4
+
+
+def eval_param(val, default=0.0):
+    """v30.6: Safely evaluates simple math expressions (e.g., '8*360')."""
+    if val is None: return default
+    # v31.3: Robust filtering of JS junk and nulls
+    s = str(val).lower().replace(' ', '').replace(',', '.')
+    if not s or s in ('undefined', 'nan', 'none', 'null'):
+        return default
+
+    # Only allow numbers and basic operators
+    if not re.match(r'^[\d\.\+\-\*\/\(\)]+$', s):
+        try: return float(s)
+        except: return default
+    try:
+        # Using eval with empty globals/locals for safety
+        return float(eval(s, {"__builtins__": None}, {}))
+    except:
+        return default
+
+
+def parse_range(val, default):
+    """'a:b' -> (a, b) | 'a' -> (a, a)."""
+    if isinstance(val, str) and ':' in val:
+        parts = val.split(':')
+        start = eval_param(parts[0], default)
+        return start, eval_param(parts[1], start)
+    start = eval_param(val, default)
+    return start, start
+
+
+def parse_moves(move):
+    """
+    Supports "HOR:0:100 + VER:50:50" or simple "HOR:0:100".
+    Returns a list of (direction, start_pct, end_pct).
+    """
+    moves = []
+    for sm in (move or "HOR:50:50").split('+'):
+        parts = [p.strip() for p in sm.strip().split(':') if p.strip()]
+        if not parts: continue
+        mstart = eval_param(parts[1] if len(parts) > 1 else "50.0", 50.0)
+        mend = eval_param(parts[2] if len(parts) > 2 else str(mstart), mstart)
+        moves.append((parts[0].upper(), mstart, mend))
+    return moves
+
+
+def resolve_human_noise(human_noise_enabled=None, project_settings=None):
+    """v10.1: Explicit per-asset toggle > script settings > HUMAN_SIGNATURE_ENABLED env."""
+    if human_noise_enabled is not None:
+        return human_noise_enabled
+    enabled = str(os.getenv('HUMAN_SIGNATURE_ENABLED', 'True')).lower() == 'true'
+    # Override from script settings if present
+    if project_settings and 'human_signature' in project_settings:
+        enabled = project_settings['human_signature']
+    return enabled
+
+
+def base_crop_size(src_size, target_size, fit=None):
+    """The crop window at zoom 1.0: COVER by default, CONTAIN when fit is set."""
+    w_orig, h_orig = src_size
+    target_w, target_h = target_size
+    tar_ar = target_w / target_h
+    img_ar = w_orig / h_orig
+
+    if fit == "contain" or fit is True:
+        # FIT: the window is larger than the image in the dimension that doesn't fit
+        if img_ar > tar_ar:
+            return w_orig, int(w_orig / tar_ar)
+        return int(h_orig * tar_ar), h_orig
+    # COVER (Default)
+    if img_ar > tar_ar:
+        return int(h_orig * tar_ar), h_orig
+    return w_orig, int(w_orig / tar_ar)
+
+
+class KenBurnsPlan:
+    """
+    v32.3: Per-scene camera motion, compiled once.
+    - matrices(t): vectorized (N, 2, 3) inverse affine maps for an array of timestamps.
+    - matrix_at(t): precompiled row for frame-aligned t, exact evaluation otherwise.
+    - rebase(): v32.4 re-targets the maps to a downscaled / cropped copy of the source
+      (pyramid level + ROI) while the motion itself stays in original pixel units.
+    """
+
+    __slots__ = (
+        'src_size', 'target_size', 'duration', 'fps', 'base_w', 'base_h',
+        'z_start', 'z_end', 'moves', 'rotate_range', 'w_rotate',
+        'shake_amp', 'noise_amp', 'source_transform', 'table',
+    )
+
+    def __init__(self, src_size, target_size, duration, fps=DEFAULT_FPS, zoom="1.0:1.3", move="HOR:50:50",
+                 fit=None, shake=False, shake_intensity=5, rotate=None, w_rotate=None,
+                 noise_enabled=False, noise_intensity=1.0):
+        self.src_size = (int(src_size[0]), int(src_size[1]))
+        self.target_size = (int(target_size[0]), int(target_size[1]))
+        self.duration = float(duration or 0.0)
+        self.fps = float(fps or DEFAULT_FPS)
+        self.base_w, self.base_h = base_crop_size(self.src_size, self.target_size, fit)
+
+        self.z_start, self.z_end = parse_range(zoom, 1.0) if zoom else (1.0, 1.0)
+        self.moves = parse_moves(move)
+        self.rotate_range = parse_range(rotate, 0.0) if rotate else None
+        self.w_rotate = eval_param(w_rotate, 0.0) if w_rotate else 0.0
+        # Shake (Intense): amplitude in pixels
+        self.shake_amp = eval_param(shake_intensity, 5.0) * 2.0 if shake else 0.0
+        # v10.1: Human Camera Noise (sub-pixel drift)
+        if noise_enabled:
+            self.noise_amp = eval_param(noise_intensity, 1.0) if noise_intensity is not None else 1.0
+        else:
+            self.noise_amp = 0.0
+
+        # (scale_x, scale_y, offset_x, offset_y): original pixel -> loaded source pixel
+        self.source_transform = None
+        n_frames = int(self.duration * self.fps) + 1
+        self.table = self.matrices(np.arange(n_frames, dtype=np.float64) / self.fps)
+
+    def matrices(self, t):
+        """Inverse affine maps for every timestamp in t (one NumPy pass, no Python loop per frame)."""
+        t = np.atleast_1d(np.asarray(t, dtype=np.float64))
+        w_orig, h_orig = self.src_size
+        target_w, target_h = self.target_size
+
+        progress = t / self.duration if self.duration else np.zeros_like(t)
+
+        # 1. Zoom > 1 means "Zoom In" -> Show smaller area
+        zoom = self.z_start + (self.z_end - self.z_start) * progress
+        curr_w = self.base_w / zoom
+        curr_h = self.base_h / zoom
+
+        # 2. v30.10: Slack-based panning (matches the editor viewfinder)
+        # 0% -> -slack/2 | 50% -> 0 | 100% -> +slack/2 (strict clamp, never shows black)
+        slack_w = w_orig - curr_w
+        slack_h = h_orig - curr_h
+        off_x = np.zeros_like(t)
+        off_y = np.zeros_like(t)
+        for mdir, mstart, mend in self.moves:
+            factor = (mstart + (mend - mstart) * progress - 50.0) / 50.0
+            if mdir == 'HOR':
+                off_x = np.maximum(-slack_w / 2.0, np.minimum(slack_w / 2.0, factor * (slack_w / 2.0)))
+            elif mdir == 'VER':
+                off_y = np.maximum(-slack_h / 2.0, np.minimum(slack_h / 2.0, factor * (slack_h / 2.0)))
+
+        if self.noise_amp:
+            off_x = off_x + (np.sin(t * 0.5 * 2 * np.pi) * 1.5 + np.cos(t * 1.2 * 2 * np.pi) * 0.8) * self.noise_amp
+            off_y = off_y + (np.cos(t * 0.7 * 2 * np.pi) * 1.2 + np.sin(t * 1.5 * 2 * np.pi) * 0.7) * self.noise_amp
+
+        if self.shake_amp:
+            off_x = off_x + np.sin(t * 12.0 * 2 * np.pi) * self.shake_amp
+            off_y = off_y + np.cos(t * 12.0 * 1.5 * np.pi) * self.shake_amp
+
+        cx = w_orig / 2.0 + off_x
+        cy = h_orig / 2.0 + off_y
+
+        # 3. v30.9: Rotation around the crop center (CSS CW -> OpenCV CCW)
+        angle = np.zeros_like(t)
+        if self.rotate_range:
+            r_start, r_end = self.rotate_range
+            angle = angle + r_start + (r_end - r_start) * progress
+        if self.w_rotate:
+            angle = angle + self.w_rotate * t
+        rad = np.radians(-angle)
+        c, s = np.cos(rad), np.sin(rad)
+
+        # Output (0,0) -> rotated top-left corner; output axes -> rotated crop edges
+        m = np.empty((t.shape[0], 2, 3), dtype=np.float64)
+        m[:, 0, 0] = c * curr_w / target_w
+        m[:, 1, 0] = s * curr_w / target_w
+        m[:, 0, 1] = -s * curr_h / target_h
+        m[:, 1, 1] = c * curr_h / target_h
+        m[:, 0, 2] = cx - c * curr_w / 2 + s * curr_h / 2
+        m[:, 1, 2] = cy - s * curr_w / 2 - c * curr_h / 2
+
+        if self.source_transform:
+            # Pixel-center aware: x_src = (x_orig + 0.5) * scale - 0.5 - offset
+            sx, sy, ox, oy = self.source_transform
+            m[:, 0, :] *= sx
+            m[:, 1, :] *= sy
+            m[:, 0, 2] += 0.5 * sx - 0.5 - ox
+            m[:, 1, 2] += 0.5 * sy - 0.5 - oy
+        return m
+
+    @property
+    def n_frames(self):
+        return len(self.table)
+
+    def required_scale(self):
+        """Smallest source scale (<= 1.0) that still gives >= 1 source pixel per output pixel at max zoom."""
+        zooms = [z for z in (self.z_start, self.z_end) if z > 0] or [1.0]
+        max_zoom = max(zooms)
+        return min(1.0, max(self.target_size[0] * max_zoom / self.base_w,
+                            self.target_size[1] * max_zoom / self.base_h))
+
+    def source_bounds(self, margin=4.0, oversample=4):
+        """
+        Bounding box (x0, y0, x1, y1) in original pixels of everything the camera will sample,
+        clamped to the image. Sampled at oversample x fps so fast shake peaks are not missed.
+        """
+        saved, self.source_transform = self.source_transform, None
+        try:
+            n = max(2, int(self.duration * self.fps * oversample) + 1)
+            m = self.matrices(np.linspace(0.0, self.duration, n))
+        finally:
+            self.source_transform = saved
+        target_w, target_h = self.target_size
+        corners = np.array([[0, 0, 1], [target_w, 0, 1], [0, target_h, 1], [target_w, target_h, 1]], dtype=np.float64)
+        pts = np.einsum('nij,kj->nki', m, corners).reshape(-1, 2)
+        w_orig, h_orig = self.src_size
+        x0 = max(0, int(np.floor(pts[:, 0].min() - margin)))
+        y0 = max(0, int(np.floor(pts[:, 1].min() - margin)))
+        x1 = min(w_orig, int(np.ceil(pts[:, 0].max() + margin)) + 1)
+        y1 = min(h_orig, int(np.ceil(pts[:, 1].max() + margin)) + 1)
+        return x0, y0, max(x0 + 1, x1), max(y0 + 1, y1)
+
+    def rebase(self, scale_x=1.0, scale_y=1.0, offset_x=0, offset_y=0):
+        """Re-targets the maps to a loaded source that is a scaled (and/or cropped) copy of the original."""
+        if (scale_x, scale_y, offset_x, offset_y) == (1.0, 1.0, 0, 0):
+            self.source_transform = None
+        else:
+            self.source_transform = (float(scale_x), float(scale_y), float(offset_x), float(offset_y))
+        self.table = self.matrices(np.arange(len(self.table), dtype=np.float64) / self.fps)
+
+    def ffmpeg_corner_exprs(self):
+        """
+        v32.6: The same motion as matrices(), written as FFmpeg expressions (per-frame `on`)
+        for the perspective filter: {'x0','y0' (top-left), 'x1','y1' (top-right),
+        'x2','y2' (bottom-left), 'x3','y3' (bottom-right)} in loaded-source pixels.
+        Registers: 0=progress 1=crop_w 2=crop_h 3=center_x 4=center_y 5=angle(rad).
+        """
+        def num(v):
+            return f"{float(v):.10f}"
+
+        w_orig, h_orig = self.src_size
+        # The output frame counter is already incremented when perspective evaluates (1-based)
+        t = f"((on-1)/{num(self.fps)})"
+        parts = [f"st(0,{t}/{num(self.duration)})" if self.duration else "st(0,0)"]
+        zoom = f"({num(self.z_start)}+{num(self.z_end - self.z_start)}*ld(0))"
+        parts.append(f"st(1,{num(self.base_w)}/{zoom})")
+        parts.append(f"st(2,{num(self.base_h)}/{zoom})")
+
+        # v30.10: Slack-based panning with the strict clamp (last move per axis wins)
+        off_x, off_y = "0", "0"
+        for mdir, mstart, mend in self.moves:
+            factor = f"(({num(mstart)}+{num(mend - mstart)}*ld(0)-50)/50)"
+            if mdir == 'HOR':
+                half = f"(({num(w_orig)}-ld(1))/2)"
+                off_x = f"max(-{half},min({half},{factor}*{half}))"
+            elif mdir == 'VER':
+                half = f"(({num(h_orig)}-ld(2))/2)"
+                off_y = f"max(-{half},min({half},{factor}*{half}))"
+        if self.noise_amp:
+            off_x += f"+(sin({t}*PI)*1.5+cos({t}*2.4*PI)*0.8)*{num(self.noise_amp)}"
+            off_y += f"+(cos({t}*1.4*PI)*1.2+sin({t}*3*PI)*0.7)*{num(self.noise_amp)}"
+        if self.shake_amp:
+            off_x += f"+sin({t}*24*PI)*{num(self.shake_amp)}"
+            off_y += f"+cos({t}*18*PI)*{num(self.shake_amp)}"
+        parts.append(f"st(3,{num(w_orig / 2.0)}+{off_x})")
+        parts.append(f"st(4,{num(h_orig / 2.0)}+{off_y})")
+
+        angle = "0"
+        if self.rotate_range:
+            r_start, r_end = self.rotate_range
+            angle += f"+{num(r_start)}+{num(r_end - r_start)}*ld(0)"
+        if self.w_rotate:
+            angle += f"+{num(self.w_rotate)}*{t}"
+        parts.append(f"st(5,-({angle})*PI/180)")
+        prelude = ";".join(parts)
+
+        sx, sy, ox, oy = self.source_transform or (1.0, 1.0, 0.0, 0.0)
+        exprs = {}
+        for k, (a, b) in enumerate(((-0.5, -0.5), (0.5, -0.5), (-0.5, 0.5), (0.5, 0.5))):
+            x = f"ld(3)+cos(ld(5))*ld(1)*{num(a)}-sin(ld(5))*ld(2)*{num(b)}"
+            y = f"ld(4)+sin(ld(5))*ld(1)*{num(a)}+cos(ld(5))*ld(2)*{num(b)}"
+            exprs[f"x{k}"] = f"{prelude};({x}+0.5)*{num(sx)}-0.5-{num(ox)}"
+            exprs[f"y{k}"] = f"{prelude};({y}+0.5)*{num(sy)}-0.5-{num(oy)}"
+        return exprs
+
+    def matrix_at(self, t):
+        pos = t * self.fps
+        idx = int(round(pos))
+        if abs(pos - idx) < _GRID_TOLERANCE and 0 <= idx < len(self.table):
+            return self.table[idx]
+        return self.matrices(t)[0]
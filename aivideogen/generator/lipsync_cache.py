@@ -0,0 +1,81 @@
+"""
+v32.22: Lip-Sync Output Cache
+Local Wav2Lip renders (the heaviest per-scene step) were recomputed on every render,
+so a draft followed by the final render paid for them twice. Outputs are now stored in
+MEDIA_ROOT/cache/lipsync (BoundedDiskCache, LRU by mtime), keyed by the content of the
+asset and of the voice audio plus the cut (start / duration). The lip-sync video does not
+depend on the output frame size or fps, so draft and final renders share every entry.
+"""
+
+import os
+import shutil
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Bump when the lip-sync models or the output encoding change
+LIPSYNC_CACHE_VERSION = 1
+
+_lipsync_cache = None
+
+
+def get_lipsync_cache():
+    """Process-wide lip-sync store (None when LIPSYNC_CACHE_ENABLED is off or unavailable)."""
+    global _lipsync_cache
+    from django.conf import settings
+    if not getattr(settings, 'LIPSYNC_CACHE_ENABLED', True):
+        return None
+    if _lipsync_cache is None:
+        try:
+            from .disk_cache import BoundedDiskCache
+            _lipsync_cache = BoundedDiskCache('lipsync', max_mb=getattr(settings, 'LIPSYNC_CACHE_MAX_MB', 2048))
+        except Exception as e:
+            logger.warning(f"⚠️ [LipSyncCache] Caché no disponible: {e}")
+            _lipsync_cache = False
+    return _lipsync_cache or None
+
+
+def lipsync_cache_key(asset_path, audio_path, start_time, duration):
+    from .disk_cache import file_digest, hash_key
+    asset_digest, audio_digest = file_digest(asset_path), file_digest(audio_path)
+    if not asset_digest or not audio_digest:
+        return None
+    return hash_key('lipsync', LIPSYNC_CACHE_VERSION, asset_digest, audio_digest, round(float(start_time), 3), round(float(duration), 3))
+
+
+def render_lipsync(asset_path, audio_path, output_path, start_time=0.0, duration=None, should_stop=None, log=None):
+    """
+    Writes the lip-synced video of (asset, audio) to output_path, from the cache when
+    possible. Returns output_path if it exists afterwards, else None.
+    """
+    from django.conf import settings
+
+    cache = get_lipsync_cache()
+    key = lipsync_cache_key(asset_path, audio_path, start_time, duration) if cache else None
+    if key:
+        cached = cache.get(key, ext='.mp4')
+        if cached:
+            try:
+                shutil.copyfile(cached, output_path)
+                if log:
+                    log(f"    ⚡ [Lip-Sync] Reutilizado de la caché ({key[:10]}).")
+                return output_path
+            except OSError as e:
+                logger.warning(f"⚠️ [LipSyncCache] Entrada ilegible {key[:10]}: {e}")
+
+    from scripts.local_lipsync import LipSyncEngine
+    model_path = os.path.join(settings.BASE_DIR, "models", "lipsync", "wav2lip_gan.onnx")
+    detector_path = os.path.join(settings.BASE_DIR, "models", "lipsync", "face_detector.onnx")
+    LipSyncEngine(model_path, detector_path).process_video(
+        asset_path, audio_path, output_path, start_time=start_time, duration=duration, should_stop=should_stop)
+    if not os.path.exists(output_path):
+        return None
+    if key and not (should_stop and should_stop()):
+        try:
+            tmp_path = cache.path_for(f"{key}.{os.getpid()}", '.tmp')
+            shutil.copyfile(output_path, tmp_path)
+            cache.put(key, tmp_path, ext='.mp4')
+            cache.evict()
+        except OSError as e:
+            logger.warning(f"⚠️ [LipSyncCache] No se pudo guardar: {e}")
+    return output_path
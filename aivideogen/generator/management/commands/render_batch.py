@@ -0,0 +1,55 @@
+"""
+v32.18: Batch render from a manifest (replaces the sequential launch_batch.py loop).
+    python manage.py render_batch manifest.json [--name N] [--concurrency N] [--no-wait]
+    python manage.py render_batch --report BATCH
+Jobs are queued longest first and rendered in parallel within the CPU / RAM budget
+(see generator/batch.py). Without a running render_worker the supervisor runs inline.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from generator import render_queue
+from generator.batch import load_manifest, launch_batch, batch_report, format_report
+
+
+class Command(BaseCommand):
+    help = "Renderiza un lote de guiones en paralelo según el presupuesto de CPU/RAM."
+
+    def add_arguments(self, parser):
+        parser.add_argument('manifest', nargs='?', help="Manifiesto JSON del lote.")
+        parser.add_argument('--name', default=None, help="Identificador del lote (por defecto el del manifiesto o uno aleatorio).")
+        parser.add_argument('--concurrency', type=int, default=None,
+                            help="Máximo de renders simultáneos si el supervisor corre aquí (0 = según presupuesto).")
+        parser.add_argument('--no-wait', action='store_true', help="Solo encola y sale.")
+        parser.add_argument('--report', default=None, help="Muestra el informe de un lote existente.")
+
+    def handle(self, *args, **options):
+        if options['report']:
+            self.stdout.write(format_report(batch_report(options['report'])))
+            return
+        if not options['manifest']:
+            raise CommandError("Indica un manifiesto o --report BATCH.")
+
+        try:
+            name, jobs = load_manifest(options['manifest'])
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Manifiesto inválido: {e}")
+        if not jobs:
+            raise CommandError("El manifiesto no contiene trabajos.")
+
+        batch_id = launch_batch(jobs, name=options['name'] or name)
+        self.stdout.write(f"📦 Lote {batch_id}: {len(jobs)} trabajos en cola.")
+        if options['no_wait']:
+            if not render_queue.ensure_worker_running():
+                self.stdout.write("⚠️ No se pudo lanzar el worker: el lote se renderizará cuando arranque 'render_worker'.")
+            return
+
+        if render_queue.worker_alive():
+            # A render_worker already consumes the queue: just follow the batch
+            while batch_report(batch_id)['pending']:
+                time.sleep(5)
+        else:
+            render_queue.supervise(concurrency=options['concurrency'], once=True, write=self.stdout.write)
+        self.stdout.write(format_report(batch_report(batch_id)))
@@ -0,0 +1,56 @@
+"""
+v32.21: Dry-run of a render (see generator/planner.py).
+    python manage.py render_plan script.json [--aspect-ratio R] [--engine E] [--voice V] [--draft] [--json]
+    python manage.py render_plan --project ID [--draft] [--json]
+Exits with status 1 when the plan has errors (usable as a pre-flight check in scripts).
+"""
+
+import sys
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from generator.models import VideoProject
+from generator.planner import plan_render, format_plan
+
+
+class Command(BaseCommand):
+    help = "Valida un guion y estima su render sin sintetizar audio ni decodificar imágenes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('script', nargs='?', help="Guion AVGL (JSON).")
+        parser.add_argument('--project', type=int, default=None, help="Planifica el guion de un proyecto existente.")
+        parser.add_argument('--aspect-ratio', default='landscape', choices=['landscape', 'portrait'])
+        parser.add_argument('--engine', default='edge', choices=['edge', 'eleven'])
+        parser.add_argument('--voice', default=None, help="Voz del proyecto (sustituye la del guion).")
+        parser.add_argument('--draft', action='store_true', help="Estima el coste con el perfil borrador (v32.22).")
+        parser.add_argument('--json', action='store_true', help="Salida JSON completa.")
+
+    def handle(self, *args, **options):
+        if options['project']:
+            project = VideoProject.objects.filter(id=options['project']).first()
+            if project is None:
+                raise CommandError(f"Proyecto {options['project']} no existe.")
+            if options['draft']:
+                project.render_profile = 'draft'  # Not saved
+            plan = plan_render(project)
+        elif options['script']:
+            try:
+                with open(options['script'], 'r', encoding='utf-8') as f:
+                    script_text = f.read()
+            except OSError as e:
+                raise CommandError(f"No se pudo leer el guion: {e}")
+            # Unsaved project: only carries the render settings
+            project = VideoProject(script_text=script_text, aspect_ratio=options['aspect_ratio'],
+                                   engine=options['engine'], voice_id=options['voice'],
+                                   render_profile='draft' if options['draft'] else 'final')
+            plan = plan_render(project)
+        else:
+            raise CommandError("Indica un guion o --project ID.")
+
+        if options['json']:
+            self.stdout.write(json.dumps(plan, ensure_ascii=False, indent=2))
+        else:
+            self.stdout.write(format_plan(plan))
+        if not plan['ok']:
+            sys.exit(1)
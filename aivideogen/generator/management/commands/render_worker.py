@@ -0,0 +1,35 @@
+"""
+v32.17: Render queue supervisor.
+    python manage.py render_worker [--concurrency N] [--once] [--job ID]
+Claims RenderJob rows and runs each render in its own child process (see render_queue.supervise).
+"""
+
+from django.core.management.base import BaseCommand
+
+from generator import render_queue
+from generator.models import RenderJob
+
+
+class Command(BaseCommand):
+    help = "Consume la cola de renders (RenderJob) con N procesos hijos."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=None,
+                            help="Máximo de renders simultáneos (por defecto RENDER_WORKER_CONCURRENCY, 0 = según presupuesto de CPU/RAM).")
+        parser.add_argument('--once', action='store_true',
+                            help="Sale cuando la cola queda vacía.")
+        parser.add_argument('--job', type=int, default=None,
+                            help="Ejecuta solo ese job (en este proceso) y sale.")
+
+    def handle(self, *args, **options):
+        if options['job']:
+            return self._run_single(options['job'])
+        render_queue.supervise(concurrency=options['concurrency'], once=options['once'], write=self.stdout.write)
+
+    def _run_single(self, job_id):
+        job = RenderJob.objects.filter(id=job_id).first()
+        if job is None or not render_queue.claim_job(job, render_queue.worker_id()):
+            self.stderr.write(f"❌ Job {job_id} no está en cola.")
+            return
+        render_queue.run_render_job(job_id)
+        self.stdout.write(f"🏁 Job {job_id} -> {render_queue.finish_job(job, 0)}.")
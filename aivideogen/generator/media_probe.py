@@ -0,0 +1,187 @@
+"""
+v32.13: Media Probe Cache
+Every render used to re-open assets just to learn what it already learned last time:
+VideoFileClip / AudioFileClip only to read a duration (each one spawns FFmpeg readers),
+and the v15.8 audio guard decoded the start and the tail of every video asset.
+
+Metadata is now probed ONCE per file version (abspath + size + mtime) and stored as a
+small JSON entry in MEDIA_ROOT/cache/probe (BoundedDiskCache, LRU by mtime):
+- duration, fps, resolution, video/audio codec, audio rate/channels  <- one `ffmpeg -i`
+- audio_ok: the audio track decodes at its start and its last second <- one decode pass
+Replacing or editing a file changes its size/mtime, so stale entries are never served.
+"""
+
+import os
+import re
+import json
+import logging
+import subprocess
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Bump when the probed fields or the audio verdict change
+MEDIA_PROBE_VERSION = 1
+# Seconds decoded at each end of the audio track by the health check
+AUDIO_CHECK_SECONDS = 1.0
+
+_probe_cache = None
+_memo = {}
+_memo_lock = threading.Lock()
+
+_AUDIO_STREAM_RE = re.compile(r"Stream #\d+:\d+.*?: Audio: (\w+).*?(\d+) Hz, ([^,]+)")
+
+
+def get_probe_cache():
+    """Process-wide probe store (None when MEDIA_PROBE_CACHE_ENABLED is off or unavailable)."""
+    global _probe_cache
+    from django.conf import settings
+    if not getattr(settings, 'MEDIA_PROBE_CACHE_ENABLED', True):
+        return None
+    if _probe_cache is None:
+        try:
+            from .disk_cache import BoundedDiskCache
+            _probe_cache = BoundedDiskCache('probe', max_mb=getattr(settings, 'MEDIA_PROBE_CACHE_MAX_MB', 16))
+        except Exception as e:
+            logger.warning(f"⚠️ [MediaProbe] Caché no disponible: {e}")
+            _probe_cache = False
+    return _probe_cache or None
+
+
+def _audio_stream_info(infos):
+    """Codec and channel count of the first audio stream (not exposed by MoviePy's parser)."""
+    match = _AUDIO_STREAM_RE.search(infos or '')
+    if not match:
+        return None, None
+    layout = match.group(3).strip()
+    channels = {'mono': 1, 'stereo': 2, '2.1': 3, 'quad': 4, '5.0': 5, '5.1': 6, '7.1': 8}.get(layout.split('(')[0])
+    if channels is None:
+        digits = re.match(r"(\d+) channels", layout)
+        channels = int(digits.group(1)) if digits else None
+    return match.group(1), channels
+
+
+def _check_audio(path, duration):
+    """
+    v15.8 guard as one FFmpeg decode: first and last AUDIO_CHECK_SECONDS of the first audio
+    stream into the null muxer. Truncated/corrupt tails fail here instead of mid-render.
+    """
+    from .segment_renderer import get_ffmpeg_exe
+    window = str(AUDIO_CHECK_SECONDS)
+    cmd = [get_ffmpeg_exe(), '-v', 'error', '-t', window, '-i', path]
+    outputs = ['-map', '0:a:0', '-f', 'null', '-']
+    if duration and duration > AUDIO_CHECK_SECONDS:
+        cmd += ['-sseof', f"-{window}", '-i', path]
+        outputs += ['-map', '1:a:0', '-f', 'null', '-']
+    try:
+        res = subprocess.run(cmd + outputs, capture_output=True, timeout=60)
+    except Exception as e:
+        return False, str(e)
+    if res.returncode != 0:
+        return False, res.stderr.decode('utf-8', errors='replace').strip()[-300:]
+    return True, None
+
+
+def _probe(path):
+    """One `ffmpeg -i` (parsed by MoviePy's own parser, so durations match VideoFileClip) + audio check."""
+    from moviepy.video.io.ffmpeg_reader import FFmpegInfosParser
+    from .segment_renderer import get_ffmpeg_exe
+    res = subprocess.run([get_ffmpeg_exe(), '-hide_banner', '-i', path], capture_output=True, timeout=60)
+    text = res.stderr.decode('utf8', errors='ignore')
+    try:
+        infos = FFmpegInfosParser(text, path).parse()
+    except Exception:
+        # Still images report "Duration: N/A"
+        infos = FFmpegInfosParser(text, path, check_duration=False).parse()
+
+    meta = {
+        'duration': infos.get('duration'),
+        'has_video': bool(infos.get('video_found')),
+        'has_audio': bool(infos.get('audio_found')),
+        'width': None, 'height': None, 'fps': None, 'video_codec': None,
+        'audio_codec': None, 'audio_fps': None, 'audio_channels': None,
+        'audio_ok': None, 'audio_error': None,
+    }
+    if meta['has_video']:
+        size = infos.get('video_size') or [None, None]
+        meta.update(width=size[0], height=size[1], fps=infos.get('video_fps'),
+                    video_codec=infos.get('video_codec_name'))
+    if meta['has_audio']:
+        meta['audio_codec'], meta['audio_channels'] = _audio_stream_info(text)
+        meta['audio_fps'] = infos.get('audio_fps')
+        meta['audio_ok'], meta['audio_error'] = _check_audio(path, meta['duration'])
+    return meta
+
+
+def probe_media(path):
+    """
+    v32.13: Cached metadata dict for a media file (see module docstring for the fields),
+    or None if the file does not exist or FFmpeg cannot read it.
+    """
+    if not path:
+        return None
+    try:
+        abspath = os.path.abspath(path)
+        st = os.stat(abspath)
+    except OSError:
+        return None
+
+    memo_key = (abspath, st.st_size, st.st_mtime_ns)
+    with _memo_lock:
+        meta = _memo.get(memo_key)
+    if meta is not None:
+        return meta
+
+    from .disk_cache import hash_key
+    cache = get_probe_cache()
+    key = hash_key('probe', MEDIA_PROBE_VERSION, *memo_key)
+    cached = cache.get(key, ext='.json') if cache else None
+    if cached:
+        try:
+            with open(cached, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except Exception:
+            meta = None
+
+    if meta is None:
+        try:
+            meta = _probe(abspath)
+        except Exception as e:
+            logger.warning(f"⚠️ [MediaProbe] No se pudo analizar {os.path.basename(path)}: {e}")
+            return None
+        if meta['audio_ok'] is False:
+            logger.warning(f"🔥 [MediaProbe] Audio ilegible en {os.path.basename(path)}: {meta['audio_error']}")
+        if cache:
+            tmp = cache.path_for(key, f".json.{os.getpid()}.tmp")
+            try:
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    json.dump(meta, f)
+                cache.put(key, tmp, ext='.json')
+                cache.evict()
+            except Exception as e:
+                logger.warning(f"⚠️ [MediaProbe] No se pudo guardar {os.path.basename(path)}: {e}")
+
+    with _memo_lock:
+        _memo[memo_key] = meta
+    return meta
+
+
+def media_duration(path, default=None):
+    """Duration in seconds from the probe cache (default if unknown)."""
+    meta = probe_media(path)
+    if meta and meta.get('duration'):
+        return float(meta['duration'])
+    return default
+
+
+def audio_is_healthy(path):
+    """True/False verdict of the cached audio check, None if the file has no audio (or no probe)."""
+    meta = probe_media(path)
+    if not meta or not meta.get('has_audio'):
+        return None
+    return meta.get('audio_ok')
+
+
+def media_probe_stats():
+    cache = get_probe_cache()
+    return cache.stats() if cache else {}
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 03:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('generator', '0026_alter_videoproject_dubbing_mode_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='videoproject',
+            name='render_mode',
+            field=models.CharField(choices=[('cpu', 'Procesador (CPU)'), ('gpu', 'Tarjeta NVIDIA (GPU)'), ('segments', 'Segmentos Paralelos (CPU Multi-Núcleo)')], default='cpu', help_text='Método de renderizado de video', max_length=10),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 04:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('generator', '0027_videoproject_render_mode_segments'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='videoproject',
+            name='render_mode',
+            field=models.CharField(choices=[('cpu', 'Procesador (CPU)'), ('gpu', 'Tarjeta NVIDIA (GPU)'), ('segments', 'Segmentos Paralelos (CPU Multi-Núcleo)'), ('frames', 'Servidor de Fotogramas (Multi-Proceso)')], default='cpu', help_text='Método de renderizado de video', max_length=10),
+        ),
+    ]
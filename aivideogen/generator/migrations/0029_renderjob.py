@@ -0,0 +1,36 @@
+# Generated by Django 5.2.5 on 2026-10-18 04:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('generator', '0028_videoproject_render_mode_frames'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RenderJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('queued', 'En cola'), ('running', 'Renderizando'), ('done', 'Terminado'), ('failed', 'Fallido'), ('cancelled', 'Cancelado')], db_index=True, default='queued', max_length=20)),
+                ('priority', models.IntegerField(default=0, help_text='Mayor prioridad se renderiza antes')),
+                ('source', models.CharField(default='ui', help_text='Origen del trabajo (ui/editor/batch)', max_length=20)),
+                ('attempts', models.IntegerField(default=0)),
+                ('max_attempts', models.IntegerField(default=2, help_text='Intentos antes de marcar como fallido (reintento tras caída del proceso)')),
+                ('worker', models.CharField(blank=True, help_text='Proceso que ejecuta el trabajo (host:pid)', max_length=100)),
+                ('pid', models.IntegerField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('heartbeat_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='render_jobs', to='generator.videoproject')),
+            ],
+            options={
+                'ordering': ['-priority', 'created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.5 on 2026-10-18 04:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('generator', '0029_renderjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='renderjob',
+            name='batch',
+            field=models.CharField(blank=True, db_index=True, help_text='Lote al que pertenece (render_batch)', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='renderjob',
+            name='cpu_share',
+            field=models.IntegerField(blank=True, help_text='Núcleos asignados por el worker', null=True),
+        ),
+        migrations.AddField(
+            model_name='renderjob',
+            name='est_cpu',
+            field=models.FloatField(default=1.0, help_text='Núcleos estimados'),
+        ),
+        migrations.AddField(
+            model_name='renderjob',
+            name='est_ram_mb',
+            field=models.IntegerField(default=0, help_text='Memoria estimada (MB)'),
+        ),
+        migrations.AddField(
+            model_name='renderjob',
+            name='est_video_seconds',
+            field=models.FloatField(blank=True, help_text='Duración estimada del video (s)', null=True),
+        ),
+        migrations.AddField(
+            model_name='renderjob',
+            name='video_seconds',
+            field=models.FloatField(blank=True, help_text='Duración real del video renderizado (s)', null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 05:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('generator', '0030_renderjob_batch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='videoproject',
+            name='render_profile',
+            field=models.CharField(choices=[('final', 'Final (1080p, 30 fps)'), ('draft', 'Borrador (baja resolución, 15 fps)')], default='final', help_text='Perfil de salida (v32.22: borrador rápido o final)', max_length=10),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 05:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('generator', '0031_videoproject_render_profile'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='videoproject',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pendiente'), ('queued', 'En cola'), ('processing', 'Procesando'), ('completed', 'Completado'), ('failed', 'Fallido'), ('cancelled', 'Cancelado')], default='pending', max_length=20),
+        ),
+    ]
@@ -55,6 +55,7 @@ class SFX(models.Model):
 class VideoProject(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pendiente'),
+        ('queued', 'En cola'),  # v32.22: RenderJob waiting for a worker
         ('processing', 'Procesando'),
         ('completed', 'Completado'),
         ('failed', 'Fallido'),
@@ -72,6 +73,12 @@ class VideoProject(models.Model):
     RENDER_MODE_CHOICES = [
         ('cpu', 'Procesador (CPU)'),
         ('gpu', 'Tarjeta NVIDIA (GPU)'),
+        ('segments', 'Segmentos Paralelos (CPU Multi-Núcleo)'),
+        ('frames', 'Servidor de Fotogramas (Multi-Proceso)'),
+    ]
+    RENDER_PROFILE_CHOICES = [
+        ('final', 'Final (1080p, 30 fps)'),
+        ('draft', 'Borrador (baja resolución, 15 fps)'),
     ]
 
     title = models.CharField(max_length=255, default="Proyecto sin título")
@@ -79,6 +86,7 @@ class VideoProject(models.Model):
     engine = models.CharField(max_length=20, choices=ENGINE_CHOICES, default='edge')
     aspect_ratio = models.CharField(max_length=20, choices=ASPECT_RATIO_CHOICES, default='landscape')
     render_mode = models.CharField(max_length=10, choices=RENDER_MODE_CHOICES, default='cpu', help_text="Método de renderizado de video")
+    render_profile = models.CharField(max_length=10, choices=RENDER_PROFILE_CHOICES, default='final', help_text="Perfil de salida (v32.22: borrador rápido o final)")
     voice_id = models.CharField(max_length=255, blank=True, null=True, help_text="ID de la voz o nombre (Edge/ElevenLabs)")
     
     background_music = models.ForeignKey(Music, on_delete=models.SET_NULL, null=True, blank=True, help_text="Música de fondo para el video")
@@ -139,3 +147,39 @@ class YouTubeToken(models.Model):
 
     def __str__(self):
         return f"YouTube Token (Último uso: {self.updated_at})"
+
+class RenderJob(models.Model):
+    """v32.17: Persistent render queue entry, consumed by `manage.py render_worker`."""
+    STATUS_CHOICES = [
+        ('queued', 'En cola'),
+        ('running', 'Renderizando'),
+        ('done', 'Terminado'),
+        ('failed', 'Fallido'),
+        ('cancelled', 'Cancelado'),
+    ]
+    project = models.ForeignKey(VideoProject, on_delete=models.CASCADE, related_name='render_jobs')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued', db_index=True)
+    priority = models.IntegerField(default=0, help_text="Mayor prioridad se renderiza antes")
+    source = models.CharField(max_length=20, default='ui', help_text="Origen del trabajo (ui/editor/batch)")
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=2, help_text="Intentos antes de marcar como fallido (reintento tras caída del proceso)")
+    worker = models.CharField(max_length=100, blank=True, help_text="Proceso que ejecuta el trabajo (host:pid)")
+    pid = models.IntegerField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    # v32.18: Batch scheduling (cost estimated from the parsed timeline) and throughput
+    batch = models.CharField(max_length=64, blank=True, db_index=True, help_text="Lote al que pertenece (render_batch)")
+    est_video_seconds = models.FloatField(null=True, blank=True, help_text="Duración estimada del video (s)")
+    est_cpu = models.FloatField(default=1.0, help_text="Núcleos estimados")
+    est_ram_mb = models.IntegerField(default=0, help_text="Memoria estimada (MB)")
+    cpu_share = models.IntegerField(null=True, blank=True, help_text="Núcleos asignados por el worker")
+    video_seconds = models.FloatField(null=True, blank=True, help_text="Duración real del video renderizado (s)")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-priority', 'created_at']
+
+    def __str__(self):
+        return f"Job {self.id} - {self.project.title} ({self.get_status_display()})"
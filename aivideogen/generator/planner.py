@@ -0,0 +1,283 @@
+"""
+v32.21: Dry-Run Render Planner
+Missing assets, overlays, SFX or music used to surface only after the TTS had run and the
+render loop reached the scene (minutes in). plan_render() checks a script in milliseconds,
+without synthesizing audio or decoding pixels:
+
+- parses the script with the engine's parser and the project voice override,
+- voice durations: exact when the scene's TTS request is already in the TTS cache (same key
+  the synthesis would use) or for custom audio (media probe); otherwise words / 2.5, the
+  same estimate the engine uses for silent scenes,
+- compiles the timeline (timeline.py) with every asset resolved through the filename index,
+- resolves overlays, SFX, custom audio and block / global music like the engine does,
+- predicts a per-scene render cost (frames x per-frame cost of its kind, lip-sync, TTS).
+
+Used by the editor on save (api/project/<id>/plan/), api/plan/ and `manage.py render_plan`.
+"""
+
+import os
+import re
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Same speech rate as the engine's estimate for silent scenes (v28.0)
+WORDS_PER_SECOND = 2.5
+# Rough single-core seconds per 1080p output frame, by how the scene is produced
+FRAME_COST_SECONDS = {'color': 0.002, 'image': 0.012, 'video': 0.02}
+LIPSYNC_FRAME_COST_SECONDS = 0.25
+SUBTITLE_COST_SECONDS = 0.05
+# Seconds of one uncached TTS request (requests run TTS_CONCURRENCY at a time)
+TTS_REQUEST_SECONDS = 2.0
+
+
+def estimated_voice_seconds(scene):
+    """v28.0: Estimated narration length (approx 2.5 words/sec, min 1.5s)."""
+    words = len(re.sub(r'\[.*?\]', '', str(scene.text or '')).split())
+    return max(1.5, words / WORDS_PER_SECOND) if words else 1.0
+
+
+# ═══════════════════════════════════════════════════════════════════
+# Media lookups (same order as the engine, no side effects)
+# ═══════════════════════════════════════════════════════════════════
+def _custom_audio_path(scene, assets_dir):
+    from django.conf import settings
+    path = os.path.join(assets_dir, scene.audio)
+    if not os.path.exists(path):
+        path = os.path.join(settings.MEDIA_ROOT, scene.audio)
+    return path if os.path.exists(path) else None
+
+
+def _global_music_path(project, script, assets_dir):
+    """(name, path or None) of the continuous music: project (UI) first, then script."""
+    from django.conf import settings
+    from django.db.models import Q
+    from .models import Music
+    from .asset_index import resolve_asset
+    name = None
+    if project.background_music_id:
+        try: name = os.path.basename(project.background_music.file.name)
+        except Exception: pass
+    name = name or script.background_music
+    if not name:
+        return None, None
+    search_name = os.path.basename(name).lower()
+    name_no_ext = re.sub(r'\.(mp3|wav|m4a)$', '', search_name)
+    name_clean = name_no_ext.replace('_', ' ').replace('-', ' ').strip()
+    name_slug = name_no_ext.replace(' ', '_').replace('-', '_').strip()
+    m = Music.objects.filter(Q(file__icontains=name_no_ext) | Q(file__icontains=name_slug) |
+                             Q(name__icontains=name_clean) | Q(name__icontains=name_no_ext)).first()
+    if m and os.path.exists(m.file.path):
+        return name, m.file.path
+    if os.path.exists(name):
+        return name, name
+    path = os.path.join(settings.MEDIA_ROOT, name)
+    if not os.path.exists(path):
+        music_dir = os.path.join(settings.MEDIA_ROOT, 'music')
+        path = (resolve_asset(search_name, [music_dir, assets_dir], extensions=['.mp3', '.wav', '.m4a'], deep_dirs=[music_dir])
+                or resolve_asset(name_no_ext, (), deep_dirs=[music_dir]) or path)
+    return name, (path if os.path.exists(path) else None)
+
+
+def _block_music_path(music):
+    from django.conf import settings
+    from .models import Music
+    m = Music.objects.filter(file__icontains=music).first() or Music.objects.filter(name__icontains=music).first()
+    if m and os.path.exists(m.file.path):
+        return m.file.path
+    if os.path.exists(music):
+        return music
+    path = os.path.join(settings.MEDIA_ROOT, music)
+    return path if os.path.exists(path) else None
+
+
+# ═══════════════════════════════════════════════════════════════════
+# Voice durations
+# ═══════════════════════════════════════════════════════════════════
+def voice_plan(project, scene, assets_dir):
+    """
+    (audio_durations value, audio_map value, source) of a scene, mirroring the
+    engine's audio stage. source: custom_audio | tts_cache | estimate | silent.
+    """
+    from .avgl_engine import scene_target_lang, scene_tts_text, edge_voice_for, tts_request_key
+    from .media_probe import media_duration
+    from .tts_cache import get_tts_cache, cached_tts_duration
+    from .timeline import scene_pause
+
+    if scene.audio:
+        path = _custom_audio_path(scene, assets_dir)
+        if path:
+            return (media_duration(path) or 1.0), path, 'custom_audio'
+
+    if getattr(scene, 'silent', False) or not str(scene.text).strip():
+        if getattr(scene, 'force_duration', False) and getattr(scene, 'duration', 0.0) > 0:
+            voice = float(scene.duration)
+        elif scene.text:
+            voice = estimated_voice_seconds(scene) + scene_pause(scene)
+        else:
+            voice = 1.0 + scene_pause(scene)
+        return voice, None, 'silent'
+
+    target_lang = scene_target_lang(scene, project)
+    s_lang = getattr(scene, 'language', None)
+    if (s_lang and s_lang.strip()) or (project.language != 'es' and project.language):
+        # Translated at render time (Gemini): the final text, hence the key, is unknown here
+        return estimated_voice_seconds(scene), 'tts', 'estimate'
+
+    text = scene_tts_text(scene, project.engine)
+    if project.engine == 'edge':
+        voice, rate, pitch, _ = edge_voice_for(scene, project, target_lang)
+        key, ext = tts_request_key('edge', text, voice, rate, pitch), '.wav'
+    else:
+        key, ext = tts_request_key('eleven', text, os.getenv('ELEVENLABS_VOICE_ID', 'EXAVITQu4vr4xnSDxMaL')), '.mp3'
+    duration = cached_tts_duration(key, ext)
+    if duration:
+        cache = get_tts_cache()
+        return duration, cache.path_for(key, ext), 'tts_cache'
+    return estimated_voice_seconds(scene), 'tts', 'estimate'
+
+
+# ═══════════════════════════════════════════════════════════════════
+# Plan
+# ═══════════════════════════════════════════════════════════════════
+def plan_render(project, script_text=None):
+    """
+    Dry run of a render: {'ok', 'title', 'duration', 'scenes': [...], 'problems': [...],
+    'tts': {...}, 'est_render_seconds', 'profile', 'elapsed_ms'}. ok is False when any problem is an error.
+    project may be unsaved (CLI); script_text defaults to project.script_text.
+    """
+    from django.conf import settings
+    from .avgl_engine import parse_avgl_json, apply_project_voice
+    from .ken_burns import DEFAULT_FPS
+    from .render_profiles import project_profile, frame_size
+    from .timeline import compile_timeline, first_asset, is_outro, resolve_overlay, resolve_sfx
+
+    started = time.time()
+    problems = []
+
+    def result(**extra):
+        data = {'ok': not any(p['level'] == 'error' for p in problems), 'problems': problems,
+                'elapsed_ms': int((time.time() - started) * 1000)}
+        data.update(extra)
+        return data
+
+    try:
+        script = parse_avgl_json(script_text if script_text is not None else project.script_text)
+    except Exception as e:
+        problems.append({'level': 'error', 'scene': None, 'message': f"Guion inválido: {e}"})
+        return result(title=None, duration=0.0, scenes=[], tts={}, est_render_seconds=None)
+    apply_project_voice(script, project)
+
+    assets_dir = os.path.join(settings.MEDIA_ROOT, 'assets')
+    overlay_dir = os.path.join(settings.MEDIA_ROOT, 'overlays')
+    sfx_dir = os.path.join(settings.MEDIA_ROOT, 'sfx')
+    all_scenes = script.get_all_scenes()
+    if not all_scenes:
+        problems.append({'level': 'error', 'scene': None, 'message': "El guion no tiene escenas."})
+
+    # v32.22: Pixel work scales with the profile's frame rate and frame area (draft)
+    profile = project_profile(project)
+    draft_w, draft_h = frame_size(project.aspect_ratio, profile)
+    full_w, full_h = frame_size(project.aspect_ratio)
+    pixel_scale = (draft_w * draft_h) / float(full_w * full_h)
+
+    audio_durations, audio_map, sources = {}, {}, {}
+    for index, scene in enumerate(all_scenes):
+        voice, audio, source = voice_plan(project, scene, assets_dir)
+        audio_durations[scene], audio_map[scene], sources[id(scene)] = voice, audio, source
+        if scene.audio and source != 'custom_audio':
+            problems.append({'level': 'warning', 'scene': index, 'message':
+                             f"Escena {index + 1} ({scene.title}): audio personalizado no encontrado '{scene.audio}', se usará TTS"})
+
+    timeline = compile_timeline(script, audio_durations, audio_map, assets_dir)
+    problems.extend(timeline.validate())
+
+    dubbing_default = getattr(project, 'dubbing_mode', 'hq')
+    tts_workers = max(1, getattr(settings, 'TTS_CONCURRENCY', 6))
+    pending_tts = 0
+    scenes = []
+    for e in timeline.scenes:
+        scene = e.scene
+        label = f"Escena {e.index + 1} ({scene.title})"
+        source = 'outro' if is_outro(scene) else sources[id(scene)]
+        asset = first_asset(scene)
+        if asset is not None and asset.overlay and not resolve_overlay(asset.overlay, overlay_dir):
+            problems.append({'level': 'error', 'scene': e.index, 'message': f"{label}: overlay no encontrado '{asset.overlay}'"})
+        for sfx in scene.sfx:
+            if not sfx.type or not resolve_sfx(sfx.type, sfx_dir):
+                problems.append({'level': 'error', 'scene': e.index, 'message': f"{label}: SFX no encontrado '{sfx.type}'"})
+
+        kind = e.asset.kind if e.asset and e.asset.path else ('color' if e.asset is None else 'image')
+        dubbing = getattr(scene, 'dubbing_mode', None)
+        if not dubbing or dubbing == 'default':
+            dubbing = dubbing_default
+        lipsync = dubbing == 'lipsync' and kind in ('image', 'video') and bool(e.audio_path) and not is_outro(scene)
+        frames = int(round(e.duration * profile['fps']))
+        render_cost = frames * FRAME_COST_SECONDS.get(kind, FRAME_COST_SECONDS['image']) * pixel_scale
+        if lipsync:
+            # Lip-sync runs on the source video (cached across profiles), not on the output frames
+            render_cost += int(round(e.duration * DEFAULT_FPS)) * LIPSYNC_FRAME_COST_SECONDS
+        render_cost += SUBTITLE_COST_SECONDS * sum(1 for w in e.subtitles if w is not None)
+        if source == 'estimate' and e.audio_path:
+            pending_tts += 1
+
+        scenes.append({
+            'index': e.index,
+            'block': e.block_index,
+            'title': scene.title,
+            'start': round(e.start, 2),
+            'duration': round(e.duration, 2),
+            'voice_seconds': round(e.voice_duration, 2),
+            'duration_source': source,
+            'group': e.group_id,
+            'asset': {'raw': e.asset.raw, 'path': e.asset.path, 'kind': e.asset.kind} if e.asset else None,
+            'effects': {'zoom': e.asset.zoom, 'move': e.asset.move} if e.asset else None,
+            'subtitles': sum(1 for w in e.subtitles if w is not None),
+            'lipsync': lipsync,
+            'cost': {'frames': frames, 'render_seconds': round(render_cost, 2)},
+        })
+
+    # Music (block beds and the continuous global track)
+    for b_idx, block in enumerate(script.blocks):
+        if block.music and not _block_music_path(block.music):
+            problems.append({'level': 'error', 'scene': None,
+                             'message': f"Bloque {b_idx + 1} ({block.title}): música no encontrada '{block.music}'"})
+    music_name, music_path = _global_music_path(project, script, assets_dir)
+    if music_name and not music_path:
+        problems.append({'level': 'error', 'scene': None, 'message': f"Música global no encontrada '{music_name}'"})
+
+    tts_seconds = -(-pending_tts // tts_workers) * TTS_REQUEST_SECONDS
+    est_render = sum(s['cost']['render_seconds'] for s in scenes) + tts_seconds
+    counts = {}
+    for s in scenes:
+        counts[s['duration_source']] = counts.get(s['duration_source'], 0) + 1
+    return result(
+        title=script.title,
+        duration=round(timeline.duration, 2),
+        scenes=scenes,
+        music=music_path,
+        tts={'cached': counts.get('tts_cache', 0), 'to_synthesize': pending_tts, 'est_seconds': tts_seconds,
+             'sources': counts},
+        est_render_seconds=round(est_render, 1),
+        profile=profile['name'],
+    )
+
+
+def format_plan(plan):
+    lines = [f"🧭 Plan '{plan.get('title') or '-'}': {len(plan['scenes'])} escenas, ~{plan['duration']:.1f}s de video "
+             f"({plan['elapsed_ms']} ms)"]
+    for s in plan['scenes']:
+        asset = os.path.basename(s['asset']['path'] or s['asset']['raw']) if s['asset'] else '-'
+        lines.append(f"   {s['index'] + 1:>3}. {s['title'][:30]:<30} {s['start']:>7.2f}s +{s['duration']:>6.2f}s "
+                     f"[{s['duration_source']}] {asset[:30]:<30} ~{s['cost']['render_seconds']:.1f}s"
+                     f"{' 👄' if s['lipsync'] else ''}")
+    if plan.get('tts'):
+        lines.append(f"   🎙️ TTS: {plan['tts']['cached']} en caché, {plan['tts']['to_synthesize']} por sintetizar")
+    if plan.get('est_render_seconds') is not None:
+        profile_txt = " (borrador)" if plan.get('profile') == 'draft' else ""
+        lines.append(f"   ⏱️ Coste estimado: ~{plan['est_render_seconds']:.0f}s de CPU{profile_txt}")
+    for p in plan['problems']:
+        lines.append(f"   {'❌' if p['level'] == 'error' else '⚠️'} {p['message']}")
+    lines.append("   ✅ Sin errores." if plan['ok'] else "   🛑 El render fallaría o usaría respaldos.")
+    return "\n".join(lines)
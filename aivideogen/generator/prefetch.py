@@ -0,0 +1,200 @@
+"""
+v32.19: Stage-Overlapped Asset Preparation
+The engine ran in strict phases: all TTS (network-bound, CPU idle), then every scene's
+asset preparation (CPU-bound, network idle), then the encode. A small thread pool now
+prepares visuals while the TTS requests are still in flight:
+
+- Duration-independent work starts right after parsing, for every scene: asset lookup
+  (filename index), media probe + audio check of video assets, and the Ken Burns source
+  pyramid level (the level only depends on the max zoom / fit / frame size, not on time).
+  v32.22: draft renders also persist the level of the final frame size (warm_sizes).
+- Duration-dependent work starts per scene as soon as that scene's audio is ready:
+  local lip-sync renders (the heaviest per-scene step) run while later scenes are
+  still being synthesized.
+
+The main scene loop calls wait(scene) before building a scene (joins only that scene's
+tasks) and takes precomputed lip-sync outputs with lipsync_output(); anything that was
+not prefetched (or no longer matches) is computed inline exactly as before. Caches are
+the usual ones (media probe, decoded image LRU, pyramid disk cache), so a prefetch can
+never change the render, only move work earlier.
+"""
+
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
+
+from .timeline import resolve_scene_asset, first_asset, asset_id, is_outro, render_duration
+
+logger = logging.getLogger(__name__)
+
+VIDEO_EXTS = ('.mp4', '.mov', '.avi', '.mkv', '.webm')
+IMAGE_EXTS = ('.png', '.jpg', '.jpeg', '.webp')
+# Seconds of difference tolerated between the prefetched lip-sync duration and the final one
+LIPSYNC_DURATION_TOLERANCE = 0.05
+
+
+class AssetPrefetcher:
+    def __init__(self, project, target_size, assets_dir, workers=2, should_stop=None, log=None, warm_sizes=()):
+        self.project = project
+        self.target_size = target_size
+        # v32.22: Other frame sizes whose pyramid levels are persisted too (draft -> final)
+        self.warm_sizes = [s for s in warm_sizes if tuple(s) != tuple(target_size)]
+        self.assets_dir = assets_dir
+        self.should_stop = should_stop or (lambda: False)
+        self.log = log or logger.info
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='prefetch')
+        self._futures = {}   # id(scene) -> [Future]
+        self._visuals = {}   # id(scene) -> stage 1 Future
+        self._lipsync = {}   # id(scene) -> Future -> (key, output path or None)
+        self._lock = threading.Lock()
+        self._asset_paths = {}
+        self._done = 0
+        self._started = time.time()
+
+    def _submit(self, scene, fn, *args):
+        if self.should_stop() or self._pool is None:
+            return None
+        future = self._pool.submit(self._guard, fn, *args)
+        with self._lock:
+            self._futures.setdefault(id(scene), []).append(future)
+        return future
+
+    def _guard(self, fn, *args):
+        if self.should_stop():
+            return None
+        try:
+            return fn(*args)
+        except Exception as e:
+            logger.warning(f"⚠️ [Prefetch] {fn.__name__}: {e}")
+            return None
+        finally:
+            with self._lock:
+                self._done += 1
+
+    # ─── Stage 1: duration-independent (starts before TTS) ─────────────
+    def submit_visuals(self, scenes):
+        for scene in scenes:
+            asset = first_asset(scene)
+            if asset is not None:
+                self._visuals[id(scene)] = self._submit(scene, self._prepare_asset, scene, asset)
+
+    def _prepare_asset(self, scene, asset):
+        path = resolve_scene_asset(asset_id(asset), self.assets_dir)
+        self._asset_paths[id(scene)] = path
+        if not path:
+            return
+        lower = path.lower()
+        if lower.endswith(VIDEO_EXTS):
+            from .media_probe import probe_media
+            probe_media(path)
+        elif lower.endswith(IMAGE_EXTS):
+            self._prepare_image(scene, asset, path)
+
+    def _prepare_image(self, scene, asset, path):
+        from .ken_burns import KenBurnsPlan
+        from .image_pyramid import get_image_size, is_pyramid_enabled, pick_level, load_level, warm_level
+        src_size = get_image_size(path)
+        if src_size is None:
+            return
+        zoom = asset.zoom or "1.0:1.3"
+        if scene.group_id and scene.group_settings:
+            # Group scenes interpolate inside the group range: its max zoom bounds them all
+            zoom = scene.group_settings.get("zoom", "1.0:1.3")
+        plan = KenBurnsPlan(src_size, self.target_size, 0.0, zoom=zoom, fit=getattr(asset, 'fit', None))
+        enabled = is_pyramid_enabled()
+        d = pick_level(src_size, plan.required_scale()) if enabled else 1
+        load_level(path, d, persist=enabled)
+        for size in (self.warm_sizes if enabled else ()):
+            if self.should_stop():
+                return
+            warm = KenBurnsPlan(src_size, size, 0.0, zoom=zoom, fit=getattr(asset, 'fit', None))
+            wd = pick_level(src_size, warm.required_scale())
+            if wd != d:
+                warm_level(path, wd)
+
+    # ─── Stage 2: duration-dependent (as each scene's audio lands) ─────
+    def audio_ready(self, scene, index, audio_path, voice_duration=None):
+        """Called as soon as a scene's voice file exists (TTS callback or custom audio)."""
+        asset = first_asset(scene)
+        if asset is None or not audio_path or is_outro(scene):
+            return
+        dubbing = getattr(scene, 'dubbing_mode', None)
+        if not dubbing or dubbing == 'default':
+            dubbing = getattr(self.project, 'dubbing_mode', 'hq')
+        if dubbing != 'lipsync':
+            return
+        future = self._submit(scene, self._run_lipsync, scene, index, asset, audio_path, voice_duration)
+        if future is not None:
+            with self._lock:
+                self._lipsync[id(scene)] = future
+
+    def _run_lipsync(self, scene, index, asset, audio_path, voice_duration):
+        from django.conf import settings
+        from .avgl_engine import safe_float
+        from .media_probe import media_duration
+        # Stage 1 of this scene resolves the asset (same FIFO pool, submitted earlier: already running or done)
+        visuals = self._visuals.get(id(scene))
+        if visuals is not None:
+            visuals.result()
+        asset_path = self._asset_paths.get(id(scene)) or resolve_scene_asset(asset_id(asset), self.assets_dir)
+        if not asset_path or not asset_path.lower().endswith(VIDEO_EXTS + IMAGE_EXTS):
+            return None
+        if voice_duration is None:
+            voice_duration = media_duration(audio_path)
+        if not voice_duration:
+            return None
+        duration = render_duration(scene, voice_duration)
+        start_time = safe_float(getattr(asset, 'start_time', 0.0), 0.0)
+
+        from .lipsync_cache import render_lipsync
+        output = os.path.join(settings.MEDIA_ROOT, 'outputs', f"ls_{self.project.id}_pre_{index:03d}.mp4")
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+        self.log(f"    👄 [Prefetch] Lip-Sync de la escena {index + 1} en paralelo al TTS...")
+        output = render_lipsync(asset_path, audio_path, output, start_time=start_time, duration=duration,
+                                should_stop=self.should_stop, log=self.log)
+        key = (asset_path, audio_path, start_time, duration)
+        return key, output
+
+    # ─── Consumer side (main scene loop) ───────────────────────────────
+    def wait(self, scene):
+        """Joins this scene's prefetch tasks (stops waiting on cancellation)."""
+        with self._lock:
+            futures = list(self._futures.get(id(scene), []))
+        for future in futures:
+            while not future.done():
+                if self.should_stop():
+                    return
+                try:
+                    future.result(timeout=0.25)
+                except FuturesTimeout:
+                    continue
+                except Exception:
+                    break
+
+    def lipsync_output(self, scene, asset_path, audio_path, start_time, duration):
+        """Prefetched lip-sync video for exactly these inputs, or None (compute inline)."""
+        with self._lock:
+            future = self._lipsync.get(id(scene))
+        if future is None:
+            return None
+        self.wait(scene)
+        try:
+            result = future.result(timeout=0) if future.done() else None
+        except Exception:
+            result = None
+        if not result or not result[1]:
+            return None
+        (p_asset, p_audio, p_start, p_duration), output = result
+        if (os.path.normcase(p_asset) != os.path.normcase(asset_path) or p_audio != audio_path
+                or abs(p_start - start_time) > 1e-6 or abs(p_duration - duration) > LIPSYNC_DURATION_TOLERANCE):
+            return None
+        return output
+
+    def shutdown(self):
+        if self._pool is None:
+            return
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        self._pool = None
+        self.log(f"⚡ [Prefetch] {self._done} tareas de preparación solapadas ({time.time() - self._started:.1f}s)")
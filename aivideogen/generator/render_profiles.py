@@ -0,0 +1,65 @@
+"""
+v32.22: Render Profiles (draft / final)
+A full 1080p / 30 fps encode is the slowest way to check a script's pacing. The 'draft'
+profile renders the same timeline at a fraction of the pixels:
+- Frame: short side RENDER_DRAFT_HEIGHT (540 -> 960x540 / 540x960), RENDER_DRAFT_FPS (15).
+- Encode: ultrafast + a high CRF (RENDER_DRAFT_CRF), subtitles as a soft track (no burn-in).
+
+Everything upstream of the pixels is shared with the final render, so a draft warms it:
+TTS cache (voice + word timings), translation/transcription cache, media probes, lip-sync
+outputs (keyed by content, not by frame size) and the Ken Burns pyramid level the final
+frame size needs (prefetched next to the draft's own level). The final render then only
+pays for its own pixels and encode. Scene segments are keyed by size/fps/encode settings,
+so draft and final segments never mix in the scene cache.
+"""
+
+BASE_SIZES = {
+    'portrait': (1080, 1920),
+    'landscape': (1920, 1080),
+}
+
+
+def get_profile(name):
+    """Encode settings for a profile name (unknown names fall back to 'final')."""
+    from django.conf import settings
+    if name == 'draft':
+        return {
+            'name': 'draft',
+            'height': getattr(settings, 'RENDER_DRAFT_HEIGHT', 540),
+            'fps': getattr(settings, 'RENDER_DRAFT_FPS', 15),
+            'preset': 'ultrafast',
+            'crf': getattr(settings, 'RENDER_DRAFT_CRF', 30),
+            'soft_subtitles': True,
+        }
+    return {
+        'name': 'final',
+        'height': None,
+        'fps': 30,
+        'preset': 'ultrafast',
+        'crf': None,
+        'soft_subtitles': False,
+    }
+
+
+def project_profile(project):
+    return get_profile(getattr(project, 'render_profile', 'final'))
+
+
+def frame_size(aspect_ratio, profile=None):
+    """(width, height) of the output frame, even on both sides (H.264)."""
+    width, height = BASE_SIZES.get(aspect_ratio, BASE_SIZES['landscape'])
+    short = (profile or {}).get('height')
+    if short and short < min(width, height):
+        k = short / min(width, height)
+        width, height = round(width * k), round(height * k)
+    return (width // 2) * 2, (height // 2) * 2
+
+
+def encoder_params(profile):
+    """Extra x264 arguments of the profile (kept in render_params['ffmpeg_params'])."""
+    crf = profile.get('crf')
+    return ['-crf', str(crf)] if crf is not None else []
+
+
+def is_draft(project):
+    return getattr(project, 'render_profile', 'final') == 'draft'
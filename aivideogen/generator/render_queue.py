@@ -0,0 +1,423 @@
+"""
+v32.17: Persistent Render Queue
+start_project used to run generate_video_process on a daemon thread inside the web
+server: renders shared the GIL with the UI, died with the server and ran without
+any concurrency limit. Renders are now RenderJob rows (SQLite) consumed by
+`manage.py render_worker`:
+
+- A supervisor process claims jobs (priority, then FIFO) up to
+  RENDER_WORKER_CONCURRENCY and runs each one in its own child process.
+- The supervisor heartbeats its running jobs. A child that dies without leaving the
+  project in a final status (crash, OOM, kill) is retried up to max_attempts.
+- Jobs whose supervisor died are picked up by the next supervisor: it adopts
+  children that are still alive and requeues the rest.
+- The web server only enqueues and makes sure a supervisor is running
+  (ensure_worker_running). Long renders survive a web restart.
+- When no supervisor can be started (frozen build without manage.py), the web process
+  drains the queue itself on a background thread, one job at a time
+  (ensure_render_consumer), so queued projects never wait forever.
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import logging
+import threading
+import subprocess
+
+logger = logging.getLogger(__name__)
+
+# Seconds without heartbeat before a running job is considered orphaned
+STALE_SECONDS = 60
+# Seconds without heartbeat before the supervisor itself is considered dead
+WORKER_STALE_SECONDS = 15
+FINAL_PROJECT_STATUSES = ('completed', 'failed', 'error', 'cancelled')
+
+
+def worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def pid_alive(pid):
+    if not pid:
+        return False
+    if os.name == 'nt':
+        import ctypes
+        PROCESS_QUERY_LIMITED_INFORMATION, STILL_ACTIVE = 0x1000, 259
+        handle = ctypes.windll.kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, int(pid))
+        if not handle:
+            return False
+        try:
+            code = ctypes.c_ulong()
+            ctypes.windll.kernel32.GetExitCodeProcess(handle, ctypes.byref(code))
+            return code.value == STILL_ACTIVE
+        finally:
+            ctypes.windll.kernel32.CloseHandle(handle)
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+# ═══════════════════════════════════════════════════════════════════
+# Producer side (web views, editor, batch scripts)
+# ═══════════════════════════════════════════════════════════════════
+def enqueue_render(project, priority=0, source='ui'):
+    """Queues a render of `project` (reuses its pending job if there is one)."""
+    from django.conf import settings
+    from .models import RenderJob
+    job = RenderJob.objects.filter(project=project, status__in=['queued', 'running']).first()
+    if job:
+        if job.status == 'queued' and priority > job.priority:
+            job.priority = priority
+            job.save(update_fields=['priority'])
+        return job
+    return RenderJob.objects.create(
+        project=project, priority=priority, source=source,
+        max_attempts=getattr(settings, 'RENDER_JOB_MAX_ATTEMPTS', 2),
+    )
+
+
+def cancel_jobs(project_id):
+    """Queued jobs are dropped; running ones stop through the cancellation token (v32.16)."""
+    from django.utils import timezone
+    from .models import RenderJob
+    return RenderJob.objects.filter(project_id=project_id, status='queued').update(
+        status='cancelled', finished_at=timezone.now())
+
+
+def queue_position(project_id):
+    """(1-based position, queue depth) of the project's queued job, or None."""
+    from django.db.models import Q
+    from .models import RenderJob
+    job = RenderJob.objects.filter(project_id=project_id, status='queued').first()
+    if not job:
+        return None
+    queued = RenderJob.objects.filter(status='queued')
+    ahead = queued.filter(Q(priority__gt=job.priority) | Q(priority=job.priority, created_at__lt=job.created_at)).count()
+    return ahead + 1, queued.count()
+
+
+def queue_stats():
+    from django.db.models import Count
+    from .models import RenderJob
+    counts = dict(RenderJob.objects.values_list('status').annotate(n=Count('id')))
+    running = list(RenderJob.objects.filter(status='running').values(
+        'id', 'project_id', 'project__title', 'worker', 'attempts', 'started_at', 'heartbeat_at'))
+    queued = list(RenderJob.objects.filter(status='queued').values(
+        'id', 'project_id', 'project__title', 'priority', 'source', 'created_at')[:50])
+    return {
+        'depth': counts.get('queued', 0),
+        'running': counts.get('running', 0),
+        'counts': counts,
+        'worker_alive': worker_alive(),
+        'jobs_running': running,
+        'jobs_queued': queued,
+    }
+
+
+# ═══════════════════════════════════════════════════════════════════
+# Supervisor liveness (one per media folder)
+# ═══════════════════════════════════════════════════════════════════
+def _worker_state_path():
+    from django.conf import settings
+    return os.path.join(settings.MEDIA_ROOT, 'cache', 'render_worker.json')
+
+
+def write_worker_state():
+    path = _worker_state_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({'pid': os.getpid(), 'worker': worker_id(), 'heartbeat': time.time()}, f)
+    os.replace(tmp, path)
+
+
+def worker_alive():
+    try:
+        with open(_worker_state_path(), 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return time.time() - state.get('heartbeat', 0) < WORKER_STALE_SECONDS and pid_alive(state.get('pid'))
+
+
+def ensure_worker_running():
+    """Spawns a detached `manage.py render_worker` if no supervisor is alive. Returns True if one runs."""
+    from django.conf import settings
+    if worker_alive():
+        return True
+    manage_py = os.path.join(settings.BASE_DIR, 'manage.py')
+    if getattr(sys, 'frozen', False) or not os.path.exists(manage_py):
+        logger.warning("⚠️ [RenderQueue] No se puede lanzar el worker (ejecutable congelado o sin manage.py).")
+        return False
+    log_dir = os.path.join(settings.MEDIA_ROOT, 'logs')
+    os.makedirs(log_dir, exist_ok=True)
+    kwargs = {}
+    if os.name == 'nt':
+        kwargs['creationflags'] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        kwargs['start_new_session'] = True  # Not killed with the web server's process group
+    with open(os.path.join(log_dir, 'render_worker.log'), 'ab') as out:
+        proc = subprocess.Popen([sys.executable, manage_py, 'render_worker'], cwd=str(settings.BASE_DIR),
+                                stdout=out, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL, **kwargs)
+    logger.info(f"🚚 [RenderQueue] Worker de render lanzado (PID {proc.pid}).")
+    # Avoid a second spawn from a concurrent request before the worker writes its state
+    try:
+        with open(_worker_state_path(), 'w', encoding='utf-8') as f:
+            json.dump({'pid': proc.pid, 'worker': 'starting', 'heartbeat': time.time()}, f)
+    except OSError:
+        pass
+    return True
+
+
+_inline_consumer = None
+_inline_lock = threading.Lock()
+
+
+def ensure_render_consumer():
+    """
+    Makes sure something will render the queue: a render_worker supervisor ('worker'),
+    or, when none can be started, a background thread of this process ('inline').
+    """
+    if ensure_worker_running():
+        return 'worker'
+    global _inline_consumer
+    with _inline_lock:
+        if _inline_consumer is None or not _inline_consumer.is_alive():
+            _inline_consumer = threading.Thread(target=_drain_inline, name='render-inline', daemon=True)
+            _inline_consumer.start()
+            logger.warning("⚠️ [RenderQueue] Sin worker de render: la cola se procesa dentro del servidor web.")
+    return 'inline'
+
+
+def _drain_inline():
+    """Runs queued jobs one by one in this process (same bookkeeping as the supervisor)."""
+    from django.db import close_old_connections
+    from .models import RenderJob
+    worker = f"{worker_id()}:inline"
+    try:
+        while True:
+            close_old_connections()
+            job = peek_next_job()
+            if job is None:
+                return
+            if not claim_job(job, worker):
+                continue
+            # Our PID: if the web server dies, the next supervisor requeues the job
+            RenderJob.objects.filter(id=job.id).update(pid=os.getpid())
+            render = threading.Thread(target=_render_inline, args=(job.id,), daemon=True)
+            render.start()
+            while render.is_alive():
+                render.join(5)
+                try:
+                    heartbeat([job.id])
+                except Exception as e:
+                    logger.warning(f"⚠️ [RenderQueue] Heartbeat fallido (job {job.id}): {e}")
+            logger.info(f"🏁 [RenderQueue] Job {job.id} (proyecto {job.project_id}) -> {finish_job(job)}.")
+    except Exception as e:
+        logger.error(f"❌ [RenderQueue] Consumidor interno detenido: {e}")
+    finally:
+        close_old_connections()
+
+
+def _render_inline(job_id):
+    from django.db import close_old_connections
+    from .models import RenderJob
+    from .utils import generate_video_process
+    try:
+        project = RenderJob.objects.select_related('project').get(id=job_id).project
+        if project.status == 'cancelled':
+            return
+        project.status = 'processing'
+        project.save(update_fields=['status'])
+        generate_video_process(project)
+    except Exception as e:
+        logger.error(f"❌ [RenderQueue] Job {job_id}: {e}")
+    finally:
+        close_old_connections()
+
+
+# ═══════════════════════════════════════════════════════════════════
+# Consumer side (render_worker supervisor)
+# ═══════════════════════════════════════════════════════════════════
+def peek_next_job():
+    """Best queued job (priority, then FIFO) without claiming it."""
+    from .models import RenderJob
+    return RenderJob.objects.filter(status='queued').select_related('project').order_by('-priority', 'created_at').first()
+
+
+def claim_job(job, worker, cpu_share=None):
+    """Atomically moves a queued job to 'running' (compare-and-set on status). False if taken."""
+    from django.utils import timezone
+    from django.db.models import F
+    from .models import RenderJob
+    now = timezone.now()
+    claimed = RenderJob.objects.filter(id=job.id, status='queued').update(
+        status='running', worker=worker, started_at=now, heartbeat_at=now,
+        attempts=F('attempts') + 1, pid=None, cpu_share=cpu_share)
+    if claimed:
+        job.refresh_from_db()
+    return bool(claimed)
+
+
+def heartbeat(job_ids):
+    from django.utils import timezone
+    from .models import RenderJob
+    if job_ids:
+        RenderJob.objects.filter(id__in=list(job_ids), status='running').update(heartbeat_at=timezone.now())
+
+
+def finish_job(job, exitcode=None):
+    """
+    Called when a job's child process is gone. Final project status -> job done/failed/
+    cancelled. Otherwise the child crashed: retry while attempts remain.
+    """
+    from django.utils import timezone
+    from .models import RenderJob, VideoProject
+    job.refresh_from_db()
+    status = VideoProject.objects.filter(pk=job.project_id).values_list('status', flat=True).first()
+    crash = f"Proceso terminado inesperadamente (código {exitcode})"
+    if status not in FINAL_PROJECT_STATUSES and job.attempts < job.max_attempts:
+        RenderJob.objects.filter(id=job.id).update(status='queued', pid=None, worker='', error=crash)
+        logger.warning(f"🔁 [RenderQueue] Job {job.id} (proyecto {job.project_id}) caído (código {exitcode}). Reintento {job.attempts + 1}/{job.max_attempts}.")
+        return 'queued'
+
+    job_status = {'completed': 'done', 'cancelled': 'cancelled'}.get(status, 'failed')
+    if status not in FINAL_PROJECT_STATUSES:
+        VideoProject.objects.filter(pk=job.project_id).update(status='failed')
+    video_seconds = None
+    if job_status == 'done':
+        # v32.18: Real output length for the batch throughput report
+        output = VideoProject.objects.filter(pk=job.project_id).values_list('output_video', flat=True).first()
+        if output:
+            from django.conf import settings
+            from .media_probe import media_duration
+            video_seconds = media_duration(os.path.join(settings.MEDIA_ROOT, output))
+    RenderJob.objects.filter(id=job.id).update(
+        status=job_status, finished_at=timezone.now(), video_seconds=video_seconds,
+        error=crash if status not in FINAL_PROJECT_STATUSES else '')
+    return job_status
+
+
+def orphaned_jobs(worker):
+    """Running jobs of other (dead) supervisors: (job, child_alive)."""
+    from datetime import timedelta
+    from django.utils import timezone
+    from .models import RenderJob
+    limit = timezone.now() - timedelta(seconds=STALE_SECONDS)
+    stale = RenderJob.objects.filter(status='running', heartbeat_at__lt=limit).exclude(worker=worker)
+    return [(job, pid_alive(job.pid)) for job in stale]
+
+
+def run_render_job(job_id, cpu_share=None):
+    """Child process entry point: one render, then exit (fresh interpreter per render)."""
+    import django
+    django.setup()
+    from django.conf import settings
+    from .models import RenderJob
+    from .utils import generate_video_process
+    job = RenderJob.objects.select_related('project').get(id=job_id)
+    project = job.project
+    if project.status == 'cancelled':
+        return
+    if cpu_share:
+        # v32.18: This render's share of the worker's CPU budget (segment/frame encoders)
+        settings.RENDER_SEGMENT_WORKERS = int(cpu_share)
+    project.status = 'processing'
+    project.save(update_fields=['status'])
+    generate_video_process(project)
+
+
+def supervise(concurrency=None, once=False, write=print):
+    """
+    Supervisor loop of `manage.py render_worker`. Runs jobs while they fit both the
+    concurrency cap (0 = none) and the CPU / RAM budget (v32.18, see batch.py).
+    once=True returns when the queue is empty and every child has finished.
+    """
+    import multiprocessing
+    from django.conf import settings
+    from django.db import close_old_connections
+    from .models import RenderJob
+    from .batch import resource_budget, plan_cpu_share, ram_for
+
+    if concurrency is None:
+        concurrency = getattr(settings, 'RENDER_WORKER_CONCURRENCY', 0)
+    concurrency = max(0, int(concurrency or 0))
+    cpu_budget, ram_budget = resource_budget()
+    worker = worker_id()
+    ctx = multiprocessing.get_context('spawn')
+    children = {}  # job_id -> (job, Process or None, pid, cores, ram_mb)
+
+    write(f"🚚 [RenderWorker] {worker} iniciado (concurrencia {concurrency or 'auto'}, "
+          f"presupuesto {cpu_budget:.0f} núcleos / {ram_budget or '?'} MB).")
+    while True:
+        # A transient error (e.g. "database is locked" while N renders write to SQLite)
+        # must not kill the supervisor: its running children would be stranded
+        try:
+            close_old_connections()
+            write_worker_state()
+            heartbeat(children.keys())
+
+            # 1. Jobs left behind by a dead supervisor: adopt live children, requeue the rest
+            for job, alive in orphaned_jobs(worker):
+                if alive:
+                    RenderJob.objects.filter(id=job.id).update(worker=worker)
+                    cores = job.cpu_share or 1
+                    children[job.id] = (job, None, job.pid, cores, ram_for(job.project.render_mode, cores))
+                    write(f"🤝 [RenderWorker] Job {job.id} adoptado (PID {job.pid}).")
+                else:
+                    write(f"♻️ [RenderWorker] Job {job.id} huérfano -> {finish_job(job, exitcode='?')}.")
+
+            # 2. Reap finished children (forgotten only once finish_job went through)
+            for job_id, (job, proc, pid, _cores, _ram) in list(children.items()):
+                if proc is not None:
+                    if proc.is_alive():
+                        continue
+                    exitcode = proc.exitcode
+                elif pid_alive(pid):
+                    continue
+                else:
+                    exitcode = None
+                result = finish_job(job, exitcode)
+                del children[job_id]
+                if proc is not None:
+                    proc.close()
+                write(f"🏁 [RenderWorker] Job {job_id} (proyecto {job.project_id}) -> {result}.")
+
+            # 3. Fill free slots within the budget (head of the queue only: big jobs never starve)
+            while not concurrency or len(children) < concurrency:
+                job = peek_next_job()
+                if job is None:
+                    break
+                used_cpu = sum(c[3] for c in children.values())
+                used_ram = sum(c[4] for c in children.values())
+                planned = len(children) + RenderJob.objects.filter(status='queued').count()
+                if concurrency:
+                    planned = min(planned, concurrency)
+                mode = job.project.render_mode
+                cores = plan_cpu_share(mode, cpu_budget - used_cpu, planned, cpu_budget)
+                ram = ram_for(mode, cores)
+                if children and (used_cpu + cores > cpu_budget or (ram_budget and used_ram + ram > ram_budget)):
+                    break
+                if not claim_job(job, worker, cpu_share=cores):
+                    continue
+                proc = ctx.Process(target=run_render_job, args=(job.id, cores), daemon=False)
+                proc.start()
+                children[job.id] = (job, proc, proc.pid, cores, ram)
+                RenderJob.objects.filter(id=job.id).update(pid=proc.pid)
+                write(f"🎬 [RenderWorker] Job {job.id} (proyecto {job.project_id}, intento {job.attempts}, "
+                      f"{cores} núcleos) -> PID {proc.pid}.")
+
+            if once and not children and not RenderJob.objects.filter(status='queued').exists():
+                write("✅ [RenderWorker] Cola vacía. Saliendo.")
+                return
+        except Exception as e:
+            write(f"⚠️ [RenderWorker] Error en el ciclo del supervisor (se reintenta): {e}")
+            logger.exception(f"❌ [RenderWorker] Ciclo del supervisor: {e}")
+        time.sleep(1)
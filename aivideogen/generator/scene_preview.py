@@ -0,0 +1,226 @@
+"""
+v32.23: Single-Scene Preview
+Checking a zoom / move / overlay tweak used to mean rendering the whole project. A preview
+renders one scene (or its whole group, so the master-shot interpolation can be judged in
+context) to a short low-resolution MP4 with its voice, or to a silent animated WebP:
+
+- Timing and effects come from the compiled timeline (same rules as the engine), with the
+  voice durations of the planner: custom audio / TTS cache entries are used as they are,
+  uncached voices are estimated and the preview is silent for them (no TTS request).
+- Pixels go through the segment renderer's per-scene path (render_scene_segment), at
+  SCENE_PREVIEW_HEIGHT / SCENE_PREVIEW_FPS. Images come from the process-wide decoded
+  image LRU and the pyramid, so repeated previews of the same asset skip the decode.
+- Results are content-addressed in MEDIA_ROOT/cache/previews: re-opening an unchanged
+  scene is served instantly.
+Not rendered: subtitles, SFX / music, video-asset audio and lip-sync (visual check only).
+"""
+
+import os
+import time
+import shutil
+import logging
+import subprocess
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_FORMATS = ('mp4', 'webp')
+# Bump when the preview pipeline changes
+SCENE_PREVIEW_VERSION = 1
+
+_preview_cache = None
+
+
+def get_preview_cache():
+    global _preview_cache
+    if _preview_cache is None:
+        from django.conf import settings
+        from .disk_cache import BoundedDiskCache
+        _preview_cache = BoundedDiskCache('previews', max_mb=getattr(settings, 'SCENE_PREVIEW_CACHE_MAX_MB', 256))
+    return _preview_cache
+
+
+def scene_index_from_locator(data, block, scene, group=None):
+    """
+    Global scene index (script.get_all_scenes() order) of an editor position:
+    block scenes first, then the scenes of each group in order.
+    Raises ValueError for out-of-range positions or a script that is not a JSON object.
+    """
+    if not isinstance(data, dict) or not isinstance(data.get('blocks', []), list):
+        raise ValueError("El guion debe ser un objeto JSON con una lista 'blocks'")
+    blocks = data.get('blocks', [])
+    if not 0 <= block < len(blocks):
+        raise ValueError(f"Bloque {block + 1} fuera de rango")
+    index = 0
+    for b in blocks[:block]:
+        index += len(b.get('scenes', [])) + sum(len(g.get('scenes', [])) for g in b.get('groups', []))
+    current = blocks[block]
+    if group is None:
+        if not 0 <= scene < len(current.get('scenes', [])):
+            raise ValueError(f"Escena {scene + 1} fuera de rango")
+        return index + scene
+    groups = current.get('groups', [])
+    if not 0 <= group < len(groups) or not 0 <= scene < len(groups[group].get('scenes', [])):
+        raise ValueError(f"Escena {scene + 1} del grupo {group + 1} fuera de rango")
+    return index + len(current.get('scenes', [])) + sum(len(g.get('scenes', [])) for g in groups[:group]) + scene
+
+
+def preview_spec(entry, script, overlay_dir):
+    """Segment spec of a timeline entry (same fields the engine records for segment mode)."""
+    from .avgl_engine import safe_float
+    from .timeline import first_asset, resolve_overlay
+
+    asset = first_asset(entry.scene)
+    t_asset = entry.asset
+    if t_asset is None or not t_asset.path or t_asset.kind is None:
+        return {'kind': 'color', 'duration': entry.duration}
+    overlay_path = resolve_overlay(asset.overlay, overlay_dir) if asset.overlay else None
+    if t_asset.kind == 'video':
+        return {
+            'kind': 'video', 'duration': entry.duration, 'video_path': t_asset.path, 'overlay_path': overlay_path,
+            'fit': asset.fit, 'end_time': getattr(asset, 'end_time', None),
+            'start_time': (entry.group_offset if entry.group_id else 0.0) + safe_float(getattr(asset, 'start_time', 0.0), 0.0),
+        }
+    zoom, move, shake, shake_intensity, rotate = entry.effects()
+    return {
+        'kind': 'ken_burns', 'duration': entry.duration, 'image_path': t_asset.path,
+        'zoom': zoom, 'move': move, 'overlay_path': overlay_path, 'fit': asset.fit,
+        'shake': shake, 'shake_intensity': shake_intensity, 'rotate': rotate,
+        'w_rotate': getattr(asset, 'w_rotate', None),
+        'project_settings': getattr(script, 'settings', {}),
+        'human_noise_enabled': getattr(asset, 'human_signature', None),
+        'human_noise_intensity': getattr(asset, 'human_amplitude', 1.0),
+    }
+
+
+def preview_timeline(project, script_text=None):
+    """
+    (script, timeline, voice sources by id(scene)) of project's script with the planner's voice
+    durations (no TTS). Cached TTS voices also bring their word timings, so subtitle windows
+    match the render. Raises ValueError on an unparsable script. Shared with frame_preview.
+    """
+    from django.conf import settings
+    from .avgl_engine import parse_avgl_json, apply_project_voice
+    from .timeline import compile_timeline
+    from .planner import voice_plan
+    from .tts_cache import cached_word_timings
+
+    try:
+        script = parse_avgl_json(script_text if script_text is not None else project.script_text)
+    except Exception as e:
+        raise ValueError(f"Guion inválido: {e}")
+    apply_project_voice(script, project)
+
+    assets_dir = os.path.join(settings.MEDIA_ROOT, 'assets')
+    audio_durations, audio_map, voice_sources = {}, {}, {}
+    for scene in script.get_all_scenes():
+        voice, audio, source = voice_plan(project, scene, assets_dir)
+        audio_durations[scene], audio_map[scene], voice_sources[id(scene)] = voice, audio, source
+        if source == 'tts_cache':
+            scene.word_timings = cached_word_timings(audio)
+    return script, compile_timeline(script, audio_durations, audio_map, assets_dir), voice_sources
+
+
+def _mix_voices(voices, output_path, duration):
+    """[(audio path, offset seconds)] -> one WAV of `duration` seconds (single FFmpeg call)."""
+    from .segment_renderer import get_ffmpeg_exe
+    cmd = [get_ffmpeg_exe(), '-y', '-loglevel', 'error']
+    for path, _ in voices:
+        cmd += ['-i', path]
+    chains = [f"[{i}:a]adelay={int(round(offset * 1000))}:all=1[a{i}]" for i, (_, offset) in enumerate(voices)]
+    mix = "".join(f"[a{i}]" for i in range(len(voices)))
+    chains.append(f"{mix}amix=inputs={len(voices)}:normalize=0,apad[out]")
+    cmd += ['-filter_complex', ";".join(chains), '-map', '[out]', '-t', f"{duration:.3f}", output_path]
+    subprocess.run(cmd, check=True, capture_output=True)
+    return output_path
+
+
+def render_scene_preview(project, scene_index, script_text=None, with_group=False, fmt='mp4'):
+    """
+    Renders one scene (or its group) of project's script (script_text = unsaved editor copy).
+    Returns {'ok', 'path', 'url', 'format', 'scenes', 'duration', 'voice', 'cached', 'elapsed_ms'}
+    or {'ok': False, 'error'}.
+    """
+    from django.conf import settings
+    from .render_profiles import frame_size
+    from .segment_renderer import (get_ffmpeg_exe, get_image_backend, quantize_segments,
+                                   render_scene_segment, scene_cache_key, concat_segments)
+    from .disk_cache import file_digest, hash_key
+
+    started = time.time()
+    if fmt not in PREVIEW_FORMATS:
+        return {'ok': False, 'error': f"Formato no soportado: {fmt}"}
+    try:
+        script, timeline, voice_sources = preview_timeline(project, script_text)
+    except ValueError as e:
+        return {'ok': False, 'error': str(e)}
+    if not 0 <= scene_index < len(timeline.scenes):
+        return {'ok': False, 'error': f"Escena {scene_index + 1} fuera de rango"}
+
+    overlay_dir = os.path.join(settings.MEDIA_ROOT, 'overlays')
+
+    entry = timeline.scenes[scene_index]
+    entries = [entry]
+    if with_group and entry.group_id:
+        entries = [timeline.scenes[i] for i in timeline.groups[entry.group_id].scene_indices]
+    origin = entries[0].start
+    duration = sum(e.duration for e in entries)
+
+    fps = getattr(settings, 'SCENE_PREVIEW_FPS', 15)
+    target_size = frame_size(project.aspect_ratio, {'height': getattr(settings, 'SCENE_PREVIEW_HEIGHT', 360)})
+    render_params = {
+        'fps': fps, 'codec': 'libx264', 'preset': 'ultrafast', 'threads': 1,
+        'ffmpeg_params': ["-pix_fmt", "yuv420p", "-crf", "28"],
+        'image_backend': get_image_backend(),
+    }
+    specs = quantize_segments([preview_spec(e, script, overlay_dir) for e in entries], fps=fps)
+    # Only real files are heard: cached TTS and custom audio (estimated voices stay silent)
+    voices = [(e.audio_path, e.start - origin) for e in entries
+              if e.audio_path and e.audio_path != 'tts' and os.path.isfile(e.audio_path)]
+
+    cache = get_preview_cache()
+    key = hash_key('preview', SCENE_PREVIEW_VERSION, fmt, [scene_cache_key(s, target_size, render_params) for s in specs],
+                   [(file_digest(p), round(offset, 3)) for p, offset in voices] if fmt == 'mp4' else [])
+    ext = f".{fmt}"
+    result = {
+        'ok': True, 'format': fmt, 'scenes': [e.index for e in entries], 'duration': round(duration, 2),
+        'size': list(target_size), 'voice': [voice_sources[id(e.scene)] for e in entries],
+    }
+    cached = cache.get(key, ext=ext)
+    if cached:
+        return dict(result, path=cached, url=f"{settings.MEDIA_URL}cache/previews/{os.path.basename(cached)}",
+                    cached=True, elapsed_ms=int((time.time() - started) * 1000))
+
+    work_dir = os.path.join(settings.MEDIA_ROOT, 'temp_preview', f"{key[:12]}_{os.getpid()}_{int(time.time() * 1000)}")
+    os.makedirs(work_dir, exist_ok=True)
+    try:
+        segments = []
+        for i, spec in enumerate(specs):
+            seg_path = os.path.join(work_dir, f"seg_{i:03d}.mp4")
+            render_scene_segment(spec, seg_path, target_size, render_params)
+            segments.append(seg_path)
+
+        video_path = os.path.join(work_dir, "preview.mp4")
+        if fmt == 'mp4':
+            audio_path = _mix_voices(voices, os.path.join(work_dir, "voice.wav"), duration) if voices else None
+            concat_segments(segments, audio_path, video_path)
+            out_path = video_path
+        else:
+            concat_segments(segments, None, video_path)
+            out_path = os.path.join(work_dir, "preview.webp")
+            subprocess.run([get_ffmpeg_exe(), '-y', '-loglevel', 'error', '-i', video_path, '-an',
+                            '-c:v', 'libwebp_anim', '-loop', '0', '-quality', '60', '-compression_level', '0', out_path],
+                           check=True, capture_output=True)
+        final = cache.put(key, out_path, ext=ext)
+        cache.evict(protect=[final])
+    except Exception as e:
+        err = e.stderr.decode('utf-8', errors='replace')[-300:] if isinstance(getattr(e, 'stderr', None), bytes) else e
+        logger.warning(f"⚠️ [Preview] Escena {scene_index + 1}: {err}")
+        return {'ok': False, 'error': f"Error renderizando la vista previa: {err}"}
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    elapsed_ms = int((time.time() - started) * 1000)
+    logger.info(f"👁️ [Preview] Escena {scene_index + 1} ({len(entries)} escena(s), {duration:.1f}s, "
+                f"{target_size[0]}x{target_size[1]}) en {elapsed_ms} ms")
+    return dict(result, path=final, url=f"{settings.MEDIA_URL}cache/previews/{os.path.basename(final)}",
+                cached=False, elapsed_ms=elapsed_ms)
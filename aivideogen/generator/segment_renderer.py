@@ -0,0 +1,496 @@
+"""
+v32.0: Parallel Segment Renderer
+Renders every scene to its own MP4 segment in a process pool and assembles the
+final video with the FFmpeg concat demuxer (stream copy + single audio mux).
+
+The MoviePy clips built by the engine are closures (not picklable), so each
+scene is described by a small "spec" dict that the worker turns back into a clip.
+"""
+
+import os
+import time
+import logging
+import subprocess
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FPS = 30
+
+# v32.1: Bump whenever the pixel pipeline changes so stale cached segments are never reused
+SCENE_CACHE_VERSION = 5
+_SPEC_FILE_KEYS = ('image_path', 'video_path', 'overlay_path', 'path', 'subtitles_ass')
+
+_scene_cache = None
+
+
+def get_ffmpeg_exe():
+    """Resolves the FFmpeg binary (imageio_ffmpeg first, PATH fallback)."""
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return 'ffmpeg'
+
+
+def get_segment_workers():
+    """v32.0: Number of parallel scene encoders (RENDER_SEGMENT_WORKERS or CPU count - 1)."""
+    from django.conf import settings
+    workers = getattr(settings, 'RENDER_SEGMENT_WORKERS', 0)
+    try:
+        workers = int(workers or 0)
+    except (TypeError, ValueError):
+        workers = 0
+    if workers <= 0:
+        workers = max(1, (os.cpu_count() or 2) - 1)
+    return workers
+
+
+def get_image_backend():
+    """v32.6: Pixel backend for plain image scenes in segment mode ('opencv' or 'ffmpeg')."""
+    from django.conf import settings
+    backend = str(getattr(settings, 'RENDER_IMAGE_BACKEND', 'opencv') or 'opencv').lower()
+    return backend if backend in ('opencv', 'ffmpeg') else 'opencv'
+
+
+def ffmpeg_can_render(spec):
+    """
+    v32.6: True when the scene is a Ken Burns image the FFmpeg filtergraph can express:
+    no overlay (compositing) and no fit/contain (intentional black bars).
+    """
+    if spec.get('kind') != 'ken_burns' or spec.get('overlay_path'):
+        return False
+    fit = spec.get('fit')
+    if fit == "contain" or fit is True:
+        return False
+    return str(spec.get('image_path', '')).lower().endswith(('.png', '.jpg', '.jpeg', '.webp'))
+
+
+def get_scene_cache():
+    """v32.1: Process-wide scene segment cache (None when SCENE_CACHE_ENABLED is off)."""
+    global _scene_cache
+    from django.conf import settings
+    if not getattr(settings, 'SCENE_CACHE_ENABLED', True):
+        return None
+    if _scene_cache is None:
+        from .disk_cache import BoundedDiskCache
+        _scene_cache = BoundedDiskCache('scenes', max_mb=getattr(settings, 'SCENE_CACHE_MAX_MB', 4096))
+    return _scene_cache
+
+
+def scene_cache_key(spec, target_size, render_params):
+    """
+    v32.1: Content address of a rendered segment.
+    Asset paths are replaced by the digest of their content, so moving/renaming a file
+    keeps the hit while editing it (or regenerating a lip-sync take) forces a miss.
+    """
+    from .disk_cache import file_digest, hash_key
+    params = {k: v for k, v in spec.items() if k not in _SPEC_FILE_KEYS and k != 'start_frame'}
+    files = {k: file_digest(spec[k]) for k in _SPEC_FILE_KEYS if spec.get(k)}
+    encode = {k: render_params.get(k) for k in ('fps', 'codec', 'preset', 'bitrate', 'ffmpeg_params')}
+    if render_params.get('image_backend') == 'ffmpeg' and ffmpeg_can_render(spec):
+        encode['image_backend'] = 'ffmpeg'
+    return hash_key(SCENE_CACHE_VERSION, params, files, list(target_size), encode)
+
+
+def quantize_segments(specs, fps=DEFAULT_FPS):
+    """
+    Snaps every scene boundary to the frame grid of the whole timeline.
+    Each segment gets an integer frame count so the concatenated video keeps
+    exactly round(total * fps) frames and never drifts against the audio.
+    """
+    cursor = 0.0
+    quantized = []
+    for spec in specs:
+        start_f = int(round(cursor * fps))
+        cursor += float(spec['duration'])
+        end_f = int(round(cursor * fps))
+        q = dict(spec)
+        q['start_frame'] = start_f
+        q['frames'] = max(1, end_f - start_f)
+        quantized.append(q)
+    return quantized
+
+
+def build_scene_clip(spec, target_size, clips_to_close=None, fps=DEFAULT_FPS):
+    """Rebuilds the (video only) MoviePy clip of a scene from its spec."""
+    from moviepy import ColorClip, VideoFileClip
+    from .video_engine import apply_ken_burns, process_video_asset
+
+    kind = spec.get('kind')
+    duration = float(spec['duration'])
+
+    if kind == 'ken_burns':
+        return apply_ken_burns(
+            spec['image_path'], duration, target_size,
+            zoom=spec.get('zoom', "1.0:1.3"),
+            move=spec.get('move', "HOR:50:50"),
+            overlay_path=spec.get('overlay_path'),
+            fit=spec.get('fit'),
+            shake=spec.get('shake', False),
+            shake_intensity=spec.get('shake_intensity', 5),
+            rotate=spec.get('rotate'),
+            w_rotate=spec.get('w_rotate'),
+            clips_to_close=clips_to_close,
+            project_settings=spec.get('project_settings'),
+            human_noise_enabled=spec.get('human_noise_enabled'),
+            human_noise_intensity=spec.get('human_noise_intensity', 1.0),
+            fps=fps,
+        )
+    if kind == 'video':
+        return process_video_asset(
+            spec['video_path'], duration, target_size,
+            overlay_path=spec.get('overlay_path'),
+            fit=spec.get('fit'),
+            clips_to_close=clips_to_close,
+            start_time=spec.get('start_time', 0.0),
+            end_time=spec.get('end_time'),
+            video_volume=0.0,
+        )
+    if kind == 'file':
+        clip = VideoFileClip(spec['path'], audio=False)
+        if clips_to_close is not None: clips_to_close.append(clip)
+        if tuple(clip.size) != tuple(target_size):
+            clip = clip.resized(target_size)
+        return clip
+    return ColorClip(size=target_size, color=(0, 0, 0), duration=duration)
+
+
+def _init_segment_worker():
+    """Pool initializer: spawned workers need Django configured before importing the engine."""
+    try:
+        import django
+        from django.apps import apps
+        if not apps.ready:
+            django.setup()
+    except Exception as e:
+        logger.warning(f"⚠️ [Segments] No se pudo inicializar Django en el worker: {e}")
+
+
+def subtitle_filters(spec):
+    """
+    v32.2: Burn-in inside the scene encode. The segment ASS uses segment-local times,
+    so it applies to the segment PTS as is.
+    """
+    if not spec.get('subtitles_ass'):
+        return []
+    from .subtitle_utils import ass_filter_arg
+    return [ass_filter_arg(spec['subtitles_ass'])]
+
+
+def render_image_scene_ffmpeg(spec, output_path, target_size, render_params):
+    """
+    v32.6: Encodes a Ken Burns image scene entirely inside FFmpeg (no Python frame loop).
+    The compiled plan is emitted as per-frame perspective corners (same coordinates as the
+    OpenCV path, v30.9 rotation + v30.10 slack panning), fed a single RGB frame of the
+    pyramid ROI through stdin and looped.
+    """
+    import numpy as np
+    from .ken_burns import KenBurnsPlan, resolve_human_noise
+    from .image_pyramid import get_image_size, load_plan_source
+
+    fps = render_params.get('fps', DEFAULT_FPS)
+    frames = int(spec['frames'])
+    image_path = spec['image_path']
+    src_size = get_image_size(image_path)
+    if src_size is None:
+        raise RuntimeError(f"No se pudo leer la cabecera: {image_path}")
+
+    plan = KenBurnsPlan(
+        src_size, target_size, float(spec['duration']), fps=fps,
+        zoom=spec.get('zoom', "1.0:1.3"), move=spec.get('move', "HOR:50:50"), fit=spec.get('fit'),
+        shake=spec.get('shake', False), shake_intensity=spec.get('shake_intensity', 5),
+        rotate=spec.get('rotate'), w_rotate=spec.get('w_rotate'),
+        noise_enabled=resolve_human_noise(spec.get('human_noise_enabled'), spec.get('project_settings')),
+        noise_intensity=spec.get('human_noise_intensity', 1.0),
+    )
+    source = load_plan_source(image_path, plan)
+    if source is None:
+        raise RuntimeError(f"OpenCV no pudo leer: {image_path}")
+    # perspective re-evaluates every canvas pixel per frame: shrink the ROI once to the
+    # exact scale the max zoom needs (pyramid levels are powers of two)
+    sx, sy, ox, oy = plan.source_transform or (1.0, 1.0, 0.0, 0.0)
+    k = plan.required_scale() / min(sx, sy)
+    if k < 0.9:
+        import cv2
+        src_h, src_w = source.shape[:2]
+        source = cv2.resize(source, (max(2, int(np.ceil(src_w * k))), max(2, int(np.ceil(src_h * k)))), interpolation=cv2.INTER_AREA)
+        plan.rebase(sx * source.shape[1] / src_w, sy * source.shape[0] / src_h, ox * source.shape[1] / src_w, oy * source.shape[0] / src_h)
+    src_h, src_w = source.shape[:2]
+
+    corners = ":".join(f"{k}='{v}'" for k, v in plan.ffmpeg_corner_exprs().items())
+    filters = [
+        "loop=loop=-1:size=1:start=0",
+        f"setpts=N/({fps}*TB)",
+        f"perspective={corners}:interpolation=linear:sense=source:eval=frame",
+        f"scale={target_size[0]}:{target_size[1]}:flags=bilinear",
+    ] + subtitle_filters(spec)
+
+    cmd = [
+        get_ffmpeg_exe(), '-y', '-loglevel', 'error',
+        '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-s', f"{src_w}x{src_h}", '-framerate', str(fps), '-i', 'pipe:0',
+        '-vf', ",".join(filters),
+        '-frames:v', str(frames), '-r', str(fps),  # setpts drops the stream rate (FFmpeg would fall back to 25 fps)
+        '-c:v', render_params.get('codec', 'libx264'),
+    ]
+    if render_params.get('preset'):
+        cmd += ['-preset', render_params['preset']]
+    if render_params.get('bitrate'):
+        cmd += ['-b:v', render_params['bitrate']]
+    if render_params.get('threads'):
+        cmd += ['-threads', str(render_params['threads'])]
+    cmd += list(render_params.get('ffmpeg_params', [])) + ['-an', output_path]
+    subprocess.run(cmd, input=source.tobytes(), check=True, capture_output=True)
+
+
+def render_scene_segment(spec, output_path, target_size, render_params):
+    """
+    v32.0: Worker entry point. Encodes one scene (video only) with exactly
+    spec['frames'] frames. Returns (output_path, elapsed_seconds).
+    """
+    t0 = time.time()
+    fps = render_params.get('fps', DEFAULT_FPS)
+    frames = int(spec['frames'])
+
+    # v32.6: Plain image scenes can skip MoviePy entirely (RENDER_IMAGE_BACKEND=ffmpeg)
+    if render_params.get('image_backend') == 'ffmpeg' and ffmpeg_can_render(spec):
+        try:
+            render_image_scene_ffmpeg(spec, output_path, target_size, render_params)
+            return output_path, time.time() - t0
+        except Exception as e:
+            err = e.stderr.decode('utf-8', errors='replace')[-300:] if isinstance(getattr(e, 'stderr', None), bytes) else e
+            logger.warning(f"⚠️ [Segments] Filtergraph FFmpeg falló ({err}). Usando OpenCV.")
+
+    clips_to_close = []
+    clip = None
+    try:
+        clip = build_scene_clip(spec, target_size, clips_to_close=clips_to_close, fps=fps)
+        # (frames + 0.5) / fps -> MoviePy iterates exactly int(duration * fps) frames
+        clip = clip.without_audio().with_duration((frames + 0.5) / fps)
+
+        ffmpeg_params = list(render_params.get('ffmpeg_params', [])) + ["-frames:v", str(frames)]
+        if spec.get('subtitles_ass'):
+            ffmpeg_params += [
+                "-vf", ",".join(subtitle_filters(spec)),
+                "-r", str(fps)  # setpts drops the stream rate (FFmpeg would fall back to 25 fps)
+            ]
+
+        clip.write_videofile(
+            output_path,
+            fps=fps,
+            codec=render_params.get('codec', 'libx264'),
+            preset=render_params.get('preset', 'ultrafast'),
+            bitrate=render_params.get('bitrate'),
+            threads=render_params.get('threads', 1),
+            audio=False,
+            ffmpeg_params=ffmpeg_params,
+            logger=None,
+        )
+    finally:
+        for c in [clip] + clips_to_close:
+            try:
+                if c is not None: c.close()
+            except Exception:
+                pass
+    return output_path, time.time() - t0
+
+
+def render_segments_parallel(jobs, target_size, render_params, max_workers=None, on_done=None):
+    """
+    v32.0: Renders scene specs in a process pool.
+    jobs: list of (index, spec, output_path).
+    on_done(index, output_path, elapsed) is called from the parent process as each scene finishes.
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    if not jobs:
+        return
+    max_workers = min(max_workers or get_segment_workers(), len(jobs))
+
+    from .cancellation import current_token
+    token = current_token()
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_segment_worker) as pool:
+        handle = token.track(pool) if token else None  # v32.16: Workers die on cancel
+        try:
+            futures = {
+                pool.submit(render_scene_segment, spec, out_path, target_size, render_params): idx
+                for idx, spec, out_path in jobs
+            }
+            for fut in as_completed(futures):
+                out_path, elapsed = fut.result()  # Propagates worker errors
+                if on_done:
+                    on_done(futures[fut], out_path, elapsed)
+        finally:
+            if handle:
+                token.untrack(handle)
+
+
+def concat_segments(segment_paths, audio_path, output_path, metadata_comment=None, extra_args=None):
+    """
+    v32.0: Joins the segments with the concat demuxer (no pixel re-encode)
+    and muxes the full soundtrack once.
+    """
+    list_path = output_path + ".segments.txt"
+    with open(list_path, 'w', encoding='utf-8') as f:
+        for p in segment_paths:
+            safe_p = os.path.abspath(p).replace('\\', '/').replace("'", "'\\''")
+            f.write(f"file '{safe_p}'\n")
+
+    cmd = [get_ffmpeg_exe(), '-y', '-loglevel', 'error', '-f', 'concat', '-safe', '0', '-i', list_path]
+    if audio_path:
+        cmd += ['-i', audio_path, '-map', '0:v:0', '-map', '1:a:0', '-c:a', 'aac']
+    cmd += ['-c:v', 'copy', '-movflags', '+faststart']
+    if metadata_comment:
+        cmd += ['-metadata', f"comment={metadata_comment}"]
+    if extra_args:
+        cmd += list(extra_args)
+    cmd.append(output_path)
+
+    from .cancellation import run
+    try:
+        run(cmd, check=True, capture_output=True)
+    finally:
+        try: os.remove(list_path)
+        except OSError: pass
+    return output_path
+
+
+def render_video_in_segments(final_video, segment_specs, output_path, target_size, project_id, log=None, jitter_id=None, fps=DEFAULT_FPS, subtitle_items=None, audio_path=None, ffmpeg_params=None):
+    """
+    v32.0: Segment render mode entry point used by generate_video_avgl.
+    - Scenes are encoded in parallel (one single-threaded libx264 per worker).
+    - The mixed soundtrack is written once, in a thread, while the pool runs.
+    - The final MP4 is a stream-copy concat of the segments + the audio.
+    - v32.1: Unchanged scenes are served from the content-addressed scene cache.
+    - v32.2: subtitle_items are burned per segment (only the events visible in it).
+    - v32.6: Plain image scenes may be encoded by an FFmpeg filtergraph (RENDER_IMAGE_BACKEND).
+    - v32.9: audio_path (offline mixdown stem) is muxed as is; no soundtrack pass here.
+    - v32.22: ffmpeg_params (render profile, e.g. draft CRF) are part of the scene cache key.
+    Returns True on success; False means the caller must fall back to write_videofile.
+    """
+    import shutil
+    import threading
+    from django.conf import settings
+    from django.core.cache import cache
+
+    log = log or logger.info
+    if not segment_specs or any(s is None for s in segment_specs):
+        log("⚠️ [Segments] Hay escenas sin descripción serializable. Usando renderizado estándar.")
+        return False
+
+    specs = quantize_segments(segment_specs, fps=fps)
+    work_dir = os.path.join(settings.MEDIA_ROOT, 'temp_segments_render', f"project_{project_id}_{int(time.time())}")
+    os.makedirs(work_dir, exist_ok=True)
+    workers = get_segment_workers()
+
+    # v32.2: Per-segment ASS in segment-local times. The ASS digest is part of the scene key,
+    # so a subtitle edit only invalidates the scenes it touches and a timing change upstream
+    # does not invalidate every later subtitled scene.
+    if subtitle_items:
+        from .subtitle_utils import compile_full_script_ass, select_subtitles_window, shift_subtitles
+        for i, spec in enumerate(specs):
+            seg_start = spec['start_frame'] / fps
+            seg_end = (spec['start_frame'] + spec['frames']) / fps
+            visible = select_subtitles_window(subtitle_items, seg_start, seg_end)
+            if not visible:
+                continue
+            seg_ass = os.path.join(work_dir, f"seg_{i:04d}.ass")
+            if not compile_full_script_ass(shift_subtitles(visible, seg_start), seg_ass):
+                log(f"⚠️ [Segments] No se pudo compilar el ASS de la escena {i+1}.")
+                shutil.rmtree(work_dir, ignore_errors=True)
+                return False
+            spec['subtitles_ass'] = seg_ass
+    render_params = {
+        'fps': fps,
+        'codec': 'libx264',
+        'preset': 'ultrafast',
+        'threads': 1,
+        'ffmpeg_params': ["-pix_fmt", "yuv420p"] + list(ffmpeg_params or []),
+        'image_backend': get_image_backend(),
+    }
+
+    # 1. Soundtrack (single pass, overlapped with the pixel work)
+    audio_error = []
+    audio_thread = None
+    if not audio_path and final_video.audio is not None:
+        audio_path = os.path.join(work_dir, "soundtrack.m4a")
+
+        def _write_audio():
+            try:
+                final_video.audio.write_audiofile(audio_path, fps=44100, codec='aac', bitrate='192k', logger=None)
+            except Exception as e:
+                audio_error.append(e)
+
+        audio_thread = threading.Thread(target=_write_audio, daemon=True)
+        audio_thread.start()
+
+    start = time.time()
+    total = len(specs)
+    segment_paths = [None] * total
+    progress = {'done': 0}
+
+    def report(idx, elapsed, hit=False):
+        progress['done'] += 1
+        p_val = 20 + (progress['done'] / total) * 70  # 20% → 90%
+        origin = "♻️ caché" if hit else f"{elapsed:.1f}s"
+        status_text = f"Segmento {progress['done']}/{total} ({p_val:.1f}%) | Escena {idx+1}: {origin}"
+        cache.set(f"project_{project_id}_progress", p_val, timeout=60)
+        cache.set(f"project_{project_id}_status_text", status_text, timeout=60)
+        log(f"  🧩 {status_text}")
+
+    try:
+        # v32.1: Incremental re-render - only scenes whose inputs changed are encoded again
+        scene_cache = get_scene_cache()
+        keys = [None] * total
+        jobs = []
+        for i, spec in enumerate(specs):
+            if scene_cache is not None:
+                try:
+                    keys[i] = scene_cache_key(spec, target_size, render_params)
+                    cached = scene_cache.get(keys[i], '.mp4')
+                except Exception as ke:
+                    log(f"  ⚠️ [SceneCache] Escena {i+1}: no se pudo calcular la huella ({ke})")
+                    keys[i] = cached = None
+                if cached:
+                    log(f"  ♻️ [SceneCache] Escena {i+1}: HIT ({keys[i][:10]})")
+                    segment_paths[i] = cached
+                    report(i, 0.0, hit=True)
+                    continue
+                if keys[i]:
+                    log(f"  🆕 [SceneCache] Escena {i+1}: MISS ({keys[i][:10]})")
+            jobs.append((i, spec, os.path.join(work_dir, f"seg_{i:04d}.mp4")))
+
+        def on_done(idx, out_path, elapsed):
+            if scene_cache is not None and keys[idx]:
+                out_path = scene_cache.put(keys[idx], out_path, '.mp4')
+            segment_paths[idx] = out_path
+            report(idx, elapsed)
+
+        log(f"🧩 [Segments] Renderizando {len(jobs)}/{total} escenas en paralelo ({min(workers, max(1, len(jobs)))} procesos)...")
+        render_segments_parallel(jobs, target_size, render_params, max_workers=workers, on_done=on_done)
+
+        if audio_thread:
+            audio_thread.join()
+            if audio_error:
+                raise audio_error[0]
+
+        log(f"🔗 [Segments] Ensamblando {len(segment_paths)} segmentos (copia directa)...")
+        concat_segments(segment_paths, audio_path, output_path, metadata_comment=jitter_id)
+        log(f"✅ [Segments] Ensamblado en {time.time() - start:.1f}s")
+
+        if scene_cache is not None:
+            hits = total - len(jobs)
+            log(f"📊 [SceneCache] {hits} HIT / {len(jobs)} MISS | {scene_cache.stats()['size_mb']} MB en caché")
+            scene_cache.evict(protect=segment_paths)
+        return True
+    except Exception as e:
+        from .cancellation import RenderCancelled, current_token
+        if isinstance(e, RenderCancelled) or (current_token() and current_token().is_cancelled()):
+            log("🛑 [Segments] Render cancelado. Procesos detenidos.")
+            return False
+        err = e.stderr.decode('utf-8', errors='replace') if isinstance(getattr(e, 'stderr', None), bytes) else e
+        log(f"⚠️ [Segments] Fallo en renderizado por segmentos: {err}. Reintentando con renderizado estándar.")
+        return False
+    finally:
+        if audio_thread and audio_thread.is_alive():
+            audio_thread.join()
+        shutil.rmtree(work_dir, ignore_errors=True)
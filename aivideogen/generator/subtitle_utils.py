@@ -1,7 +1,10 @@
 import os
+import logging
 import pysubs2
 from pysubs2 import SSAEvent, SSAStyle, make_time
 
+logger = logging.getLogger(__name__)
+
 def compile_full_script_ass(all_subtitles, output_path):
     """
     Genera un archivo .ass profesional usando pysubs2.
@@ -95,3 +98,68 @@ def compile_full_script_ass(all_subtitles, output_path):
         import traceback
         traceback.print_exc()
         return False
+
+
+def ass_filter_arg(ass_path):
+    """
+    v32.2: Argument for FFmpeg's ass filter with an ABSOLUTE path.
+    Colons (Windows drive letters) and quotes are escaped for the filtergraph parser,
+    so the filter works from any CWD (no more BASE_DIR-relative path trick).
+    """
+    p = os.path.abspath(ass_path).replace('\\', '/')
+    p = p.replace(':', '\\:').replace("'", "'\\\\\\''")
+    return f"ass=filename='{p}'"
+
+
+def select_subtitles_window(all_subtitles, start, end):
+    """v32.2: Subtitle items visible inside [start, end) (absolute seconds, untouched)."""
+    return [s for s in all_subtitles if s['start'] < end and s['end'] > start]
+
+
+def shift_subtitles(all_subtitles, offset):
+    """
+    v32.2: Copies of the subtitle items moved by -offset seconds (segment-local times).
+    Events that began before the segment start at 0; karaoke words already spoken are dropped.
+    """
+    shifted = []
+    for sub in all_subtitles:
+        item = dict(sub, start=max(0.0, sub['start'] - offset), end=sub['end'] - offset)
+        if sub.get('relevant_timings'):
+            item['relevant_timings'] = [
+                dict(w, start=max(0.0, w['start'] - offset), end=w['end'] - offset)
+                for w in sub['relevant_timings'] if w['end'] > offset
+            ]
+        shifted.append(item)
+    return shifted
+
+
+def embed_soft_subtitles(video_path, ass_path, language=None):
+    """
+    v32.2: Soft subtitles for drafts. Remuxes the ASS file as an embedded mov_text
+    track (stream copy, no pixel work) and replaces video_path in place.
+    """
+    import imageio_ffmpeg
+
+    tmp_path = video_path + ".subs.mp4"
+    iso_lang = {'es': 'spa', 'en': 'eng'}.get(language or 'es', language)
+    cmd = [
+        imageio_ffmpeg.get_ffmpeg_exe(), '-y', '-loglevel', 'error',
+        '-i', video_path, '-i', ass_path,
+        '-map', '0', '-map', '1:s:0',
+        '-c', 'copy', '-c:s', 'mov_text',
+        '-metadata:s:s:0', f"language={iso_lang}",
+        '-movflags', '+faststart',
+        tmp_path
+    ]
+    from .cancellation import run
+    try:
+        run(cmd, check=True, capture_output=True)
+        os.replace(tmp_path, video_path)
+        return True
+    except Exception as e:
+        err = e.stderr.decode('utf-8', errors='replace')[-300:] if isinstance(getattr(e, 'stderr', None), bytes) else e
+        logger.warning(f"⚠️ [Subtítulos] Error incrustando subtítulos suaves: {err}")
+        if os.path.exists(tmp_path):
+            try: os.remove(tmp_path)
+            except OSError: pass
+        return False
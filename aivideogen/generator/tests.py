@@ -1,3 +1,922 @@
-from django.test import TestCase
+"""
+Behavior tests of the render pipeline subsystems (v32.x).
+Run with: python manage.py test generator
+"""
 
-# Create your tests here.
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import threading
+
+import numpy as np
+from django.test import SimpleTestCase, TestCase, override_settings
+
+
+class TempDirMixin:
+    def setUp(self):
+        super().setUp()
+        self.tmp = tempfile.mkdtemp(prefix='avg_test_')
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+
+    def write_file(self, name, size):
+        path = os.path.join(self.tmp, name)
+        with open(path, 'wb') as f:
+            f.write(b'\0' * size)
+        return path
+
+    def make_video(self, name, frames, size='64x64', fps=30):
+        import subprocess
+        from .segment_renderer import get_ffmpeg_exe
+        path = os.path.join(self.tmp, name)
+        subprocess.run([get_ffmpeg_exe(), '-y', '-loglevel', 'error', '-f', 'lavfi',
+                        '-i', f'color=c=red:size={size}:rate={fps}', '-frames:v', str(frames),
+                        '-c:v', 'libx264', '-pix_fmt', 'yuv420p', path], check=True)
+        return path
+
+
+# ═══════════════════════════════════════════════════════════════════
+# Segment renderer (v32.0)
+# ═══════════════════════════════════════════════════════════════════
+class SegmentAssemblyTests(TempDirMixin, SimpleTestCase):
+    def test_quantize_keeps_total_frame_count(self):
+        from .segment_renderer import quantize_segments
+        specs = [{'duration': d} for d in (1.01, 0.333, 2.5, 0.05, 1.2)]
+        q = quantize_segments(specs, fps=30)
+        self.assertEqual(sum(s['frames'] for s in q), int(round(sum(s['duration'] for s in specs) * 30)))
+        self.assertEqual(q[0]['start_frame'], 0)
+        for prev, cur in zip(q, q[1:]):
+            self.assertEqual(cur['start_frame'], prev['start_frame'] + prev['frames'])
+
+    def test_concat_segments_stream_copies_in_order(self):
+        from .segment_renderer import concat_segments
+        from .media_probe import media_duration
+        segments = [self.make_video('seg_0.mp4', 15), self.make_video('seg_1.mp4', 30)]
+        out = concat_segments(segments, None, os.path.join(self.tmp, 'out.mp4'))
+        self.assertAlmostEqual(media_duration(out), 1.5, delta=0.05)
+        self.assertFalse(os.path.exists(out + ".segments.txt"))
+
+
+# ═══════════════════════════════════════════════════════════════════
+# Disk cache / scene cache (v32.1)
+# ═══════════════════════════════════════════════════════════════════
+class BoundedDiskCacheTests(TempDirMixin, SimpleTestCase):
+    def make_cache(self, max_bytes):
+        from .disk_cache import BoundedDiskCache
+        return BoundedDiskCache('test', max_mb=max_bytes / (1024 * 1024), root=self.tmp)
+
+    def test_put_moves_file_and_get_hits(self):
+        cache = self.make_cache(10_000)
+        src = self.write_file('src.bin', 100)
+        cached = cache.put('k1', src, ext='.bin')
+        self.assertFalse(os.path.exists(src))
+        self.assertEqual(cache.get('k1', ext='.bin'), cached)
+        self.assertIsNone(cache.get('missing', ext='.bin'))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_evict_drops_least_recently_used_first(self):
+        cache = self.make_cache(2500)
+        now = time.time()
+        paths = {}
+        for i, key in enumerate(('old', 'mid', 'new')):
+            paths[key] = cache.put(key, self.write_file(f'{key}.bin', 1000), ext='.bin')
+            os.utime(paths[key], (now - 100 + i * 10, now - 100 + i * 10))
+        # A hit refreshes the LRU position of 'old'
+        cache.get('old', ext='.bin')
+
+        freed = cache.evict()
+        self.assertEqual(freed, 1000)
+        self.assertFalse(os.path.exists(paths['mid']))
+        self.assertTrue(os.path.exists(paths['old']))
+        self.assertTrue(os.path.exists(paths['new']))
+
+    def test_evict_keeps_protected_entries(self):
+        cache = self.make_cache(500)
+        a = cache.put('a', self.write_file('a.bin', 1000), ext='.bin')
+        os.utime(a, (time.time() - 100, time.time() - 100))
+        b = cache.put('b', self.write_file('b.bin', 1000), ext='.bin')
+        cache.evict(protect=[a])
+        self.assertTrue(os.path.exists(a))
+        self.assertFalse(os.path.exists(b))
+
+    def test_hash_key_is_stable(self):
+        from .disk_cache import hash_key
+        self.assertEqual(hash_key('x', {'b': 1, 'a': 2}), hash_key('x', {'a': 2, 'b': 1}))
+        self.assertNotEqual(hash_key('x', 1), hash_key('x', 2))
+
+    def test_scene_key_follows_content_not_position(self):
+        from .segment_renderer import scene_cache_key
+        image = self.write_file('img.png', 100)
+        params = {'fps': 30, 'codec': 'libx264'}
+        spec = {'kind': 'ken_burns', 'image_path': image, 'duration': 2.0, 'frames': 60, 'start_frame': 0}
+        key = scene_cache_key(spec, (1920, 1080), params)
+        self.assertEqual(key, scene_cache_key(dict(spec, start_frame=900), (1920, 1080), params))
+        self.assertNotEqual(key, scene_cache_key(dict(spec, frames=61), (1920, 1080), params))
+        with open(image, 'ab') as f:
+            f.write(b'edit')
+        self.assertNotEqual(key, scene_cache_key(spec, (1920, 1080), params))
+
+
+# ═══════════════════════════════════════════════════════════════════
+# Per-segment subtitle burn-in (v32.2)
+# ═══════════════════════════════════════════════════════════════════
+class SegmentSubtitleTests(TempDirMixin, SimpleTestCase):
+    def test_shift_to_segment_local_times(self):
+        from .subtitle_utils import shift_subtitles
+        items = [
+            {'text': 'a', 'start': 10.5, 'end': 11.5},
+            {'text': 'b c', 'start': 9.0, 'end': 10.6, 'is_dynamic': True, 'relevant_timings': [
+                {'word': 'b', 'start': 9.0, 'end': 9.8}, {'word': 'c', 'start': 9.9, 'end': 10.6}]},
+        ]
+        a, b = shift_subtitles(items, 10.0)
+        self.assertEqual((a['start'], a['end']), (0.5, 1.5))
+        self.assertEqual(b['start'], 0.0)
+        self.assertAlmostEqual(b['end'], 0.6)
+        self.assertEqual([w['word'] for w in b['relevant_timings']], ['c'])
+        self.assertEqual(items[0]['start'], 10.5)
+
+    def test_segment_ass_is_burned_in_local_time(self):
+        import subprocess
+        from .segment_renderer import get_ffmpeg_exe, subtitle_filters
+        from .subtitle_utils import compile_full_script_ass, shift_subtitles
+        ass = os.path.join(self.tmp, 'seg.ass')
+        # Event at 100.2s-100.6s of the timeline, inside a segment that starts at 100s
+        events = shift_subtitles([{'text': 'XXXXXX', 'start': 100.2, 'end': 100.6, 'y_pos': 0.5}], 100.0)
+        self.assertTrue(compile_full_script_ass(events, ass))
+        w, h = 270, 480
+        cmd = [get_ffmpeg_exe(), '-loglevel', 'error', '-f', 'lavfi', '-i', f'color=c=black:size={w}x{h}:rate=10',
+               '-frames:v', '10', '-vf', ','.join(subtitle_filters({'subtitles_ass': ass})),
+               '-f', 'rawvideo', '-pix_fmt', 'gray', '-']
+        raw = subprocess.run(cmd, capture_output=True, check=True).stdout
+        frames = np.frombuffer(raw, np.uint8).reshape(-1, h, w)
+        lit = [int(f.max() > 128) for f in frames]
+        self.assertEqual(lit, [0, 0, 1, 1, 1, 1, 0, 0, 0, 0])
+
+
+# ═══════════════════════════════════════════════════════════════════
+# Ken Burns motion plan (v32.3)
+# ═══════════════════════════════════════════════════════════════════
+class KenBurnsPlanTests(SimpleTestCase):
+    def test_required_scale_follows_max_zoom(self):
+        from .ken_burns import KenBurnsPlan
+        still = KenBurnsPlan((3840, 2160), (1920, 1080), 2.0, zoom="1.0:1.0", move="HOR:50:50")
+        zoomed = KenBurnsPlan((3840, 2160), (1920, 1080), 2.0, zoom="1.0:2.0", move="HOR:50:50")
+        self.assertAlmostEqual(still.required_scale(), 0.5, delta=0.05)
+        self.assertGreater(zoomed.required_scale(), still.required_scale())
+
+    def test_table_maps_crop_window(self):
+        from .ken_burns import KenBurnsPlan
+        plan = KenBurnsPlan((2000, 1000), (200, 100), 1.0, fps=10, zoom="1.0:2.0", move="HOR:0:100")
+        self.assertEqual(plan.n_frames, 11)
+        # First frame: full-height crop (2000x1000 -> base 2000x1000) panned fully left
+        first, last = plan.table[0], plan.table[-1]
+        self.assertAlmostEqual(first[0, 0], 10.0)
+        self.assertAlmostEqual(first[0, 2], 0.0)
+        # Last frame: half-size crop (zoom 2.0) against the right edge
+        self.assertAlmostEqual(last[0, 0], 5.0)
+        self.assertAlmostEqual(last[0, 2] + last[0, 0] * 200, 2000.0)
+
+    def test_source_bounds_cover_only_sampled_area(self):
+        from .ken_burns import KenBurnsPlan
+        plan = KenBurnsPlan((4000, 2000), (400, 200), 1.0, zoom="2.0:2.0", move="HOR:50:50")
+        x0, y0, x1, y1 = plan.source_bounds(margin=0)
+        self.assertLessEqual(abs((x1 - x0) - 2000), 2)
+        self.assertLessEqual(abs((y1 - y0) - 1000), 2)
+
+
+# ═══════════════════════════════════════════════════════════════════
+# Image pyramid (v32.4)
+# ═══════════════════════════════════════════════════════════════════
+@override_settings(IMAGE_PYRAMID_ENABLED=False)
+class ImagePyramidTests(TempDirMixin, SimpleTestCase):
+    def save_jpeg(self, name, array, orientation=None):
+        from PIL import Image
+        path = os.path.join(self.tmp, name)
+        kwargs = {'quality': 95}
+        if orientation:
+            exif = Image.Exif()
+            exif[0x0112] = orientation
+            kwargs['exif'] = exif
+        Image.fromarray(array).save(path, **kwargs)
+        return path
+
+    def source_image(self):
+        import cv2
+        rng = np.random.default_rng(7)
+        small = (rng.random((30, 40, 3)) * 255).astype(np.uint8)
+        return cv2.resize(small, (400, 300), interpolation=cv2.INTER_CUBIC)
+
+    def test_pick_level_covers_required_scale(self):
+        from .image_pyramid import pick_level
+        self.assertEqual(pick_level((8000, 4000), 0.1), 8)
+        self.assertEqual(pick_level((8000, 4000), 0.3), 2)
+        self.assertEqual(pick_level((8000, 4000), 0.9), 1)
+
+    def test_exif_orientation_size_matches_decoded_level(self):
+        from .image_pyramid import get_image_size, _decode_level
+        img = self.source_image()
+        for orientation, expected in ((1, (400, 300)), (3, (400, 300)), (6, (300, 400)), (8, (300, 400))):
+            path = self.save_jpeg(f'o{orientation}.jpg', img, orientation)
+            self.assertEqual(get_image_size(path), expected)
+            for d in (1, 2):
+                level = _decode_level(path, d)
+                self.assertEqual((level.shape[1] * d, level.shape[0] * d), expected)
+
+    def test_exif_rotated_photo_renders_like_rotated_pixels(self):
+        import cv2
+        from .video_engine import apply_ken_burns
+        img = self.source_image()
+        tagged = self.save_jpeg('tagged.jpg', img, orientation=6)
+        rotated = self.save_jpeg('rotated.jpg', cv2.rotate(img, cv2.ROTATE_90_CLOCKWISE))
+        frames = []
+        for path in (tagged, rotated):
+            clip = apply_ken_burns(path, 1.0, (320, 180), zoom="1.0:1.2", move="HOR:50:50",
+                                   human_noise_enabled=False, fps=30)
+            frames.append(np.array(clip.get_frame(0.5), dtype=np.float32, copy=True))
+            clip.close()
+        self.assertLess(np.abs(frames[0] - frames[1]).mean(), 5.0)
+
+
+# ═══════════════════════════════════════════════════════════════════
+# Music gain envelope (v32.8)
+# ═══════════════════════════════════════════════════════════════════
+class GainEnvelopeTests(SimpleTestCase):
+    def test_duck_attack_hold_release(self):
+        from .audio_envelope import GainEnvelope
+        env = GainEnvelope(10.0).duck([(2.0, 4.0)], ratio=0.2, attack=1.0, release=2.0)
+        self.assertAlmostEqual(env.gains(0.5), 1.0)
+        self.assertAlmostEqual(env.gains(1.5), 0.6, places=3)
+        self.assertAlmostEqual(env.gains(3.0), 0.2, places=3)
+        self.assertAlmostEqual(env.gains(5.0), 0.6, places=3)
+        self.assertAlmostEqual(env.gains(7.0), 1.0)
+
+    def test_overlapping_ramps_keep_minimum(self):
+        from .audio_envelope import GainEnvelope
+        env = GainEnvelope(10.0).duck([(2.0, 3.0), (3.5, 5.0)], ratio=0.0, attack=1.0, release=1.0)
+        self.assertAlmostEqual(env.gains(3.25), 0.25, places=3)
+
+    def test_fades_volume_map_and_mute(self):
+        from .audio_envelope import global_ducking_envelope
+        env = global_ducking_envelope(10.0, [], 0.2, 0.1, 0.1, block_ranges=[(0.0, 5.0, 0.5), (5.0, 10.0, 0.25)],
+                                      default_volume=0.1, fade=1.0, early_finish=0.5, mute_intervals=[(8.0, 9.0)])
+        self.assertAlmostEqual(env.gains(0.0), 0.0)
+        self.assertAlmostEqual(env.gains(0.5), 0.25, places=3)
+        self.assertAlmostEqual(env.gains(2.0), 0.5, places=3)
+        self.assertAlmostEqual(env.gains(4.75), 0.0)
+        self.assertAlmostEqual(env.gains(7.0), 0.25, places=3)
+        self.assertAlmostEqual(env.gains(8.5), 0.0)
+
+    def test_gains_vectorized_and_apply(self):
+        from .audio_envelope import GainEnvelope
+        env = GainEnvelope(2.0).scale(0.5)
+        t = np.linspace(0.0, 2.0, 7)
+        np.testing.assert_allclose(env.gains(t), 0.5)
+        out = env.apply(lambda t: np.ones((len(t), 2)), t)
+        np.testing.assert_allclose(out, 0.5)
+
+
+# ═══════════════════════════════════════════════════════════════════
+# Offline soundtrack mixdown (v32.9)
+# ═══════════════════════════════════════════════════════════════════
+class MixdownTests(TempDirMixin, SimpleTestCase):
+    def write_wav(self, name, samples, fps=44100):
+        import wave
+        path = os.path.join(self.tmp, name)
+        with wave.open(path, 'wb') as wav:
+            wav.setnchannels(2)
+            wav.setsampwidth(2)
+            wav.setframerate(fps)
+            wav.writeframes((np.repeat(samples[:, None], 2, axis=1) * 32767).astype('<i2').tobytes())
+        return path
+
+    def read_wav(self, path):
+        import wave
+        with wave.open(path, 'rb') as wav:
+            self.assertEqual((wav.getnchannels(), wav.getframerate()), (2, 44100))
+            data = np.frombuffer(wav.readframes(wav.getnframes()), dtype='<i2')
+        return data.reshape(-1, 2).astype(np.float32) / 32767
+
+    def test_bed_is_looped_under_envelope_plus_dialogue(self):
+        from moviepy import AudioClip
+        from .audio_envelope import GainEnvelope
+        from .audio_mixdown import mixdown_soundtrack
+        # 0.25 s bed: first half 0.4, second half -0.4 (so the loop position is visible)
+        bed = self.write_wav('bed.wav', np.where(np.arange(11025) < 5512, 0.4, -0.4).astype(np.float32))
+        envelope = GainEnvelope(1.0).scale(0.5)
+        dialogue = AudioClip(lambda t: np.full((np.size(t), 2), 0.1), duration=1.0, fps=44100)
+        out = mixdown_soundtrack(dialogue, 1.0, os.path.join(self.tmp, 'mix.wav'), beds=[(bed, envelope)],
+                                 log=lambda msg: None)
+        mix = self.read_wav(out)
+        self.assertEqual(len(mix), 44100)
+        for i, expected in ((100, 0.3), (8000, -0.1), (11025 + 100, 0.3), (44000, -0.1)):
+            self.assertAlmostEqual(float(mix[i, 0]), expected, delta=0.01)
+        self.assertFalse(os.path.exists(out + '.part'))
+
+    def test_output_is_clipped_and_unreadable_bed_falls_back(self):
+        from .audio_mixdown import mixdown_soundtrack
+        from moviepy import AudioClip
+        loud = AudioClip(lambda t: np.full((np.size(t), 2), 3.0), duration=0.5, fps=44100)
+        mix = self.read_wav(mixdown_soundtrack(loud, 0.5, os.path.join(self.tmp, 'loud.wav'), log=lambda msg: None))
+        self.assertAlmostEqual(float(mix.max()), 1.0, delta=0.001)
+        broken = self.write_file('broken.mp3', 10)
+        self.assertIsNone(mixdown_soundtrack(None, 0.5, os.path.join(self.tmp, 'x.wav'), beds=[(broken, None)]))
+
+
+# ═══════════════════════════════════════════════════════════════════
+# Segmented Edge TTS assembly (v32.10)
+# ═══════════════════════════════════════════════════════════════════
+class EdgeSegmentAssemblyTests(TempDirMixin, SimpleTestCase):
+    RATE = 24000
+
+    def pcm(self, seconds, value=1000):
+        return np.full(int(seconds * self.RATE), value, dtype=np.int16)
+
+    def test_split_pauses_and_emotions_in_script_order(self):
+        from .avgl_engine import edge_segments
+        segments = edge_segments("Hola [PAUSA:0.5] [TENSO]cuidado[/TENSO] fin")
+        self.assertEqual([(s[0], s[1]) for s in segments],
+                         [('text', 'Hola'), ('pause', 0.5), ('text', 'cuidado'), ('text', 'fin')])
+        self.assertEqual(segments[2][2], {'pitch': '-2Hz', 'rate': '-5%'})
+
+    def test_timings_are_rebuilt_in_script_order(self):
+        from .avgl_engine import _assemble_edge_segments
+        segments = [
+            ('text', self.pcm(1.0), [{'word': 'uno', 'start': 0.1, 'end': 0.8}], 0.8),
+            ('pause', 0.5),
+            ('text', self.pcm(1.0), [{'word': 'dos', 'start': 0.0, 'end': 0.4}], 0.4),
+        ]
+        words, intervals, duration = _assemble_edge_segments(segments, os.path.join(self.tmp, 'v.wav'))
+        self.assertEqual([w['word'] for w in words], ['uno', 'dos'])
+        self.assertAlmostEqual(words[1]['start'], 1.3)
+        self.assertEqual(len(intervals), 2)
+        self.assertAlmostEqual(intervals[1][0], 1.3)
+        self.assertAlmostEqual(duration, 1.7)
+
+    def test_only_pauses_assemble_nothing(self):
+        from .avgl_engine import _assemble_edge_segments
+        self.assertIsNone(_assemble_edge_segments([('pause', 1.0)], os.path.join(self.tmp, 'v.wav')))
+
+    def test_pcm_trimmed_at_last_word_and_written_once(self):
+        import wave
+        from .avgl_engine import _assemble_edge_segments
+        out = os.path.join(self.tmp, 'v.wav')
+        # 1.0 s of PCM but the last word ends at 0.75 s: the tail padding is cut by sample index
+        segments = [('pause', 0.25), ('text', self.pcm(1.0), [{'word': 'a', 'start': 0.0, 'end': 0.75}], 0.75)]
+        _, intervals, duration = _assemble_edge_segments(segments, out)
+        self.assertEqual(duration, 1.0)
+        self.assertEqual(intervals, [(0.25, 1.0)])
+        with wave.open(out, 'rb') as wav:
+            self.assertEqual((wav.getnchannels(), wav.getframerate(), wav.getnframes()), (1, self.RATE, self.RATE))
+            pcm = np.frombuffer(wav.readframes(wav.getnframes()), dtype='<i2')
+        self.assertFalse(pcm[:6000].any())
+        self.assertTrue((pcm[6000:] == 1000).all())
+
+    def test_word_timings_rescaled_when_audio_is_shorter(self):
+        from .avgl_engine import _assemble_edge_segments
+        segments = [('text', self.pcm(0.5), [{'word': 'a', 'start': 0.0, 'end': 0.5},
+                                              {'word': 'b', 'start': 0.5, 'end': 1.0}], 1.0)]
+        words, _, duration = _assemble_edge_segments(segments, os.path.join(self.tmp, 'v.wav'))
+        self.assertEqual(duration, 0.5)
+        self.assertAlmostEqual(words[-1]['end'], 0.5)
+
+
+# ═══════════════════════════════════════════════════════════════════
+# Media probe cache (v32.13)
+# ═══════════════════════════════════════════════════════════════════
+class MediaProbeTests(TempDirMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        from unittest import mock
+        from . import media_probe
+        override = override_settings(MEDIA_ROOT=self.tmp)
+        override.enable()
+        self.addCleanup(override.disable)
+        # Fresh process-wide probe store and memo under the temporary MEDIA_ROOT
+        for patcher in (mock.patch.object(media_probe, '_probe_cache', None),
+                        mock.patch.dict(media_probe._memo, clear=True)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def make_av(self, name, seconds=2.0):
+        import subprocess
+        from .segment_renderer import get_ffmpeg_exe
+        path = os.path.join(self.tmp, name)
+        subprocess.run([get_ffmpeg_exe(), '-y', '-loglevel', 'error',
+                        '-f', 'lavfi', '-i', 'color=c=blue:size=64x48:rate=25',
+                        '-f', 'lavfi', '-i', 'sine=frequency=440:sample_rate=44100',
+                        '-t', str(seconds), '-c:v', 'libx264', '-pix_fmt', 'yuv420p', '-c:a', 'aac', '-ac', '2',
+                        path], check=True)
+        return path
+
+    def test_probe_fields_and_audio_check(self):
+        from .media_probe import probe_media, audio_is_healthy, _check_audio
+        meta = probe_media(self.make_av('av.mp4', 2.5))
+        self.assertAlmostEqual(meta['duration'], 2.5, delta=0.1)
+        self.assertEqual((meta['width'], meta['height']), (64, 48))
+        self.assertEqual((meta['has_video'], meta['has_audio']), (True, True))
+        self.assertEqual((meta['audio_codec'], meta['audio_channels'], meta['audio_fps']), ('aac', 2, 44100))
+        self.assertIs(meta['audio_ok'], True)
+        self.assertIs(audio_is_healthy(self.make_av('av2.mp4')), True)
+
+        silent = self.make_video('silent.mp4', 10)
+        self.assertIs(audio_is_healthy(silent), None)
+        ok, error = _check_audio(silent, 0.4)
+        self.assertFalse(ok)
+        self.assertTrue(error)
+
+    def test_probe_is_cached_per_file_version(self):
+        from unittest import mock
+        from . import media_probe
+        path = self.make_av('av.mp4', 1.0)
+        first = media_probe.probe_media(path)
+        media_probe._memo.clear()
+        with mock.patch.object(media_probe, '_probe', side_effect=AssertionError('re-probed')):
+            self.assertEqual(media_probe.probe_media(path), first)
+
+        # Replacing the file (new size/mtime) is probed again
+        os.replace(self.make_av('longer.mp4', 2.0), path)
+        self.assertAlmostEqual(media_probe.media_duration(path), 2.0, delta=0.1)
+
+    def test_missing_or_unreadable_file(self):
+        from .media_probe import probe_media, media_duration
+        self.assertIsNone(probe_media(os.path.join(self.tmp, 'nope.mp4')))
+        self.assertEqual(media_duration(self.write_file('junk.mp4', 100), default=7.0), 7.0)
+
+
+# ═══════════════════════════════════════════════════════════════════
+# Asset filename index (v32.14)
+# ═══════════════════════════════════════════════════════════════════
+class AssetIndexTests(TempDirMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        from unittest import mock
+        from . import asset_index
+        patcher = mock.patch.dict(asset_index._indexes, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.assets = os.path.join(self.tmp, 'assets')
+        self.uploads = os.path.join(self.tmp, 'uploads')
+        os.makedirs(os.path.join(self.assets, 'deep', 'er'))
+        os.makedirs(self.uploads)
+
+    def touch(self, *parts):
+        path = os.path.join(self.tmp, *parts)
+        open(path, 'wb').close()
+        return path
+
+    def test_lookup_order(self):
+        from .asset_index import resolve_asset
+        top = self.touch('assets', 'photo.png')
+        deep = self.touch('assets', 'deep', 'er', 'Sunset.JPG')
+        dirs, exts = [self.uploads, self.assets], ('.png', '.jpg')
+        self.assertEqual(resolve_asset('photo', dirs, exts), top)
+        self.assertEqual(resolve_asset('photo.png', dirs, exts), top)
+        self.assertIsNone(resolve_asset('sunset.jpg', dirs, exts))
+        self.assertEqual(resolve_asset('sunset.jpg', dirs, exts, deep_dirs=[self.assets]), deep)
+        self.assertEqual(resolve_asset('SUNSET', dirs, exts, deep_dirs=[self.assets]), deep)
+        self.assertEqual(resolve_asset(os.path.join('deep', 'er', 'Sunset.JPG'), dirs, exts), deep)
+        self.assertIsNone(resolve_asset('', dirs, exts))
+
+    def test_new_file_found_right_after_a_miss(self):
+        from .asset_index import resolve_asset
+        dirs = [self.uploads, self.assets]
+        self.assertIsNone(resolve_asset('late.png', dirs))
+        late = self.touch('uploads', 'late.png')
+        self.assertEqual(resolve_asset('late.png', dirs), late)
+
+    def test_stale_hit_is_rebuilt_and_retried(self):
+        from .asset_index import resolve_asset
+        dirs = [self.uploads, self.assets]
+        old = self.touch('uploads', 'clip.mp4')
+        self.assertEqual(resolve_asset('clip.mp4', dirs), old)
+        # Moved between directories inside the recheck window: the cached hit is gone
+        os.remove(old)
+        moved = self.touch('assets', 'clip.mp4')
+        self.assertEqual(resolve_asset('clip.mp4', dirs), moved)
+        os.remove(moved)
+        self.assertIsNone(resolve_asset('clip.mp4', dirs))
+
+
+# ═══════════════════════════════════════════════════════════════════
+# Render log sink (v32.15)
+# ═══════════════════════════════════════════════════════════════════
+class ProjectLogTests(TempDirMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        from .models import VideoProject
+        override = override_settings(MEDIA_ROOT=self.tmp)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.project = VideoProject.objects.create(title='Log', script_text='{}', log_output='Inicio')
+
+    def append(self, text):
+        from .utils import project_log_path
+        with open(project_log_path(self.project.id), 'ab') as f:
+            f.write(text.encode('utf-8'))
+
+    def test_read_by_cursor(self):
+        from .utils import read_project_log, reset_project_log
+        self.assertEqual(read_project_log(self.project.id, 0), (None, 0))
+        reset_project_log(self.project)
+        text, cursor = read_project_log(self.project.id)
+        self.assertEqual(text, 'Inicio\n')
+
+        # A half-written line is held back until its newline arrives
+        self.append('línea 1\nlínea ')
+        text, cursor = read_project_log(self.project.id, cursor)
+        self.assertEqual(text, 'línea 1\n')
+        self.assertEqual(read_project_log(self.project.id, cursor), ('', cursor))
+        self.append('2\n')
+        text, cursor = read_project_log(self.project.id, cursor)
+        self.assertEqual(text, 'línea 2\n')
+
+        # A new render resets the file: a stale cursor past the end starts over
+        reset_project_log(self.project)
+        self.assertEqual(read_project_log(self.project.id, cursor)[0], 'Inicio\n')
+
+    def test_logger_flushes_to_file_and_appends_to_log_output(self):
+        from .models import VideoProject
+        from .utils import ProjectLogger, read_project_log, reset_project_log
+        reset_project_log(self.project)
+        logger = ProjectLogger(self.project)
+        logger.log('uno')
+        logger.log('dos')
+        # Written by other code (stop button) while the render runs
+        VideoProject.objects.filter(pk=self.project.pk).update(log_output='Inicio\nStop')
+        logger.close()
+
+        text, _ = read_project_log(self.project.id)
+        self.assertEqual([line.split('] ', 1)[-1] for line in text.splitlines()], ['Inicio', 'uno', 'dos'])
+        log_output = VideoProject.objects.get(pk=self.project.pk).log_output
+        self.assertTrue(log_output.startswith('Inicio\nStop\n'))
+        self.assertTrue(log_output.endswith('dos'))
+
+
+# ═══════════════════════════════════════════════════════════════════
+# Cancellation (v32.16)
+# ═══════════════════════════════════════════════════════════════════
+class CancellationTests(TestCase):
+    def test_run_kills_child_on_cancel(self):
+        from .cancellation import CancellationToken, RenderCancelled, run
+        token = CancellationToken(987654)
+        self.addCleanup(token.stop)
+        token.start()
+        threading.Timer(0.3, token.cancel).start()
+        started = time.time()
+        with self.assertRaises(RenderCancelled):
+            run([sys.executable, '-c', 'import time; time.sleep(30)'], capture_output=True)
+        self.assertLess(time.time() - started, 10)
+
+    def test_run_refuses_to_start_after_cancel(self):
+        from .cancellation import CancellationToken, RenderCancelled, run
+        token = CancellationToken(987655)
+        self.addCleanup(token.stop)
+        token.start()
+        token.cancel()
+        with self.assertRaises(RenderCancelled):
+            run([sys.executable, '-c', 'pass'])
+
+    def test_run_without_token_is_plain_subprocess(self):
+        from .cancellation import run
+        result = run([sys.executable, '-c', 'print(42)'], capture_output=True, check=True)
+        self.assertEqual(result.stdout.strip(), b'42')
+
+
+# ═══════════════════════════════════════════════════════════════════
+# Render queue (v32.17)
+# ═══════════════════════════════════════════════════════════════════
+@override_settings(RENDER_JOB_MAX_ATTEMPTS=2)
+class RenderQueueTests(TestCase):
+    def setUp(self):
+        from .models import VideoProject
+        self.project = VideoProject.objects.create(title='Queue', script_text='{}', status='processing')
+
+    def test_enqueue_reuses_pending_job_and_raises_priority(self):
+        from .render_queue import enqueue_render
+        job = enqueue_render(self.project, priority=0)
+        again = enqueue_render(self.project, priority=5)
+        self.assertEqual(job.id, again.id)
+        again.refresh_from_db()
+        self.assertEqual(again.priority, 5)
+
+    def test_claim_is_compare_and_set(self):
+        from .render_queue import enqueue_render, claim_job, peek_next_job
+        job = enqueue_render(self.project)
+        self.assertEqual(peek_next_job().id, job.id)
+        self.assertTrue(claim_job(job, 'w1'))
+        self.assertEqual((job.status, job.worker, job.attempts), ('running', 'w1', 1))
+        self.assertFalse(claim_job(job, 'w2'))
+        self.assertIsNone(peek_next_job())
+
+    def test_crash_is_retried_then_failed(self):
+        from .models import VideoProject
+        from .render_queue import enqueue_render, claim_job, finish_job
+        job = enqueue_render(self.project)
+        claim_job(job, 'w1')
+        self.assertEqual(finish_job(job, exitcode=-9), 'queued')
+        job.refresh_from_db()
+        self.assertIn('-9', job.error)
+        self.assertTrue(claim_job(job, 'w1'))
+        self.assertEqual(finish_job(job, exitcode=-9), 'failed')
+        self.assertEqual(VideoProject.objects.get(pk=self.project.pk).status, 'failed')
+
+    def test_final_project_status_finishes_job(self):
+        from .models import VideoProject
+        from .render_queue import enqueue_render, claim_job, finish_job
+        job = enqueue_render(self.project)
+        claim_job(job, 'w1')
+        VideoProject.objects.filter(pk=self.project.pk).update(status='cancelled')
+        self.assertEqual(finish_job(job, exitcode=0), 'cancelled')
+
+    def test_orphaned_jobs_of_dead_supervisors(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from .models import RenderJob
+        from .render_queue import enqueue_render, claim_job, orphaned_jobs
+        job = enqueue_render(self.project)
+        claim_job(job, 'dead-worker')
+        RenderJob.objects.filter(id=job.id).update(pid=os.getpid(), heartbeat_at=timezone.now() - timedelta(minutes=5))
+        self.assertEqual([(j.id, alive) for j, alive in orphaned_jobs('me')], [(job.id, True)])
+        self.assertEqual(orphaned_jobs('dead-worker'), [])
+
+
+class RenderQueueApiTests(TestCase):
+    def setUp(self):
+        from unittest import mock
+        from .models import VideoProject
+        # No worker process / inline consumer is started by the API calls under test
+        patcher = mock.patch('generator.render_queue.ensure_render_consumer', return_value='worker')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.project = VideoProject.objects.create(title='Api', script_text='{}', status='pending')
+
+    def post(self, url, body):
+        import json
+        return self.client.post(url, data=json.dumps(body), content_type='application/json')
+
+    def test_enqueue_rejects_bad_bodies(self):
+        from .models import RenderJob
+        from django.urls import reverse
+        url = reverse('generator:api_enqueue_project', args=[self.project.id])
+        for body in ([1, 2], 3, {'priority': 'high'}, {'priority': [1]}):
+            self.assertEqual(self.post(url, body).status_code, 400, body)
+        self.assertFalse(RenderJob.objects.exists())
+        response = self.post(url, {'priority': '3'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(RenderJob.objects.get().priority, 3)
+
+    def test_batch_is_validated_before_creating_anything(self):
+        from django.urls import reverse
+        from .models import VideoProject, RenderJob
+        url = reverse('generator:api_batch')
+        script = {'title': 'B', 'blocks': []}
+        bad = [{'script': script}, {'script': script, 'priority': 'high'}]
+        for body in ({'jobs': bad}, {'jobs': [{'script': script}, 'x']}, {'jobs': {}}, 7):
+            self.assertEqual(self.post(url, body).status_code, 400, body)
+        self.assertEqual(VideoProject.objects.count(), 1)
+        self.assertFalse(RenderJob.objects.exists())
+        response = self.post(url, {'defaults': {'priority': 2}, 'jobs': [{'script': script}] * 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(RenderJob.objects.values_list('priority', flat=True)), [2, 2])
+
+    def test_enqueue_marks_project_queued_until_a_worker_starts_it(self):
+        from unittest import mock
+        from django.urls import reverse
+        from .models import VideoProject, RenderJob
+        from .render_queue import _render_inline
+        response = self.post(reverse('generator:api_enqueue_project', args=[self.project.id]), {'profile': 'draft'})
+        self.assertEqual(response.status_code, 200)
+        self.project.refresh_from_db()
+        self.assertEqual((self.project.status, self.project.render_profile), ('queued', 'draft'))
+
+        seen = []
+        with mock.patch('generator.utils.generate_video_process', side_effect=lambda p: seen.append(p.status)):
+            _render_inline(RenderJob.objects.get().id)
+        self.assertEqual(seen, ['processing'])
+        self.assertEqual(VideoProject.objects.get(pk=self.project.pk).status, 'processing')
+
+    def test_start_from_the_ui_queues_the_project(self):
+        from django.urls import reverse
+        response = self.client.post(reverse('generator:start_project', args=[self.project.id]))
+        self.assertEqual(response.status_code, 302)
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.status, 'queued')
+        page = self.client.get(reverse('generator:project_detail', args=[self.project.id]))
+        self.assertContains(page, 'En cola')
+        self.assertContains(page, 'progress-container')
+
+    def test_batch_projects_start_queued(self):
+        from .batch import launch_batch
+        from .models import RenderJob
+        launch_batch([{'script': json.dumps(SMALL_SCRIPT)}, {'script': json.dumps(SMALL_SCRIPT), 'render_profile': 'draft'}])
+        jobs = RenderJob.objects.select_related('project')
+        self.assertEqual({(j.status, j.project.status) for j in jobs}, {('queued', 'queued')})
+        self.assertEqual(sorted(j.project.render_profile for j in jobs), ['draft', 'final'])
+
+    def test_job_lost_before_start_is_retried(self):
+        from .models import VideoProject
+        from .render_queue import enqueue_render, claim_job, finish_job
+        VideoProject.objects.filter(pk=self.project.pk).update(status='queued')
+        job = enqueue_render(self.project)
+        claim_job(job, 'w1')
+        self.assertEqual(finish_job(job, exitcode=1), 'queued')
+
+
+# ═══════════════════════════════════════════════════════════════════
+# Timeline IR (v32.20)
+# ═══════════════════════════════════════════════════════════════════
+SMALL_SCRIPT = {
+    "title": "Test",
+    "blocks": [
+        {"title": "B1", "scenes": [
+            {"title": "S1", "text": "uno dos", "silent": True, "assets": [{"id": "img.png"}]},
+            {"title": "S2", "text": "tres", "silent": True, "pause": 0.5, "assets": [{"id": "img.png"}]},
+            {"title": "S3", "text": "", "duration": 2.0, "force_duration": True, "assets": [{"id": "img.png"}]},
+        ]},
+        {"title": "B2", "groups": [{"zoom": "1.0:1.4", "master_asset": "img.png", "scenes": [
+            {"title": "G1", "text": "cuatro", "silent": True},
+            {"title": "G2", "text": "cinco", "silent": True},
+        ]}]},
+    ]}
+
+
+class TimelineTests(SimpleTestCase):
+    def compile(self, voices):
+        from .avgl_engine import parse_avgl_json
+        from .timeline import compile_timeline
+        script = parse_avgl_json(json.dumps(SMALL_SCRIPT))
+        scenes = script.get_all_scenes()
+        return compile_timeline(script, {s: v for s, v in zip(scenes, voices)})
+
+    def test_absolute_offsets(self):
+        timeline = self.compile([1.5, 1.0, 9.0, 2.0, 3.0])
+        self.assertEqual([e.start for e in timeline.scenes], [0.0, 1.5, 3.0, 5.0, 7.0])
+        # pause is added to the voice, force_duration wins over it
+        self.assertEqual([e.duration for e in timeline.scenes], [1.5, 1.5, 2.0, 2.0, 3.0])
+        self.assertEqual(timeline.duration, 10.0)
+        self.assertEqual([b.start for b in timeline.blocks], [0.0, 5.0])
+
+    def test_group_offsets_and_lookup(self):
+        timeline = self.compile([1.5, 1.0, 9.0, 2.0, 3.0])
+        g1, g2 = timeline.scenes[3], timeline.scenes[4]
+        self.assertEqual(g1.group_id, g2.group_id)
+        self.assertEqual((g1.group_offset, g2.group_offset), (0.0, 2.0))
+        self.assertEqual(g1.group_duration, 5.0)
+        self.assertEqual(timeline.groups[g1.group_id].scene_indices, (3, 4))
+        self.assertEqual(timeline.scene_at(0.0).index, 0)
+        self.assertEqual(timeline.scene_at(4.99).index, 2)
+        self.assertEqual(timeline.scene_at(7.0).index, 4)
+        self.assertEqual(timeline.scene_at(99).index, 4)
+        self.assertIs(timeline.entry(g2.scene), g2)
+
+    def test_nodes_are_immutable(self):
+        timeline = self.compile([1.0] * 5)
+        with self.assertRaises(AttributeError):
+            timeline.scenes[0].start = 3.0
+
+
+# ═══════════════════════════════════════════════════════════════════
+# Dry-run planner (v32.21)
+# ═══════════════════════════════════════════════════════════════════
+class PlannerTests(TempDirMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        import cv2
+        os.makedirs(os.path.join(self.tmp, 'assets'))
+        cv2.imwrite(os.path.join(self.tmp, 'assets', 'img.png'), np.zeros((90, 160, 3), np.uint8))
+        override = override_settings(MEDIA_ROOT=self.tmp, TTS_CACHE_ENABLED=False)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def plan(self, script, **fields):
+        from .models import VideoProject
+        from .planner import plan_render
+        project = VideoProject(title='Plan', script_text=json.dumps(script), engine='edge', **fields)
+        return plan_render(project)
+
+    def test_plan_of_small_script(self):
+        plan = self.plan(SMALL_SCRIPT)
+        self.assertTrue(plan['ok'], plan['problems'])
+        self.assertEqual(len(plan['scenes']), 5)
+        # Group scenes are not parsed with 'silent', so their voice is estimated
+        self.assertEqual([s['duration_source'] for s in plan['scenes']], ['silent'] * 3 + ['estimate'] * 2)
+        self.assertEqual(plan['tts']['to_synthesize'], 2)
+        self.assertEqual(plan['scenes'][0]['asset']['kind'], 'image')
+        self.assertAlmostEqual(plan['duration'], sum(s['duration'] for s in plan['scenes']), delta=0.05)
+        self.assertEqual(plan['profile'], 'final')
+
+    def test_missing_asset_is_reported(self):
+        script = json.loads(json.dumps(SMALL_SCRIPT))
+        script['blocks'][0]['scenes'][0]['assets'][0]['id'] = 'nope.png'
+        plan = self.plan(script)
+        self.assertTrue(any(p['scene'] == 0 for p in plan['problems']), plan['problems'])
+
+    def test_draft_profile_is_cheaper(self):
+        final = self.plan(SMALL_SCRIPT)
+        draft = self.plan(SMALL_SCRIPT, render_profile='draft')
+        self.assertEqual(draft['profile'], 'draft')
+        self.assertLess(draft['est_render_seconds'], final['est_render_seconds'])
+        self.assertLess(draft['scenes'][0]['cost']['frames'], final['scenes'][0]['cost']['frames'])
+
+    def test_plan_api_rejects_non_object_bodies(self):
+        from django.urls import reverse
+        url = reverse('generator:api_plan')
+        for body in ('[1, 2]', '3', '{"script": {}, "settings": "landscape"}', '{"settings": [1]}'):
+            response = self.client.post(url, data=body, content_type='application/json')
+            self.assertEqual(response.status_code, 400, body)
+        response = self.client.post(url, data=json.dumps({'script': SMALL_SCRIPT, 'settings': {'engine': 'edge'}}),
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['scenes']), 5)
+        response = self.client.post(url, data='{"script": [1]}', content_type='application/json')
+        self.assertFalse(response.json()['ok'])
+
+
+# ═══════════════════════════════════════════════════════════════════
+# Single-scene preview (v32.23)
+# ═══════════════════════════════════════════════════════════════════
+class ScenePreviewLocatorTests(TestCase):
+    def test_editor_position_to_global_index(self):
+        from .avgl_engine import parse_avgl_json
+        from .scene_preview import scene_index_from_locator
+        self.assertEqual(scene_index_from_locator(SMALL_SCRIPT, 0, 0), 0)
+        self.assertEqual(scene_index_from_locator(SMALL_SCRIPT, 0, 2), 2)
+        self.assertEqual(scene_index_from_locator(SMALL_SCRIPT, 1, 1, group=0), 4)
+        scenes = parse_avgl_json(json.dumps(SMALL_SCRIPT)).get_all_scenes()
+        self.assertEqual(scenes[scene_index_from_locator(SMALL_SCRIPT, 1, 0, group=0)].title, 'G1')
+        for args in ((2, 0), (0, 3), (1, 0), (1, 2, 0), (1, 0, 1), (-1, 0)):
+            with self.assertRaises(ValueError):
+                scene_index_from_locator(SMALL_SCRIPT, *args)
+        for bad in ([1, 2], 'x', {'blocks': {}}):
+            with self.assertRaises(ValueError):
+                scene_index_from_locator(bad, 0, 0)
+
+    def test_api_rejects_bad_bodies(self):
+        from django.urls import reverse
+        from .models import VideoProject
+        project = VideoProject.objects.create(title='Preview', script_text=json.dumps(SMALL_SCRIPT))
+        url = reverse('generator:api_scene_preview', args=[project.id])
+        bodies = ([1, 2], 5, {'block': 0, 'script': [1]}, {'block': 0, 'script': {'blocks': ['x']}},
+                  {'block': 'a'}, {'block': 0, 'scene': 9}, {'block': 1, 'scene': 0, 'group': 3})
+        for body in bodies:
+            response = self.client.post(url, data=json.dumps(body), content_type='application/json')
+            self.assertEqual(response.status_code, 400, body)
+
+
+# ═══════════════════════════════════════════════════════════════════
+# Random-access frames (v32.24)
+# ═══════════════════════════════════════════════════════════════════
+class FrameJobTests(SimpleTestCase):
+    def setUp(self):
+        from .avgl_engine import parse_avgl_json
+        from .models import VideoProject
+        from .timeline import compile_timeline
+        script_json = {"title": "Frames", "blocks": [{"title": "B", "scenes": [
+            {"title": "S1", "text": "uno dos tres cuatro", "subtitles": [
+                {"text": "uno dos", "offset": 0, "word_count": 2}, {"text": "tres cuatro", "offset": 2, "word_count": 2}]},
+            {"title": "S2", "text": "", "duration": 1.0, "force_duration": True},
+        ]}]}
+        self.project = VideoProject(title='Frames', script_text=json.dumps(script_json))
+        self.script = parse_avgl_json(json.dumps(script_json))
+        s1, s2 = self.script.get_all_scenes()
+        # Fast first half: the word timings (not the proportional split) place the second line at 0.4s
+        s1.word_timings = [{'word': w, 'start': a, 'end': b} for w, a, b in
+                           (('uno', 0.0, 0.2), ('dos', 0.2, 0.4), ('tres', 0.4, 1.2), ('cuatro', 1.2, 2.0))]
+        self.timeline = compile_timeline(self.script, {s1: 2.0, s2: 0.0})
+
+    def job(self, t, subtitles=True):
+        from .frame_preview import _frame_job
+        return _frame_job(self.project, self.script, self.timeline, t, (320, 180), 'jpeg', subtitles, '/nonexistent')
+
+    def test_time_snaps_to_the_scene_frame_grid(self):
+        a, b = self.job(0.505), self.job(0.51)
+        self.assertEqual((a['entry'].index, a['frame_no'], a['t']), (0, 15, 0.5))
+        self.assertEqual(a['key'], b['key'])
+        self.assertNotEqual(a['key'], self.job(0.55)['key'])
+        # Last frame of a scene never spills into the next one
+        self.assertEqual((self.job(1.999)['entry'].index, self.job(1.999)['frame_no']), (0, 59))
+        self.assertEqual((self.job(2.0)['entry'].index, self.job(2.0)['frame_no']), (1, 0))
+        # Out-of-range times clamp to the first / last frame of the timeline
+        self.assertEqual(self.job(-5)['t'], 0.0)
+        last = self.job(999)
+        self.assertEqual((last['entry'].index, last['frame_no']), (1, 29))
+
+    def test_only_subtitles_active_at_the_frame_are_selected(self):
+        self.assertEqual([i['text'] for i in self.job(0.2)['items']], ['uno dos'])
+        self.assertEqual([i['text'] for i in self.job(0.6)['items']], ['tres cuatro'])
+        self.assertEqual(self.job(2.5)['items'], [])
+        self.assertEqual(self.job(0.2, subtitles=False)['items'], [])
+        self.assertNotEqual(self.job(0.2)['key'], self.job(0.2, subtitles=False)['key'])
+
+
+class FrameApiTests(TestCase):
+    def test_invalid_heights_are_rejected(self):
+        from django.urls import reverse
+        from .models import VideoProject
+        project = VideoProject.objects.create(title='Frames', script_text=json.dumps(SMALL_SCRIPT))
+        for name in ('api_frame', 'api_storyboard'):
+            url = reverse(f'generator:{name}', args=[project.id])
+            for height in ('0', '-5', '99999', 'x'):
+                self.assertEqual(self.client.get(url, {'t': 0, 'height': height}).status_code, 400, (name, height))
@@ -0,0 +1,533 @@
+"""
+v32.20: Timeline IR
+The render loop used to derive scene timing ad hoc: every grouped scene rebuilt its group
+(`[s for s in all_scenes if s.group_id == ...]`) and re-summed its durations, twice
+(Ken Burns interpolation and video sync), which is O(n^2) on long scripts. It also
+re-parsed move aliases / SHAKE / ROTATE and recomputed subtitle timing inline.
+
+compile_timeline() turns a parsed AVGLScript (+ the per-scene voice durations once the TTS
+is done) into an immutable tree of __slots__ nodes in two O(n) passes:
+- absolute start / end of every scene (same duration rules as the engine),
+- group offset / total duration of grouped scenes,
+- resolved asset path and kind (same lookup as the engine, no fallbacks),
+- pre-parsed effects (aliases, SHAKE / ROTATE, group zoom / move interpolation),
+- subtitle windows (word timings, phonetic consolidation, legibility limits).
+
+Consumers: the engine scene loop, scene previews, the frame / storyboard API and validators
+(Timeline.validate()).
+"""
+
+import os
+import re
+import bisect
+import logging
+
+from .avgl_engine import safe_float
+
+logger = logging.getLogger(__name__)
+
+VIDEO_EXTS = ('.mp4', '.mov', '.avi', '.mkv', '.webm', '.gif')
+IMAGE_EXTS = ('.png', '.jpg', '.jpeg', '.webp')
+OUTRO_DURATION = 60.0
+DEFAULT_ZOOM = "1.0:1.3"
+DEFAULT_MOVE = "HOR:50:50"
+
+# v5.0 Directional Aliases (Extended Support)
+MOVE_ALIASES = {
+    "UP": "VER:100:0",
+    "DOWN": "VER:0:100",
+    "LEFT": "HOR:100:0",
+    "RIGHT": "HOR:0:100",
+    "CENTER": "HOR:50:50"
+}
+
+# v16.7.23: Professional subtitle standards (Netflix/HBO)
+MIN_READING_SPEED = 2.6  # palabras/segundo (estándar profesional)
+MIN_SUBTITLE_DURATION = 1.0  # segundos
+MAX_SUBTITLE_DURATION = 7.0  # segundos
+
+
+# ═══════════════════════════════════════════════════════════════════
+# Scene rules (shared with the engine / prefetcher)
+# ═══════════════════════════════════════════════════════════════════
+def is_outro(scene):
+    text = str(scene.text).upper()
+    return "[60_SEGUNDOS_OUTRO]" in text or "[OUTRO]" in text
+
+
+def scene_pause(scene):
+    try:
+        return float(scene.pause or 0.0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def is_forced(scene):
+    return bool(getattr(scene, 'force_duration', False)) and safe_float(getattr(scene, 'duration', 0.0)) > 0
+
+
+def render_duration(scene, voice_duration):
+    """On-screen duration: 60s outro, forced duration, else voice + pause (min 1s)."""
+    if is_outro(scene):
+        return OUTRO_DURATION
+    if is_forced(scene):
+        return float(scene.duration)
+    duration = (voice_duration or 0.0) + scene_pause(scene)
+    return duration if duration > 0 else 1.0
+
+
+def group_slot(scene, audio_durations):
+    """Length a scene takes inside its group for the Master Shot interpolation / video sync."""
+    if is_forced(scene):
+        return float(scene.duration)
+    return audio_durations.get(scene, 1.0) + scene_pause(scene)
+
+
+def asset_id(asset):
+    return str(getattr(asset, 'id', '') or getattr(asset, 'type', '') or '').strip()
+
+
+def first_asset(scene):
+    """v16.7.21: First asset that is not empty or a generic placeholder ('image', 'video'...)."""
+    for asset in scene.assets:
+        a_id = asset_id(asset)
+        if a_id and a_id.lower() not in ['video', 'image', 'none', 'null']:
+            return asset
+    return None
+
+
+def resolve_scene_asset(raw_path, assets_dir):
+    """Same lookup as the main scene loop (absolute path, search dirs, deep scan), no fallbacks."""
+    from django.conf import settings
+    from .asset_index import resolve_asset
+    norm_path = os.path.normpath(raw_path)
+    if norm_path and os.path.isabs(norm_path) and os.path.isfile(norm_path):
+        return norm_path
+    fname = raw_path
+    if '://' in fname or ':\\' in fname or '/media/' in fname:
+        fname = os.path.basename(fname)
+    search_dirs = [assets_dir, os.path.join(settings.MEDIA_ROOT, 'videos'),
+                   os.path.join(settings.MEDIA_ROOT, 'uploads'), os.path.join(settings.MEDIA_ROOT, 'outputs')]
+    return (resolve_asset(fname, search_dirs, extensions=['.png', '.jpg', '.jpeg', '.mp4', '.gif'])
+            or resolve_asset(fname, (), deep_dirs=[assets_dir]))
+
+
+def resolve_overlay(raw_overlay, overlay_dir):
+    """v31.0: Multi-Format Overlay Resolution (Video & Images)."""
+    for ext in ['', '.mp4', '.png', '.jpg', '.jpeg', '.webp', '.mov']:
+        test_path = os.path.join(overlay_dir, f"{raw_overlay}{ext}")
+        if os.path.isfile(test_path):
+            return test_path
+    return None
+
+
+def resolve_sfx(sfx_type, sfx_dir):
+    """SFX file by name (extension optional)."""
+    sfx_path = os.path.join(sfx_dir, sfx_type)
+    if not os.path.exists(sfx_path):
+        for ext in ['.mp3', '.wav', '.m4a']:
+            if os.path.exists(sfx_path + ext):
+                return sfx_path + ext
+    return sfx_path if os.path.exists(sfx_path) else None
+
+
+def asset_kind(path):
+    if not path:
+        return None
+    lower = path.lower()
+    if lower.endswith(VIDEO_EXTS):
+        return 'video'
+    if lower.endswith(IMAGE_EXTS):
+        return 'image'
+    return None
+
+
+# ═══════════════════════════════════════════════════════════════════
+# Effects
+# ═══════════════════════════════════════════════════════════════════
+def parse_effects(asset):
+    """(zoom, move, shake, shake_intensity, rotate) of an image asset, aliases and inline SHAKE/ROTATE applied."""
+    eff_zoom = asset.zoom or DEFAULT_ZOOM
+    eff_move = asset.move or DEFAULT_MOVE
+    eff_shake = getattr(asset, 'shake', False)
+    eff_shake_intensity = getattr(asset, 'shake_intensity', 5)
+    eff_rotate = getattr(asset, 'rotate', None)
+
+    raw_move = str(eff_move).strip().upper()
+    if raw_move in MOVE_ALIASES:
+        eff_move = MOVE_ALIASES[raw_move]
+
+    # v5.0 Parsing: Extract SHAKE/ROTATE from eff_move if present
+    if eff_move and 'SHAKE' in eff_move.upper():
+        match = re.search(r'SHAKE:(\d+)', eff_move, re.IGNORECASE)
+        eff_shake = True
+        if match: eff_shake_intensity = int(match.group(1))
+
+    if eff_move and 'ROTATE' in eff_move.upper():
+        match = re.search(r'ROTATE:([-0-9.]+):([-0-9.]+)', eff_move, re.IGNORECASE)
+        if match: eff_rotate = f"{match.group(1)}:{match.group(2)}"
+        else:
+            match_static = re.search(r'ROTATE:([-0-9.]+)', eff_move, re.IGNORECASE)
+            if match_static: eff_rotate = match_static.group(1)
+    return eff_zoom, eff_move, eff_shake, eff_shake_intensity, eff_rotate
+
+
+def group_effects(group_settings, eff_move, start_in_group, duration, group_duration):
+    """v5.2.1 Master Shot: this scene's slice of the group zoom / move ranges. Raises on bad input."""
+    g_zoom = group_settings.get("zoom", DEFAULT_ZOOM)
+    g_move = group_settings.get("move", DEFAULT_MOVE)
+
+    # Interpolate Zoom
+    z_parts = g_zoom.split(':') if ':' in g_zoom else [g_zoom, g_zoom]
+    gz_start = safe_float(z_parts[0], 1.0); gz_end = safe_float(z_parts[1], 1.3)
+    z_s = gz_start + (gz_end - gz_start) * (start_in_group / group_duration)
+    z_e = gz_start + (gz_end - gz_start) * ((start_in_group + duration) / group_duration)
+    eff_zoom = f"{z_s:.3f}:{z_e:.3f}"
+
+    # Interpolate Move (Simple Linear)
+    m_configs = []
+    for p in ([p.strip() for p in g_move.split('+')] if '+' in g_move else [g_move]):
+        mp = p.split(':')
+        if len(mp) >= 3: m_configs.append({'dir': mp[0], 's': safe_float(mp[1], 50.0), 'e': safe_float(mp[2], 50.0)})
+
+    for cfg in m_configs:
+        ms = cfg['s']; me = cfg['e']
+        m_s = ms + (me - ms) * (start_in_group / group_duration)
+        m_e = ms + (me - ms) * ((start_in_group + duration) / group_duration)
+        if cfg['dir'] == 'HOR':
+            eff_move = f"HOR:{m_s:.1f}:{m_e:.1f}" if not eff_move or '+' not in eff_move else eff_move + f" + HOR:{m_s:.1f}:{m_e:.1f}"
+        else:
+            eff_move += f" + VER:{m_s:.1f}:{m_e:.1f}" if eff_move else f"VER:{m_s:.1f}:{m_e:.1f}"
+    return eff_zoom, eff_move
+
+
+# ═══════════════════════════════════════════════════════════════════
+# Subtitles
+# ═══════════════════════════════════════════════════════════════════
+def subtitle_window(sub, word_timings, duration, total_words):
+    """
+    Scene-relative window of one subtitle: TimelineSubtitle, or None when it is not drawn.
+    Word timings win (phonetic consolidation, -200ms lead on highlights); without them the
+    window is proportional to the word offset with a legible minimum (2.6 words/s, 1-7s).
+    """
+    s_text = sub.get('text', '')
+    s_offset = sub.get('offset', 0)
+    s_w_count = sub.get('word_count', 4)
+    phonetic_count = sub.get('phonetic_count', s_w_count)  # v17.0: Phonetic mapping
+    if not s_text or s_w_count < 0:
+        return None
+
+    relevant_timings = None
+    consolidated = False
+    if word_timings:
+        relevant_timings = word_timings[s_offset: s_offset + phonetic_count]
+        if phonetic_count > s_w_count and len(relevant_timings) > 0:
+            # Multiple phonetic words -> Single display text
+            consolidated = True
+            s_start = relevant_timings[0]['start']
+            s_dur = relevant_timings[-1]['end'] - s_start
+        elif len(relevant_timings) > 0:
+            s_start = relevant_timings[0]['start']
+            s_dur = relevant_timings[-1]['end'] - s_start
+            # v17.2.8: Advance highlight clips by 200ms
+            if sub.get('is_highlight', False):
+                s_start = max(0, s_start - 0.20)
+        else:
+            s_start = 0
+            s_dur = 1.5
+    else:
+        s_start = (s_offset / total_words) * duration if total_words > 0 else 0
+        proportional_dur = (phonetic_count / total_words) * duration if total_words > 0 else 1.5
+        min_legible_dur = s_w_count / MIN_READING_SPEED
+        s_dur = max(proportional_dur, min_legible_dur)
+        s_dur = max(MIN_SUBTITLE_DURATION, min(MAX_SUBTITLE_DURATION, s_dur))
+
+    s_start = min(s_start, duration - 0.1)
+    s_dur = max(0.1, min(s_dur, duration - s_start))
+    return TimelineSubtitle(s_text, s_start, s_dur, relevant_timings, consolidated, phonetic_count)
+
+
+def scene_word_count(scene):
+    """v16.7.12: Unified Word Count (Clean text to match TTS output)."""
+    return len(re.sub(r'\[.*?\]', '', scene.text).split())
+
+
+# Karaoke visuals lead the audio by this much (v26.11 "Audio Ferrari" fix: system latency, MP3 gaps)
+KARAOKE_SYNC_OFFSET = -0.08
+
+
+def subtitle_item(sub, window, default_y=0.70, log=None):
+    """
+    v32.24: ASS event of one subtitle window, in scene-local seconds (the engine adds the
+    scene start): {'text', 'start', 'end', 'is_dynamic', 'y_pos', 'relevant_timings'}.
+    """
+    text = sub.get('text', '')
+    try:
+        y_pos = float(sub.get('y_position', default_y))
+    except (TypeError, ValueError):
+        y_pos = 0.70
+    is_dynamic = sub.get('is_dynamic', False)
+    start, duration = window.start, window.duration
+
+    # v26.9: Karaoke Phonetic -> Visual Mapping ([DYN] must show the visual text, not the TTS phonetics)
+    timings = window.timings
+    if is_dynamic and timings:
+        v_words = text.split()
+        if len(v_words) == len(timings):
+            # 1:1 Match - Perfect Swap
+            timings = [dict(w, word=v_words[i]) for i, w in enumerate(timings)]
+        else:
+            # Mismatch - Proportional Distribution by character length
+            # Example: [PHO]veintidos de enero|22/01[/PHO] -> 1 visual, 3 phonetic
+            if log:
+                log(f"      [DYN] Mismatch: {len(v_words)}v vs {len(timings)}p. Remapping...")
+            start_t, end_t = timings[0]['start'], timings[-1]['end']
+            total_chars = sum(len(w) for w in v_words) or 1
+            remapped, cursor = [], start_t
+            for w in v_words:
+                w_dur = (len(w) / total_chars) * (end_t - start_t)
+                remapped.append({'word': w, 'start': cursor, 'end': cursor + w_dur})
+                cursor += w_dur
+            timings = remapped
+
+        # v26.11: Global karaoke compensator
+        if timings:
+            for wt in timings:
+                wt['start'] = max(0.0, wt['start'] + KARAOKE_SYNC_OFFSET)
+                wt['end'] = max(0.0, wt['end'] + KARAOKE_SYNC_OFFSET)
+            start = timings[0]['start']
+            duration = timings[-1]['end'] - start
+
+    return {
+        'text': text,
+        'start': start,
+        'end': start + duration,
+        'is_dynamic': is_dynamic,
+        'y_pos': y_pos,
+        'relevant_timings': timings if is_dynamic else None,
+    }
+
+
+# ═══════════════════════════════════════════════════════════════════
+# Nodes
+# ═══════════════════════════════════════════════════════════════════
+class _Node:
+    __slots__ = ()
+
+    def _init(self, **values):
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} es inmutable")
+
+    def __repr__(self):
+        fields = ', '.join(f"{k}={getattr(self, k)!r}" for k in self.__slots__ if k not in ('scene', 'timings'))
+        return f"{type(self).__name__}({fields})"
+
+
+class TimelineSubtitle(_Node):
+    __slots__ = ('text', 'start', 'duration', 'timings', 'consolidated', 'phonetic_count')
+
+    def __init__(self, text, start, duration, timings, consolidated, phonetic_count):
+        self._init(text=text, start=start, duration=duration, timings=timings,
+                   consolidated=consolidated, phonetic_count=phonetic_count)
+
+    @property
+    def end(self):
+        return self.start + self.duration
+
+
+class TimelineAsset(_Node):
+    """Resolved first asset of a scene and its effects (videos keep zoom 1.0 / centered move)."""
+    __slots__ = ('raw', 'path', 'kind', 'resolved', 'zoom', 'move', 'shake', 'shake_intensity', 'rotate',
+                 'zoom_range', 'moves', 'error')
+
+    def __init__(self, raw, path, kind, zoom, move, shake, shake_intensity, rotate, error=None, resolved=True):
+        from .ken_burns import parse_range, parse_moves
+        self._init(raw=raw, path=path, kind=kind, resolved=resolved, zoom=zoom, move=move, shake=shake,
+                   shake_intensity=shake_intensity, rotate=rotate, error=error,
+                   zoom_range=parse_range(zoom, 1.0), moves=tuple(parse_moves(move)))
+
+
+class TimelineScene(_Node):
+    __slots__ = ('index', 'block_index', 'scene', 'start', 'duration', 'voice_duration', 'audio_path',
+                 'group_id', 'group_offset', 'group_duration', 'asset', 'subtitles', 'total_words')
+
+    def __init__(self, **values):
+        self._init(**values)
+
+    @property
+    def end(self):
+        return self.start + self.duration
+
+    def effects(self, duration=None):
+        """(zoom, move, shake, shake_intensity, rotate) for an on-screen duration (default: compiled one)."""
+        a = self.asset
+        if a is None:
+            return None
+        if duration is None or abs(duration - self.duration) < 1e-6 or not self.group_id or a.kind != 'image':
+            return a.zoom, a.move, a.shake, a.shake_intensity, a.rotate
+        return asset_effects(self.scene, first_asset(self.scene), a.kind, self.group_offset, duration,
+                              self.group_duration or 1.0)[:5]
+
+    def subtitle_windows(self, duration=None):
+        """Windows aligned with scene.subtitles (None = skipped), recomputed if the real duration differs."""
+        if duration is None or abs(duration - self.duration) < 1e-6:
+            return self.subtitles
+        timings = getattr(self.scene, 'word_timings', None)
+        return tuple(subtitle_window(sub, timings, duration, self.total_words) for sub in self.scene.subtitles or ())
+
+
+class TimelineGroup(_Node):
+    __slots__ = ('id', 'start', 'duration', 'scene_indices', 'settings')
+
+    def __init__(self, **values):
+        self._init(**values)
+
+
+class TimelineBlock(_Node):
+    __slots__ = ('index', 'title', 'start', 'duration', 'scene_indices')
+
+    def __init__(self, **values):
+        self._init(**values)
+
+
+class Timeline(_Node):
+    __slots__ = ('scenes', 'blocks', 'groups', 'duration', '_by_scene', '_starts')
+
+    def __init__(self, scenes, blocks, groups, duration):
+        self._init(scenes=tuple(scenes), blocks=tuple(blocks), groups=groups, duration=duration,
+                   _by_scene={id(e.scene): e for e in scenes}, _starts=[e.start for e in scenes])
+
+    def entry(self, scene):
+        """TimelineScene of an AVGLScene (None if it is not part of this timeline)."""
+        return self._by_scene.get(id(scene))
+
+    def scene_at(self, t):
+        """TimelineScene on screen at absolute second t."""
+        if not self.scenes:
+            return None
+        i = bisect.bisect_right(self._starts, max(0.0, t)) - 1
+        return self.scenes[max(0, min(i, len(self.scenes) - 1))]
+
+    def validate(self):
+        """
+        Problems found in the compiled timeline: [{'level': 'error' | 'warning', 'scene': index, 'message'}].
+        Asset checks need the timeline compiled with assets_dir.
+        """
+        problems = []
+
+        def add(level, e, message):
+            problems.append({'level': level, 'scene': e.index, 'message': f"Escena {e.index + 1} ({e.scene.title}): {message}"})
+
+        for e in self.scenes:
+            if e.asset is not None and e.asset.resolved:
+                if not e.asset.path:
+                    add('error', e, f"asset no encontrado '{e.asset.raw}'")
+                elif e.asset.kind is None:
+                    add('warning', e, f"formato de asset no soportado '{os.path.basename(e.asset.path)}'")
+            if e.asset is not None and e.asset.error:
+                add('warning', e, f"interpolación de grupo inválida ({e.asset.error})")
+            for sub_idx, window in enumerate(e.subtitles):
+                if window is not None and window.end > e.duration + 1e-6:
+                    add('warning', e, f"subtítulo {sub_idx + 1} excede la escena")
+            if is_forced(e.scene) and e.voice_duration > e.duration + 0.05:
+                add('warning', e, f"la voz ({e.voice_duration:.2f}s) supera la duración forzada ({e.duration:.2f}s)")
+        return problems
+
+
+def asset_effects(scene, asset, kind, group_offset, duration, group_duration):
+    """(zoom, move, shake, shake_intensity, rotate, error) as the engine applies them."""
+    if kind == 'video':
+        # v14.2 OPTIMIZATION: Videos don't need Zoom/Move math
+        return "1.0", DEFAULT_MOVE, getattr(asset, 'shake', False), getattr(asset, 'shake_intensity', 5), getattr(asset, 'rotate', None), None
+    zoom, move, shake, intensity, rotate = parse_effects(asset)
+    error = None
+    if scene.group_id and scene.group_settings:
+        try:
+            zoom, move = group_effects(scene.group_settings, move, group_offset, duration, group_duration)
+        except Exception as e:
+            error = str(e)
+            zoom, move = DEFAULT_ZOOM, DEFAULT_MOVE
+    return zoom, move, shake, intensity, rotate, error
+
+
+# ═══════════════════════════════════════════════════════════════════
+# Compiler
+# ═══════════════════════════════════════════════════════════════════
+def compile_timeline(script, audio_durations=None, audio_map=None, assets_dir=None):
+    """
+    AVGLScript -> Timeline.
+    audio_durations: {scene: voice seconds} (as measured after the TTS); audio_map: {scene: audio path}.
+    Without audio_map every scene with a duration in audio_durations counts as voiced (previews /
+    estimates). Without assets_dir assets are not resolved (path None, kind from the raw name).
+    """
+    audio_durations = audio_durations or {}
+    all_scenes = script.get_all_scenes()
+
+    # Pass 1: group totals (one sweep, no per-scene regrouping)
+    group_totals = {}
+    for s in all_scenes:
+        if s.group_id:
+            group_totals[s.group_id] = group_totals.get(s.group_id, 0.0) + group_slot(s, audio_durations)
+
+    # Pass 2: absolute timing, group offsets, assets, effects, subtitles
+    entries, blocks, groups = [], [], {}
+    group_cursor = {}
+    cursor = 0.0
+    index = 0
+    for b_idx, block in enumerate(script.blocks):
+        block_start = cursor
+        block_indices = []
+        for scene in block.scenes:
+            if audio_map is None:
+                audio_path = None
+                voiced = scene in audio_durations
+            else:
+                audio_path = audio_map.get(scene)
+                voiced = bool(audio_path)
+            voice = 0.0 if is_outro(scene) or not voiced else float(audio_durations.get(scene, 0.0))
+            duration = render_duration(scene, voice)
+
+            group_offset = group_duration = 0.0
+            if scene.group_id:
+                group_offset = group_cursor.get(scene.group_id, 0.0)
+                group_duration = group_totals[scene.group_id]
+                group_cursor[scene.group_id] = group_offset + group_slot(scene, audio_durations)
+                g = groups.get(scene.group_id)
+                if g is None:
+                    groups[scene.group_id] = {'start': cursor, 'indices': [index], 'settings': scene.group_settings}
+                else:
+                    g['indices'].append(index)
+
+            t_asset = None
+            asset = first_asset(scene)
+            if asset is not None:
+                raw = asset_id(asset)
+                path = resolve_scene_asset(raw, assets_dir) if assets_dir else None
+                kind = asset_kind(path or raw)
+                zoom, move, shake, intensity, rotate, error = asset_effects(
+                    scene, asset, kind, group_offset, duration, group_duration or 1.0)
+                t_asset = TimelineAsset(raw, path, kind, zoom, move, shake, intensity, rotate, error,
+                                        resolved=bool(assets_dir))
+
+            total_words = scene_word_count(scene)
+            timings = getattr(scene, 'word_timings', None)
+            subtitles = tuple(subtitle_window(sub, timings, duration, total_words) for sub in scene.subtitles or ())
+
+            entries.append(TimelineScene(
+                index=index, block_index=b_idx, scene=scene, start=cursor, duration=duration,
+                voice_duration=voice, audio_path=audio_path, group_id=scene.group_id,
+                group_offset=group_offset, group_duration=group_duration, asset=t_asset,
+                subtitles=subtitles, total_words=total_words))
+            block_indices.append(index)
+            cursor += duration
+            index += 1
+        blocks.append(TimelineBlock(index=b_idx, title=block.title, start=block_start,
+                                    duration=cursor - block_start, scene_indices=tuple(block_indices)))
+
+    t_groups = {gid: TimelineGroup(id=gid, start=g['start'], duration=group_totals[gid],
+                                   scene_indices=tuple(g['indices']), settings=g['settings'])
+                for gid, g in groups.items()}
+    return Timeline(entries, blocks, t_groups, cursor)
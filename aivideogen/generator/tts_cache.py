@@ -0,0 +1,126 @@
+"""
+v32.11: Persistent TTS Cache
+Re-rendering an unchanged script (or a clone_project copy) used to re-synthesize every
+line. Synthesized scene audio is now stored content-addressed in
+MEDIA_ROOT/cache/tts (BoundedDiskCache, LRU by mtime):
+- <key>.wav / .mp3 : the assembled scene audio (Edge: PCM WAV since v32.12)
+- <key>.json       : sidecar with word_timings + voice_intervals (+ duration)
+The key covers everything that changes the audio: engine, voice and the exact request
+plan (cleaned text, rate and pitch of each emotion segment, pause lengths).
+"""
+
+import os
+import json
+import shutil
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Bump when the assembly (trimming, calibration, encoding) changes the produced audio
+TTS_CACHE_VERSION = 2
+
+_tts_cache = None
+
+
+def get_tts_cache():
+    """Process-wide TTS cache (None when TTS_CACHE_ENABLED is off or unavailable)."""
+    global _tts_cache
+    from django.conf import settings
+    if not getattr(settings, 'TTS_CACHE_ENABLED', True):
+        return None
+    if _tts_cache is None:
+        try:
+            from .disk_cache import BoundedDiskCache
+            _tts_cache = BoundedDiskCache('tts', max_mb=getattr(settings, 'TTS_CACHE_MAX_MB', 1024))
+        except Exception as e:
+            logger.warning(f"⚠️ [TTSCache] Caché no disponible: {e}")
+            _tts_cache = False
+    return _tts_cache or None
+
+
+def tts_cache_key(engine, voice, plan):
+    """plan: JSON-serializable request list, e.g. [('text', clean, rate, pitch), ('pause', 0.5)]."""
+    from .disk_cache import hash_key
+    return hash_key('tts', TTS_CACHE_VERSION, engine, voice, plan)
+
+
+def load_cached_tts(key, output_path, ext='.mp3'):
+    """
+    Copies the cached audio to output_path and returns its sidecar dict
+    ({'word_timings': [...], 'voice_intervals': [...], 'duration': s}), or None on a miss.
+    """
+    cache = get_tts_cache()
+    if not cache or not key:
+        return None
+    audio = cache.get(key, ext=ext)
+    if not audio:
+        return None
+    sidecar = cache.path_for(key, '.json')
+    try:
+        os.utime(sidecar, None)  # Same LRU position as its audio
+        with open(sidecar, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        shutil.copyfile(audio, output_path)
+    except Exception as e:
+        logger.warning(f"⚠️ [TTSCache] Entrada ilegible {key[:10]}: {e}")
+        return None
+    meta['voice_intervals'] = [tuple(iv) for iv in meta.get('voice_intervals', [])]
+    meta.setdefault('word_timings', [])
+    return meta
+
+
+def cached_word_timings(audio_path):
+    """v32.24: word_timings of the sidecar of a cached audio path (as returned by the planner); [] if unreadable."""
+    try:
+        with open(os.path.splitext(audio_path)[0] + '.json', 'r', encoding='utf-8') as f:
+            return json.load(f).get('word_timings') or []
+    except Exception:
+        return []
+
+
+def cached_tts_duration(key, ext='.mp3'):
+    """v32.21: Duration of a cached entry without copying it or touching its LRU position (None = miss)."""
+    cache = get_tts_cache()
+    if not cache or not key:
+        return None
+    audio = cache.path_for(key, ext)
+    if not os.path.isfile(audio):
+        return None
+    try:
+        with open(cache.path_for(key, '.json'), 'r', encoding='utf-8') as f:
+            duration = json.load(f).get('duration')
+    except Exception:
+        duration = None
+    if not duration:
+        from .media_probe import media_duration
+        duration = media_duration(audio)
+    return float(duration) if duration else None
+
+
+def store_tts(key, audio_path, word_timings=None, voice_intervals=None, duration=None, ext='.mp3'):
+    """Stores a copy of audio_path + its sidecar. Never raises (the cache is best effort)."""
+    cache = get_tts_cache()
+    if not cache or not key or not os.path.exists(audio_path):
+        return
+    suffix = f".{os.getpid()}.tmp"
+    try:
+        tmp_audio = cache.path_for(key, ext + suffix)
+        shutil.copyfile(audio_path, tmp_audio)
+        tmp_meta = cache.path_for(key, '.json' + suffix)
+        with open(tmp_meta, 'w', encoding='utf-8') as f:
+            json.dump({
+                'word_timings': word_timings or [],
+                'voice_intervals': [list(iv) for iv in (voice_intervals or [])],
+                'duration': duration,
+            }, f, ensure_ascii=False)
+        # Audio first: a sidecar never points to a missing file
+        cache.put(key, tmp_audio, ext=ext)
+        cache.put(key, tmp_meta, ext='.json')
+        cache.evict()
+    except Exception as e:
+        logger.warning(f"⚠️ [TTSCache] No se pudo guardar {key[:10]}: {e}")
+
+
+def tts_cache_stats():
+    cache = get_tts_cache()
+    return cache.stats() if cache else {}
@@ -58,6 +58,16 @@ urlpatterns = [
     # v12.5: Progress & Shutdown
     path('api/shutdown/', views.shutdown_app, name='shutdown_app'),
     path('api/project/<int:project_id>/status/', views.get_project_status, name='api_project_status'),
+    path('api/cache/stats/', views.cache_stats_api, name='api_cache_stats'),
+    path('api/queue/stats/', views.queue_stats_api, name='api_queue_stats'),
+    path('api/project/<int:project_id>/enqueue/', views.enqueue_project_api, name='api_enqueue_project'),
+    path('api/batch/', views.batch_api, name='api_batch'),
+    path('api/batch/<str:batch_id>/', views.batch_report_api, name='api_batch_report'),
+    path('api/plan/', views.plan_api, name='api_plan'),
+    path('api/project/<int:project_id>/plan/', views.project_plan_api, name='api_project_plan'),
+    path('api/project/<int:project_id>/scene/preview/', views.scene_preview_api, name='api_scene_preview'),
+    path('api/project/<int:project_id>/frame/', views.frame_api, name='api_frame'),
+    path('api/project/<int:project_id>/storyboard/', views.storyboard_api, name='api_storyboard'),
 
     # Carousel Tool (v15.9.2)
     path('tools/carousel/', views.carousel_tool_view, name='carousel_tool'),
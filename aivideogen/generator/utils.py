@@ -166,9 +166,52 @@ def translate_script_ai(script_data, target_lang="es"):
     except Exception as e:
         return None, str(e)
 
+# ═══════════════════════════════════════════════════════════════════
+# v32.22: TEXT CACHE (translations / transcriptions)
+# Gemini and Whisper are not deterministic: a draft and the final render of the same
+# script must speak the same words, or the TTS cache cannot serve the final voices.
+# Results are stored as small JSON files in MEDIA_ROOT/cache/text (BoundedDiskCache).
+# ═══════════════════════════════════════════════════════════════════
+_text_cache = None
+
+def _get_text_cache():
+    global _text_cache
+    if _text_cache is None:
+        try:
+            from .disk_cache import BoundedDiskCache
+            _text_cache = BoundedDiskCache('text', max_mb=16)
+        except Exception:
+            _text_cache = False
+    return _text_cache or None
+
+def _cached_text(key):
+    cache = _get_text_cache()
+    path = cache.get(key, ext='.json') if cache else None
+    if not path:
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f).get('text')
+    except Exception:
+        return None
+
+def _store_text(key, text):
+    cache = _get_text_cache()
+    if not cache or not text:
+        return
+    tmp_path = cache.path_for(f"{key}.{os.getpid()}", '.tmp')
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'text': text}, f, ensure_ascii=False)
+        cache.put(key, tmp_path, ext='.json')
+        cache.evict()
+    except OSError:
+        pass
+
 def translate_text_ai(text, target_lang="es"):
     """
     Translates a single string into the target language using Gemini.
+    v32.22: Successful translations are cached (same text + language + model -> same words).
     """
     if not text or not text.strip():
         return text, None
@@ -177,6 +220,12 @@ def translate_text_ai(text, target_lang="es"):
     if not api_key:
         return text, "Error: No se encontró GEMINI_API_KEY."
 
+    from .disk_cache import hash_key
+    cache_key = hash_key('translate', os.getenv("GEMINI_MODEL_NAME", "gemini-flash-latest"), target_lang.lower(), text)
+    cached = _cached_text(cache_key)
+    if cached:
+        return cached, None
+
     langs = {
         'es': 'Español', 'en': 'Inglés', 'fr': 'Francés', 'it': 'Italiano', 
         'pt': 'Portugués', 'de': 'Alemán', 'ja': 'Japonés', 'zh': 'Chino'
@@ -222,6 +271,7 @@ def translate_text_ai(text, target_lang="es"):
                 
                 if not translated:
                      return text, "Gemini devolvió una traducción vacía."
+                _store_text(cache_key, translated)
                 return translated, None
             elif response.status_code == 429:
                 if attempt < MAX_RETRIES - 1:
@@ -245,6 +295,16 @@ def auto_transcribe_and_translate_asset(video_path, target_lang="es", logger=Non
     if not os.path.exists(video_path):
         return None, f"Archivo no encontrado: {video_path}"
 
+    # v32.22: The transcription of this exact cut is reused across renders
+    from .disk_cache import file_digest, hash_key
+    digest = file_digest(video_path)
+    transcript_key = hash_key('whisper', 'small', digest, float(start_time or 0.0), duration) if digest else None
+    original_text = _cached_text(transcript_key) if transcript_key else None
+    if original_text:
+        if logger: logger.log(f"      [Dubbing] Transcripción reutilizada de la caché: {original_text[:50]}...")
+        translated, err = translate_text_ai(original_text, target_lang)
+        return (original_text if err else translated), None
+
     try:
         # 1. FFmpeg setup (v5.13: Robust Injection)
         import imageio_ffmpeg, shutil
@@ -309,6 +369,8 @@ def auto_transcribe_and_translate_asset(video_path, target_lang="es", logger=Non
 
         if not original_text:
             return None, "No se detectó habla en el video."
+        if transcript_key:
+            _store_text(transcript_key, original_text)
 
         if logger: logger.log(f"      [Dubbing] Transcripción exitosa: {original_text[:50]}...")
 
@@ -469,10 +531,80 @@ def generate_contextual_tags(project):
     
     return final_tags
 
+# ═══════════════════════════════════════════════════════════════════
+# v32.15: BUFFERED RENDER LOG
+# ═══════════════════════════════════════════════════════════════════
+# Lines are appended to MEDIA_ROOT/logs/project_<id>.log in batches (every
+# LOG_FLUSH_SECONDS or LOG_FLUSH_LINES lines). project.log_output is only re-synced
+# (appending only the new lines) every LOG_DB_SYNC_SECONDS and on close(), instead of
+# rewriting the whole log to SQLite on every line. Pollers read the file from a byte cursor (read_project_log).
+LOG_FLUSH_SECONDS = 1.0
+LOG_FLUSH_LINES = 100
+LOG_DB_SYNC_SECONDS = 15.0
+
+
+def project_log_path(project_id):
+    return os.path.join(settings.MEDIA_ROOT, 'logs', f"project_{project_id}.log")
+
+
+def reset_project_log(project):
+    """Starts a fresh render log seeded with the current log_output (start/reset messages)."""
+    path = project_log_path(project.id)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            if project.log_output:
+                f.write(project.log_output.rstrip('\n') + '\n')
+    except OSError as e:
+        print(f"[Project {project.id}] ⚠️ No se pudo iniciar el log de render: {e}", flush=True)
+
+
+def read_project_log(project_id, cursor=0):
+    """
+    v32.15: (text, new_cursor) with the complete lines written after byte offset `cursor`,
+    or (None, cursor) if the project has no render log file.
+    """
+    path = project_log_path(project_id)
+    try:
+        with open(path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            if cursor > size:
+                cursor = 0  # Log was reset by a new render
+            f.seek(cursor)
+            data = f.read()
+    except OSError:
+        return None, cursor
+    end = data.rfind(b'\n') + 1  # Never hand out a half-written line
+    return data[:end].decode('utf-8', errors='replace'), cursor + end
+
+
+def tail_file(path, max_lines=500, block_size=65536):
+    """Last max_lines lines of a text file, read backwards from the end."""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        data = b''
+        while pos > 0 and data.count(b'\n') <= max_lines:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+    lines = data.decode('utf-8', errors='replace').splitlines(keepends=True)
+    return lines[-max_lines:]
+
+
 class ProjectLogger:
     def __init__(self, project):
+        import threading
         self.project = project
-        self.log_buffer = []
+        self.log_path = project_log_path(project.id)
+        self._pending = []
+        self._unsynced = []
+        self._lock = threading.Lock()
+        self._timer = None
+        self._last_flush = time.time()
+        self._last_db_sync = time.time()
 
     def log(self, message):
         from datetime import datetime
@@ -485,9 +617,59 @@ class ProjectLogger:
             clean_msg = timestamped_message.encode('ascii', 'ignore').decode('ascii')
             print(f"[Project {self.project.id}] {clean_msg}", flush=True)
 
-        self.log_buffer.append(timestamped_message)
-        self.project.log_output = "\n".join(self.log_buffer)
-        self.project.save(update_fields=['log_output'])
+        with self._lock:
+            self._pending.append(timestamped_message)
+            due = len(self._pending) >= LOG_FLUSH_LINES or time.time() - self._last_flush >= LOG_FLUSH_SECONDS
+            if not due and self._timer is None:
+                # Quiet phases (long encodes) still publish the last lines within LOG_FLUSH_SECONDS
+                import threading
+                # (file only: the timer thread must not open its own DB connection)
+                self._timer = threading.Timer(LOG_FLUSH_SECONDS, self.flush, kwargs={'allow_db': False})
+                self._timer.daemon = True
+                self._timer.start()
+        if due:
+            self.flush()
+
+    def flush(self, sync_db=False, allow_db=True):
+        """Appends pending lines to the render log; re-syncs log_output when due (or sync_db)."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            lines, self._pending = self._pending, []
+            self._unsynced.extend(lines)
+            self._last_flush = time.time()
+            if lines:
+                try:
+                    os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+                    with open(self.log_path, 'a', encoding='utf-8') as f:
+                        f.write('\n'.join(lines) + '\n')
+                except OSError as e:
+                    print(f"[Project {self.project.id}] ⚠️ No se pudo escribir el log de render: {e}", flush=True)
+            sync_db = allow_db and (sync_db or (lines and time.time() - self._last_db_sync >= LOG_DB_SYNC_SECONDS))
+            if sync_db:
+                self._last_db_sync = time.time()
+        if sync_db:
+            self._sync_db()
+
+    def _sync_db(self):
+        # Appends only this logger's unsynced lines: messages other code appended to
+        # log_output meanwhile (stop button, YouTube upload) are preserved
+        with self._lock:
+            lines, self._unsynced = self._unsynced, []
+        if not lines:
+            return
+        try:
+            model = type(self.project)
+            current = model.objects.filter(pk=self.project.pk).values_list('log_output', flat=True).first() or ''
+            self.project.log_output = (current + "\n" if current else "") + "\n".join(lines)
+            model.objects.filter(pk=self.project.pk).update(log_output=self.project.log_output)
+        except Exception as e:
+            print(f"[Project {self.project.id}] ⚠️ No se pudo guardar log_output: {e}", flush=True)
+
+    def close(self):
+        """Final flush + log_output sync (the detail page shows log_output once the render ends)."""
+        self.flush(sync_db=True)
 
 async def generate_audio_edge(text, output_path, voice="es-ES-AlvaroNeural", rate=None):
     import edge_tts
@@ -522,8 +704,10 @@ def generate_video_process(project):
     project.script_text = script_text.strip()
     
     # Init Logger for start message
+    reset_project_log(project)  # v32.15
     logger = ProjectLogger(project)
     logger.log(f"Using Unified AVGL v4.0 Engine (Single Pipeline)")
+    logger.close()  # The engine opens its own logger: this line must reach log_output too
     
     # Call the Unified Engine
     # Note: parse_avgl_json inside this function handles JSON vs Text conversion
@@ -534,6 +718,7 @@ def generate_video_process(project):
         tb = traceback.format_exc()
         logger = ProjectLogger(project)
         logger.log(f"[ERROR] Error CRITICO en Motor V15.7: {e}\n{tb}")
+        logger.close()
         project.status = 'error'
         project.save()
 
@@ -543,13 +728,15 @@ def generate_video_process(project):
     # Refresh project to get latest status if it was modified elsewhere
     project.refresh_from_db()
 
-    if project.status == 'completed' and project.auto_upload_youtube:
+    # v32.22: Drafts are previews, never published
+    if project.status == 'completed' and project.auto_upload_youtube and getattr(project, 'render_profile', 'final') != 'draft':
         try:
             from .youtube_utils import trigger_auto_upload
             trigger_auto_upload(project)
         except Exception as e:
             logger = ProjectLogger(project)
             logger.log(f"[YouTube] [ERROR] Error fatal disparando subida automatica: {e}")
+            logger.close()
 
 def cleanup_garbage(base_dir=None):
     """
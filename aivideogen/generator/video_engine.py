@@ -12,7 +12,6 @@ import uuid
 import proglog
 from django.conf import settings
 from .subtitle_utils import compile_full_script_ass
-from scripts.local_lipsync import LipSyncEngine
 
 # v8.5 Notification Support
 if os.name == 'nt':
@@ -96,7 +95,16 @@ try:
             # v14.9 Trace: Log if silence is being injected
             if hasattr(tt, "__len__") and len(tt) > 0:
                 pass # Normal operation log would be too noisy here
-            
+
+            # v32.9: MoviePy splits requests wider than half its buffer by recursing with the
+            # boolean mask instead of the times (silence). Split them correctly here
+            # (the offline mixdown pulls multi-second blocks; short files have small buffers).
+            if isinstance(tt, np.ndarray) and len(tt) > 1:
+                max_span = max(1, self.buffersize // 2 - 1)
+                n_parts = int(np.ceil((tt[-1] - tt[0]) * self.fps / max_span))
+                if n_parts > 1:
+                    return np.concatenate([_patched_get_frame(self, part) for part in np.array_split(tt, n_parts + 1)])
+
             # Fix 2: Execute original but catch ANY internal error (like out of bounds)
             return _original_get_frame(self, tt)
             
@@ -164,11 +172,12 @@ def fast_mux_audio_video(video_path, audio_path, output_path, video_volume=1.0,
         return False
 # ═══════════════════════════════════════════════════════════════════
 
-def apply_ken_burns(image_path, duration, target_size, zoom="1.0:1.3", move="HOR:50:50", overlay_path=None, fit=None, shake=False, rotate=None, shake_intensity=5, w_rotate=None, clips_to_close=None, overlay_clip=None, project_settings=None, human_noise_enabled=None, human_noise_intensity=1.0):
+def apply_ken_burns(image_path, duration, target_size, zoom="1.0:1.3", move="HOR:50:50", overlay_path=None, fit=None, shake=False, rotate=None, shake_intensity=5, w_rotate=None, clips_to_close=None, overlay_clip=None, project_settings=None, human_noise_enabled=None, human_noise_intensity=1.0, fps=30):
     """
     Applies optimized Ken Burns effect with robust sizing and movement.
     Supports diagonal movement: "HOR:start:end + VER:start:end"
     v11.8: Added SHAKE and ROTATE support.
+    v32.3: Motion is precompiled per frame (see ken_burns.KenBurnsPlan); fps sets the frame grid.
     """
     import cv2
     import numpy as np
@@ -182,263 +191,62 @@ def apply_ken_burns(image_path, duration, target_size, zoom="1.0:1.3", move="HOR
         from moviepy import ColorClip
         return ColorClip(size=target_size, color=(0,0,0), duration=duration)
 
-    # Load Full Resolution Image (OpenCV reads BGR)
-    # Using cv2.imdecode to handle standard paths, or simple imread
-    # We use Img decoding to ensure unicode path support if needed, but imread is usually fine
-    img_bgr = cv2.imread(image_path)
-    if img_bgr is None:
-        logger.error(f"❌ [apply_ken_burns] OpenCV no pudo leer: {image_path}")
+    # v32.4: Only the header is read here; pixels come from the pyramid cache once
+    # the motion plan knows which resolution and region are actually needed.
+    from .image_pyramid import get_image_size, load_plan_source
+    src_size = get_image_size(image_path)
+    if src_size is None:
+        logger.error(f"❌ [apply_ken_burns] No se pudo leer la cabecera: {image_path}")
         from moviepy import ColorClip
         return ColorClip(size=target_size, color=(0,0,0), duration=duration)
 
-    h_orig, w_orig = img_bgr.shape[:2]
+    w_orig, h_orig = src_size
     target_w, target_h = target_size # (width, height)
     
     # v30.8.1: Debug Coordinate Integrity
     # logger.info(f"    📏 [Engine] Asset: {w_orig}x{h_orig} | Target: {target_w}x{target_h}")
 
-    def safe_eval_math(val, default=0.0):
-        """v30.6: Safely evaluates simple math expressions (e.g., '8*360')."""
-        if val is None: return default
-        # v31.3: Robust filtering of JS junk and nulls
-        s = str(val).lower().replace(' ', '').replace(',', '.')
-        if not s or s in ('undefined', 'nan', 'none', 'null'): 
-            return default
-            
-        # Only allow numbers and basic operators
-        if not re.match(r'^[\d\.\+\-\*\/\(\)]+$', s):
-            try: return float(s)
-            except: return default
-        try:
-            # Using eval with empty globals/locals for safety
-            return float(eval(s, {"__builtins__": None}, {}))
-        except:
-            return default
-
-    # Parse Zoom
-    z_start, z_end = 1.0, 1.0
-    if zoom:
-        if isinstance(zoom, str) and ':' in zoom:
-            parts = zoom.split(':')
-            z_start = safe_eval_math(parts[0], 1.0)
-            z_end = safe_eval_math(parts[1], z_start)
-        else:
-            z_start = safe_eval_math(zoom, 1.0)
-            z_end = z_start
-
-    # Parse Move
-    # Supports "HOR:0:100 + VER:50:50" or simple "HOR:0:100"
-    move_configs = []
-    move_str = move if move else "HOR:50:50"
-    
-    # v30.6: REMOVED Portrait Auto-Scan hack
-    # This was causing discrepancies with the editor's viewfinder.
-    # If no move is defined, we stick to the provided string (defaults to 50:50).
-    
-    sub_moves = move_str.split('+')
-    for sm in sub_moves:
-        parts = [p.strip() for p in sm.strip().split(':') if p.strip()]
-        if not parts: continue
-        mdir = parts[0].upper()
-        mstart = safe_eval_math(parts[1] if len(parts) > 1 else "50.0", 50.0)
-        mend = safe_eval_math(parts[2] if len(parts) > 2 else str(mstart), mstart)
-            
-        move_configs.append({'dir': mdir, 'start': mstart, 'end': mend})
+    # v32.0: Resolve the Human Signature toggle once (assigning the argument inside
+    # make_frame made it a closure-local and raised UnboundLocalError on every frame).
+    from .ken_burns import KenBurnsPlan, resolve_human_noise
+    noise_enabled = resolve_human_noise(human_noise_enabled, project_settings)
 
     # ═══════════════════════════════════════════════════════════════════
-    # 2. CALCULATE CROP GEOMETRY
+    # 2. COMPILE MOTION PLAN (v32.3)
     # ═══════════════════════════════════════════════════════════════════
-    # We need a base rectangle that fits/covers the target aspect ratio
-    # Then we zoom into that rectangle.
-    
-    # Target Aspect Ratio
-    tar_ar = target_w / target_h
-    img_ar = w_orig / h_orig
-
-    is_fit = (fit == "contain" or fit is True)
-
-    # Base Crop Size (The "1.0" zoom level)
-    # Usually we want to COVER the target.
-    # If Image is wider than Target, height limits.
-    # If Image is taller than Target, width limits.
-    
-    # Determine the maximum crop size that maintains target aspect ratio
-    if is_fit:
-        # FIT (Contain) Logic: The "window" is larger than the image in the dimension that doesn't fit.
-        if img_ar > tar_ar:
-            # Image is wider than target. Width is the limiting factor for containment.
-            base_w = w_orig
-            base_h = int(w_orig / tar_ar)
-        else:
-            # Image is taller/squarer than target. Height is the limiting factor for containment.
-            base_h = h_orig
-            base_w = int(h_orig * tar_ar)
-    else:
-        # COVER Logic (Default)
-        if img_ar > tar_ar:
-            # Image is wider (Landscape source, Portrait target?)
-            # Max height, calculated width
-            base_h = h_orig
-            base_w = int(h_orig * tar_ar)
-        else:
-            # Image is taller/squarer
-            # Max width, calculated height
-            base_w = w_orig
-            base_h = int(w_orig / tar_ar)
+    # Zoom/pan/rotate/shake/noise are parsed once and turned into one affine
+    # matrix per frame (single NumPy pass) instead of being re-parsed per frame.
+    plan = KenBurnsPlan(
+        (w_orig, h_orig), (target_w, target_h), duration, fps=fps,
+        zoom=zoom, move=move, fit=fit, shake=shake, shake_intensity=shake_intensity,
+        rotate=rotate, w_rotate=w_rotate,
+        noise_enabled=noise_enabled, noise_intensity=human_noise_intensity
+    )
+
+    # v32.4: Smallest pyramid level covering the max zoom, cropped to the visited ROI (RGB)
+    img_rgb = load_plan_source(image_path, plan)
+    if img_rgb is None:
+        logger.error(f"❌ [apply_ken_burns] OpenCV no pudo leer: {image_path}")
+        from moviepy import ColorClip
+        return ColorClip(size=target_size, color=(0,0,0), duration=duration)
+    frame_buf = np.empty((target_h, target_w, 3), dtype=np.uint8)
 
     # ═══════════════════════════════════════════════════════════════════
     # 3. FAST OPENCV MAKE_FRAME
     # ═══════════════════════════════════════════════════════════════════
     def make_frame(t):
-        if duration == 0: progress = 0
-        else: progress = t / duration
-
-        # 1. Current Zoom Level
-        # Note: In our previous logic, scale was inverse? 
-        # Usually Ken Burns: Zoom 1.0 = Full Cover. Zoom 1.5 = Crop is smaller (1/1.5)
-        # Let's align with logic: Zoom > 1 means "Zoom In" -> Show smaller area.
-        current_zoom = z_start + (z_end - z_start) * progress
-        scale_factor = 1.0 / current_zoom
-
-        # Dimensions of the crop at this moment
-        curr_w = base_w * scale_factor
-        curr_h = base_h * scale_factor
-
-        # 2. Current Pan Position (Center of the crop)
-        # We navigate the "Slack" - the space between the crop and the image edges.
-        # Slack dimensions
-        slack_w = w_orig - curr_w
-        slack_h = h_orig - curr_h
-
-        # Default Center
-        center_x = w_orig / 2
-        center_y = h_orig / 2
-        
-        # Apply offsets based on Moves
-        # 0% = Left/Top, 100% = Right/Bottom
-        # Center = 50%
-        
-        # Accumulate normalized offsets (-0.5 to 0.5)
-        off_x = 0.0
-        off_y = 0.0
-        
-        has_hor = False
-        has_ver = False
-        
-        # v30.10: Unificado con Frontend (Slack-based Panning)
-        for cfg in move_configs:
-            # Porcentaje de paneo (0 a 100, donde 50 es el centro)
-            m_prog = cfg['start'] + (cfg['end'] - cfg['start']) * progress
-            
-            # El Frontend mueve el div desde left:0 hasta left: (100 - zoom_width)
-            # En OpenCV, movemos el centro de la cámara.
-            # Rango de movimiento válido del centro = desde (w_orig/2 - slack_w/2) hasta (w_orig/2 + slack_w/2)
-            # Por lo tanto, el offset desde el centro oscila entre -slack_w/2 y +slack_w/2
-            
-            # Mapeo: 0% -> -slack/2 | 50% -> 0 | 100% -> +slack/2
-            factor = (m_prog - 50.0) / 50.0 # Rango de -1.0 a 1.0
-            
-            if cfg['dir'] == 'HOR':
-                off_x = factor * (slack_w / 2.0)
-                # Clamp de seguridad estricto (no se puede ver negro)
-                off_x = max(-slack_w/2.0, min(slack_w/2.0, off_x))
-            elif cfg['dir'] == 'VER':
-                off_y = factor * (slack_h / 2.0)
-                off_y = max(-slack_h/2.0, min(slack_h/2.0, off_y))
-
-        # Apply default center-lock if no move defined for axis
-        # (Already handled by 50% default in logic above effectively)
-
-        # v10.1: Human Camera Noise (Global Imperfection)
-        # v11.8: Sub-pixel granular control (Amplitude/Local Toggle)
-        if human_noise_enabled is None:
-            human_noise_enabled = str(os.getenv('HUMAN_SIGNATURE_ENABLED', 'True')).lower() == 'true'
-            # Override from script settings if present
-            if project_settings and 'human_signature' in project_settings:
-                human_noise_enabled = project_settings['human_signature']
-
-        if human_noise_enabled:
-            # Very low frequency, very low amplitude random-like drift
-            # Amplitud base multiplicada por la intensidad local
-            amp = human_noise_intensity if human_noise_intensity is not None else 1.0
-            drift_x = (np.sin(t * 0.5 * 2 * np.pi) * 1.5 + np.cos(t * 1.2 * 2 * np.pi) * 0.8) * amp
-            drift_y = (np.cos(t * 0.7 * 2 * np.pi) * 1.2 + np.sin(t * 1.5 * 2 * np.pi) * 0.7) * amp
-            off_x += drift_x
-            off_y += drift_y
-
-        # Shake Effect (Intense)
-        if shake:
-            freq = 12.0
-            intensity = safe_eval_math(shake_intensity, 5.0)
-            amp = intensity * 2.0 # Pixels
-            off_x += np.sin(t * freq * 2 * np.pi) * amp
-            off_y += np.cos(t * freq * 1.5 * np.pi) * amp
-
-        # Calculate Center (Float)
-        cx = (w_orig / 2.0) + off_x
-        cy = (h_orig / 2.0) + off_y
-        
-        # v27.3: Sub-pixel Ken Burns using WarpAffine
-        # This combines cropping and resizing into one sub-pixel accurate operation.
-        # It eliminates "jitter" caused by integer rounding of coordinates.
-        
-        # Source Points (The crop rectangle in original image)
-        # Top-Left, Top-Right, Bottom-Left
-        # v11.8+: ROTATE & W_ROTATE Support
-        angle = 0.0
-        if rotate:
-            r_start, r_end = 0.0, 0.0
-            if isinstance(rotate, str) and ':' in rotate:
-                r_parts = rotate.split(':')
-                r_start = safe_eval_math(r_parts[0], 0.0)
-                r_end = safe_eval_math(r_parts[1], r_start)
-            else:
-                r_start = safe_eval_math(rotate, 0.0)
-                r_end = r_start
-            angle += r_start + (r_end - r_start) * progress
-
-        if w_rotate:
-            angle += safe_eval_math(w_rotate, 0.0) * t
-
-        # v30.9: Rotated Source Points (Matches Editor Viewfinder)
-        pivot = np.array([cx, cy])
-        p1 = np.array([cx - curr_w / 2, cy - curr_h / 2])
-        p2 = np.array([cx + curr_w / 2, cy - curr_h / 2])
-        p3 = np.array([cx - curr_w / 2, cy + curr_h / 2])
-        
-        if angle != 0:
-            rad = np.radians(-angle) # CSS CW -> OpenCV CCW
-            c, s = np.cos(rad), np.sin(rad)
-            R_mat = np.array([[c, -s], [s, c]])
-            p1 = pivot + R_mat @ (p1 - pivot)
-            p2 = pivot + R_mat @ (p2 - pivot)
-            p3 = pivot + R_mat @ (p3 - pivot)
-
-        src_pts = np.array([p1, p2, p3], dtype=np.float32)
-        
-        # Destination Points (The full target frame)
-        dst_pts = np.float32([
-            [0, 0],
-            [target_w, 0],
-            [0, target_h]
-        ])
-        
-        # Compute Final Affine Transform Matrix
-        # v30.9 FIX: By rotating src_pts, M already contains the rotation.
-        M = cv2.getAffineTransform(src_pts, dst_pts)
-
+        # v27.3: Sub-pixel Ken Burns using WarpAffine (crop + resize + rotation in one op).
+        # The matrix is an inverse map, written into a reused buffer: consumers that keep
+        # frames around (previews, storyboards) must copy them.
         try:
-            # Apply Warp (Crop + Resize + Rotation + Subpixel Interpolation)
-            # Sampling directly from img_bgr ensures we don't see black if zoom is sufficient
-            resized = cv2.warpAffine(img_bgr, M, (target_w, target_h), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_CONSTANT, borderValue=(0,0,0))
-
+            cv2.warpAffine(img_rgb, plan.matrix_at(t), (target_w, target_h), dst=frame_buf,
+                           flags=cv2.INTER_LINEAR | cv2.WARP_INVERSE_MAP,
+                           borderMode=cv2.BORDER_CONSTANT, borderValue=(0, 0, 0))
         except Exception as e:
             # Fallback (Safety net)
             print(f"Error in warpAffine/rotate: {e}")
             return np.zeros((target_h, target_w, 3), dtype=np.uint8)
-
-        # Convert BGR to RGB
-        return cv2.cvtColor(resized, cv2.COLOR_BGR2RGB)
+        return frame_buf
 
     clip = VideoClip(make_frame, duration=duration)
 
@@ -463,8 +271,9 @@ def apply_ken_burns(image_path, duration, target_size, zoom="1.0:1.3", move="HOR
             # v30.5: Support static image overlays (PNG/JPG)
             is_static = overlay_path.lower().endswith(('.png', '.jpg', '.jpeg'))
             if is_static:
-                from moviepy import ImageClip
-                overlay = ImageClip(overlay_path).with_duration(duration)
+                # v32.5: Shared decoded image cache (same overlay across scenes)
+                from .image_cache import cached_image_clip
+                overlay = cached_image_clip(overlay_path, duration)
             else:
                 overlay = VideoFileClip(overlay_path, has_mask=True)
             
@@ -533,7 +342,16 @@ def process_video_asset(video_path, duration, target_size, overlay_path=None, fi
             v_clip = VideoFileClip(video_path)
     else:
         # Standard Video loading
-        v_clip = VideoFileClip(video_path)
+        # v32.13: Cached probe decides up front whether the audio reader is worth opening
+        from .media_probe import probe_media
+        probe = probe_media(video_path)
+        if probe and (not probe['has_audio'] or probe['audio_ok'] is False):
+            v_clip = VideoFileClip(video_path, audio=False)
+            if probe['audio_ok'] is False:
+                logger.warning(f"  🔥 [CORRUPT AUDIO DETECTED]: {os.path.basename(video_path)} -> {probe['audio_error']}. Stripping audio to save render.")
+                video_volume = 0.0
+        else:
+            v_clip = VideoFileClip(video_path)
     
     if clips_to_close is not None: clips_to_close.append(v_clip)
     
@@ -586,9 +404,13 @@ def process_video_asset(video_path, duration, target_size, overlay_path=None, fi
     v_clip = v_clip.with_position("center")
     
     # Audio Logic
+    from .media_probe import audio_is_healthy
     try:
         # v15.8 UNIVERSAL AUDIO GUARD: Proactive integrity check for ALL assets
-        if v_clip.audio:
+        # v32.13: Already verified (once per file version) by the probe cache
+        if v_clip.audio and audio_is_healthy(video_path):
+            pass
+        elif v_clip.audio:
             try:
                 # 1. Test Read: Start of file
                 v_clip.audio.to_soundarray(nbytes=2, buffersize=1000, fps=44100)
@@ -630,8 +452,9 @@ def process_video_asset(video_path, duration, target_size, overlay_path=None, fi
             # v30.5: Support static image overlays (PNG/JPG)
             is_static = overlay_path.lower().endswith(('.png', '.jpg', '.jpeg'))
             if is_static:
-                from moviepy import ImageClip
-                overlay = ImageClip(overlay_path).with_duration(duration)
+                # v32.5: Shared decoded image cache (same overlay across scenes)
+                from .image_cache import cached_image_clip
+                overlay = cached_image_clip(overlay_path, duration)
             else:
                 overlay = VideoFileClip(overlay_path, has_mask=True)
             
@@ -672,15 +495,19 @@ class CacheProgressBarLogger(proglog.ProgressBarLogger):
     Captures frame-level processing ("Items") and syncs them to Django Cache
     for real-time visibility in the terminal and UI.
     """
-    def __init__(self, project_id):
+    def __init__(self, project_id, cancel_token=None):
         super().__init__()
         self.project_id = project_id
+        self.cancel_token = cancel_token
         from django.core.cache import cache
         self.cache = cache
         self.last_update = 0
         self.start_time = time.time()
 
     def bars_callback(self, bar, attr, value, old_value=None):
+        # v32.16: Frame-loop checkpoint (a flag read; the watchdog does the polling)
+        if self.cancel_token is not None:
+            self.cancel_token.raise_if_cancelled()
         # MoviePy uses 'chunk' for frames and 't' for general progress
         if bar in ['chunk', 't']:
             now = time.time()
@@ -965,17 +792,20 @@ def generate_video_avgl(project):
     Main video generation function using AVGL v4.0 JSON format.
     v8.6.2: Wrapped in Global Error Listener for robust notifications.
     """
-    from moviepy import ImageClip, AudioFileClip, concatenate_videoclips, VideoFileClip, CompositeAudioClip, CompositeVideoClip, vfx
-    from .avgl_engine import parse_avgl_json, translate_emotions, wrap_ssml, generate_audio_edge, generate_audio_elevenlabs
+    from moviepy import AudioFileClip, concatenate_videoclips, VideoFileClip, CompositeAudioClip, CompositeVideoClip, vfx
+    from .avgl_engine import parse_avgl_json, wrap_ssml, synthesize_scenes, apply_project_voice, scene_target_lang, scene_tts_text, edge_voice_for
+    from .media_probe import media_duration
+    from .asset_index import resolve_asset
     from .utils import ProjectLogger, translate_text_ai, auto_transcribe_and_translate_asset
-    import asyncio
-    import numpy as np
     from moviepy import AudioClip, ColorClip, afx, TextClip
     from .models import Music
     from django.db.models import Q
     
     start_time = time.time()
     logger = ProjectLogger(project)
+    # v32.16: Cooperative cancellation (watchdog kills FFmpeg/pools within POLL_SECONDS)
+    from .cancellation import CancellationToken, RenderCancelled
+    cancel_token = CancellationToken(project.id).start()
     
     # v26.0: Global Subtitle Collection
     all_srt_items = []
@@ -987,6 +817,7 @@ def generate_video_avgl(project):
     
     # v15.8: Asset Cache to prevent memory leaks and redundant FFmpeg processes
     overlay_cache = {}
+    prefetcher = None  # v32.19
     
     try:
         audio_files = []
@@ -1009,7 +840,8 @@ def generate_video_avgl(project):
             logger.log(f"[OK] Script parseado: '{script.title}'")
         except Exception as e:
             logger.log(f"[Error] Error al parsear JSON: {e}")
-            project.status = 'error'; project.save()
+            logger.flush(sync_db=True)
+            project.status = 'error'; project.save(update_fields=['status'])
             play_finish_sound(success=False)
             return
 
@@ -1018,12 +850,7 @@ def generate_video_avgl(project):
             project.title = script.title; project.save(update_fields=['title'])
 
         # FORCE OVERRIDE: Apply Project Voice to Script
-        if project.voice_id:
-            script.voice = project.voice_id
-            for block in script.blocks:
-                for scene in block.scenes:
-                    if not scene.voice or scene.voice == "es-ES-AlvaroNeural":
-                        scene.voice = project.voice_id
+        apply_project_voice(script, project)
         
         # Setup directories
         temp_audio_dir = os.path.join(settings.MEDIA_ROOT, 'temp_audio')
@@ -1032,15 +859,28 @@ def generate_video_avgl(project):
         overlay_dir = os.path.join(settings.MEDIA_ROOT, 'overlays')
         
         # Target resolution (Ensuring even numbers for H.264 compatibility)
-        target_size = (1080, 1920) if project.aspect_ratio == 'portrait' else (1920, 1080)
-        target_size = ((target_size[0] // 2) * 2, (target_size[1] // 2) * 2)
+        # v32.22: Render profile (draft = low resolution / low fps, see render_profiles.py)
+        from .render_profiles import project_profile, frame_size
+        profile = project_profile(project)
+        target_size = frame_size(project.aspect_ratio, profile)
+        if profile['name'] == 'draft':
+            logger.log(f"📝 [Borrador] {target_size[0]}x{target_size[1]} a {profile['fps']} fps (cachés compartidas con el render final)")
         
         # 2. Generate audio for all scenes
         logger.log("[Audio] Generando segmentos...")
         all_scenes = script.get_all_scenes()
+
+        # v32.19: Visual preparation overlapped with TTS (see prefetch.py)
+        if getattr(settings, 'ASSET_PREFETCH_ENABLED', True):
+            from .prefetch import AssetPrefetcher
+            prefetcher = AssetPrefetcher(project, target_size, assets_dir, workers=getattr(settings, 'ASSET_PREFETCH_WORKERS', 2),
+                                         should_stop=cancel_token.is_cancelled, log=logger.log,
+                                         warm_sizes=[frame_size(project.aspect_ratio)] if profile['name'] == 'draft' else ())
+            prefetcher.submit_visuals(all_scenes)
         
         # v5.2.1: Pre-calculate durations for Master Shot interpolation
         audio_durations = {}
+        tts_jobs = []  # v32.10: Synthesized concurrently after the scene loop
         for i, scene in enumerate(all_scenes):
             logger.log(f"  Escena {i+1}/{len(all_scenes)}: {scene.title}")
             
@@ -1056,8 +896,7 @@ def generate_video_avgl(project):
             # v22.6: Bidirectional Adaptive Translation (v5.1.1)
             s_lang = getattr(scene, 'language', None)
             p_lang = project.language
-            target_lang = s_lang if (s_lang and s_lang.strip()) else p_lang
-            if not target_lang: target_lang = 'es'
+            target_lang = scene_target_lang(scene, project)
 
             # Pre-resolve asset if needed for auto-dubbing
             asset_path = None
@@ -1067,12 +906,9 @@ def generate_video_avgl(project):
                 asset = valid_assets[0]
                 raw_path = str(getattr(asset, 'id', '') or getattr(asset, 'type', '') or "").strip()
                 fname = os.path.basename(raw_path) if ('/' in raw_path or '\\' in raw_path) else raw_path
-                for s_dir in [assets_dir, os.path.join(settings.MEDIA_ROOT, 'videos'), os.path.join(settings.MEDIA_ROOT, 'uploads')]:
-                    test_p = os.path.join(s_dir, fname)
-                    if os.path.isfile(test_p): asset_path = test_p; break
-                    for ext in ['.mp4', '.mov', '.avi', '.mkv']:
-                        if os.path.isfile(test_p + ext): asset_path = test_p + ext; break
-                    if asset_path: break
+                # v32.14: Filename index instead of isfile probes
+                asset_path = resolve_asset(fname, [assets_dir, os.path.join(settings.MEDIA_ROOT, 'videos'), os.path.join(settings.MEDIA_ROOT, 'uploads')],
+                                           extensions=['.mp4', '.mov', '.avi', '.mkv'])
                 is_video = asset_path and asset_path.lower().endswith(('.mp4', '.mov', '.avi', '.mkv'))
 
             # v5.12: Smart Language Detection
@@ -1138,12 +974,16 @@ def generate_video_avgl(project):
                         if not os.path.exists(audio_path) or os.path.getsize(audio_path) < 100:
                              raise Exception(f"Archivo de audio normalizado inválido o muy pequeño: {os.path.getsize(audio_path) if os.path.exists(audio_path) else 0} bytes")
                         
-                        temp_clip = AudioFileClip(audio_path)
-                        logger.log(f"    📏 Normalizado OK: {temp_clip.duration:.2f}s | {os.path.getsize(audio_path)//1024}KB")
+                        norm_duration = media_duration(audio_path)  # v32.13
+                        if norm_duration is None:
+                            temp_clip = AudioFileClip(audio_path)
+                            norm_duration = temp_clip.duration
+                            temp_clip.close()
+                        logger.log(f"    📏 Normalizado OK: {norm_duration:.2f}s | {os.path.getsize(audio_path)//1024}KB")
                         
                         audio_files.append((scene, audio_path))
-                        audio_durations[scene] = temp_clip.duration
-                        temp_clip.close()
+                        audio_durations[scene] = norm_duration
+                        if prefetcher: prefetcher.audio_ready(scene, i, audio_path, norm_duration)
                         continue
                     except subprocess.CalledProcessError as e:
                         logger.log(f"    ❌ Fallo crítico FFmpeg normalization: {e.stderr}")
@@ -1171,12 +1011,7 @@ def generate_video_avgl(project):
                     audio_durations[scene] = 1.0 + getattr(scene, 'pause', 0.0)
                 continue
                 
-            use_ssml = (project.engine == 'eleven')
-            curr_text = re.sub(r'\(.*?\)', '', scene.text).strip()
-            if curr_text.startswith('[') and not re.match(r'^\[\s*SUB', curr_text, flags=re.IGNORECASE):
-                curr_text = re.sub(r'^\[(?!(?:\s*/?SUB|TENSO|EPICO|SUSPENSO|GRITANDO|SUSURRO))[^\]]+\]\s*', '', curr_text, flags=re.IGNORECASE)
-
-            text_with_emotions = translate_emotions(curr_text, use_ssml=use_ssml)
+            text_with_emotions = scene_tts_text(scene, project.engine)  # v32.21: Shared with the dry-run planner
             
             # REGLA MAESTRA: Traducimos si hay un idioma de escena explícito O si el global no es español
             should_translate = (s_lang and s_lang.strip()) or (p_lang != 'es' and p_lang)
@@ -1190,42 +1025,59 @@ def generate_video_avgl(project):
                  else:
                      logger.log(f"       ⚠️ Error en traducción: {err}")
             
-            success = False
             if project.engine == 'edge':
-                env_rate = os.getenv("EDGE_TTS_RATE", "+0%")
-                speed_rate = f"+{int((scene.speed - 1.0) * 100)}%" if scene.speed != 1.0 else env_rate
-                
                 # v22.5: Smart Voice Switch (Edge TTS ONLY)
                 # If target is English but voice is Spanish, switch to a native English voice
-                eff_voice = scene.voice or project.voice_id or "es-MX-JorgeNeural"
-                if target_lang == 'en' and eff_voice.startswith('es-'):
-                    eff_voice = "en-US-GuyNeural"
-                    logger.log(f"    🎙️ [VoiceSwitch] Cambiando a voz nativa en-US para coherencia lingüística.")
-                elif target_lang == 'es' and eff_voice.startswith('en-'):
-                    eff_voice = "es-MX-JorgeNeural"
-                    logger.log(f"    🎙️ [VoiceSwitch] Cambiando a voz nativa es-MX para coherencia lingüística.")
-
-                loop = asyncio.new_event_loop(); asyncio.set_event_loop(loop)
-                success = loop.run_until_complete(generate_audio_edge(text_with_emotions, audio_path, eff_voice, speed_rate, pitch=scene.pitch or "+0Hz", scene=scene))
-                loop.close()
+                eff_voice, speed_rate, eff_pitch, switched = edge_voice_for(scene, project, target_lang)
+                if switched:
+                    logger.log(f"    🎙️ [VoiceSwitch] Cambiando a voz nativa {switched[:5]} para coherencia lingüística.")
+
+                # v32.12: Edge audio is assembled from in-memory PCM as a WAV
+                audio_path = os.path.join(temp_audio_dir, f"{base_audio_name}.wav")
+                tts_job = {'voice': eff_voice, 'rate': speed_rate, 'pitch': eff_pitch}
             else:
                 # ElevenLabs (usually multilingual v2 handled by API)
-                api_key = os.getenv('ELEVENLABS_API_KEY')
-                voice_id = os.getenv('ELEVENLABS_VOICE_ID', 'EXAVITQu4vr4xnSDxMaL')
-                success = asyncio.run(generate_audio_elevenlabs(text_with_emotions, audio_path, voice_id, api_key))
-            
-            if success:
-                audio_files.append((scene, audio_path))
-                try: temp_clip = AudioFileClip(audio_path); audio_durations[scene] = temp_clip.duration; temp_clip.close()
-                except: audio_durations[scene] = 1.0
-            else:
-                logger.log(f"  ⚠️ Error generando audio para escena {i+1}")
-                audio_files.append((scene, None))
-                audio_durations[scene] = 1.0
+                tts_job = {'voice': os.getenv('ELEVENLABS_VOICE_ID', 'EXAVITQu4vr4xnSDxMaL'), 'api_key': os.getenv('ELEVENLABS_API_KEY')}
+
+            # v32.10: Queued; all scenes are synthesized together after this loop
+            tts_job.update({'index': i, 'slot': len(audio_files), 'scene': scene, 'text': text_with_emotions, 'path': audio_path})
+            tts_jobs.append(tts_job)
+            audio_files.append((scene, audio_path))
+
+        # ═══════════════════════════════════════════════════════════════════
+        # v32.10 CONCURRENT TTS
+        # One event loop for every scene and [PAUSA]/emotion segment, bounded by
+        # TTS_CONCURRENCY with retry/backoff. Word timings and voice intervals are
+        # assembled per scene in script order, whatever order the requests finish in.
+        # ═══════════════════════════════════════════════════════════════════
+        if tts_jobs:
+            tts_start = time.time()
+            logger.log(f"[Audio] Sintetizando {len(tts_jobs)} escenas en paralelo (máx. {getattr(settings, 'TTS_CONCURRENCY', 6)} peticiones)...")
+            from .tts_cache import get_tts_cache
+            tts_cache = get_tts_cache()
+            hits_before = tts_cache.hits if tts_cache else 0
+            on_done = None
+            if prefetcher:
+                # v32.19: Each scene's lip-sync starts as soon as its own voice is ready
+                on_done = lambda job, res: prefetcher.audio_ready(job['scene'], job['index'], job['path'], None if res is True else float(res))
+            results = synthesize_scenes(tts_jobs, engine='edge' if project.engine == 'edge' else 'eleven', on_done=on_done)
+            for job, success in zip(tts_jobs, results):
+                scene = job['scene']
+                if success is not True and success:
+                    audio_durations[scene] = float(success)  # v32.12: Exact duration from the PCM assembly
+                elif success:
+                    audio_durations[scene] = media_duration(job['path'], default=1.0)  # v32.13
+                else:
+                    logger.log(f"  ⚠️ Error generando audio para escena {job['index']+1}")
+                    audio_files[job['slot']] = (scene, None)
+                    audio_durations[scene] = 1.0
+            cache_txt = f", {tts_cache.hits - hits_before} desde caché" if tts_cache else ""
+            logger.log(f"[Audio] TTS completado en {time.time() - tts_start:.1f}s ({sum(1 for r in results if r)}/{len(tts_jobs)} OK{cache_txt})")
 
         # Check if we have at least some audio or scenes
         if not audio_files:
             logger.log("❌ Error fatal: No se generó ningún audio.")
+            logger.flush(sync_db=True)
             project.status = 'error'
             project.save(update_fields=['status'])
             play_finish_sound(success=False)
@@ -1238,6 +1090,7 @@ def generate_video_avgl(project):
         # 3. Main Clip Generation Loop
         logger.log("[Video] Procesando escenas...")
         block_metadata = []
+        segment_specs = [] # v32.0: Picklable per-scene descriptions for the segment renderer
         global_voice_intervals = [] # v18.0: Centralized absolute intervals
         current_time = 0.0
         timestamps_list = []
@@ -1245,6 +1098,11 @@ def generate_video_avgl(project):
         # Create a Scene-to-Audio mapping to prevent desync
         scene_audio_map = {scene: audio for scene, audio in audio_files}
 
+        # v32.20: Timeline IR (absolute timing, group offsets, resolved assets, effects, subtitle windows)
+        from .timeline import compile_timeline, asset_effects, subtitle_window, subtitle_item, scene_word_count, resolve_overlay, resolve_sfx
+        timeline = compile_timeline(script, audio_durations, scene_audio_map, assets_dir)
+        logger.log(f"[Timeline] {len(timeline.scenes)} escenas, {len(timeline.groups)} grupos, {timeline.duration:.1f}s estimados")
+
         # v12.5: Granular Progress & Speed Logging (Cache-First)
         # Pre-calculate total scenes for accurate progress bar
         total_scenes = sum(len(b.scenes) for b in script.blocks)
@@ -1257,8 +1115,8 @@ def generate_video_avgl(project):
 
         for b_idx, block in enumerate(script.blocks):
             # v20.8: Emergency Stop - Check if project was cancelled between blocks
-            project.refresh_from_db()
-            if project.status == 'cancelled':
+            # v32.16: Token flag instead of a SQLite read
+            if cancel_token.is_cancelled():
                 logger.log(f"🛑 [Engine] Renderizado cancelado por el Arquitecto (Bloque {b_idx+1}). Abortando.")
                 for c in clips_to_close: 
                     try: c.close()
@@ -1274,8 +1132,7 @@ def generate_video_avgl(project):
             
             for s_idx, scene in enumerate(block.scenes):
                 # v20.8: Emergency Stop - Check if project was cancelled between scenes
-                project.refresh_from_db()
-                if project.status == 'cancelled':
+                if cancel_token.is_cancelled():
                     logger.log(f"🛑 [Engine] Renderizado cancelado por el Arquitecto (Escena {global_scene_cnt+1}). Abortando.")
                     for c in clips_to_close: 
                         try: c.close()
@@ -1348,7 +1205,11 @@ def generate_video_avgl(project):
                     duration = 1.0 # Minimal failsafe
                 
                 # ASSET LOADING & FALLBACK
+                if prefetcher:
+                    prefetcher.wait(scene)  # v32.19: Only this scene's prefetch tasks
+                t_entry = timeline.entry(scene)
                 clip = None
+                scene_spec = None # v32.0: Segment render description (None = not serializable)
                 # v16.7.20: Filter out empty assets to treat them like no-assets (fast mode)
                 # v16.7.21: Also filter out generic category placeholders ('image', 'video', etc.)
                 def is_valid_asset(a):
@@ -1370,7 +1231,9 @@ def generate_video_avgl(project):
                     
                     # 1. Check Absolute Path (Priority)
                     norm_path = os.path.normpath(raw_path)
-                    if norm_path and os.path.isabs(norm_path) and os.path.isfile(norm_path):
+                    if t_entry and t_entry.asset and t_entry.asset.path and not os.path.isabs(norm_path):
+                        asset_path = t_entry.asset.path  # v32.20: Resolved when the timeline was compiled
+                    elif norm_path and os.path.isabs(norm_path) and os.path.isfile(norm_path):
                          asset_path = norm_path
                          logger.log(f"    ✅ Ruta ABSOLUTA detectada y validada: {os.path.basename(asset_path)}")
                          logger.log(f"       Path: {asset_path}")
@@ -1388,33 +1251,13 @@ def generate_video_avgl(project):
                             os.path.join(settings.MEDIA_ROOT, 'outputs')
                         ]
                         
-                        found_path = None
-                        for s_dir in search_dirs:
-                            test_path = os.path.join(s_dir, fname)
-                            if os.path.isfile(test_path):
-                                found_path = test_path
-                                break
-                            # Try extensions
-                            for ext in ['.png', '.jpg', '.jpeg', '.mp4', '.gif']:
-                                if os.path.isfile(test_path + ext):
-                                    found_path = test_path + ext
-                                    break
-                            if found_path: break
+                        # v32.14: Served by the per-process filename index (no isfile probes / os.walk)
+                        found_path = resolve_asset(fname, search_dirs, extensions=['.png', '.jpg', '.jpeg', '.mp4', '.gif'])
                         
                         # 3. Recursive Deep Search (v20.7)
                         if not found_path:
                             logger.log(f"    🔍 Escaneo profundo exigido: Buscando '{fname}' en subcarpetas...")
-                            for root, dirs, files in os.walk(assets_dir):
-                                if fname in files:
-                                    found_path = os.path.join(root, fname)
-                                    break
-                                # Case insensitive / extension check
-                                for f in files:
-                                    name_no_ext, _ = os.path.splitext(f)
-                                    if f.lower() == fname.lower() or name_no_ext.lower() == fname.lower():
-                                        found_path = os.path.join(root, f)
-                                        break
-                                if found_path: break
+                            found_path = resolve_asset(fname, (), deep_dirs=[assets_dir])
                         
                         asset_path = found_path if found_path else os.path.join(assets_dir, fname)
                     
@@ -1451,12 +1294,13 @@ def generate_video_avgl(project):
                             except: pass
                         
                         if not found_fb:
-                            from moviepy import ColorClip
                             clip = ColorClip(size=target_size, color=(0,0,0), duration=duration)
+                            scene_spec = {'kind': 'color'}
                             logger.log("    🛑 SIN ASSETS DISPONIBLES. Usando fondo negro.")
                         else:
                             # Apply fallback
-                            clip = apply_ken_burns(asset_path, duration, target_size, zoom="1.1:1.0", move="HOR:50:50")
+                            clip = apply_ken_burns(asset_path, duration, target_size, zoom="1.1:1.0", move="HOR:50:50", fps=profile['fps'])
+                            scene_spec = {'kind': 'ken_burns', 'image_path': asset_path, 'zoom': "1.1:1.0", 'move': "HOR:50:50"}
                             clips_to_close.append(clip)
                     
                     if not clip and os.path.isfile(asset_path):
@@ -1466,97 +1310,21 @@ def generate_video_avgl(project):
                         
                         # ═══════════════════════════════════════════════════════════════════
                         # MASTER SHOT / GROUP INTERPOLATION & V5.0 EFFECTS
-                        eff_zoom = asset.zoom or "1.0:1.3"
-                        eff_move = asset.move or "HOR:50:50"
-                        eff_shake = getattr(asset, 'shake', False)
-                        eff_shake_intensity = getattr(asset, 'shake_intensity', 5)
-                        eff_rotate = getattr(asset, 'rotate', None)
+                        # v32.20: Pre-parsed by the timeline (aliases, SHAKE/ROTATE, O(1) group offset)
+                        if t_entry and t_entry.asset and t_entry.asset.kind == ('video' if is_video else 'image' if is_image else None):
+                            eff_zoom, eff_move, eff_shake, eff_shake_intensity, eff_rotate = t_entry.effects(duration)
+                            fx_error = t_entry.asset.error
+                        else:
+                            g_offset = t_entry.group_offset if t_entry else 0.0
+                            g_duration = (t_entry.group_duration if t_entry else 0.0) or 1.0
+                            eff_zoom, eff_move, eff_shake, eff_shake_intensity, eff_rotate, fx_error = asset_effects(
+                                scene, asset, 'video' if is_video else 'image', g_offset, duration, g_duration)
 
                         # v14.2 OPTIMIZATION: Videos don't need Zoom/Move math
                         if is_video:
-                            eff_zoom = "1.0"
-                            eff_move = "HOR:50:50"
                             logger.log(f"    📽️ Video detectado: Omitiendo efectos de Zoom/Move.")
-                        else:
-                        
-                            # v5.0 Directional Aliases (Extended Support)
-                            MOVE_ALIASES = {
-                                "UP": "VER:100:0",
-                                "DOWN": "VER:0:100",
-                                "LEFT": "HOR:100:0",
-                                "RIGHT": "HOR:0:100",
-                                "CENTER": "HOR:50:50"
-                            }
-                            
-                            raw_move = str(eff_move).strip().upper()
-                            if raw_move in MOVE_ALIASES:
-                                eff_move = MOVE_ALIASES[raw_move]
-                            
-                            # v5.0 Parsing: Extract SHAKE/ROTATE from eff_move if present
-                            if eff_move and 'SHAKE' in eff_move.upper():
-                                match = re.search(r'SHAKE:(\d+)', eff_move, re.IGNORECASE)
-                                eff_shake = True
-                                if match: eff_shake_intensity = int(match.group(1))
-                            
-                            if eff_move and 'ROTATE' in eff_move.upper():
-                                match = re.search(r'ROTATE:([-0-9.]+):([-0-9.]+)', eff_move, re.IGNORECASE)
-                                if match: eff_rotate = f"{match.group(1)}:{match.group(2)}"
-                                else:
-                                    match_static = re.search(r'ROTATE:([-0-9.]+)', eff_move, re.IGNORECASE)
-                                    if match_static: eff_rotate = match_static.group(1)
-                            
-                            if scene.group_id and scene.group_settings:
-                                g = scene.group_settings
-                                g_zoom = g.get("zoom", "1.0:1.3")
-                                g_move = g.get("move", "HOR:50:50")
-                                
-                                try:
-                                    # Calculate group timing
-                                    group_scenes = [s for s in all_scenes if s.group_id == scene.group_id]
-                                    # v20.4: Respect Force Duration in Group Calculations
-                                    total_group_duration = 0.0
-                                    for s in group_scenes:
-                                        s_dur = audio_durations.get(s, 1.0) + s.pause
-                                        if getattr(s, 'force_duration', False) and getattr(s, 'duration', 0.0) > 0:
-                                            s_dur = float(s.duration)
-                                        total_group_duration += s_dur
-                                    
-                                    # Find start time of CURRENT scene relative to group start
-                                    start_in_group = 0.0
-                                    for s in group_scenes:
-                                        if s == scene: break
-                                        s_dur = audio_durations.get(s, 1.0) + s.pause
-                                        start_in_group += s_dur
-                                    
-                                    # Interpolate Zoom
-                                    z_parts = g_zoom.split(':') if ':' in g_zoom else [g_zoom, g_zoom]
-                                    gz_start = safe_float(z_parts[0], 1.0); gz_end = safe_float(z_parts[1], 1.3)
-                                    
-                                    z_s = gz_start + (gz_end - gz_start) * (start_in_group / total_group_duration)
-                                    z_e = gz_start + (gz_end - gz_start) * ((start_in_group + duration) / total_group_duration)
-                                    eff_zoom = f"{z_s:.3f}:{z_e:.3f}"
-                                    
-                                    # Interpolate Move (Simple Linear)
-                                    m_configs = []
-                                    if '+' in g_move:
-                                        for p in [p.strip() for p in g_move.split('+')]:
-                                            mp = p.split(':')
-                                            if len(mp) >= 3: m_configs.append({'dir': mp[0], 's': safe_float(mp[1], 50.0), 'e': safe_float(mp[2], 50.0)})
-                                    else:
-                                        mp = g_move.split(':')
-                                        if len(mp) >= 3: m_configs.append({'dir': mp[0], 's': safe_float(mp[1], 50.0), 'e': safe_float(mp[2], 50.0)})
-                                    
-                                    for cfg in m_configs:
-                                        ms = cfg['s']; me = cfg['e']
-                                        m_s = ms + (me - ms) * (start_in_group / total_group_duration)
-                                        m_e = ms + (me - ms) * ((start_in_group + duration) / total_group_duration)
-                                        if cfg['dir'] == 'HOR':
-                                            eff_move = f"HOR:{m_s:.1f}:{m_e:.1f}" if not eff_move or '+' not in eff_move else eff_move + f" + HOR:{m_s:.1f}:{m_e:.1f}"
-                                        else:
-                                            eff_move += f" + VER:{m_s:.1f}:{m_e:.1f}" if eff_move else f"VER:{m_s:.1f}:{m_e:.1f}"
-                                except Exception as e:
-                                    logger.log(f"    ⚠️ Error en interpolación visual de grupo: {e}")
-                                    eff_zoom = "1.0:1.3"; eff_move = "HOR:50:50"
+                        elif fx_error:
+                            logger.log(f"    ⚠️ Error en interpolación visual de grupo: {fx_error}")
 
                         logger.log(f"  🎬 Item {s_idx+1}: {os.path.basename(asset_path)} | Zoom: {eff_zoom} | Move: {eff_move}")
                         
@@ -1574,21 +1342,27 @@ def generate_video_avgl(project):
                         if scene_dubbing == 'lipsync' and (is_video or is_image) and audio_clip:
                             logger.log(f"    👄 [Lip-Sync] Iniciando sincronización facial local (Modo: {'Video' if is_video else 'Talking Head'})...")
                             try:
-                                ls_output = os.path.join(settings.MEDIA_ROOT, 'outputs', f"ls_{project.id}_{s_idx}.mp4")
-                                # v2.2: Absolute Paths for Models
-                                model_path = os.path.join(settings.BASE_DIR, "models", "lipsync", "wav2lip_gan.onnx")
-                                detector_path = os.path.join(settings.BASE_DIR, "models", "lipsync", "face_detector.onnx")
-                                
-                                ls_engine = LipSyncEngine(model_path, detector_path)
                                 ls_start_time = safe_float(getattr(asset, 'start_time', 0.0), 0.0)
-                                ls_engine.process_video(asset_path, audio_path, ls_output, start_time=ls_start_time, duration=duration)
+                                # v32.19: Usually already rendered while the TTS of later scenes was in flight
+                                ls_output = prefetcher.lipsync_output(scene, asset_path, audio_path, ls_start_time, duration) if prefetcher else None
+                                if ls_output:
+                                    logger.log(f"    ⚡ [Lip-Sync] Precalculado durante el TTS.")
+                                else:
+                                    # v32.22: Served from the lip-sync cache when a previous render (e.g. the draft) made it
+                                    from .lipsync_cache import render_lipsync
+                                    ls_output = render_lipsync(
+                                        asset_path, audio_path, os.path.join(settings.MEDIA_ROOT, 'outputs', f"ls_{project.id}_{s_idx}.mp4"),
+                                        start_time=ls_start_time, duration=duration, should_stop=cancel_token.is_cancelled, log=logger.log)
+                                cancel_token.raise_if_cancelled()
                                 
-                                if os.path.exists(ls_output):
+                                if ls_output and os.path.exists(ls_output):
                                     asset_path = ls_output
                                     is_video = True
                                     logger.log(f"    ✅ [Lip-Sync] Éxito. Usando video sincronizado.")
                                     # v5.8: Force volume to 1.0 so the "baked" translation is audible
                                     setattr(asset, 'video_volume', 1.0)
+                            except RenderCancelled:
+                                raise
                             except Exception as lse:
                                 logger.log(f"    ⚠️ [Lip-Sync] Fallo: {lse}. Continuando con asset original.")
 
@@ -1599,14 +1373,7 @@ def generate_video_avgl(project):
                         if asset.overlay:
                             # v31.0: Multi-Format Overlay Resolution (Video & Images)
                             raw_overlay = asset.overlay
-                            overlay_path = None
-                            
-                            # Check popular extensions
-                            for ext in ['', '.mp4', '.png', '.jpg', '.jpeg', '.webp', '.mov']:
-                                test_path = os.path.join(overlay_dir, f"{raw_overlay}{ext}")
-                                if os.path.exists(test_path) and os.path.isfile(test_path):
-                                    overlay_path = test_path
-                                    break
+                            overlay_path = resolve_overlay(raw_overlay, overlay_dir)
                             
                             if overlay_path:
                                 if overlay_path not in overlay_cache:
@@ -1614,8 +1381,8 @@ def generate_video_avgl(project):
                                         logger.log(f"    📦 Cargando overlay: {os.path.basename(overlay_path)}")
                                         # Use ImageClip for static, VideoFileClip for dynamic
                                         if overlay_path.lower().endswith(('.png', '.jpg', '.jpeg', '.webp')):
-                                            from moviepy import ImageClip
-                                            oc = ImageClip(overlay_path).with_duration(duration)
+                                            from .image_cache import cached_image_clip
+                                            oc = cached_image_clip(overlay_path, duration)
                                         else:
                                             oc = VideoFileClip(overlay_path, has_mask=True)
                                         
@@ -1631,17 +1398,8 @@ def generate_video_avgl(project):
                                 overlay_path = None
                         
                         # v14.0 Sync Logic: Identify timing for groups
-                        sync_start_time = 0.0
-                        if scene.group_id:
-                            # Re-use calculated start_in_group if it exists (K-Burns logic above)
-                            # or calculate it here
-                            group_scenes = [s for s in all_scenes if s.group_id == scene.group_id]
-                            for s in group_scenes:
-                                if s == scene: break
-                                s_dur = audio_durations.get(s, 1.0) + s.pause
-                                if getattr(s, 'force_duration', False) and getattr(s, 'duration', 0.0) > 0:
-                                    s_dur = float(s.duration)
-                                sync_start_time += s_dur
+                        # v32.20: Group offset precomputed by the timeline
+                        sync_start_time = t_entry.group_offset if t_entry and scene.group_id else 0.0
 
                         if is_video:
                             # v14.9: Smart Default - If not specified, we assume user wants sound (Cinema Mode)
@@ -1659,12 +1417,16 @@ def generate_video_avgl(project):
                             
                             if is_cinema and voice_duration < 1.0:
                                 try:
-                                    from moviepy import VideoFileClip
-                                    temp_v = VideoFileClip(asset_path)
-                                    if temp_v.duration > duration:
-                                        logger.log(f"    🎬 [MODO CINE] Auto-Persistencia Activada: {duration:.2f}s -> {temp_v.duration:.2f}s")
-                                        duration = temp_v.duration
-                                    temp_v.close()
+                                    # v32.13: Duration from the probe cache, no reader spawned
+                                    asset_duration = media_duration(asset_path)
+                                    if asset_duration is None:
+                                        from moviepy import VideoFileClip
+                                        temp_v = VideoFileClip(asset_path)
+                                        asset_duration = temp_v.duration
+                                        temp_v.close()
+                                    if asset_duration > duration:
+                                        logger.log(f"    🎬 [MODO CINE] Auto-Persistencia Activada: {duration:.2f}s -> {asset_duration:.2f}s")
+                                        duration = asset_duration
                                 except Exception as e:
                                     logger.log(f"    ⚠️ Error en Auto-Persistencia: {e}")
 
@@ -1680,24 +1442,25 @@ def generate_video_avgl(project):
                                     clip = VideoFileClip(asset_path)
                                     if clips_to_close is not None: clips_to_close.append(clip)
                                     if clip.size != target_size: clip = clip.resized(target_size)
+                                    scene_spec = {'kind': 'file', 'path': asset_path}
                                     is_fast_success = True
                                 else:
                                     logger.log(f"    ⚡ [FastAssembly] Modo Inyección Directa Activado para: {os.path.basename(asset_path)}")
                                     # 1. Prepare scene audio (Voice or Silence)
-                                    temp_scene_audio = os.path.join(temp_audio_dir, f"fast_audio_{s_idx}.aac")
+                                    # v32.0: Unique per project/scene (s_idx restarts on every block)
+                                    temp_scene_audio = os.path.join(temp_audio_dir, f"fast_audio_{project.id}_{global_scene_cnt}.aac")
                                     
                                     if audio_clip:
                                         audio_clip.write_audiofile(temp_scene_audio, logger=None)
                                     else:
                                         # Inyectar silencio de la duración de la escena
                                         logger.log(f"    🔇 Inyectando silencio de {duration:.2f}s para inyección directa.")
-                                        from moviepy import AudioClip
                                         silent_audio = AudioClip(lambda t: 0, duration=duration)
                                         silent_audio.write_audiofile(temp_scene_audio, fps=44100, logger=None)
                                         silent_audio.close()
                                     
                                     # 2. Mux
-                                    temp_scene_video = os.path.join(temp_audio_dir, f"fast_scene_{s_idx}.mp4")
+                                    temp_scene_video = os.path.join(temp_audio_dir, f"fast_scene_{project.id}_{global_scene_cnt}.mp4")
                                     success = fast_mux_audio_video(
                                         asset_path, temp_scene_audio, temp_scene_video, 
                                         video_volume=v_vol if audio_clip else 0.0,
@@ -1710,6 +1473,7 @@ def generate_video_avgl(project):
                                         clip = VideoFileClip(temp_scene_video)
                                         if clips_to_close is not None: clips_to_close.append(clip)
                                         if clip.size != target_size: clip = clip.resized(target_size)
+                                        scene_spec = {'kind': 'file', 'path': temp_scene_video}
                                         is_fast_success = True
                                     else:
                                         logger.log(f"    ⚠️ Falló FastAssembly. Reintentando con renderizado estándar.")
@@ -1729,43 +1493,50 @@ def generate_video_avgl(project):
                                     end_time=getattr(asset, 'end_time', None),
                                     video_volume=v_vol
                                 )
+                                scene_spec = {
+                                    'kind': 'video', 'video_path': asset_path, 'overlay_path': overlay_path, 'fit': asset.fit,
+                                    'start_time': sync_start_time + safe_float(getattr(asset, 'start_time', 0.0), 0.0),
+                                    'end_time': getattr(asset, 'end_time', None)
+                                }
                         else:
                             # Apply Ken Burns (Standard image logic)
-                            clip = apply_ken_burns(
-                                asset_path, duration, target_size,
+                            kb_params = dict(
                                 zoom=eff_zoom,
                                 move=eff_move,
                                 overlay_path=overlay_path,
-                                overlay_clip=current_overlay_clip, 
                                 fit=asset.fit,
                                 shake=eff_shake,
                                 shake_intensity=eff_shake_intensity,
                                 rotate=eff_rotate,
                                 w_rotate=getattr(asset, 'w_rotate', None),
-                                clips_to_close=clips_to_close,
                                 project_settings=getattr(script, 'settings', {}),
                                 human_noise_enabled=getattr(asset, 'human_signature', None),
                                 human_noise_intensity=getattr(asset, 'human_amplitude', 1.0)
                             )
+                            clip = apply_ken_burns(
+                                asset_path, duration, target_size,
+                                overlay_clip=current_overlay_clip,
+                                clips_to_close=clips_to_close,
+                                fps=profile['fps'],
+                                **kb_params
+                            )
+                            scene_spec = dict(kb_params, kind='ken_burns', image_path=asset_path)
                 else:
                     # v8.6: FAST AUDIO TEST MODE
                     # Use ColorClip for maximum speed when user explicitly omits assets (for audio testing)
                     logger.log(f"  🔇 Modo Solo Audio/Debug: Sin assets. Fondo negro rápido.")
                     clip = ColorClip(size=target_size, color=(0,0,0), duration=duration)
+                    scene_spec = {'kind': 'color'}
 
                 # 2. SFX Processing (New)
                 scene_sfx_clips = []
                 if scene.sfx:
                     sfx_dir = os.path.join(settings.MEDIA_ROOT, 'sfx')
                     for sfx_item in scene.sfx:
-                        sfx_path = os.path.join(sfx_dir, sfx_item.type)
                         # Tolerance for extension
-                        if not os.path.exists(sfx_path):
-                            for ext in ['.mp3', '.wav', '.m4a']:
-                                if os.path.exists(sfx_path + ext):
-                                    sfx_path += ext; break
+                        sfx_path = resolve_sfx(sfx_item.type, sfx_dir)
                         
-                        if os.path.exists(sfx_path):
+                        if sfx_path:
                             try:
                                 # v15.7: Force float cast to prevent numpy ufunc error (dtype <U3)
                                 vol_safe = float(sfx_item.volume)
@@ -1813,153 +1584,31 @@ def generate_video_avgl(project):
                     if hasattr(scene, 'subtitles') and scene.subtitles:
                         # v17.2.1: CRITICAL FIX - Use full duration (voice + pause) for timing
                         # Previously used only voice_duration, causing subtitle desync with scene pauses
-                        timing_base = duration  # duration already = voice_duration + scene.pause (line 781)
-                        # v16.7.12: Unified Word Count (Clean text to match TTS output)
-                        # v16.7.23: Professional subtitle standards (Netflix/HBO)
-                        MIN_READING_SPEED = 2.6  # palabras/segundo (estándar profesional)
-                        MIN_SUBTITLE_DURATION = 1.0  # segundos
-                        MAX_SUBTITLE_DURATION = 7.0  # segundos
-                        
-                        clean_scene_text = re.sub(r'\[.*?\]', '', scene.text)
-                        total_words_scene = len(clean_scene_text.split())
+                        # v32.20: Windows compiled by the timeline (recomputed only if the real duration differs)
+                        if t_entry:
+                            sub_windows = t_entry.subtitle_windows(duration)
+                        else:
+                            sub_windows = [subtitle_window(sub, getattr(scene, 'word_timings', None), duration, scene_word_count(scene))
+                                           for sub in scene.subtitles]
                         
                         for idx, sub_data in enumerate(scene.subtitles):
-                            s_text = sub_data.get('text', '')
-                            s_offset = sub_data.get('offset', 0)
-                            s_w_count = sub_data.get('word_count', 4)
-                            phonetic_count = sub_data.get('phonetic_count', s_w_count)  # v17.0: Phonetic mapping
-                            is_highlight = sub_data.get('is_highlight', False)           # v17.0: Highlight mode
-                            global_y_pos = getattr(project, 'subtitles_y_position', 0.70)
-                            raw_y_pos = sub_data.get('y_position', global_y_pos)
-                            try:
-                                y_pos = float(raw_y_pos)
-                            except (TypeError, ValueError):
-                                y_pos = 0.70
-                            is_dynamic = sub_data.get('is_dynamic', False)
-                            is_movie_mode = sub_data.get('movie_mode', False)
-                            
                             # v26.0: Collect for Post-Injection (Absolute Timing)
                             # Timing must be: Global Cursor (completed blocks) + Block Cursor (previous scenes in current block) + local timing
                             s_start_global_base = video_base_cursor + block_cursor
                             
-                            if not s_text or s_w_count < 0: continue
-                            
-                            # v17.0: Enhanced timing logic with phonetic consolidation
-                            relevant_timings = None
-                            consolidated_timing = None
-                            
-                            # v18.9: Support word timings for ALL subtitles (Dynamic or Static) if available
-                            if hasattr(scene, 'word_timings') and scene.word_timings:
-                                # Extract timings using phonetic_count (not word_count)
-                                relevant_timings = scene.word_timings[s_offset : s_offset + phonetic_count]
-                                
-                                # v17.0: Consolidate if phonetic words > display words
-                                if phonetic_count > s_w_count and len(relevant_timings) > 0:
-                                    # Multiple phonetic words → Single display text
-                                    consolidated_timing = {
-                                        'word': s_text,
-                                        'start': relevant_timings[0]['start'],
-                                        'end': relevant_timings[-1]['end']
-                                    }
-                                    s_start = consolidated_timing['start']
-                                    s_dur = consolidated_timing['end'] - s_start
-                                    logger.log(f"      [PHO] Consolidated {phonetic_count}p → 1d: \"{s_text}\" ({s_dur:.2f}s)")
-                                elif len(relevant_timings) > 0:
-                                    # v18.9: Perfect sync for static/header subs using phonetic_count
-                                    s_start = relevant_timings[0]['start']
-                                    s_dur = relevant_timings[-1]['end'] - s_start
-                                    
-                                    # v17.2.8: Advance highlight clips by 200ms
-                                    if is_highlight:
-                                        s_start = max(0, s_start - 0.20)
-                                else:
-                                    # Fallback if slice resulted in empty timings
-                                    s_start = 0
-                                    s_dur = 1.5
-                            else:
-                                # Fallback: distribución uniforme con mínimo legible
-                                s_start = (s_offset / total_words_scene) * timing_base if total_words_scene > 0 else 0
-                                
-                                # Calcular duración proporcional usando phonetic_count
-                                proportional_dur = (phonetic_count / total_words_scene) * timing_base if total_words_scene > 0 else 1.5
-                                
-                                # Calcular duración mínima legible basada en estándar profesional
-                                min_legible_dur = s_w_count / MIN_READING_SPEED
-                                
-                                # Usar el mayor entre proporcional y mínimo legible
-                                s_dur = max(proportional_dur, min_legible_dur)
-                                
-                                # Aplicar límites min/max
-                                s_dur = max(MIN_SUBTITLE_DURATION, min(MAX_SUBTITLE_DURATION, s_dur))
-                            
-                            s_start = min(s_start, duration - 0.1)
-                            s_dur = max(0.1, min(s_dur, duration - s_start))
+                            window = sub_windows[idx]
+                            if window is None: continue
                             
-                            # Alignment logic (SRT tags: {\an8} Top, {\an2} Bottom)
-                            align_tag = "{\\an8}" if y_pos < 0.6 else "{\\an2}"
+                            # v17.0: Enhanced timing logic with phonetic consolidation (see timeline.subtitle_window)
+                            if window.consolidated:
+                                phonetic_count = sub_data.get('phonetic_count', sub_data.get('word_count', 4))
+                                logger.log(f"      [PHO] Consolidated {phonetic_count}p → 1d: \"{sub_data.get('text', '')}\" ({window.duration:.2f}s)")
                             
-                            # v26.1: Populate all_srt_items (now used for ASS) with full metadata
-                            
-                            # v26.9: Karaoke Phonetic -> Visual Mapping
-                            # Fixes issue where [DYN] shows TTS phonetic text instead of visual text.
-                            final_timings = relevant_timings
-                            if is_dynamic and relevant_timings:
-                                v_words = s_text.split()
-                                p_words = relevant_timings
-                                
-                                if len(v_words) == len(p_words):
-                                    # 1:1 Match - Perfect Swap
-                                    final_timings = []
-                                    for i, w_obj in enumerate(p_words):
-                                        new_obj = w_obj.copy()
-                                        new_obj['word'] = v_words[i]
-                                        final_timings.append(new_obj)
-                                else:
-                                    # Mismatch - Proportional Distribution (Fallback)
-                                    # Example: [PHO]veintidos|22[/PHO] -> 1 visual, 1 phonetic ("veintidos")
-                                    # Example: [PHO]veintidos de enero|22/01[/PHO] -> 1 visual, 3 phonetic
-                                    logger.log(f"      [DYN] Mismatch: {len(v_words)}v vs {len(p_words)}p. Remapping...")
-                                    
-                                    start_t = p_words[0]['start']
-                                    end_t = p_words[-1]['end']
-                                    total_dur = end_t - start_t
-                                    total_chars = sum(len(w) for w in v_words)
-                                    if total_chars == 0: total_chars = 1 # Safety
-                                    
-                                    final_timings = []
-                                    curr_t = start_t
-                                    for w in v_words:
-                                        # Calculate duration based on character length ratio
-                                        w_dur = (len(w) / total_chars) * total_dur
-                                        final_timings.append({
-                                            'word': w,
-                                            'start': curr_t,
-                                            'end': curr_t + w_dur
-                                        })
-                                        curr_t += w_dur
-                            
-                            # v26.11: GLOBAL KARAOKE COMPENSATOR
-                            # "Audio Ferrari" Fix: Shift all visuals -80ms to catch up with audio.
-                            # This covers system latency and MP3 start gaps.
-                            if is_dynamic and final_timings:
-                                sync_offset = -0.08
-                                for wt in final_timings:
-                                    wt['start'] = max(0.0, wt['start'] + sync_offset)
-                                    wt['end'] = max(0.0, wt['end'] + sync_offset)
-                                
-                                # Update S_START to match new timings (Critical!)
-                                if final_timings:
-                                    s_start = final_timings[0]['start']
-                                    s_dur = final_timings[-1]['end'] - s_start
-
-                            metadata = {
-                                'text': s_text,
-                                'start': s_start_global_base + s_start,
-                                'end': s_start_global_base + s_start + s_dur,
-                                'is_dynamic': is_dynamic,
-                                'y_pos': y_pos,
-                                'relevant_timings': final_timings if is_dynamic else None
-                            }
+                            # v26.1 / v26.9 / v26.11: ASS event (karaoke remap + sync compensation), see timeline.subtitle_item
+                            # v32.24: Shared with the frame API, which must draw exactly what the render burns
+                            metadata = subtitle_item(sub_data, window, getattr(project, 'subtitles_y_position', 0.70), log=logger.log)
+                            metadata['start'] += s_start_global_base
+                            metadata['end'] += s_start_global_base
                             all_srt_items.append(metadata)
                             
                             # v26.12: PERFORMANCE BOOST
@@ -1995,6 +1644,7 @@ def generate_video_avgl(project):
                     clip = clip.without_audio()
 
                 block_scene_clips.append(clip)
+                segment_specs.append(dict(scene_spec, duration=clip.duration) if scene_spec else None)
                 
                 # Timestamps
                 m, s = divmod(int(current_time), 60)
@@ -2090,64 +1740,13 @@ def generate_video_avgl(project):
                         
                         logger.log(f"  [Audio] Ducking Inline Bloque {b_idx+1}: {len(local_merged)} intervalos, vol={peak_vol}, ratio={_duck_ratio}")
                         
-                        # Simple ducking function (block-local, no external references)
-                        def make_block_ducking(intervals, vol, dr, att, rel, block_dur):
-                            """Factory function to avoid closure issues."""
-                            def apply_ducking(get_frame, t):
-                                audio = get_frame(t)
-                                if isinstance(t, np.ndarray):
-                                    factors = np.full(t.shape, float(vol))
-                                    for vs, ve in intervals:
-                                        # Attack
-                                        m = (t >= (vs - att)) & (t < vs)
-                                        if np.any(m):
-                                            p = (t[m] - (vs - att)) / att
-                                            factors[m] = np.minimum(factors[m], vol * (1.0 - p * (1.0 - dr)))
-                                        # Ducked
-                                        factors[(t >= vs) & (t <= ve)] = vol * dr
-                                        # Release
-                                        m = (t > ve) & (t <= (ve + rel))
-                                        if np.any(m):
-                                            p = (t[m] - ve) / rel
-                                            factors[m] = np.minimum(factors[m], vol * (dr + p * (1.0 - dr)))
-                                    
-                                    # Block fade-in and fade-out based on settings
-                                    if _block_fade > 0:
-                                        factors[t < _block_fade] *= (t[t < _block_fade] / _block_fade)
-                                        m_out = t > (block_dur - _early_finish - _block_fade)
-                                        if np.any(m_out):
-                                            # Smooth transition to 0 at the very end
-                                            p_out = (block_dur - _early_finish - t[m_out]) / _block_fade
-                                            factors[m_out] *= np.maximum(0, np.minimum(1, p_out))
-                                        
-                                        # Force silence during early finish
-                                        factors[t > (block_dur - _early_finish)] = 0.0
-                                    
-                                    return audio * factors[:, None]
-                                else:
-                                    factor = float(vol)
-                                    for vs, ve in intervals:
-                                        if vs <= t <= ve:
-                                            factor = vol * dr; break
-                                        elif (vs - att) <= t < vs:
-                                            p = (t - (vs - att)) / att
-                                            factor = min(factor, vol * (1.0 - p * (1.0 - dr)))
-                                        elif ve < t <= (ve + rel):
-                                            p = (t - ve) / rel
-                                            factor = min(factor, vol * (dr + p * (1.0 - dr)))
-                                    # Scalar fade-in/fade-out
-                                    if _block_fade > 0:
-                                        if t < _block_fade: factor *= (t / _block_fade)
-                                        if t > (block_dur - _early_finish - _block_fade):
-                                            p_out = (block_dur - _early_finish - t) / _block_fade
-                                            factor *= max(0, min(1, p_out))
-                                        if t > (block_dur - _early_finish):
-                                            factor = 0.0
-                                    return audio * factor
-                            return apply_ducking
-                        
-                        ducking_fn = make_block_ducking(local_merged, peak_vol, _duck_ratio, _attack, _release, block_video.duration)
-                        bg_ducked = bg_looped.transform(ducking_fn)
+                        # v32.8: Gain curve rendered once (audio_envelope.py); per chunk it is a lookup + multiply
+                        from .audio_envelope import block_ducking_envelope
+                        ducking_env = block_ducking_envelope(
+                            block_video.duration, local_merged, peak_vol, _duck_ratio, _attack, _release,
+                            _block_fade, _early_finish
+                        )
+                        bg_ducked = bg_looped.transform(ducking_env.apply)
                         
                         # v19.2: Direct mix (same approach as original engine - fast)
                         block_video = block_video.with_audio(CompositeAudioClip([block_video.audio, bg_ducked]))
@@ -2173,8 +1772,14 @@ def generate_video_avgl(project):
 
         if not block_clips: raise Exception("No block clips generated")
 
+        if prefetcher:
+            prefetcher.shutdown()
+
         # 4. Final Export
         final_video = concatenate_videoclips(block_clips, method="chain")
+        # v32.9: Dialogue tree (everything but the global music) and music beds for the offline mixdown
+        dialogue_audio = final_video.audio
+        music_beds = []
         
         # ═══════════════════════════════════════════════════════════════════
         # GLOBAL MUSIC PROCESSING (Continuous)
@@ -2224,8 +1829,14 @@ def generate_video_avgl(project):
                 elif global_music_name:
                     # Try media-relative path as last resort
                     potential_path = os.path.join(settings.MEDIA_ROOT, global_music_name)
+                    # v32.14: Fuzzy file-name fallback (music library, then assets) via the filename index
+                    if not os.path.exists(potential_path):
+                        potential_path = resolve_asset(search_name, [os.path.join(settings.MEDIA_ROOT, 'music'), assets_dir],
+                                                       extensions=['.mp3', '.wav', '.m4a'],
+                                                       deep_dirs=[os.path.join(settings.MEDIA_ROOT, 'music')]) or \
+                                         resolve_asset(name_no_ext, (), deep_dirs=[os.path.join(settings.MEDIA_ROOT, 'music')]) or potential_path
                     if os.path.exists(potential_path):
-                        logger.log(f"🎵 Aplicando Música Global (Media): {os.path.basename(global_music_name)}")
+                        logger.log(f"🎵 Aplicando Música Global (Media): {os.path.basename(potential_path)}")
                         bg_audio = AudioFileClip(potential_path)
                         clips_to_close.append(bg_audio)
                 else:
@@ -2286,96 +1897,21 @@ def generate_video_avgl(project):
                     logger.log(f"    [Audio] Block Time Ranges: {block_time_ranges}")
                     logger.log(f"    [Audio] Mute Intervals: {mute_intervals}")
                     logger.log(f"    [Audio] Default Vol: {default_vol}")
+                    # v32.8: Whole music gain curve rendered once at a 1 kHz control rate
+                    # (ducking + block fades + early finish + block volumes + local-music mutes).
+                    from .audio_envelope import global_ducking_envelope
+                    env_start = time.time()
+                    global_env = global_ducking_envelope(
+                        final_video.duration, merged_global_intervals, duck_ratio, attack_t, release_t,
+                        block_time_ranges, default_vol, block_fade_t, early_finish_t, mute_intervals
+                    )
+                    logger.log(f"    [Audio] Envolvente de ganancia: {len(global_env.values)} puntos en {(time.time() - env_start) * 1000:.1f} ms")
                     # Probe: Check ducking factor at a few key points
                     test_times = [5.0, 10.0, 20.0, 30.0, 40.0, 50.0, 60.0]
                     for tt in test_times:
                         if tt < final_video.duration:
-                            # Simple scalar test
-                            factor = 1.0
-                            for v_start, v_end in merged_global_intervals:
-                                if v_start <= tt <= v_end: factor = duck_ratio; break
-                            logger.log(f"    [Audio] PROBE t={tt:.1f}s -> factor={factor:.3f} (ducked={factor < 1.0})")
-
-                    def get_ducking_factor(t, peak_vol_val, current_intervals, time_offset=0.0):
-                        if isinstance(t, np.ndarray):
-                            factors = np.ones_like(t, dtype=float)
-                            for v_start, v_end in current_intervals:
-                                # 1. Attack (Fade Down)
-                                m_out = (t >= (v_start - attack_t)) & (t < v_start)
-                                if np.any(m_out):
-                                    p = (t[m_out] - (v_start - attack_t)) / attack_t
-                                    factors[m_out] = np.minimum(factors[m_out], 1.0 - (p * (1.0 - duck_ratio)))
-                                
-                                # 2. Release (Fade Up)
-                                m_in = (t > v_end) & (t <= (v_end + release_t))
-                                if np.any(m_in):
-                                    p = (t[m_in] - v_end) / release_t
-                                    factors[m_in] = np.minimum(factors[m_in], duck_ratio + (p * (1.0 - duck_ratio)))
-
-                                # 3. SILENCE PRIORITY (v4.8.5): Force duck_ratio if voice is active
-                                # This prevents Attack logic from 'lifting' volume during voice
-                                factors[(t >= v_start) & (t <= v_end)] = duck_ratio
-                            
-                            # v20.2: Master Console Fade/Finish Integration (Vectorized)
-                            # (Values already captured as block_fade_t and early_finish_t)
-                            if block_fade_t > 0:
-                                t_abs = t + time_offset
-                                for b_start, b_end, b_vol in block_time_ranges:
-                                    # Fade In
-                                    m_fade_in = (t_abs >= b_start) & (t_abs <= (b_start + block_fade_t))
-                                    if np.any(m_fade_in):
-                                        p = (t_abs[m_fade_in] - b_start) / block_fade_t
-                                        factors[m_fade_in] *= p
-                                    
-                                    # Finish Early: Silence during the last 1s of the block
-                                    m_silent = (t_abs > (b_end - early_finish_t)) & (t_abs <= b_end)
-                                    if np.any(m_silent):
-                                        factors[m_silent] = 0.0
-                                    
-                                    # Fade Out: Transition to silence before the early finish
-                                    m_fade_out = (t_abs >= (b_end - early_finish_t - block_fade_t)) & (t_abs <= (b_end - early_finish_t))
-                                    if np.any(m_fade_out):
-                                        p = (b_end - early_finish_t - t_abs[m_fade_out]) / block_fade_t
-                                        factors[m_fade_out] *= np.maximum(0, np.minimum(1, p))
-
-                            if t.size == 0: return np.zeros((0, 1))
-                            return (float(peak_vol_val) * factors)[:, None]
-                        else:
-                            factor = 1.0
-                            for v_start, v_end in current_intervals:
-                                # 1. Attack (Fade Down)
-                                if (v_start - attack_t) <= t < v_start:
-                                    p = (t - (v_start - attack_t)) / attack_t
-                                    factor = min(factor, 1.0 - (p * (1.0 - duck_ratio)))
-                                
-                                # 2. Release (Fade Up)
-                                if v_end < t <= (v_end + release_t):
-                                    p = (t - v_end) / release_t
-                                    factor = min(factor, duck_ratio + (p * (1.0 - duck_ratio)))
-                                
-                                # 3. SILENCE PRIORITY (v4.8.6): Absolute drop if voice is active
-                                if v_start <= t <= v_end:
-                                    factor = duck_ratio
-                            
-                            # v20.2: Master Console Fade/Finish Integration (Scalar)
-                            # (Values already captured as block_fade_t and early_finish_t)
-                            if block_fade_t > 0:
-                                t_abs = t + time_offset
-                                for b_start, b_end, b_vol in block_time_ranges:
-                                    # Fade In at start of block
-                                    if b_start <= t_abs <= (b_start + block_fade_t):
-                                        p_in = (t_abs - b_start) / block_fade_t
-                                        factor *= p_in
-                                    
-                                    # Finish Early Logic: Volume is 0 during the last 1 second of the block
-                                    if t_abs > (b_end - early_finish_t):
-                                        factor = 0.0
-                                    # Fade Out Early: Smooth transition to 0 before the early finish
-                                    elif (b_end - early_finish_t - block_fade_t) <= t_abs <= (b_end - early_finish_t):
-                                        p_out = (b_end - early_finish_t - t_abs) / block_fade_t
-                                        factor *= max(0, min(1, p_out))
-                                        
-                            return float(peak_vol_val * factor)
+                            factor = global_env.gains(tt)
+                            logger.log(f"    [Audio] PROBE t={tt:.1f}s -> gain={factor:.3f}")
 
                     # --- LOCAL MUSIC DUCKING ---
                     # v19.0: Moved to inline block construction (see "INLINE BLOCK DUCKING" above)
@@ -2383,24 +1919,8 @@ def generate_video_avgl(project):
 
                     # --- APPLY TO GLOBAL MUSIC ---
                     if bg_audio_looped:
-                        def volume_ducking_global(t):
-                            if isinstance(t, np.ndarray):
-                                base_vols = np.full(t.shape, float(default_vol))
-                                for b_start, b_end, b_vol in block_time_ranges:
-                                    mask = (t >= b_start) & (t <= b_end)
-                                    base_vols[mask] = b_vol
-                                factors = get_ducking_factor(t, 1.0, merged_global_intervals)
-                                for ms, me in mute_intervals: factors[(t >= ms) & (t <= me)] = 0.0
-                                return (base_vols[:, None] * factors)
-                            else:
-                                cur_peak = default_vol
-                                for b_start, b_end, b_vol in block_time_ranges:
-                                    if b_start <= t <= b_end: cur_peak = b_vol; break
-                                for ms, me in mute_intervals:
-                                    if ms <= t <= me: return 0.0
-                                return get_ducking_factor(t, cur_peak, merged_global_intervals)
-
-                        bg_audio_final = bg_audio_looped.transform(lambda get_f, t: get_f(t) * volume_ducking_global(t))
+                        bg_audio_final = bg_audio_looped.transform(global_env.apply)
+                        music_beds.append((bg_audio.filename, global_env))
                         audio_sources = [final_video.audio] if final_video.audio else []
                         if bg_audio_final: audio_sources.append(bg_audio_final)
                         if audio_sources:
@@ -2417,31 +1937,42 @@ def generate_video_avgl(project):
             width, height = target_size # Ensure width/height are defined for logging
             logger.log(f"🎬 Iniciando renderizado final ({width}x{height})...")
             
-            output_filename = f"video_{project.id}_{int(time.time())}.mp4"
+            draft_suffix = "_draft" if profile['name'] == 'draft' else ""
+            output_filename = f"video_{project.id}_{int(time.time())}{draft_suffix}.mp4"
             output_path = os.path.join(settings.MEDIA_ROOT, 'videos', output_filename)
             os.makedirs(os.path.dirname(output_path), exist_ok=True)
             
             # v5.18: Reverted Auto-GPU - Reverting as per Architect's preference.
             # Respect the manual selector (CPU is sometimes faster on specific hardware).
             use_gpu = (project.render_mode == 'gpu')
+            use_segments = (project.render_mode == 'segments')
+            use_frames = (project.render_mode == 'frames')
             
             # v11.8: Stable rendering (Single Thread)
+            # v32.22: fps / preset / CRF come from the render profile
+            from .render_profiles import encoder_params
             render_params = {
-                'fps': 30, 
+                'fps': profile['fps'], 
                 'codec': 'libx264', 
                 'audio_codec': 'aac', 
-                'preset': 'ultrafast', 
+                'preset': profile['preset'], 
                 'threads': 1  # Revertido v26.12: 16 threads causa severa contención de CPU en MoviePy
             }
+            profile_ffmpeg_params = encoder_params(profile)
             
             if use_gpu:
                 logger.log("[HW] MODO RENDER: GPU Acelerado (NVENC)")
+                profile_ffmpeg_params = []  # CRF is an x264 option
                 render_params.update({
                     'codec': 'h264_nvenc', 
                     'bitrate': '5000k',
                     'preset': 'p1',  # Correct preset for NVENC (p1=fastest, p7=slowest/best)
                     'threads': None  # NVENC handles its own threads better
                 })
+            elif use_segments:
+                logger.log("[HW] MODO RENDER: Segmentos Paralelos (libx264 por escena + ensamblado por copia)")
+            elif use_frames:
+                logger.log("[HW] MODO RENDER: Servidor de Fotogramas (N procesos + memoria compartida -> 1 encoder)")
             else:
                 cpu_threads = render_params.get('threads', 1)
                 logger.log(f"[HW] MODO RENDER: CPU Standard (libx264) - {cpu_threads} Threads")
@@ -2466,11 +1997,10 @@ def generate_video_avgl(project):
             set_progress(20)  # v19.2: Render starts at 20% (prep = 0-20%, render = 20-95%)
 
             # v13.0: Custom Cache Logger (Terminology Sync)
-            cache_logger = CacheProgressBarLogger(project.id)
+            cache_logger = CacheProgressBarLogger(project.id, cancel_token=cancel_token)
 
             # v20.8: Final Cancellation Check before Rendering
-            project.refresh_from_db()
-            if project.status == 'cancelled':
+            if cancel_token.is_cancelled():
                 logger.log("🛑 [Engine] Renderizado cancelado ANTES de iniciar escritura de archivo. Abortando.")
                 for c in clips_to_close: 
                     try: c.close()
@@ -2480,130 +2010,117 @@ def generate_video_avgl(project):
             # v4.1: Implementation of "Hash Jitter" (Uniqueness Safeguard)
             jitter_id = f"aj-{uuid.uuid4().hex[:8]}"
 
-            final_video.write_videofile(
-                output_path, 
-                ffmpeg_params=[
+            # ═══════════════════════════════════════════════════════════════════
+            # v32.2 SINGLE-PASS SUBTITLES
+            # The ASS is compiled BEFORE the encode and burned inside the one and only
+            # encode (no second decode/re-encode, no 120s timeout, no _final.mp4 rename).
+            # Drafts can skip burn-in entirely with settings.soft_subtitles (embedded track).
+            # v32.22: The draft profile always does (the ASS PlayRes scales to any frame size).
+            # ═══════════════════════════════════════════════════════════════════
+            ass_path = None
+            soft_subtitles = profile['soft_subtitles'] or bool((getattr(script, 'settings', None) or {}).get('soft_subtitles', False))
+            if all_srt_items:
+                ass_path = output_path.replace('.mp4', '.ass')
+                if compile_full_script_ass(all_srt_items, ass_path):
+                    mode_txt = "pista embebida (soft)" if soft_subtitles else "quemados en el encode principal"
+                    logger.log(f"🎬 Subtítulos ASS compilados ({len(all_srt_items)} eventos) -> {mode_txt}")
+                else:
+                    logger.log("⚠️ Error compilando ASS. Se renderiza sin subtítulos.")
+                    ass_path = None
+            burn_subtitles = bool(ass_path) and not soft_subtitles
+
+            # ═══════════════════════════════════════════════════════════════════
+            # v32.9 OFFLINE SOUNDTRACK MIXDOWN
+            # The whole soundtrack is rendered to one WAV stem here, so the encoders only
+            # mux it (no lazy audio tree pulled between video frames, readers closed early).
+            # ═══════════════════════════════════════════════════════════════════
+            audio_stem = None
+            cancel_token.raise_if_cancelled()
+            if getattr(settings, 'AUDIO_MIXDOWN_ENABLED', True) and final_video.audio is not None:
+                from .audio_mixdown import mixdown_soundtrack
+                audio_stem = mixdown_soundtrack(
+                    dialogue_audio, final_video.duration, output_path.replace('.mp4', '_mix.wav'),
+                    beds=music_beds, log=logger.log
+                )
+                if audio_stem:
+                    stem_clip = AudioFileClip(audio_stem)
+                    final_video = final_video.with_audio(stem_clip)
+                    # Voice/SFX/music readers are no longer needed by any encoder
+                    for c in clips_to_close:
+                        if isinstance(c, AudioFileClip):
+                            try: c.close()
+                            except: pass
+                    clips_to_close.append(stem_clip)
+
+            # v32.0: Parallel Segment Mode (falls back to the single encode on any failure)
+            segments_ok = False
+            if use_segments:
+                from .segment_renderer import render_video_in_segments
+                segments_ok = render_video_in_segments(
+                    final_video, segment_specs, output_path, target_size, project.id,
+                    log=logger.log, jitter_id=jitter_id, fps=render_params['fps'],
+                    subtitle_items=all_srt_items if burn_subtitles else None,
+                    audio_path=audio_stem, ffmpeg_params=profile_ffmpeg_params
+                )
+            elif use_frames:
+                # v32.7: Multi-process frame synthesis feeding one libx264 via a shared memory ring
+                from .frame_server import render_video_frame_server
+                segments_ok = render_video_frame_server(
+                    final_video, segment_specs, output_path, target_size, project.id,
+                    log=logger.log, jitter_id=jitter_id, fps=render_params['fps'],
+                    render_params=dict(render_params, ffmpeg_params=profile_ffmpeg_params), ass_path=ass_path if burn_subtitles else None,
+                    audio_path=audio_stem
+                )
+
+            # v32.16: A killed segment/frame-server render must not fall back to write_videofile
+            cancel_token.raise_if_cancelled()
+            if not segments_ok:
+                video_ffmpeg_params = [
                     "-pix_fmt", "yuv420p", 
                     "-movflags", "+faststart",
                     "-metadata", f"comment={jitter_id}"
-                ], 
-                logger=cache_logger, # v13.0: Real-time Item visibility
-                **render_params
-            )
+                ] + profile_ffmpeg_params
+                if burn_subtitles:
+                    from .subtitle_utils import ass_filter_arg
+                    video_ffmpeg_params += ["-vf", ass_filter_arg(ass_path)]
+
+                final_video.write_videofile(
+                    output_path, 
+                    audio=audio_stem or True,  # v32.9: Mux the stem directly
+                    ffmpeg_params=video_ffmpeg_params, 
+                    logger=cache_logger, # v13.0: Real-time Item visibility
+                    **render_params
+                )
+
+            if ass_path and soft_subtitles:
+                from .subtitle_utils import embed_soft_subtitles
+                if embed_soft_subtitles(output_path, ass_path, language=project.language):
+                    logger.log("✅ Subtítulos embebidos como pista seleccionable (sin quemar).")
+                else:
+                    logger.log("⚠️ No se pudo embeber la pista de subtítulos. El archivo .ass queda junto al video.")
             
             project.output_video.name = f"videos/{output_filename}"
             project.duration = float(final_video.duration)
             project.timestamps = "\n".join(timestamps_list)
-            # v26.6: Deferred completion until after subtitle injection (Wait for ASS burn-in)
             project.progress_total = 95.0
             project.save(update_fields=['output_video', 'duration', 'timestamps', 'progress_total'])
             
-            logger.log(f"✅ ¡Video base generado! ({output_path})")
+            logger.log(f"✅ ¡Video generado! ({output_path})")
             phase1_end = time.time()
-            logger.log(f"⏱️ FASE 1 (Video Base) Duración: {phase1_end - start_time:.2f}s")
-
-            # ═══════════════════════════════════════════════════════════════════
-            # v26.0 POST-INJECTION PHASE (THE YOUTUBE WAY)
-            # ═══════════════════════════════════════════════════════════════════
-            if all_srt_items:
-                # v20.8: Check cancellation before FFmpeg Subtitle Injection
-                project.refresh_from_db()
-                if project.status == 'cancelled':
-                    logger.log("🛑 [Engine] Renderizado cancelado antes de inyección de subtítulos. Abortando.")
-                    for c in clips_to_close: 
-                        try: c.close()
-                        except: pass
-                    return
-
-                # v4.1 cleanup: ensure jitter_id exists for double jitter
-                if 'jitter_id' not in locals():
-                    jitter_id = f"aj-{uuid.uuid4().hex[:8]}"
+            logger.log(f"⏱️ FASE 1 (Video + Subtítulos) Duración: {phase1_end - start_time:.2f}s")
 
-                logger.log("🎬 Iniciando Inyección Final de Subtítulos v26.1 (Format: ASS)...")
-                # v26.1: Use .ass instead of .srt for professional styling and position control
-                ass_path = output_path.replace('.mp4', '.ass')
-                final_output_path = output_path.replace('.mp4', '_final.mp4')
-                
-                # 1. Compile ASS (Professionally styled)
-                from .subtitle_utils import compile_full_script_ass
-                if compile_full_script_ass(all_srt_items, ass_path):
-                    # 2. FFmpeg Injection Command (Automated Binary Discovery)
-                    import subprocess
-                    import imageio_ffmpeg
-                    ff_exe = imageio_ffmpeg.get_ffmpeg_exe()
-                    
-                    # v26.4: HYBRID PATH STRATEGY (The Golden Mean)
-                    # We run FFmpeg anchored to BASE_DIR to ensure the relative ASS path (no colons!) works.
-                    # HOWEVER, we use ABSOLUTE paths for Input/Output to guarantee file discovery regardless of CWD.
-                    try:
-                        base_dir = str(settings.BASE_DIR)
-                        rel_ass_path = os.path.relpath(ass_path, base_dir).replace('\\', '/')
-                        # Input/Output remain Absolute for maximum reliability
-                        
-                        # v27.1: Re-apply GPU Acceleration for Subtitle Injection (The "P1" Fix)
-                        video_codec_params = ['-c:v', 'libx264', '-preset', 'ultrafast'] # CPU Default
-
-                        if project.render_mode == 'gpu':
-                             # NVENC P1 = Fastest possible encoding (Low Latency / High Perf)
-                             logger.log("  🚀 [GPU] Activando NVENC P1 para inyección de subtítulos.")
-                             video_codec_params = ['-c:v', 'h264_nvenc', '-preset', 'p1', '-b:v', '5M']
-
-                        ff_cmd = [
-                            ff_exe, '-y', '-i', output_path,
-                            '-vf', f"ass=filename='{rel_ass_path}'",
-                            *video_codec_params,
-                            '-c:a', 'copy',
-                            '-metadata', f"comment=aj-{uuid.uuid4().hex[:8]}", # Double Jitter for maximum safety
-                            final_output_path
-                        ]
-                        
-                        logger.log(f"🎬 Ejecutando FFmpeg (CWD: {base_dir}): {ff_cmd}")
-                        
-                        # V26.5: Robust Execution with Timeout & Stderr Capture
-                        try:
-                            # 120s timeout to prevent zombie processes
-                            result = subprocess.run(ff_cmd, check=True, capture_output=True, cwd=base_dir, timeout=120)
-                            
-                            # Reemplazo final Robusto (Anti-Lock)
-                            if os.path.exists(final_output_path):
-                                try:
-                                    if os.path.exists(output_path):
-                                        try: os.remove(output_path)
-                                        except OSError: pass # Try to rename anyway
-                                    
-                                    os.rename(final_output_path, output_path)
-                                    logger.log(f"✅ Fusión exitosa. Video final reemplazó al original: {output_path}")
-                                except OSError as lock_err:
-                                    logger.log(f"⚠️ LOCK DETECTADO: No se pudo sobrescribir {output_path}. Usando ruta alternativa.")
-                                    # CRITICAL: Return the new file to avoid serving the old one
-                                    output_path = final_output_path
-                                    # Update project model to point to the new file
-                                    # We use RELATIVE path for Django FileField
-                                    rel_new_path = f"videos/{os.path.basename(output_path)}"
-                                    project.output_video.name = rel_new_path
-                                    project.save(update_fields=['output_video'])
-                                    logger.log(f"⚠️ Proyecto actualizado a: {rel_new_path}")
-
-                            else:
-                                logger.log("⚠️ Error: El video finalizado no se generó (File missing).")
-
-                        except subprocess.CalledProcessError as e:
-                            logger.log(f"❌ Error FFmpeg (Exit {e.returncode}): {e.stderr.decode('utf-8', errors='replace')}")
-                            # Don't raise immediately, let the original video survive if burning fails?
-                            # No, burning is critical.
-                            raise e
-                        except subprocess.TimeoutExpired:
-                            logger.log("❌ Error: Tiempo de espera agotado en FFmpeg (120s).")
-                            raise
-
-                    except Exception as fe:
-                        logger.log(f"⚠️ Error en fusión FFmpeg: {fe}")
-                        # If burning fails, we still have the original video (output_path).
-                        # We proceed, but warn.
+            # v32.5: Decoded image reuse (this process; segment workers keep their own)
+            try:
+                from .image_cache import get_image_cache
+                ic = get_image_cache().stats()
+                logger.log(f"🖼️ [ImageCache] {ic['misses']} decodificaciones, {ic['hits']} reutilizadas, {ic['evictions']} expulsadas ({ic['size_mb']}/{ic['max_mb']} MB)")
+            except Exception:
+                pass
 
         project.progress_total = 100.0 # Ensure final progress is 100%
         # v26.5: output_path might have changed!
         # Ensure the final project status reflects the correct file if changed earlier
+        logger.flush(sync_db=True)  # v32.15: The page reloads on 'completed' and shows log_output
         project.status = 'completed'; project.save(update_fields=['status', 'progress_total'])
         
         # v27.0: AUTOMATED GARBAGE COLLECTION
@@ -2615,11 +2132,21 @@ def generate_video_avgl(project):
 
         play_finish_sound(success=True)
         phase2_end = time.time()
-        logger.log(f"⏱️ FASE 2 (Subtítulos) Duración: {phase2_end - phase1_end:.2f}s")
+        logger.log(f"⏱️ FASE 2 (Cierre) Duración: {phase2_end - phase1_end:.2f}s")
         logger.log(f"[Done] Exito en {phase2_end-start_time:.1f} segundos!")
 
+    except RenderCancelled:
+        # v32.16: Status is already 'cancelled' (stop_project); drop the partial outputs
+        logger.log("🛑 [Engine] Renderizado cancelado durante la codificación. Limpiando archivos parciales.")
+        for partial in [locals().get('output_path'), locals().get('ass_path')]:
+            if partial and os.path.exists(partial):
+                try: os.remove(partial)
+                except OSError: pass
+        play_finish_sound(success=False)
+        return None
     except Exception as e:
         logger.log(f"[FATAL] Error en renderizado: {e}")
+        logger.flush(sync_db=True)
         project.status = 'failed'; project.save(update_fields=['status'])
         play_finish_sound(success=False)
         raise e
@@ -2627,6 +2154,9 @@ def generate_video_avgl(project):
         # v12.5.3: Clear active project from global cache
         from django.core.cache import cache
         cache.delete("active_rendering_project_id")
+        cancel_token.stop()
+        if prefetcher:
+            prefetcher.shutdown()
         
         try:
             # v15.8: Explicit closure of all tracked resources
@@ -2651,6 +2181,14 @@ def generate_video_avgl(project):
         except Exception as e:
             logger.log(f"[Cleanup] Error fatal en cierre de clips: {e}")
             
+        # v32.15: Last buffered lines -> render log file + log_output
+        logger.close()
+
+        # v32.9: Mixdown stem (kept on demand to debug audio without re-rendering)
+        if locals().get('audio_stem') and not getattr(settings, 'AUDIO_MIXDOWN_KEEP_STEM', False):
+            try: os.remove(audio_stem)
+            except OSError: pass
+
         # v15.8: Retry loop for file deletion (Windows WinError 32 fix)
         if 'audio_files' in locals():
             for name, p in audio_files:
@@ -458,7 +458,7 @@ def delete_project(request, project_id):
     project = get_object_or_404(VideoProject, id=project_id)
     if request.method == 'POST':
         # 1. Stop if running
-        if project.status in ['processing', 'pending']:
+        if project.status in ['processing', 'pending', 'queued']:
              project.status = 'cancelled'
              project.save()
         
@@ -481,30 +481,46 @@ def start_project(request, project_id):
     project = get_object_or_404(VideoProject, id=project_id)
     
     if request.method == 'POST':
-        if project.status == 'processing':
+        if project.status in ('processing', 'queued'):
             messages.warning(request, "El proyecto ya se está procesando.")
         else:
             # v4.1: Sync YouTube auto-upload status from confirmation checkbox
             confirm_upload = request.POST.get('confirm_auto_upload') == 'on'
             project.auto_upload_youtube = confirm_upload
+            # v32.22: Render profile chosen per render (draft = fast low-resolution preview)
+            project.render_profile = 'draft' if request.POST.get('draft_render') == 'on' else 'final'
             
             # Reset logs/status
             from datetime import datetime
             now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            project.status = 'processing'
+            queued = getattr(settings, 'RENDER_QUEUE_ENABLED', True)
+            # v32.22: Queued until a worker starts it (run_render_job sets 'processing')
+            project.status = 'queued' if queued else 'processing'
             project.log_output = f"[{now}] 🚀 Iniciando generación manual (v3.3)..."
             if confirm_upload:
                 project.log_output += "\n[System] 🚩 Subida automática a YouTube ACTIVADA."
             else:
                 project.log_output += "\n[System] ⚪ Subida automática a YouTube DESACTIVADA por el usuario."
+            if project.render_profile == 'draft':
+                project.log_output += "\n[System] 📝 Render BORRADOR (baja resolución, sin subida a YouTube)."
             project.save()
             
-            # Start Thread
-            thread = threading.Thread(target=generate_video_process, args=(project,))
-            thread.daemon = True
-            thread.start()
-            
-            messages.success(request, "Generación iniciada.")
+            if queued:
+                # v32.17: Persistent queue, rendered by the render_worker process
+                from .render_queue import enqueue_render, ensure_render_consumer
+                enqueue_render(project, source='ui')
+                if ensure_render_consumer() == 'worker':
+                    messages.success(request, "Generación en cola.")
+                else:
+                    project.log_output += "\n[System] ⚠️ Sin worker de render: se renderiza dentro del servidor web."
+                    project.save(update_fields=['log_output'])
+                    messages.warning(request, "No se pudo iniciar el worker de render: la generación se ejecuta en el servidor web.")
+            else:
+                # Start Thread
+                thread = threading.Thread(target=generate_video_process, args=(project,))
+                thread.daemon = True
+                thread.start()
+                messages.success(request, "Generación iniciada.")
             
     return redirect('generator:project_detail', project_id=project.id)
 
@@ -564,10 +580,16 @@ def clone_project(request, project_id):
 def stop_project(request, project_id):
     project = get_object_or_404(VideoProject, id=project_id)
     if request.method == 'POST':
-        if project.status == 'processing' or project.status == 'pending':
+        if project.status in ('processing', 'pending', 'queued'):
             project.status = 'cancelled'
             project.log_output += "\n🛑 GENERACIÓN DETENIDA POR EL USUARIO."
             project.save()
+            # v32.16: Wakes the render watchdog (FFmpeg/pools are killed within a second)
+            from .cancellation import request_cancel
+            request_cancel(project.id)
+            # v32.17: Queued jobs never start
+            from .render_queue import cancel_jobs
+            cancel_jobs(project.id)
             messages.info(request, "Generación cancelada. El proceso se detendrá en el próximo paso seguro.")
     return redirect('generator:project_detail', project_id=project.id)
 
@@ -947,6 +969,7 @@ def create_project_from_editor(request):
             music_volume=float(settings.get('music_volume', 0.15)),
             auto_upload_youtube=bool(settings.get('auto_upload', False)),
             render_mode=settings.get('render_mode') or script.get('render_mode', 'cpu'),
+            render_profile='draft' if (settings.get('render_profile') or data.get('profile')) == 'draft' else 'final',
             dynamic_subtitles=bool(settings.get('dynamic_subtitles', False)),
             # v20.2: Audio Master Console
             audio_ducking_ratio=settings.get('audio_ducking_ratio'),
@@ -978,7 +1001,15 @@ def create_project_from_editor(request):
                 project.background_music = m
                 project.save()
         
-        return JsonResponse({'status': 'created', 'project_id': project.id})
+        response = {'status': 'created', 'project_id': project.id}
+        if data.get('enqueue'):
+            # v32.17: Create-and-render in one call (goes straight to the render queue)
+            from .render_queue import enqueue_render, ensure_render_consumer
+            project.status = 'queued'
+            project.save(update_fields=['status'])
+            job = enqueue_render(project, priority=int(data.get('priority', 0) or 0), source='editor')
+            response.update(status='queued', job_id=job.id, consumer=ensure_render_consumer())
+        return JsonResponse(response)
         
     except Exception as e:
         import logging
@@ -1153,6 +1184,7 @@ def get_project_script_json(request, project_id):
         'voice_id': project.voice_id,
         'aspect_ratio': project.aspect_ratio,
         'render_mode': project.render_mode,
+        'render_profile': project.render_profile,
         'music_volume_lock': project.music_volume_lock,
         'dynamic_subtitles': project.dynamic_subtitles,
         'subtitles_y_position': getattr(project, 'subtitles_y_position', 0.70),
@@ -1332,6 +1364,10 @@ def save_project_script_json(request, project_id):
             if 'render_mode' in settings_data:
                 project.render_mode = settings_data['render_mode']
 
+            # Render Profile (v32.22)
+            if settings_data.get('render_profile') in ('draft', 'final'):
+                project.render_profile = settings_data['render_profile']
+
             # Music Volume Lock (v8.7)
             if 'music_volume_lock' in settings_data:
                 project.music_volume_lock = bool(settings_data['music_volume_lock'])
@@ -1422,11 +1458,10 @@ def view_logs(request):
     
     if os.path.exists(log_file):
         try:
-            with open(log_file, 'r', encoding='utf-8', errors='replace') as f:
-                # Read last 500 lines
-                lines = f.readlines()
-                logs = lines[-500:]
-                logs.reverse() # Show newest first
+            # v32.15: Read last 500 lines seeking from the end (app.log grows without bound)
+            from .utils import tail_file
+            logs = tail_file(log_file, 500)
+            logs.reverse() # Show newest first
         except Exception as e:
             logs = [f"Error leyendo el archivo de logs: {e}"]
     else:
@@ -1643,7 +1678,12 @@ def open_file_folder(request):
 # ═══════════════════════════════════════════════════════════════════
 
 def get_project_status(request, project_id):
-    """Returns JSON with current status, progress and log tailored for polling."""
+    """
+    Returns JSON with current status, progress and log tailored for polling.
+    v32.15: ?cursor=<n> returns only the render-log lines written after byte offset n
+    ('log' = new lines, 'cursor' = offset for the next poll, 'live' = current status line).
+    Without cursor the whole log is returned as before.
+    """
     try:
         project = VideoProject.objects.get(id=project_id)
         
@@ -1655,21 +1695,274 @@ def get_project_status(request, project_id):
         final_progress = project.progress
         if cached_progress is not None:
             final_progress = float(cached_progress)
-            
-        log_content = getattr(project, 'log_output', '')
         if cached_status:
             # v12.5.2: Terminal Visibility (User Request)
             print(f"[Polling] Project {project_id} | {cached_status}")
-            log_content += f"\n[Live] {cached_status}"
-            
-        return JsonResponse({
+
+        from .utils import read_project_log
+        raw_cursor = request.GET.get('cursor')
+        try:
+            cursor = max(0, int(raw_cursor)) if raw_cursor is not None else 0
+        except ValueError:
+            cursor = 0
+        log_content, new_cursor = (None, cursor)
+        if project.status == 'processing':
+            log_content, new_cursor = read_project_log(project_id, cursor)
+        if log_content is None:
+            # No render log (old project / finished render): the DB copy, served whole
+            log_content = getattr(project, 'log_output', '') or ''
+            new_cursor = None
+
+        if project.status in ('queued', 'processing') and not cached_status:
+            # v32.17: Not rendering yet -> position in the render queue
+            from .render_queue import queue_position
+            position = queue_position(project_id)
+            if position:
+                cached_status = f"⏳ En cola: posición {position[0]} de {position[1]}"
+
+        response = {
             'status': project.status,
             'progress': final_progress,
-            'log': log_content
-        })
+            'log': log_content,
+            'cursor': new_cursor,
+            'live': cached_status or '',
+        }
+        if raw_cursor is None and cached_status:
+            response['log'] = log_content.rstrip('\n') + f"\n[Live] {cached_status}"
+        return JsonResponse(response)
     except VideoProject.DoesNotExist:
         return JsonResponse({'status': 'error', 'message': 'Project not found'}, status=404)
 
+def cache_stats_api(request):
+    """v32.11: Size / hit-rate of the render caches (TTS, scenes, pyramid, decoded images, media probes)."""
+    stats = {}
+    try:
+        from .tts_cache import tts_cache_stats
+        stats['tts'] = tts_cache_stats()
+    except Exception as e:
+        stats['tts'] = {'error': str(e)}
+    try:
+        from .segment_renderer import get_scene_cache
+        scene_cache = get_scene_cache()
+        stats['scenes'] = scene_cache.stats() if scene_cache else {}
+    except Exception as e:
+        stats['scenes'] = {'error': str(e)}
+    try:
+        from .image_pyramid import pyramid_stats
+        stats['pyramid'] = pyramid_stats()
+    except Exception as e:
+        stats['pyramid'] = {'error': str(e)}
+    try:
+        from .image_cache import get_image_cache
+        stats['images'] = get_image_cache().stats()
+    except Exception as e:
+        stats['images'] = {'error': str(e)}
+    try:
+        from .media_probe import media_probe_stats
+        stats['probe'] = media_probe_stats()
+    except Exception as e:
+        stats['probe'] = {'error': str(e)}
+    return JsonResponse(stats)
+
+def queue_stats_api(request):
+    """v32.17: Render queue depth, running jobs and worker liveness."""
+    from .render_queue import queue_stats
+    return JsonResponse(queue_stats())
+
+@csrf_exempt
+def enqueue_project_api(request, project_id):
+    """v32.17: Queues a render (POST, optional JSON {"priority": n, "profile": "draft"|"final"})."""
+    if request.method != 'POST':
+        return JsonResponse({'error': 'POST required'}, status=405)
+    import json
+    project = get_object_or_404(VideoProject, id=project_id)
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        data = {}
+    if not isinstance(data, dict):
+        return JsonResponse({'error': 'El cuerpo debe ser un objeto JSON.'}, status=400)
+    try:
+        priority = int(data.get('priority', 0) or 0)
+    except (TypeError, ValueError):
+        return JsonResponse({'error': 'priority debe ser un entero.'}, status=400)
+    from .render_queue import enqueue_render, ensure_render_consumer, queue_position
+    if data.get('profile') in ('draft', 'final'):
+        project.render_profile = data['profile']  # v32.22
+    if project.status != 'processing':
+        project.status = 'queued'  # v32.22: 'processing' only once a worker starts it
+    project.save(update_fields=['status', 'render_profile'])
+    job = enqueue_render(project, priority=priority, source=data.get('source', 'api'))
+    consumer = ensure_render_consumer()
+    position = queue_position(project.id)
+    return JsonResponse({'job_id': job.id, 'status': job.status, 'position': position[0] if position else None,
+                         'worker': consumer == 'worker', 'consumer': consumer})
+
+@csrf_exempt
+def batch_api(request):
+    """v32.18: POST a batch manifest ({"name", "defaults", "jobs": [...]}, inline scripts) -> queued jobs."""
+    if request.method != 'POST':
+        return JsonResponse({'error': 'POST required'}, status=405)
+    import json
+    from .batch import normalize_manifest, launch_batch
+    from .render_queue import ensure_render_consumer
+    try:
+        name, jobs = normalize_manifest(json.loads(request.body))
+    except (ValueError, OSError, AttributeError) as e:
+        return JsonResponse({'error': f"Manifiesto inválido: {e}"}, status=400)
+    if not jobs:
+        return JsonResponse({'error': 'El manifiesto no contiene trabajos.'}, status=400)
+    batch_id = launch_batch(jobs, name=name)
+    return JsonResponse({'batch': batch_id, 'jobs': len(jobs), 'consumer': ensure_render_consumer()})
+
+def batch_report_api(request, batch_id):
+    """v32.18: Per-job and aggregate throughput of a batch."""
+    from .batch import batch_report
+    report = batch_report(batch_id)
+    if not report['total']:
+        return JsonResponse({'error': 'Batch not found'}, status=404)
+    return JsonResponse(report)
+
+def project_plan_api(request, project_id):
+    """v32.21: Dry-run plan of the saved script (problems, durations, predicted cost). No TTS, no decoding."""
+    from .planner import plan_render
+    project = get_object_or_404(VideoProject, id=project_id)
+    return JsonResponse(plan_render(project))
+
+@csrf_exempt
+def plan_api(request):
+    """v32.21: Dry-run plan of a posted script ({"script": {...} | "text", "settings": {...}}), e.g. standalone editor."""
+    if request.method != 'POST':
+        return JsonResponse({'error': 'POST required'}, status=405)
+    import json
+    from .planner import plan_render
+    try:
+        data = json.loads(request.body)
+    except ValueError as e:
+        return JsonResponse({'error': f"JSON inválido: {e}"}, status=400)
+    options = (data.get('settings') or {}) if isinstance(data, dict) else None
+    if not isinstance(options, dict):
+        return JsonResponse({'error': 'El cuerpo y "settings" deben ser objetos JSON.'}, status=400)
+    script = data.get('script', data)
+    if not isinstance(script, str):
+        script = json.dumps(script, ensure_ascii=False)
+    # Unsaved project: only carries the render settings
+    project = VideoProject(script_text=script, aspect_ratio=options.get('aspect_ratio', 'landscape'),
+                           engine=options.get('engine', 'edge'), voice_id=options.get('voice_id') or None,
+                           language=options.get('language', ''), dubbing_mode=options.get('dubbing_mode', ''))
+    return JsonResponse(plan_render(project))
+
+@csrf_exempt
+def scene_preview_api(request, project_id):
+    """
+    v32.23: Low-res preview of one scene (POST JSON).
+    {"scene": n} or {"block": b, "scene": s[, "group": g]}; optional "group_context", "format" (mp4 | webp)
+    and "script" (unsaved editor copy). Returns the preview URL (served from the preview cache).
+    """
+    if request.method != 'POST':
+        return JsonResponse({'error': 'POST required'}, status=405)
+    import json
+    from .scene_preview import render_scene_preview, scene_index_from_locator
+    project = get_object_or_404(VideoProject, id=project_id)
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError as e:
+        return JsonResponse({'error': f"JSON inválido: {e}"}, status=400)
+    if not isinstance(data, dict):
+        return JsonResponse({'error': 'El cuerpo debe ser un objeto JSON.'}, status=400)
+    script = data.get('script')
+    if script is not None and not isinstance(script, str):
+        script = json.dumps(script, ensure_ascii=False)
+    try:
+        if 'block' in data:
+            source = json.loads(script if script is not None else project.script_text)
+            group = data.get('group')
+            index = scene_index_from_locator(source, int(data['block']), int(data.get('scene', 0)),
+                                             int(group) if group is not None else None)
+        else:
+            index = int(data.get('scene', 0))
+    except (ValueError, TypeError, KeyError, AttributeError) as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    result = render_scene_preview(project, index, script_text=script, with_group=bool(data.get('group_context')),
+                                  fmt=data.get('format', 'mp4'))
+    result.pop('path', None)
+    return JsonResponse(result, status=200 if result['ok'] else 400)
+
+def _frame_request(request):
+    """
+    v32.24: Frame / storyboard parameters from the query string, or a POST JSON body (may carry "script").
+    Raises ValueError / TypeError on invalid values (-> 400).
+    """
+    import json
+    from .frame_preview import FRAME_MAX_HEIGHT
+    params = dict(request.GET.items())
+    if request.method == 'POST':
+        params.update(json.loads(request.body or b'{}'))
+    height = params.get('height')
+    if height in (None, ''):
+        params['height'] = None
+    else:
+        params['height'] = int(height)
+        if not 0 < params['height'] <= FRAME_MAX_HEIGHT:
+            raise ValueError(f"height debe estar entre 1 y {FRAME_MAX_HEIGHT}")
+    script = params.get('script')
+    if script is not None and not isinstance(script, str):
+        params['script'] = json.dumps(script, ensure_ascii=False)
+    subtitles = params.get('subtitles')
+    if isinstance(subtitles, str):
+        params['subtitles'] = subtitles.lower() not in ('0', 'false', 'no', 'off')
+    return params
+
+def _image_response(result, headers):
+    with open(result['path'], 'rb') as f:
+        response = HttpResponse(f.read(), content_type=result['content_type'])
+    response['Cache-Control'] = 'no-cache'
+    response['X-Frame-Cached'] = '1' if result['cached'] else '0'
+    for name, value in headers.items():
+        response[name] = str(value)
+    return response
+
+@csrf_exempt
+def frame_api(request, project_id):
+    """
+    v32.24: Single frame of the project's timeline (timeline scrubbing).
+    GET ?t=<seconds>&format=jpeg|webp&height=<short side px>&subtitles=0|1, or POST JSON with the
+    same fields plus "script" (unsaved editor copy). Returns the image (served from the frame cache).
+    """
+    from .frame_preview import render_frame
+    project = get_object_or_404(VideoProject, id=project_id)
+    try:
+        params = _frame_request(request)
+        t = float(params.get('t', 0.0))
+    except (ValueError, TypeError) as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    result = render_frame(project, t, fmt=params.get('format', 'jpeg'), script_text=params.get('script'),
+                          subtitles=params.get('subtitles'), height=params['height'])
+    if not result['ok']:
+        return JsonResponse(result, status=400)
+    return _image_response(result, {'X-Frame-Time': result['t'], 'X-Scene-Index': result['scene']})
+
+@csrf_exempt
+def storyboard_api(request, project_id):
+    """
+    v32.24: Contact sheet of N evenly spaced frames.
+    GET ?n=<frames>&cols=<columns>&height=<tile short side px>&format=jpeg|webp&subtitles=0|1
+    (or POST JSON with "script"). The tile times / scenes travel in X-Storyboard-Frames.
+    """
+    import json
+    from .frame_preview import render_storyboard
+    project = get_object_or_404(VideoProject, id=project_id)
+    try:
+        params = _frame_request(request)
+        count, columns = int(params.get('n', 12)), int(params.get('cols', 4))
+    except (ValueError, TypeError) as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    result = render_storyboard(project, count=count, columns=columns, height=params['height'], fmt=params.get('format', 'jpeg'),
+                               script_text=params.get('script'), subtitles=params.get('subtitles'))
+    if not result['ok']:
+        return JsonResponse(result, status=400)
+    return _image_response(result, {'X-Storyboard-Frames': json.dumps(result['frames'])})
+
 def shutdown_app(request):
     """Kill Switch: Terminates the Django server process safely and closes all windows."""
     if request.method == 'POST':
@@ -2,14 +2,15 @@ import os
 import django
 import sys
 import json
+import time
 
 # Setup Django environment
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 django.setup()
 
-from generator.models import VideoProject
-from generator.utils import generate_video_process
-from django.conf import settings
+from generator.models import RenderJob
+from generator.batch import normalize_manifest, launch_batch, batch_report, format_report
+from generator import render_queue
 
 projects_to_launch = [
     {
@@ -24,43 +25,30 @@ projects_to_launch = [
     # }
 ]
 
-print("📊 --- INICIANDO PROCESAMIENTO POR LOTES (SEQUENTIAL MODE) ---")
+# v32.18: Parallel batch (same as `manage.py render_batch manifest.json`). Jobs are rendered
+# longest first, as many at a time as the CPU/RAM budget allows.
+print("📊 --- INICIANDO PROCESAMIENTO POR LOTES ---")
 
+entries = []
 for p_data in projects_to_launch:
-    print(f"\n🎬 PROYECTO: {p_data['title']}")
-    
-    # 1. Read script
-    try:
-        with open(p_data['script_path'], 'r', encoding='utf-8') as f:
-            script_content = f.read()
-    except Exception as e:
-        print(f"❌ Error leyendo guion en {p_data['script_path']}: {e}")
+    if not os.path.exists(p_data['script_path']):
+        print(f"❌ Error leyendo guion en {p_data['script_path']}")
         continue
+    entries.append({**p_data, 'auto_upload': True, 'engine': 'edge'})  # Engine will use script JSON for specific voice
 
-    # 2. Create database entry
-    project = VideoProject.objects.create(
-        title=p_data['title'],
-        script_text=script_content,
-        aspect_ratio=p_data['aspect_ratio'],
-        auto_upload_youtube=True,
-        engine='edge',  # Engine will use script JSON for specific voice
-        status='pending'
-    )
-    
-    print(f"⚙️  Renderizando... (ID: {project.id})")
-    
-    # 3. Execute generation (Sync call ensures sequential processing)
-    try:
-        generate_video_process(project)
-    except Exception as e:
-        print(f"❌ Error fatal en la generación de {p_data['title']}: {e}")
-        project.status = 'error'
-        project.log_output += f"\n[Script] ERROR FATAL: {str(e)}"
-        project.save()
-        continue
-    
-    # 4. Final check
-    project.refresh_from_db()
+_, jobs = normalize_manifest(entries)
+if not jobs:
+    sys.exit("❌ No hay guiones que renderizar.")
+batch_id = launch_batch(jobs)
+if render_queue.worker_alive():
+    while batch_report(batch_id)['pending']:
+        time.sleep(5)
+else:
+    render_queue.supervise(once=True)
+
+# Final check
+for job in RenderJob.objects.filter(batch=batch_id).select_related('project'):
+    project = job.project
     if project.status == 'completed':
         print(f"✅ ÉXITO: {project.title}")
         if project.youtube_video_id:
@@ -70,4 +58,5 @@ for p_data in projects_to_launch:
     else:
         print(f"❌ FALLÓ: {project.title} (Status: {project.status})")
 
+print(format_report(batch_report(batch_id)))
 print("\n✨ --- LOTE FINALIZADO ---")
@@ -162,6 +162,14 @@ if __name__ == "__main__":
             from django.core.management import call_command
             call_command('migrate', no_input=True, verbosity=1)
             print("Database integrity verified.")
+            # v32.17: Resume queued renders left by a previous session
+            from django.conf import settings as dj_settings
+            if dj_settings.RENDER_QUEUE_ENABLED:
+                from generator.models import RenderJob
+                if RenderJob.objects.filter(status__in=['queued', 'running']).exists():
+                    from generator.render_queue import ensure_render_consumer
+                    if ensure_render_consumer() == 'inline':
+                        print("⚠️ Worker de render no disponible: los renders en cola se procesan en el servidor web.")
         except Exception as e:
             print(f"Warning: Auto-migration failed: {e}")
             import traceback
@@ -165,7 +165,7 @@ class LipSyncEngine:
                 fb[m-1, k] = (bin_points[m+1] - k) / (bin_points[m+1] - bin_points[m])
         return fb
 
-    def process_video(self, face_video_path, audio_path, output_path, start_time=0.0, end_time=None, duration=None):
+    def process_video(self, face_video_path, audio_path, output_path, start_time=0.0, end_time=None, duration=None, should_stop=None):
         mel = self.get_mel(audio_path, duration=duration)
         
         # v2.8: Soporte para Modo Talking Head (Imágenes Estáticas)
@@ -209,6 +209,11 @@ class LipSyncEngine:
         pbar = tqdm(total=int(mel.shape[1] / (16000 / fps / 200))) # Estimar frames necesarios
         
         while True:
+            # v32.16: Cooperative cancellation (checked per frame, it is only a flag read)
+            if should_stop and should_stop():
+                print("[*] Sincronización cancelada.")
+                break
+
             if is_static_image:
                 frame = static_frame.copy()
                 ret = True